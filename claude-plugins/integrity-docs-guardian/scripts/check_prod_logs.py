@@ -2,14 +2,29 @@
 """
 ProdGuardian - Production Log Analyzer for ÉMERGENCE
 Fetches and analyzes Google Cloud Run logs for anomalies
+
+Also analyzes exported logs offline (JSON array or NDJSON, file or stdin):
+entries are streamed and classified in a single pass with pre-compiled
+patterns, error signatures are aggregated in bounded top-k sketches, and
+large NDJSON files can be sharded across processes.
+
+Usage:
+    python check_prod_logs.py                      # live Cloud Logging
+    python check_prod_logs.py --input export.json  # offline file
+    gcloud logging read ... --format=json | python check_prod_logs.py --input -
+    python check_prod_logs.py --input big.ndjson --workers 8
 """
 
+import argparse
 import subprocess
 import json
 import datetime
+import math
+import re
 import sys
 import os
 import platform
+from concurrent.futures import ProcessPoolExecutor
 
 # Configuration
 SERVICE = "emergence-app"
@@ -23,6 +38,91 @@ ERROR_THRESHOLD_DEGRADED = 1
 ERROR_THRESHOLD_CRITICAL = 5
 WARNING_THRESHOLD = 3
 
+# Streaming analysis
+READ_BLOCK_CHARS = 1 << 16
+SKETCH_CAPACITY = 64  # distinct keys kept per top-k sketch
+SHARD_MIN_BYTES = 64 * 1024 * 1024  # below this, a single process is faster
+
+ERROR_SEVERITIES = frozenset(["ERROR", "CRITICAL", "ALERT", "EMERGENCY"])
+
+# Known bot scan endpoints (not part of our application)
+BOT_SCAN_PATHS = (
+    "/install",
+    "/protractor.conf.js",
+    "/wizard/",
+    "/applications.pinpoint",
+    "/install/update.html",
+    "/.env",
+    "/wp-admin",
+    "/admin",
+    "/phpmyadmin",
+    "/config.json",
+    "/web.config",
+    "/.git/config",
+    "/backup",
+    "/setup",
+    "/test",
+    "/debug",
+    "/api/v1/admin",
+    "/api/admin",
+    "/console",
+    "/.aws/credentials",
+    "/server-status",
+    "/cgi-bin",
+    "/xmlrpc.php",
+    # PHP vulnerability scans
+    "/xprober.php",
+    "/.user.ini",
+    "/user.ini",
+    "/index.php",
+    # AWS/S3 scans
+    "/.s3cfg",
+    "/.aws/",
+    "/aws/",
+    # Path traversal attempts
+    "/etc/passwd",
+    "/etc/shadow",
+    "000~ROOT~000",
+    # Python/environment scans
+    "/venv/",
+    "/env/",
+    "/.git/",
+    "/requirements.txt",
+)
+
+# Known bot scan hosts (cloud metadata, security scans)
+BOT_SCAN_HOSTS = (
+    "alibaba.oast.pro",
+    "100.100.100.200",
+    "169.254.169.254",
+    "metadata.google.internal",
+    "metadata",
+)
+
+# Pre-compiled pattern sets (one scan per message instead of one per pattern)
+BOT_SCAN_RE = re.compile(
+    "|".join(re.escape(p.lower()) for p in BOT_SCAN_PATHS + BOT_SCAN_HOSTS)
+)
+TRACEBACK_LOCATION_RE = re.compile(r'File "([^"]+)", line (\d+)')
+ERROR_TYPE_RE = re.compile(r"(\w+Error|Exception):")
+HTTP_5XX_RE = re.compile(
+    r'(status_code["\s:]+5\d{2}|HTTP[/\s]+5\d{2}|\s5(0[0-5]|0[0-9])\s)'
+)
+MEMORY_LIMIT_RE = re.compile(
+    r"Memory limit of\s+(?P<limit>\d+)\s*MiB exceeded with\s+(?P<used>\d+)\s*MiB used",
+    re.IGNORECASE,
+)
+CRITICAL_SIGNAL_PATTERNS = (
+    ("OOM", re.compile(r"oomkilled|out of memory|memory limit")),
+    ("UNHEALTHY", re.compile(r"unhealthy|health check")),
+    ("CRASH", re.compile(r"crash|terminated|killed|exit code")),
+)
+LATENCY_RE = re.compile(r"latency|slow")
+# Variable parts scrubbed from messages to group errors by signature
+SIGNATURE_SCRUB_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|\d+"
+)
+
 
 def get_gcloud_command():
     """
@@ -205,71 +305,128 @@ def extract_full_context(log_entry):
 
     # Extract file/line from message if not found (Python traceback format)
     if not context["file_path"] and context["message"]:
-        import re
-
         # Match: File "/path/to/file.py", line 123
-        match = re.search(r'File "([^"]+)", line (\d+)', context["message"])
+        match = TRACEBACK_LOCATION_RE.search(context["message"])
         if match:
             context["file_path"] = match.group(1)
             context["line_number"] = int(match.group(2))
 
         # Extract error type (e.g., "ValueError:", "KeyError:")
-        match = re.search(r"(\w+Error|Exception):", context["message"])
+        match = ERROR_TYPE_RE.search(context["message"])
         if match:
             context["error_type"] = match.group(1)
 
     return context
 
 
-def analyze_patterns(errors_with_context):
+class TopKSketch:
     """
-    Analyze patterns in errors to provide actionable insights
-    Returns dict with pattern analysis
-    """
-    patterns = {
-        "by_endpoint": {},
-        "by_error_type": {},
-        "by_file": {},
-        "frequency_timeline": [],
-        "most_common_error": None,
-    }
-
-    for error in errors_with_context:
-        # Count by endpoint
-        endpoint = error.get("endpoint")
-        if endpoint:
-            patterns["by_endpoint"][endpoint] = (
-                patterns["by_endpoint"].get(endpoint, 0) + 1
-            )
+    Bounded-memory frequency sketch (Space-Saving algorithm).
 
-        # Count by error type
-        error_type = error.get("error_type")
-        if error_type:
-            patterns["by_error_type"][error_type] = (
-                patterns["by_error_type"].get(error_type, 0) + 1
-            )
-
-        # Count by file
-        file_path = error.get("file_path")
-        if file_path:
-            patterns["by_file"][file_path] = patterns["by_file"].get(file_path, 0) + 1
+    Keeps at most `capacity` keys; counts of the heavy hitters are exact as
+    long as the number of distinct keys stays below capacity, and otherwise
+    overestimate by at most the count of the evicted key.
+    """
 
-    # Sort by frequency
-    if patterns["by_endpoint"]:
-        patterns["by_endpoint"] = dict(
-            sorted(patterns["by_endpoint"].items(), key=lambda x: x[1], reverse=True)
-        )
-    if patterns["by_error_type"]:
-        patterns["by_error_type"] = dict(
-            sorted(patterns["by_error_type"].items(), key=lambda x: x[1], reverse=True)
-        )
-        patterns["most_common_error"] = list(patterns["by_error_type"].keys())[0]
-    if patterns["by_file"]:
-        patterns["by_file"] = dict(
-            sorted(patterns["by_file"].items(), key=lambda x: x[1], reverse=True)
-        )
+    def __init__(self, capacity=SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.total = 0
+
+    def add(self, key, count=1):
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+        else:
+            victim = min(self.counts, key=self.counts.__getitem__)
+            self.counts[key] = self.counts.pop(victim) + count
+
+    def merge(self, other):
+        """Merge another sketch (e.g. from a shard) into this one"""
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        if len(self.counts) > self.capacity:
+            self.counts = dict(self.most_common(self.capacity))
+
+    def most_common(self, n=None):
+        ranked = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def as_dict(self):
+        return dict(self.most_common())
+
+
+def error_signature(full_context):
+    """Group key for an error: type + message with variable parts scrubbed"""
+    message = (full_context.get("message") or "").splitlines()
+    head = message[0][:200].lower() if message else ""
+    scrubbed = SIGNATURE_SCRUB_RE.sub("#", head)
+    prefix = full_context.get("error_type") or full_context.get("severity") or ""
+    return f"{prefix}: {scrubbed}"[:160]
+
+
+def iter_log_entries(stream, block_chars=READ_BLOCK_CHARS):
+    """
+    Yield log entries from a text stream without loading it whole.
 
-    return patterns
+    Accepts the `gcloud logging read --format=json` array as well as NDJSON
+    (one entry per line); array elements are decoded one by one. In NDJSON
+    mode an invalid line is skipped, like in `_analyze_shard`.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    ndjson = None
+    skipped = 0
+    while True:
+        # Skip separators between entries
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+            if ndjson is None and buffer[pos] == "[":
+                ndjson = False
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                break
+            buffer, pos = stream.read(block_chars), 0
+            eof = not buffer
+            continue
+        if ndjson is None:
+            ndjson = True
+        try:
+            entry, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            newline = buffer.find("\n", pos) if ndjson else -1
+            if newline != -1:
+                # Complete but invalid line: resume on the next one
+                skipped += 1
+                pos = newline + 1
+                continue
+            if eof:
+                print(
+                    f"⚠️  Truncated or invalid JSON near offset {pos}, stopping",
+                    file=sys.stderr,
+                )
+                break
+            chunk = stream.read(block_chars)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        # A complete value may still be a prefix (e.g. a number): only trust
+        # it when followed by a separator or at end of input
+        if end == len(buffer) and not eof and not isinstance(entry, dict):
+            chunk = stream.read(block_chars)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        pos = end
+        if isinstance(entry, dict):
+            yield entry
+    if skipped:
+        print(f"⚠️  Skipped {skipped} invalid NDJSON line(s)", file=sys.stderr)
 
 
 def get_code_snippet(file_path, line_number, context_lines=5):
@@ -352,250 +509,325 @@ def is_bot_scan_or_noise(full_context):
     Detect if a warning is just bot scanning noise (not a real application error)
     Returns True if this is noise that should be ignored
     """
-    message = full_context.get("message", "")
-    endpoint = full_context.get("endpoint", "")
-    status_code = full_context.get("status_code")
-
     # Ignore non-404 warnings (they might be real issues)
-    if status_code != 404:
+    if full_context.get("status_code") != 404:
         return False
 
-    # Known bot scan endpoints (not part of our application)
-    BOT_SCAN_PATHS = [
-        "/install",
-        "/protractor.conf.js",
-        "/wizard/",
-        "/applications.pinpoint",
-        "/install/update.html",
-        "/.env",
-        "/wp-admin",
-        "/admin",
-        "/phpmyadmin",
-        "/config.json",
-        "/web.config",
-        "/.git/config",
-        "/backup",
-        "/setup",
-        "/test",
-        "/debug",
-        "/api/v1/admin",
-        "/api/admin",
-        "/console",
-        "/.aws/credentials",
-        "/server-status",
-        "/cgi-bin",
-        "/xmlrpc.php",
-        # PHP vulnerability scans
-        "/xprober.php",
-        "/.user.ini",
-        "/user.ini",
-        "/index.php",
-        # AWS/S3 scans
-        "/.s3cfg",
-        "/.aws/",
-        "/aws/",
-        # Path traversal attempts
-        "/etc/passwd",
-        "/etc/shadow",
-        "000~ROOT~000",
-        # Python/environment scans
-        "/venv/",
-        "/.env",
-        "/env/",
-        "/.git/",
-        "/requirements.txt",
-    ]
-
-    # Known bot scan hosts (cloud metadata, security scans)
-    BOT_SCAN_HOSTS = [
-        "alibaba.oast.pro",
-        "100.100.100.200",
-        "169.254.169.254",
-        "metadata.google.internal",
-        "169.254.169.254",
-        "metadata",
-    ]
-
-    # Check if endpoint matches bot scan patterns
-    if endpoint:
-        endpoint_lower = endpoint.lower()
-        for bot_path in BOT_SCAN_PATHS:
-            if bot_path.lower() in endpoint_lower:
-                return True
-
-        # Check if trying to access cloud metadata
-        for bot_host in BOT_SCAN_HOSTS:
-            if bot_host in endpoint_lower:
-                return True
-
-    # Check message for bot scan patterns
-    message_lower = message.lower()
-    for bot_path in BOT_SCAN_PATHS:
-        if bot_path.lower() in message_lower:
-            return True
-
-    for bot_host in BOT_SCAN_HOSTS:
-        if bot_host in message_lower:
-            return True
-
-    return False
+    endpoint = (full_context.get("endpoint") or "").lower()
+    if endpoint and BOT_SCAN_RE.search(endpoint):
+        return True
+    message = (full_context.get("message") or "").lower()
+    return bool(BOT_SCAN_RE.search(message))
 
 
-def analyze_logs(logs):
+class LogAnalyzer:
     """
-    Analyze logs for errors, warnings, performance issues, and critical signals
-    Returns: analysis report dict with FULL CONTEXT for Codex GPT
+    Single-pass, bounded-memory log classifier.
+
+    Each entry is classified once (severity, bot noise, critical signals,
+    latency, 5xx); only capped samples and top-k sketches are kept, so memory
+    does not grow with the number of entries. Analyzers built on separate
+    shards can be merged.
     """
-    errors = []
-    errors_with_full_context = []  # NEW: Full context for deep analysis
-    warnings = []
-    warnings_with_context = []
-    latency_issues = []
-    critical_signals = []
-    info_logs = []
-    log_samples = []
-
-    for log in logs:
+
+    MAX_ERRORS = 5
+    MAX_ERRORS_DETAILED = 10
+    MAX_WARNINGS = 10
+    MAX_CRITICAL = 3
+    MAX_LATENCY = 3
+    MAX_LOG_SAMPLES = 15
+    MAX_FILE_LOCATIONS = 256
+
+    def __init__(self):
+        self.logs_analyzed = 0
+        self.counts = {
+            "errors": 0,
+            "warnings": 0,
+            "critical_signals": 0,
+            "latency_issues": 0,
+        }
+        self.critical_types = set()
+        self.errors = []
+        self.errors_detailed = []
+        self.warnings = []
+        self.warnings_detailed = []
+        self.critical_signals = []
+        self.latency_issues = []
+        self.log_samples = []
+        self.by_endpoint = TopKSketch()
+        self.by_error_type = TopKSketch()
+        self.by_file = TopKSketch()
+        self.by_signature = TopKSketch()
+        self.file_locations = {}  # file -> first line number seen
+        self.memory_limit_mib = None
+        self.memory_peak_mib = None
+
+    def add(self, log):
+        self.logs_analyzed += 1
         severity = log.get("severity", "DEFAULT")
         timestamp = log.get("timestamp", "")
-        message = extract_message(log)
-
-        # NEW: Extract full context
         full_context = extract_full_context(log)
+        message = extract_message(log)
+        message_lower = message.lower()
 
-        # Collect representative sample for the email report (cap later)
-        if len(log_samples) < 20:
-            sample = {
-                "timestamp": timestamp,
-                "severity": severity,
-                "message": (full_context.get("message") or message or "")[:500],
-                "endpoint": full_context.get("endpoint"),
-                "http_method": full_context.get("http_method"),
-                "status_code": full_context.get("status_code"),
-                "request_id": full_context.get("request_id"),
-                "source": log.get("logName")
-                or log.get("resource", {}).get("labels", {}).get("revision_name"),
-            }
+        if len(self.log_samples) < self.MAX_LOG_SAMPLES:
+            self.log_samples.append(self._sample(log, full_context, message))
 
-            payload_excerpt = full_context.get("full_payload")
-            if payload_excerpt and isinstance(payload_excerpt, dict):
-                try:
-                    sample["payload_excerpt"] = json.dumps(payload_excerpt)[:500]
-                except Exception:
-                    # Don't block report generation if payload can't be serialized
-                    pass
-
-            log_samples.append(sample)
-
-        # Categorize by severity
-        if severity in ["ERROR", "CRITICAL", "ALERT", "EMERGENCY"]:
-            # OLD format for summary
-            errors.append(
-                {"time": timestamp, "severity": severity, "msg": message[:300]}
+        if severity in ERROR_SEVERITIES:
+            self._add_error(
+                {"time": timestamp, "severity": severity, "msg": message[:300]},
+                full_context,
             )
-            # NEW: Full context for analysis
-            errors_with_full_context.append(full_context)
-
         elif severity == "WARNING":
             # FILTER: Ignore bot scan noise (404s from security scanners)
             if not is_bot_scan_or_noise(full_context):
-                warnings.append({"time": timestamp, "msg": message[:300]})
-                warnings_with_context.append(full_context)
-
-        elif severity == "INFO":
-            info_logs.append({"time": timestamp, "msg": message[:200]})
-
-        # Check for specific critical patterns
-        message_lower = message.lower()
+                self.counts["warnings"] += 1
+                if len(self.warnings) < self.MAX_WARNINGS:
+                    self.warnings.append({"time": timestamp, "msg": message[:300]})
+                    self.warnings_detailed.append(full_context)
+
+        for signal_type, pattern in CRITICAL_SIGNAL_PATTERNS:
+            if pattern.search(message_lower):
+                self._add_critical(signal_type, timestamp, message, full_context)
+
+        if LATENCY_RE.search(message_lower):
+            self.counts["latency_issues"] += 1
+            if len(self.latency_issues) < self.MAX_LATENCY:
+                self.latency_issues.append(
+                    {
+                        "time": timestamp,
+                        "msg": message[:300],
+                        "full_context": full_context,
+                    }
+                )
 
-        # OOMKilled or memory issues
-        if any(
-            pattern in message_lower
-            for pattern in ["oomkilled", "out of memory", "memory limit"]
-        ):
-            critical_signals.append(
-                {
-                    "type": "OOM",
-                    "time": timestamp,
-                    "msg": message[:300],
-                    "full_context": full_context,
-                }
+        # 5xx errors - check for actual HTTP 5xx status codes
+        if severity not in ERROR_SEVERITIES and HTTP_5XX_RE.search(message):
+            self._add_error(
+                {"time": timestamp, "severity": "HTTP_5XX", "msg": message[:300]},
+                full_context,
             )
 
-        # Unhealthy revisions
-        if "unhealthy" in message_lower or "health check" in message_lower:
-            critical_signals.append(
+    def add_all(self, logs):
+        for log in logs:
+            self.add(log)
+        return self
+
+    def _sample(self, log, full_context, message):
+        """Representative sample for the email report"""
+        sample = {
+            "timestamp": log.get("timestamp", ""),
+            "severity": log.get("severity", "DEFAULT"),
+            "message": (full_context.get("message") or message or "")[:500],
+            "endpoint": full_context.get("endpoint"),
+            "http_method": full_context.get("http_method"),
+            "status_code": full_context.get("status_code"),
+            "request_id": full_context.get("request_id"),
+            "source": log.get("logName")
+            or log.get("resource", {}).get("labels", {}).get("revision_name"),
+        }
+        payload_excerpt = full_context.get("full_payload")
+        if payload_excerpt and isinstance(payload_excerpt, dict):
+            try:
+                sample["payload_excerpt"] = json.dumps(payload_excerpt)[:500]
+            except Exception:
+                # Don't block report generation if payload can't be serialized
+                pass
+        return sample
+
+    def _add_error(self, summary, full_context):
+        self.counts["errors"] += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(summary)
+        if len(self.errors_detailed) < self.MAX_ERRORS_DETAILED:
+            self.errors_detailed.append(full_context)
+
+        if full_context.get("endpoint"):
+            self.by_endpoint.add(full_context["endpoint"])
+        if full_context.get("error_type"):
+            self.by_error_type.add(full_context["error_type"])
+        file_path = full_context.get("file_path")
+        if file_path:
+            self.by_file.add(file_path)
+            if (
+                file_path not in self.file_locations
+                and len(self.file_locations) < self.MAX_FILE_LOCATIONS
+            ):
+                self.file_locations[file_path] = full_context.get("line_number")
+        self.by_signature.add(error_signature(full_context))
+
+    def _add_critical(self, signal_type, timestamp, message, full_context):
+        self.counts["critical_signals"] += 1
+        self.critical_types.add(signal_type)
+        if len(self.critical_signals) < self.MAX_CRITICAL:
+            self.critical_signals.append(
                 {
-                    "type": "UNHEALTHY",
+                    "type": signal_type,
                     "time": timestamp,
                     "msg": message[:300],
                     "full_context": full_context,
                 }
             )
+        if signal_type == "OOM":
+            match = MEMORY_LIMIT_RE.search(full_context.get("message") or message)
+            if match:
+                self.memory_limit_mib = max(
+                    self.memory_limit_mib or 0, int(match.group("limit"))
+                )
+                self.memory_peak_mib = max(
+                    self.memory_peak_mib or 0, int(match.group("used"))
+                )
 
-        # Container crashes
-        if any(
-            pattern in message_lower
-            for pattern in ["crash", "terminated", "killed", "exit code"]
+    def merge(self, other):
+        """Merge an analyzer built on a later shard (samples keep file order)"""
+        self.logs_analyzed += other.logs_analyzed
+        for key, value in other.counts.items():
+            self.counts[key] += value
+        self.critical_types |= other.critical_types
+        for name, cap in (
+            ("errors", self.MAX_ERRORS),
+            ("errors_detailed", self.MAX_ERRORS_DETAILED),
+            ("warnings", self.MAX_WARNINGS),
+            ("warnings_detailed", self.MAX_WARNINGS),
+            ("critical_signals", self.MAX_CRITICAL),
+            ("latency_issues", self.MAX_LATENCY),
+            ("log_samples", self.MAX_LOG_SAMPLES),
         ):
-            critical_signals.append(
-                {
-                    "type": "CRASH",
-                    "time": timestamp,
-                    "msg": message[:300],
-                    "full_context": full_context,
-                }
-            )
+            mine = getattr(self, name)
+            mine.extend(getattr(other, name)[: max(0, cap - len(mine))])
+        self.by_endpoint.merge(other.by_endpoint)
+        self.by_error_type.merge(other.by_error_type)
+        self.by_file.merge(other.by_file)
+        self.by_signature.merge(other.by_signature)
+        for file_path, line in other.file_locations.items():
+            if len(self.file_locations) >= self.MAX_FILE_LOCATIONS:
+                break
+            self.file_locations.setdefault(file_path, line)
+        for attr in ("memory_limit_mib", "memory_peak_mib"):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v]
+            setattr(self, attr, max(values) if values else None)
+        return self
+
+    def patterns(self):
+        """Error patterns (top-k by endpoint, error type, file and signature)"""
+        by_error_type = self.by_error_type.as_dict()
+        return {
+            "by_endpoint": self.by_endpoint.as_dict(),
+            "by_error_type": by_error_type,
+            "by_file": self.by_file.as_dict(),
+            "by_signature": self.by_signature.as_dict(),
+            "frequency_timeline": [],
+            "most_common_error": next(iter(by_error_type), None),
+        }
 
-        # Latency issues
-        if "latency" in message_lower or "slow" in message_lower:
-            latency_issues.append(
-                {"time": timestamp, "msg": message[:300], "full_context": full_context}
-            )
 
-        # 5xx errors - check for actual HTTP 5xx status codes
-        import re
-
-        if severity not in [
-            "ERROR",
-            "CRITICAL",
-            "ALERT",
-            "EMERGENCY",
-        ]:  # Avoid duplicates
-            if re.search(
-                r'(status_code["\s:]+5\d{2}|HTTP[/\s]+5\d{2}|\s5(0[0-5]|0[0-9])\s)',
-                message,
-            ):
-                errors.append(
-                    {"time": timestamp, "severity": "HTTP_5XX", "msg": message[:300]}
-                )
-                errors_with_full_context.append(full_context)
+def _analyze_shard(task):
+    """Analyze the NDJSON lines in [start, end) of a file (process pool task)"""
+    path, start, end = task
+    analyzer = LogAnalyzer()
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                analyzer.add(entry)
+    return analyzer
+
+
+def _shard_offsets(path, shards):
+    """Byte ranges of `path` split on line boundaries"""
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, "rb") as f:
+        for i in range(1, shards):
+            f.seek(max(size * i // shards, offsets[-1]))
+            f.readline()
+            offsets.append(min(f.tell(), size))
+    offsets.append(size)
+    return [(a, b) for a, b in zip(offsets, offsets[1:]) if b > a]
+
+
+def _is_ndjson(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        head = f.read(4096).lstrip()
+    return head.startswith("{")
+
+
+def analyze_stream(stream):
+    """Analyze log entries from a text stream (JSON array or NDJSON)"""
+    return LogAnalyzer().add_all(iter_log_entries(stream))
+
+
+def analyze_file(path, workers=1):
+    """
+    Analyze a log export; large NDJSON files are sharded across processes.
+    Returns a LogAnalyzer.
+    """
+    if path == "-":
+        return analyze_stream(sys.stdin)
+
+    if (
+        workers > 1
+        and os.path.getsize(path) >= SHARD_MIN_BYTES
+        and _is_ndjson(path)
+    ):
+        tasks = [(path, a, b) for a, b in _shard_offsets(path, workers * 4)]
+        print(
+            f"🔀 Sharding {path} into {len(tasks)} ranges over {workers} workers",
+            file=sys.stderr,
+        )
+        result = LogAnalyzer()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() keeps shard order, so merged samples follow file order
+            for shard in pool.map(_analyze_shard, tasks):
+                result.merge(shard)
+        return result
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return analyze_stream(f)
+
+
+def analyze_logs(logs):
+    """
+    Analyze logs for errors, warnings, performance issues, and critical signals
+    Returns: analysis report dict with FULL CONTEXT for Codex GPT
+    """
+    return build_report(LogAnalyzer().add_all(logs))
+
+
+def build_report(analyzer, source=None):
+    """Build the report dict from an analyzer (live logs or offline export)"""
+    error_count = analyzer.counts["errors"]
+    warning_count = analyzer.counts["warnings"]
+    critical_signals = analyzer.critical_signals
+    latency_issues = analyzer.latency_issues
 
     # Determine overall status
     status = "OK"
-    if len(errors) > ERROR_THRESHOLD_CRITICAL or len(critical_signals) > 0:
+    if error_count > ERROR_THRESHOLD_CRITICAL or analyzer.counts["critical_signals"] > 0:
         status = "CRITICAL"
-    elif len(errors) > ERROR_THRESHOLD_DEGRADED or len(warnings) > WARNING_THRESHOLD:
+    elif error_count > ERROR_THRESHOLD_DEGRADED or warning_count > WARNING_THRESHOLD:
         status = "DEGRADED"
 
-    # NEW: Analyze patterns
-    error_patterns = analyze_patterns(errors_with_full_context)
+    error_patterns = analyzer.patterns()
 
-    # NEW: Extract code snippets for top failing files
+    # Extract code snippets for top failing files
     code_snippets = []
-    if error_patterns["by_file"]:
-        top_files = list(error_patterns["by_file"].keys())[:3]  # Top 3 files
-        for file_path in top_files:
-            # Find first error with this file to get line number
-            for error_ctx in errors_with_full_context:
-                if error_ctx.get("file_path") == file_path:
-                    snippet = get_code_snippet(file_path, error_ctx.get("line_number"))
-                    if snippet:
-                        snippet["error_count"] = error_patterns["by_file"][file_path]
-                        code_snippets.append(snippet)
-                    break
-
-    # NEW: Get recent commits
+    for file_path in list(error_patterns["by_file"].keys())[:3]:  # Top 3 files
+        snippet = get_code_snippet(file_path, analyzer.file_locations.get(file_path))
+        if snippet:
+            snippet["error_count"] = error_patterns["by_file"][file_path]
+            code_snippets.append(snippet)
+
     recent_commits = get_recent_commits(max_commits=5)
 
     # Build report (ENHANCED)
@@ -603,27 +835,28 @@ def analyze_logs(logs):
         "timestamp": datetime.datetime.now().isoformat(),
         "service": SERVICE,
         "region": REGION,
-        "logs_analyzed": len(logs),
-        "freshness": FRESHNESS,
+        "logs_analyzed": analyzer.logs_analyzed,
+        "freshness": FRESHNESS if source is None else None,
+        "source": source or "cloud_logging",
         "status": status,
         "summary": {
-            "errors": len(errors),
-            "warnings": len(warnings),
-            "critical_signals": len(critical_signals),
-            "latency_issues": len(latency_issues),
+            "errors": error_count,
+            "warnings": warning_count,
+            "critical_signals": analyzer.counts["critical_signals"],
+            "latency_issues": analyzer.counts["latency_issues"],
         },
         # OLD format (backward compatibility)
-        "errors": errors[:5],
-        "warnings": warnings[:5],
+        "errors": analyzer.errors[:5],
+        "warnings": analyzer.warnings[:5],
         "critical_signals": critical_signals[:3],
-        "latency_issues": latency_issues[:3] if latency_issues else [],
+        "latency_issues": latency_issues[:3],
         # NEW: Full context for Codex GPT
-        "errors_detailed": errors_with_full_context[:10],  # Top 10 with full context
-        "warnings_detailed": warnings_with_context[:10],
+        "errors_detailed": analyzer.errors_detailed[:10],  # Top 10 with full context
+        "warnings_detailed": analyzer.warnings_detailed[:10],
         "error_patterns": error_patterns,
         "code_snippets": code_snippets,
         "recent_commits": recent_commits,
-        "log_samples": log_samples[:15],
+        "log_samples": analyzer.log_samples[:15],
         "recommendations": [],
     }
 
@@ -634,7 +867,7 @@ def analyze_logs(logs):
                 "priority": "HIGH",
                 "action": "Investigate critical issues immediately",
                 "details": "OOMKilled or container crashes detected"
-                if critical_signals
+                if analyzer.counts["critical_signals"]
                 else "High error rate detected",
                 "affected_files": list(error_patterns["by_file"].keys())[:3]
                 if error_patterns["by_file"]
@@ -645,32 +878,10 @@ def analyze_logs(logs):
             }
         )
 
-        if any(sig["type"] == "OOM" for sig in critical_signals):
-            # Determine the current and peak memory usage from log context (if available)
-            import math
-            import re
-
-            memory_pattern = re.compile(
-                r"Memory limit of\s+(?P<limit>\d+)\s*MiB exceeded with\s+(?P<used>\d+)\s*MiB used",
-                re.IGNORECASE,
-            )
-
-            current_limit_mib = None
-            peak_usage_mib = None
-
-            for signal in critical_signals:
-                if signal.get("type") != "OOM":
-                    continue
-
-                context_message = signal.get("full_context", {}).get(
-                    "message"
-                ) or signal.get("msg", "")
-                match = memory_pattern.search(context_message)
-                if match:
-                    limit_mib = int(match.group("limit"))
-                    used_mib = int(match.group("used"))
-                    current_limit_mib = max(current_limit_mib or 0, limit_mib)
-                    peak_usage_mib = max(peak_usage_mib or 0, used_mib)
+        if "OOM" in analyzer.critical_types:
+            # Current and peak memory usage from log context (if available)
+            current_limit_mib = analyzer.memory_limit_mib
+            peak_usage_mib = analyzer.memory_peak_mib
 
             # Cloud Run supported tiers in MiB
             memory_tiers_mib = [512, 1024, 2048, 4096, 8192, 16384]
@@ -724,7 +935,7 @@ def analyze_logs(logs):
                 }
             )
 
-        if len(errors) > 10:
+        if error_count > 10:
             report["recommendations"].append(
                 {
                     "priority": "HIGH",
@@ -767,7 +978,7 @@ def analyze_logs(logs):
             {
                 "priority": "MEDIUM",
                 "action": "Monitor closely and investigate warnings",
-                "details": f"{len(warnings)} warnings detected",
+                "details": f"{warning_count} warnings detected",
                 "affected_files": list(error_patterns["by_file"].keys())[:3]
                 if error_patterns["by_file"]
                 else [],
@@ -803,7 +1014,7 @@ def analyze_logs(logs):
 def save_report(report, output_path="reports/prod_report.json"):
     """Save the report to a JSON file"""
     # Ensure reports directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
@@ -857,28 +1068,70 @@ def print_summary(report):
     print()
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="ProdGuardian - analyze Cloud Run logs (live or exported)"
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        help="JSON/NDJSON log export to analyze offline ('-' for stdin); "
+        "default: fetch live logs with gcloud",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to shard large NDJSON exports (default: 1)",
+    )
+    parser.add_argument(
+        "--output",
+        default="reports/prod_report.json",
+        help="Report path (default: reports/prod_report.json)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main execution flow"""
+    args = parse_args(argv)
+
     print("=" * 60, file=sys.stderr)
     print("ProdGuardian - ÉMERGENCE Production Monitor", file=sys.stderr)
     print("=" * 60, file=sys.stderr)
 
-    # Fetch logs
-    logs = fetch_logs()
+    if args.input:
+        # Offline analysis: stream the export, never load it whole
+        try:
+            analyzer = analyze_file(args.input, workers=max(1, args.workers))
+        except OSError as e:
+            print(f"❌ Cannot read log export {args.input}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(
+            f"✅ Analyzed {analyzer.logs_analyzed} log entries from {args.input}",
+            file=sys.stderr,
+        )
+        if not analyzer.logs_analyzed:
+            print("\n⚠️  No log entries found in the export.", file=sys.stderr)
+            sys.exit(1)
+        report = build_report(analyzer, source=args.input)
+    else:
+        # Fetch logs
+        logs = fetch_logs()
 
-    if not logs:
-        print("\n⚠️  No logs retrieved. Possible reasons:", file=sys.stderr)
-        print("   - gcloud CLI not authenticated", file=sys.stderr)
-        print("   - No logs in the specified timeframe", file=sys.stderr)
-        print("   - Service name or region incorrect", file=sys.stderr)
-        print("\n💡 Try running: gcloud auth login", file=sys.stderr)
-        sys.exit(1)
+        if not logs:
+            print("\n⚠️  No logs retrieved. Possible reasons:", file=sys.stderr)
+            print("   - gcloud CLI not authenticated", file=sys.stderr)
+            print("   - No logs in the specified timeframe", file=sys.stderr)
+            print("   - Service name or region incorrect", file=sys.stderr)
+            print("\n💡 Try running: gcloud auth login", file=sys.stderr)
+            sys.exit(1)
 
-    # Analyze logs
-    report = analyze_logs(logs)
+        # Analyze logs
+        report = analyze_logs(logs)
 
     # Save report
-    save_report(report)
+    save_report(report, args.output)
 
     # Print summary to stdout
     print_summary(report)
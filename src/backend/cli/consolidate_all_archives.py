@@ -9,12 +9,15 @@ Usage:
     python src/backend/cli/consolidate_all_archives.py --user-id <user_id>
     python src/backend/cli/consolidate_all_archives.py --all  # Admin only
     python src/backend/cli/consolidate_all_archives.py --all --force  # Reconsolider tout
+    python src/backend/cli/consolidate_all_archives.py --all --concurrency 8 --llm-concurrency 4
+
+Un run interrompu reprend automatiquement (checkpoint SQL par périmètre) ;
+--restart repart de zéro.
 """
 
 import asyncio
 import argparse
 import logging
-from datetime import datetime, timezone
 from typing import Optional, Any
 
 import sys
@@ -28,6 +31,10 @@ from backend.core.database.manager import DatabaseManager  # noqa: E402
 from backend.features.memory.gardener import MemoryGardener  # noqa: E402
 from backend.features.memory.vector_service import VectorService  # noqa: E402
 from backend.features.memory.analyzer import MemoryAnalyzer  # noqa: E402
+from backend.core.database.schema import create_tables
+from backend.features.memory.archive_consolidation import (
+    ArchiveConsolidationRunner,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +43,9 @@ async def is_already_consolidated(vector_service: Any, thread_id: str) -> bool:
     """
     Vérifie si thread déjà consolidé en cherchant concepts dans ChromaDB.
 
+    Conservé pour compatibilité : le traitement en lot utilise la sonde
+    groupée de ``ArchiveConsolidationRunner.find_already_consolidated``.
+
     Args:
         vector_service: Service vectoriel ChromaDB
         thread_id: ID du thread à vérifier
@@ -65,6 +75,11 @@ async def consolidate_all_archives(
     user_id: Optional[str] = None,
     limit: int = 1000,
     force: bool = False,
+    concurrency: int = 4,
+    llm_concurrency: int = 2,
+    vector_concurrency: int = 1,
+    run_id: Optional[str] = None,
+    restart: bool = False,
 ) -> dict[str, Any]:
     """
     Consolide tous threads archivés non traités.
@@ -76,96 +91,52 @@ async def consolidate_all_archives(
         user_id: Filtrer par utilisateur (None = tous)
         limit: Limite de threads à traiter
         force: Forcer reconsolidation même si déjà fait
+        concurrency: Threads consolidés en parallèle
+        llm_concurrency: Appels LLM simultanés max
+        vector_concurrency: Écritures vectorielles simultanées max
+        run_id: Identifiant de checkpoint (reprise)
+        restart: Ignorer le checkpoint existant
     """
-
-    # Récupérer threads archivés
     logger.info(f"Récupération threads archivés (user_id={user_id}, limit={limit})...")
 
-    # Requête SQL pour threads archivés
-    where_clauses = ["archived = 1"]
-    params: list[Any] = []
-
-    if user_id:
-        where_clauses.append("user_id = ?")
-        params.append(user_id)
-
-    query = f"""
-        SELECT * FROM threads
-        WHERE {" AND ".join(where_clauses)}
-        ORDER BY created_at DESC
-        LIMIT ?
-    """
-    params.append(limit)
-
-    threads_raw = await db.fetch_all(query, tuple(params))
-    threads: list[dict[str, Any]] = [dict(t) for t in threads_raw]
-
-    logger.info(f"Trouvé {len(threads)} thread(s) archivé(s)")
-
-    consolidated = 0
-    skipped = 0
-    errors = []
-
-    for i, thread in enumerate(threads, 1):
-        thread_id = thread.get("id")
-        if not thread_id:
-            continue
-
-        logger.info(f"[{i}/{len(threads)}] Processing thread {thread_id[:8]}...")
-
-        try:
-            # Vérifier si déjà consolidé
-            if not force and await is_already_consolidated(vector_service, thread_id):
-                logger.info("  -> Déjà consolidé, skip")
-                skipped += 1
-                continue
-
-            # Consolider
-            result = await gardener._tend_single_thread(
-                thread_id=thread_id,
-                session_id=thread.get("session_id"),
-                user_id=thread.get("user_id"),
-            )
-
-            new_concepts = result.get("new_concepts", 0)
-            if new_concepts > 0:
-                logger.info(f"  -> Consolidé: {new_concepts} concepts")
-                consolidated += 1
-
-                # Marquer comme consolidé
-                await db.execute(
-                    "UPDATE threads SET consolidated_at = ? WHERE id = ?",
-                    (datetime.now(timezone.utc).isoformat(), thread_id),
-                    commit=True,
-                )
-            else:
-                logger.info("  -> Aucun concept extrait")
-                skipped += 1
-
-        except Exception as e:
-            logger.error(f"  -> ERREUR: {e}", exc_info=True)
-            errors.append({"thread_id": thread_id, "error": str(e)})
+    runner = ArchiveConsolidationRunner(
+        db,
+        gardener,
+        vector_service,
+        concurrency=concurrency,
+        llm_concurrency=llm_concurrency,
+        vector_concurrency=vector_concurrency,
+    )
+    stats = await runner.run(
+        user_id=user_id, limit=limit, force=force, run_id=run_id, restart=restart
+    )
+    skipped = stats.skipped + stats.already_consolidated + stats.resumed
 
     # Rapport final
     logger.info(f"""
     ╔═══════════════════════════════════════╗
     ║  CONSOLIDATION BATCH TERMINÉE         ║
     ╠═══════════════════════════════════════╣
-    ║  Total threads: {len(threads):4d}               ║
-    ║  Consolidés:    {consolidated:4d}               ║
+    ║  Total threads: {stats.total:4d}               ║
+    ║  Consolidés:    {stats.consolidated:4d}               ║
     ║  Skipped:       {skipped:4d}               ║
-    ║  Erreurs:       {len(errors):4d}               ║
+    ║  Erreurs:       {len(stats.errors):4d}               ║
+    ║  Débit:    {stats.throughput_per_minute:7.1f} threads/min     ║
     ╚═══════════════════════════════════════╝
     """)
 
-    if errors:
-        logger.error(f"Erreurs détaillées:\n{errors}")
+    if stats.errors:
+        logger.error(f"Erreurs détaillées:\n{stats.errors}")
 
     return {
-        "total": len(threads),
-        "consolidated": consolidated,
+        "total": stats.total,
+        "consolidated": stats.consolidated,
         "skipped": skipped,
-        "errors": errors,
+        "errors": stats.errors,
+        "run_id": stats.run_id,
+        "resumed": stats.resumed,
+        "duration_seconds": round(stats.elapsed_seconds, 2),
+        "throughput_per_minute": round(stats.throughput_per_minute, 2),
     }
 
 
@@ -180,6 +151,22 @@ async def main():
     parser.add_argument(
         "--db", default="emergence.db", help="Chemin DB (défaut: emergence.db)"
     )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Threads en parallèle (défaut: 4)"
+    )
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=2, help="Appels LLM simultanés (défaut: 2)"
+    )
+    parser.add_argument(
+        "--vector-concurrency",
+        type=int,
+        default=1,
+        help="Écritures vectorielles simultanées (défaut: 1)",
+    )
+    parser.add_argument("--run-id", help="Identifiant de checkpoint (reprise)")
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignorer le checkpoint existant"
+    )
     args = parser.parse_args()
 
     # Setup logging
@@ -190,6 +177,7 @@ async def main():
     # Setup database
     db = DatabaseManager(args.db)
     await db.connect()
+    await create_tables(db)  # table de checkpoint des runs
     logger.info(f"Connected to {args.db}")
 
     # Setup vector service + analyzer + gardener
@@ -210,6 +198,11 @@ async def main():
         user_id=user_id,
         limit=args.limit,
         force=args.force,
+        concurrency=args.concurrency,
+        llm_concurrency=args.llm_concurrency,
+        vector_concurrency=args.vector_concurrency,
+        run_id=args.run_id,
+        restart=args.restart,
     )
 
     await db.close()
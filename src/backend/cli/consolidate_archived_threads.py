@@ -17,6 +17,11 @@ Options:
     --force                 Reconsolidate even if already consolidated
     --dry-run               Show what would be done without actually doing it
     --verbose              Show detailed progress
+    --concurrency INTEGER  Threads consolidated in parallel (default: 4)
+    --llm-concurrency INT  Max simultaneous LLM calls (default: 2)
+    --vector-concurrency   Max simultaneous vector writes (default: 1)
+    --run-id TEXT          Checkpoint identifier; an interrupted run resumes
+    --restart              Ignore the existing checkpoint
 
 Examples:
     # Consolidate all unconsolidated archived threads
@@ -36,7 +41,6 @@ import asyncio
 import logging
 import os
 import sys
-from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 
 import click
@@ -144,6 +148,11 @@ async def run_consolidation(
     force: bool = False,
     dry_run: bool = False,
     verbose: bool = False,
+    concurrency: int = 4,
+    llm_concurrency: int = 2,
+    vector_concurrency: int = 1,
+    run_id: Optional[str] = None,
+    restart: bool = False,
 ) -> None:
     """
     Main consolidation logic.
@@ -154,17 +163,27 @@ async def run_consolidation(
         force: Whether to reconsolidate already consolidated threads
         dry_run: If True, don't actually consolidate
         verbose: Show detailed output
+        concurrency: Number of threads consolidated in parallel
+        llm_concurrency: Max simultaneous LLM calls
+        vector_concurrency: Max simultaneous vector store writes
+        run_id: Checkpoint identifier (resume an interrupted run)
+        restart: Ignore any existing checkpoint
     """
     # Import here to avoid circular dependencies
     from backend.core.database.manager import DatabaseManager
     from backend.features.memory.gardener import MemoryGardener
     from backend.features.memory.vector_service import VectorService
     from backend.features.memory.analyzer import MemoryAnalyzer
+    from backend.core.database.schema import create_tables
+    from backend.features.memory.archive_consolidation import (
+        ArchiveConsolidationRunner,
+    )
 
     # Initialize services
     logger.info("Initializing services...")
     db_manager = DatabaseManager("emergence.db")
     await db_manager.connect()
+    await create_tables(db_manager)  # table de checkpoint des runs
 
     # Initialize VectorService with proper parameters
     persist_directory = os.getenv("EMERGENCE_VECTOR_DIR", "./data/vector_store")
@@ -205,36 +224,35 @@ async def run_consolidation(
                 logger.info(f"   Previously consolidated: {thread['consolidated_at']}")
         return
 
-    # Consolidate threads
+    # Consolidate threads (moteur partagé : concurrence bornée + checkpoint)
     logger.info(f"\nStarting consolidation of {len(threads)} thread(s)...\n")
 
+    runner = ArchiveConsolidationRunner(
+        db_manager,
+        gardener,
+        vector_service,
+        concurrency=concurrency,
+        llm_concurrency=llm_concurrency,
+        vector_concurrency=vector_concurrency,
+    )
+    run_stats = await runner.run(
+        user_id=user_id,
+        force=force,
+        run_id=run_id,
+        restart=restart,
+        threads=threads,
+    )
+
     stats = {
-        "total": len(threads),
-        "success": 0,
-        "skipped": 0,
-        "errors": 0,
-        "total_concepts": 0,
+        "total": run_stats.total,
+        "success": run_stats.consolidated,
+        "skipped": run_stats.skipped
+        + run_stats.already_consolidated
+        + run_stats.resumed,
+        "errors": len(run_stats.errors),
+        "total_concepts": run_stats.total_concepts,
     }
-
-    start_time = datetime.now(timezone.utc)
-
-    for i, thread in enumerate(threads, 1):
-        logger.info(f"[{i}/{len(threads)}] Thread: {thread['id'][:8]}...")
-
-        result = await consolidate_thread(gardener, thread, verbose=verbose)
-
-        if result.get("status") == "success":
-            new_concepts = result.get("new_concepts", 0)
-            if new_concepts > 0:
-                stats["success"] += 1
-                stats["total_concepts"] += new_concepts
-            else:
-                stats["skipped"] += 1
-        else:
-            stats["errors"] += 1
-
-    end_time = datetime.now(timezone.utc)
-    duration = (end_time - start_time).total_seconds()
+    duration = run_stats.elapsed_seconds
 
     # Print summary
     logger.info("\n" + "=" * 60)
@@ -246,6 +264,9 @@ async def run_consolidation(
     logger.info(f"Errors:                     {stats['errors']}")
     logger.info(f"Total concepts/items added: {stats['total_concepts']}")
     logger.info(f"Duration:                   {duration:.2f} seconds")
+    logger.info(
+        f"Throughput:                 {run_stats.throughput_per_minute:.1f} threads/min"
+    )
     logger.info("=" * 60)
 
     if stats["errors"] > 0:
@@ -272,7 +293,30 @@ async def run_consolidation(
     "--dry-run", is_flag=True, help="Show what would be done without actually doing it"
 )
 @click.option("--verbose", "-v", is_flag=True, help="Show detailed progress")
-def main(user_id, limit, force, dry_run, verbose):
+@click.option(
+    "--concurrency", type=int, default=4, help="Threads consolidated in parallel"
+)
+@click.option("--llm-concurrency", type=int, default=2, help="Max simultaneous LLM calls")
+@click.option(
+    "--vector-concurrency",
+    type=int,
+    default=1,
+    help="Max simultaneous vector store writes",
+)
+@click.option("--run-id", type=str, default=None, help="Checkpoint identifier (resume)")
+@click.option("--restart", is_flag=True, help="Ignore existing checkpoint")
+def main(
+    user_id,
+    limit,
+    force,
+    dry_run,
+    verbose,
+    concurrency,
+    llm_concurrency,
+    vector_concurrency,
+    run_id,
+    restart,
+):
     """
     Consolidate archived threads to Long-Term Memory.
 
@@ -290,6 +334,11 @@ def main(user_id, limit, force, dry_run, verbose):
                 force=force,
                 dry_run=dry_run,
                 verbose=verbose,
+                concurrency=concurrency,
+                llm_concurrency=llm_concurrency,
+                vector_concurrency=vector_concurrency,
+                run_id=run_id,
+                restart=restart,
             )
         )
     except KeyboardInterrupt:
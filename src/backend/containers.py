@@ -224,6 +224,23 @@ def _get_uploads_dir(settings: Settings) -> str:
     return str(Path("./data/uploads").resolve())
 
 
+def _build_redis_manager() -> Optional[Any]:
+    """
+    RedisManager partagé de l'application (cache RAG, mémoire consolidée).
+    RAG_CACHE_REDIS_URL, sinon REDIS_URL ; None si non configuré ou si le
+    paquet redis est absent (caches en mémoire locale).
+    """
+    url = (os.getenv("RAG_CACHE_REDIS_URL") or os.getenv("REDIS_URL") or "").strip()
+    if not url:
+        return None
+    try:
+        from backend.core.cache.redis_manager import RedisManager
+    except ImportError:
+        logger.warning("REDIS_URL défini mais paquet redis absent : cache mémoire")
+        return None
+    return RedisManager(url=url)
+
+
 def _build_voice_config(settings: Settings) -> VoiceServiceConfig:
     if VoiceServiceConfig is None:
         raise RuntimeError("VoiceServiceConfig unavailable.")
@@ -323,6 +340,9 @@ class AppContainer(containers.DeclarativeContainer):
     db_path = providers.Callable(_get_db_path, settings)
     db_manager = providers.Singleton(DatabaseManager, db_path)  # positionnel → robuste
 
+    # --- Redis partagé (optionnel) ---
+    redis_manager = providers.Singleton(_build_redis_manager)
+
     # --- Coûts ---
     cost_tracker = providers.Singleton(CostTracker, db_manager=db_manager)
 
@@ -386,6 +406,7 @@ class AppContainer(containers.DeclarativeContainer):
         vector_service=vector_service,
         settings=settings,
         document_service=document_service,  # ✅ Phase 3 RAG
+        redis_manager=redis_manager,
     )
 
     # --- Features optionnelles ---
@@ -0,0 +1,356 @@
+"""
+Pipeline ASGI pur, en une seule passe, pour les traitements transverses HTTP.
+
+Remplace la pile de ``BaseHTTPMiddleware`` (monitoring, sécurité, rate limit,
+usage, deny-list) : chaque ``BaseHTTPMiddleware`` ajoutait un saut de tâche,
+ré-encapsulait le corps de la réponse et re-parsait headers/URL.
+
+Ici la requête est analysée une seule fois (``RequestContext``) puis chaque
+étape (``PipelineStage``) expose trois hooks peu coûteux :
+
+- ``on_request(ctx)`` : peut court-circuiter en renvoyant une ``Response`` ;
+- ``on_response(ctx, headers)`` : modifie les headers bruts au
+  ``http.response.start`` (le corps n'est jamais touché, le streaming passe
+  tel quel) ;
+- ``on_complete(ctx, exc)`` : métriques / logs une fois la réponse envoyée.
+
+L'ordre des étapes suit l'ancien empilement (la première est la plus
+externe) : une étape qui court-circuite ne voit que les hooks des étapes qui
+la précèdent, comme avec des middlewares imbriqués.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.monitoring import (
+    log_structured,
+    metrics,
+    route_template,
+    security_monitor,
+)
+
+logger = logging.getLogger(__name__)
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+MAX_REQUEST_BYTES = 10 * 1024 * 1024  # 10MB max
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+
+def set_header(headers: RawHeaders, name: str, value: str) -> None:
+    """Remplace (ou ajoute) un header dans une liste de headers ASGI bruts."""
+    key = name.lower().encode("latin-1")
+    headers[:] = [(k, v) for k, v in headers if k.lower() != key]
+    headers.append((key, value.encode("latin-1")))
+
+
+class RequestContext:
+    """Vue parsée une seule fois de la requête, partagée par toutes les étapes."""
+
+    __slots__ = (
+        "scope",
+        "method",
+        "path",
+        "client_ip",
+        "start",
+        "response_time",
+        "status_code",
+        "_headers",
+        "_query",
+    )
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        self.method: str = scope.get("method", "GET")
+        self.path: str = scope.get("path", "")
+        client = scope.get("client")
+        self.client_ip: str = client[0] if client else "unknown"
+        self.start = time.perf_counter()
+        self.response_time: Optional[float] = None
+        self.status_code = 500
+        self._headers: Optional[Dict[str, str]] = None
+        self._query: Optional[List[Tuple[str, str]]] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Headers de la requête (clés en minuscules), décodés à la demande."""
+        if self._headers is None:
+            self._headers = {
+                k.decode("latin-1").lower(): v.decode("latin-1")
+                for k, v in self.scope.get("headers", [])
+            }
+        return self._headers
+
+    @property
+    def query_params(self) -> List[Tuple[str, str]]:
+        if self._query is None:
+            raw = self.scope.get("query_string", b"")
+            self._query = (
+                parse_qsl(raw.decode("latin-1"), keep_blank_values=True) if raw else []
+            )
+        return self._query
+
+    @property
+    def state(self) -> Dict[str, object]:
+        """État de la requête (``request.state`` côté Starlette)."""
+        state: Dict[str, object] = self.scope.setdefault("state", {})
+        return state
+
+    @property
+    def duration(self) -> float:
+        """Durée jusqu'aux headers de réponse (ou jusqu'à maintenant), en secondes."""
+        if self.response_time is not None:
+            return self.response_time
+        return time.perf_counter() - self.start
+
+
+class PipelineStage:
+    """Étape du pipeline : tous les hooks sont optionnels."""
+
+    name = "stage"
+
+    def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        return None
+
+    def on_response(self, ctx: RequestContext, headers: RawHeaders) -> None:
+        return None
+
+    def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        return None
+
+
+class ASGIPipelineMiddleware:
+    """Middleware ASGI pur qui exécute les étapes en une seule passe."""
+
+    def __init__(self, app: ASGIApp, stages: Sequence[PipelineStage]) -> None:
+        self.app = app
+        self.stages = tuple(stages)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext(scope)
+        active: List[PipelineStage] = []
+        early: Optional[Response] = None
+        for stage in self.stages:
+            early = stage.on_request(ctx)
+            if early is not None:
+                break
+            active.append(stage)
+
+        started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                ctx.response_time = time.perf_counter() - ctx.start
+                ctx.status_code = message["status"]
+                headers: RawHeaders = list(message.get("headers", ()))
+                # Du plus interne au plus externe, comme des middlewares imbriqués
+                for stage in reversed(active):
+                    stage.on_response(ctx, headers)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        error: Optional[BaseException] = None
+        try:
+            if early is not None:
+                await early(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            error = exc
+            if not started:
+                # 500 envoyé ici pour que les étapes posent leurs headers ;
+                # l'exception remonte ensuite au serveur (trace journalisée)
+                await PlainTextResponse("Internal server error", status_code=500)(
+                    scope, receive, send_wrapper
+                )
+            raise
+        finally:
+            for stage in reversed(active):
+                try:
+                    stage.on_complete(ctx, error)
+                except Exception as hook_error:  # ne doit jamais casser la requête
+                    logger.debug(f"Pipeline {stage.name}.on_complete: {hook_error}")
+
+
+class DenyListStage(PipelineStage):
+    """404 immédiat pour les chemins de scan connus (wp-admin, .env, ...)."""
+
+    name = "denylist"
+
+    def __init__(self, patterns: Sequence[str], enabled: bool = True) -> None:
+        self.enabled = enabled and bool(patterns)
+        self.patterns = [(p, re.compile(p, re.IGNORECASE)) for p in patterns]
+
+    def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        if not self.enabled:
+            return None
+        for raw, rx in self.patterns:
+            if rx.search(ctx.path):
+                logger.info(f"DenyList: 404 bloqué path={ctx.path} (pattern={raw})")
+                return PlainTextResponse("Not Found", status_code=404)
+        return None
+
+
+class RateLimitStage(PipelineStage):
+    """Rate limiting global par IP sur une fenêtre glissante d'une minute."""
+
+    name = "rate_limit"
+
+    def __init__(self, requests_per_minute: int = 60) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.request_times: Dict[str, Deque[float]] = {}
+        self._last_sweep = time.monotonic()
+
+    def _sweep(self, now: float) -> None:
+        """Oublie les IP inactives depuis plus d'une fenêtre."""
+        self._last_sweep = now
+        cutoff = now - RATE_LIMIT_WINDOW_SECONDS
+        for ip in [ip for ip, q in self.request_times.items() if not q or q[-1] <= cutoff]:
+            del self.request_times[ip]
+
+    def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        now = time.monotonic()
+        if now - self._last_sweep > RATE_LIMIT_WINDOW_SECONDS:
+            self._sweep(now)
+        timestamps = self.request_times.setdefault(ctx.client_ip, deque())
+        cutoff = now - RATE_LIMIT_WINDOW_SECONDS
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
+
+        if len(timestamps) >= self.requests_per_minute:
+            log_structured(
+                "warning",
+                "Rate limit exceeded",
+                client_ip=ctx.client_ip,
+                requests_count=len(timestamps),
+                limit=self.requests_per_minute,
+            )
+            return PlainTextResponse(
+                "Rate limit exceeded. Please try again later.",
+                status_code=429,
+                headers={"Retry-After": "60"},
+            )
+
+        timestamps.append(now)
+        return None
+
+    def on_response(self, ctx: RequestContext, headers: RawHeaders) -> None:
+        used = len(self.request_times.get(ctx.client_ip, ()))
+        set_header(headers, "X-RateLimit-Limit", str(self.requests_per_minute))
+        set_header(
+            headers, "X-RateLimit-Remaining", str(max(0, self.requests_per_minute - used))
+        )
+
+
+class SecurityStage(PipelineStage):
+    """Limite de taille, détection SQLi/XSS (log seulement) et headers de sécurité."""
+
+    name = "security"
+
+    SECURITY_HEADERS: Tuple[Tuple[str, str], ...] = (
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+    )
+
+    def __init__(self, max_request_bytes: int = MAX_REQUEST_BYTES) -> None:
+        self.max_request_bytes = max_request_bytes
+
+    def on_request(self, ctx: RequestContext) -> Optional[Response]:
+        content_length = ctx.headers.get("content-length")
+        if content_length:
+            try:
+                size = int(content_length)
+            except ValueError:
+                return PlainTextResponse("Invalid Content-Length", status_code=400)
+            if size > self.max_request_bytes:
+                log_structured(
+                    "warning",
+                    "Oversized request blocked",
+                    size_bytes=size,
+                    endpoint=ctx.path,
+                    client_ip=ctx.client_ip,
+                )
+                return PlainTextResponse("Request too large", status_code=413)
+
+        for key, value in ctx.query_params:
+            if security_monitor.detect_sql_injection(value):
+                log_structured(
+                    "critical",
+                    "SQL injection attempt blocked",
+                    param=key,
+                    value=value[:100],
+                    endpoint=ctx.path,
+                )
+            if security_monitor.detect_xss(value):
+                log_structured(
+                    "critical",
+                    "XSS attempt blocked",
+                    param=key,
+                    value=value[:100],
+                    endpoint=ctx.path,
+                )
+        return None
+
+    def on_response(self, ctx: RequestContext, headers: RawHeaders) -> None:
+        for name, value in self.SECURITY_HEADERS:
+            set_header(headers, name, value)
+
+
+class MonitoringStage(PipelineStage):
+    """
+    Métriques par template de route et une seule ligne de log structurée par
+    requête.
+    """
+
+    name = "monitoring"
+
+    def on_response(self, ctx: RequestContext, headers: RawHeaders) -> None:
+        set_header(headers, "X-Response-Time", f"{ctx.duration * 1000:.2f}ms")
+        set_header(headers, "X-Request-ID", str(id(ctx.scope)))
+
+    def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        duration = ctx.duration
+        route = route_template(ctx.scope)
+        if exc is not None:
+            error_type = type(exc).__name__
+            metrics.record_response(route, ctx.method, 500, duration, error_type)
+            log_structured(
+                "error",
+                f"Request failed: {ctx.method} {ctx.path}",
+                method=ctx.method,
+                endpoint=ctx.path,
+                route=route,
+                client_ip=ctx.client_ip,
+                error_type=error_type,
+                error_message=str(exc),
+                duration_ms=round(duration * 1000, 2),
+            )
+            return
+        metrics.record_response(route, ctx.method, ctx.status_code, duration)
+        log_structured(
+            "info",
+            f"Request completed: {ctx.method} {ctx.path}",
+            method=ctx.method,
+            endpoint=ctx.path,
+            route=route,
+            client_ip=ctx.client_ip,
+            status_code=ctx.status_code,
+            duration_ms=round(duration * 1000, 2),
+        )
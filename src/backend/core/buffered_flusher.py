@@ -0,0 +1,159 @@
+"""
+Buffer borné + flusher asyncio unique, partagé par les écritures en lot
+différées (télémétrie d'usage, magasin d'événements, coûts LLM, export OTLP).
+
+- ``append()`` ajoute sans await (O(1)) et renvoie la raison d'un refus
+  (``"closed"``, ``"buffer_full"``) : le propriétaire compte ses abandons ;
+- une tâche unique vide le buffer toutes les ``flush_interval`` secondes ou
+  dès ``batch_size`` éléments, en appelant ``write_batch`` lot par lot ;
+- ``write_batch`` renvoie False en cas d'échec : le lot est abandonné, ou
+  remis en tête du buffer si ``requeue_failed`` (le flush s'arrête alors) ;
+- ``stop()`` arrête la tâche puis vide le buffer. Les instances globales
+  survivent aux boucles asyncio (tests, redémarrage du lifespan) : le verrou
+  est recréé pour chaque boucle et une nouvelle boucle rouvre le buffer
+  fermé par ``stop()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+BatchWriter = Callable[[List[T]], Awaitable[bool]]
+
+DROP_CLOSED = "closed"
+DROP_FULL = "buffer_full"
+# Raison de refus -> compteur ``stats`` des propriétaires
+DROP_STATS = {DROP_FULL: "dropped_full", DROP_CLOSED: "dropped_closed"}
+
+
+class BufferedFlusher(Generic[T]):
+    """Buffer borné vidé par lots dans ``write_batch`` par une tâche unique."""
+
+    def __init__(
+        self,
+        write_batch: BatchWriter[T],
+        *,
+        name: str,
+        capacity: int,
+        batch_size: int,
+        flush_interval: float,
+        requeue_failed: bool = False,
+        on_tick: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        self.write_batch = write_batch
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.requeue_failed = requeue_failed
+        self.on_tick = on_tick
+        self.buffer: Deque[T] = deque()
+        # Verrou créé à la demande : l'instance globale survit aux boucles
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closed = False
+        self._stopped_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def append(self, item: T) -> Optional[str]:
+        """Ajoute sans bloquer ; None si accepté, sinon la raison du refus."""
+        if self._closed and not self._can_restart():
+            return DROP_CLOSED
+        if len(self.buffer) >= self.capacity:
+            return DROP_FULL
+        self.buffer.append(item)
+        self.start()
+        if len(self.buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return None
+
+    def _can_restart(self) -> bool:
+        """Après ``stop()``, seule une autre boucle (redémarrage) rouvre le buffer."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return loop is not self._stopped_loop
+
+    def start(self) -> None:
+        """Lance le flusher sur la boucle courante (rouvre le buffer fermé)."""
+        if self.running:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # hors boucle : le prochain flush() explicite videra le buffer
+        self._closed = False
+        self._stopped_loop = None
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run(), name=self.name)
+
+    def lock(self) -> asyncio.Lock:
+        """Verrou des écritures (à prendre pour toute opération exclusive du sink)."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if self.on_tick is not None and not self._closed:
+                await self.on_tick()
+
+    async def flush(self) -> int:
+        """Vide tout le buffer par lots ; retourne le nombre d'éléments écrits."""
+        async with self.lock():
+            return await self.flush_locked()
+
+    async def flush_locked(self) -> int:
+        """``flush()`` pour un appelant qui détient déjà ``lock()``."""
+        written = 0
+        while self.buffer:
+            batch = [
+                self.buffer.popleft()
+                for _ in range(min(self.batch_size, len(self.buffer)))
+            ]
+            if await self.write_batch(batch):
+                written += len(batch)
+            elif self.requeue_failed:
+                self.buffer.extendleft(reversed(batch))
+                break
+        return written
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Arrête le flusher et vide le buffer (shutdown garanti)."""
+        self._closed = True
+        self._stopped_loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done():
+            if self._wakeup is not None:
+                self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+        self._task = None
+        await self.flush()
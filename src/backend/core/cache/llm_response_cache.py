@@ -0,0 +1,344 @@
+"""
+Cache persistant des réponses LLM structurées (JSON, température 0).
+
+Les appels déterministes (analyse mémoire, classification de préférences)
+sont rejoués à l'identique lors d'une re-consolidation d'archive ou d'une
+ré-analyse de session. Ce cache adressé par contenu évite ces appels :
+
+- clé = sha256(provider, modèle, version du template, entrée normalisée
+  — prompt système + prompt + schéma JSON, espaces compactés) ;
+- stockage SQLite sur disque (survit aux redémarrages), éviction LRU
+  quand la taille totale dépasse ``LLM_RESPONSE_CACHE_MAX_MB`` ;
+- opt-in par site d'appel avec TTL propre, via ``cached_call_site`` :
+  sans site actif, ``ChatService.get_structured_llm_response`` ne lit ni
+  n'écrit le cache.
+
+Usage:
+    with cached_call_site("memory_analysis", version="v3"):
+        result = await chat_service.get_structured_llm_response(...)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Après éviction, la taille redescend à cette fraction du maximum
+EVICTION_TARGET_RATIO = 0.9
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class CallSitePolicy:
+    """Site d'appel autorisé à utiliser le cache (version du template + TTL)."""
+
+    name: str
+    version: str
+    ttl_seconds: int
+
+
+_active_call_site: ContextVar[Optional[CallSitePolicy]] = ContextVar(
+    "llm_cache_call_site", default=None
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+@contextmanager
+def cached_call_site(
+    name: str, *, version: str = "v1", ttl_seconds: Optional[int] = None
+) -> Iterator[CallSitePolicy]:
+    """
+    Active le cache pour les appels structurés exécutés dans le bloc.
+
+    Le TTL vient de ``ttl_seconds``, sinon de ``LLM_CACHE_TTL_<NAME>``, sinon
+    de ``LLM_RESPONSE_CACHE_TTL_SECONDS`` (7 jours). Changer ``version`` quand
+    le template du prompt change invalide les entrées existantes.
+    """
+    if ttl_seconds is None:
+        ttl_seconds = _env_int(
+            f"LLM_CACHE_TTL_{name.upper()}",
+            _env_int("LLM_RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS),
+        )
+    policy = CallSitePolicy(name=name, version=version, ttl_seconds=int(ttl_seconds))
+    token = _active_call_site.set(policy)
+    try:
+        yield policy
+    finally:
+        _active_call_site.reset(token)
+
+
+def current_call_site() -> Optional[CallSitePolicy]:
+    """Site d'appel actif (None si le cache n'est pas demandé)."""
+    policy = _active_call_site.get()
+    if policy is None or policy.ttl_seconds <= 0:
+        return None
+    return policy
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    version: str,
+    *,
+    system_prompt: str,
+    prompt: str,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Clé adressée par contenu d'un appel structuré."""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "version": version,
+            "system": _normalize(system_prompt),
+            "prompt": _normalize(prompt),
+            "schema": json_schema or {},
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Cache SQLite des réponses structurées, borné en taille (éviction LRU)."""
+
+    def __init__(self, path: str, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key TEXT PRIMARY KEY,
+                call_site TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                cost_usd REAL NOT NULL DEFAULT 0,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_response_cache_access "
+            "ON llm_response_cache(last_access)"
+        )
+        self._conn.commit()
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+        ).fetchone()
+        self._total_bytes = int(row[0] or 0)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrée valide pour ``key`` (réponse décodée + coût d'origine), sinon None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, cost_usd, input_tokens, output_tokens, expires_at, "
+                "size_bytes FROM llm_response_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            response, cost_usd, input_tokens, output_tokens, expires_at, size = row
+            if expires_at <= now:
+                self._conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key = ?", (key,)
+                )
+                self._conn.commit()
+                self._total_bytes -= int(size)
+                return None
+            self._conn.execute(
+                "UPDATE llm_response_cache SET last_access = ?, hits = hits + 1 "
+                "WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+        try:
+            decoded = json.loads(response)
+        except ValueError:
+            return None
+        return {
+            "response": decoded,
+            "cost_usd": float(cost_usd or 0.0),
+            "input_tokens": int(input_tokens or 0),
+            "output_tokens": int(output_tokens or 0),
+        }
+
+    def put(
+        self,
+        key: str,
+        response: Dict[str, Any],
+        *,
+        policy: CallSitePolicy,
+        provider: str,
+        model: str,
+        cost_usd: float = 0.0,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+    ) -> None:
+        encoded = json.dumps(response, ensure_ascii=False)
+        size = len(encoded.encode("utf-8")) + len(key)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size_bytes FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, call_site, provider, "
+                "model, response, size_bytes, cost_usd, input_tokens, output_tokens, "
+                "created_at, expires_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    key,
+                    policy.name,
+                    provider,
+                    model,
+                    encoded,
+                    size,
+                    float(cost_usd or 0.0),
+                    int(input_tokens or 0),
+                    int(output_tokens or 0),
+                    now,
+                    now + policy.ttl_seconds,
+                    now,
+                ),
+            )
+            self._total_bytes += size - (int(previous[0]) if previous else 0)
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        """Supprime les entrées expirées puis les moins récemment lues."""
+        self._conn.execute(
+            "DELETE FROM llm_response_cache WHERE expires_at <= ?", (time.time(),)
+        )
+        total = int(
+            self._conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+            ).fetchone()[0]
+        )
+        target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        evicted = 0
+        if total > target:
+            rows = self._conn.execute(
+                "SELECT key, size_bytes FROM llm_response_cache ORDER BY last_access ASC"
+            )
+            victims = []
+            for key, size in rows:
+                if total <= target:
+                    break
+                victims.append((key,))
+                total -= int(size)
+            self._conn.executemany(
+                "DELETE FROM llm_response_cache WHERE key = ?", victims
+            )
+            evicted = len(victims)
+        self._total_bytes = total
+        if evicted:
+            logger.info(
+                "[LLMResponseCache] %s entrées évincées (taille=%s octets)",
+                evicted,
+                total,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM llm_response_cache"
+            ).fetchone()
+        return {
+            "entries": int(row[0]),
+            "stored_hits": int(row[1]),
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_response_cache")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, response: Dict[str, Any], **kwargs: Any) -> None:
+        await asyncio.to_thread(self.put, key, response, **kwargs)
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_disabled = False
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """
+    Instance globale (None si désactivée ou indisponible).
+
+    Env: LLM_RESPONSE_CACHE_ENABLED (défaut true), LLM_RESPONSE_CACHE_PATH
+    (défaut ./data/llm_response_cache.db), LLM_RESPONSE_CACHE_MAX_MB (défaut 64).
+    """
+    global _cache, _cache_disabled
+    if _cache is not None or _cache_disabled:
+        return _cache
+    if os.getenv("LLM_RESPONSE_CACHE_ENABLED", "true").lower() != "true":
+        _cache_disabled = True
+        return None
+    path = os.getenv("LLM_RESPONSE_CACHE_PATH", "./data/llm_response_cache.db")
+    max_bytes = _env_int("LLM_RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))
+    try:
+        _cache = LLMResponseCache(path, max_bytes=max_bytes * 1024 * 1024)
+        logger.info(
+            "[LLMResponseCache] Cache persistant ouvert: %s (max %s MB)", path, max_bytes
+        )
+    except Exception as e:
+        _cache_disabled = True
+        logger.warning(f"[LLMResponseCache] Cache indisponible ({path}): {e}")
+    return _cache
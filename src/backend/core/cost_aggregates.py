@@ -0,0 +1,137 @@
+"""
+Totaux de dépense glissants en mémoire pour CostTracker.
+
+Une entrée par portée (global, utilisateur, agent, modèle) garde le total
+cumulé et les totaux du jour / de la semaine / du mois courants, chacun
+étiqueté par sa clé de période (``%Y-%m-%d``, ``%Y-%W``, ``%Y-%m`` en UTC,
+mêmes formats que les ``strftime`` SQLite). Ajout et lecture sont O(1) : une
+période révolue se lit comme 0 et est remise à zéro au prochain ajout.
+
+Les totaux sont amorcés depuis la table ``costs`` au démarrage et recalés
+périodiquement (``replace``) pour corriger la dérive (autres processus,
+écritures perdues).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+PERIODS: Tuple[str, ...] = ("today", "this_week", "this_month")
+
+# Colonne SQL correspondant à chaque portée (None = global)
+SCOPE_COLUMNS: Dict[str, Optional[str]] = {
+    "global": None,
+    "user": "user_id",
+    "agent": "agent",
+    "model": "model",
+}
+
+ScopeKey = Tuple[str, str]
+
+
+def period_keys(moment: Optional[datetime] = None) -> Dict[str, str]:
+    """Clés de période (UTC) d'un instant : jour, semaine (lundi) et mois."""
+    moment = moment or datetime.now(timezone.utc)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return {
+        "today": moment.strftime("%Y-%m-%d"),
+        "this_week": moment.strftime("%Y-%W"),
+        "this_month": moment.strftime("%Y-%m"),
+    }
+
+
+class _Totals:
+    __slots__ = ("total", "values", "keys")
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self.values: Dict[str, float] = dict.fromkeys(PERIODS, 0.0)
+        self.keys: Dict[str, str] = dict.fromkeys(PERIODS, "")
+
+    def add(self, amount: float, keys: Dict[str, str]) -> None:
+        self.total += amount
+        for period in PERIODS:
+            if self.keys[period] != keys[period]:
+                if keys[period] < self.keys[period]:
+                    continue  # événement d'une période déjà close : total seulement
+                self.keys[period] = keys[period]
+                self.values[period] = 0.0
+            self.values[period] += amount
+
+    def read(self, keys: Dict[str, str]) -> Dict[str, float]:
+        summary = {"total": self.total}
+        for period in PERIODS:
+            summary[period] = self.values[period] if self.keys[period] == keys[period] else 0.0
+        return summary
+
+
+class SpendAggregates:
+    """Totaux par (portée, clé) ; ``ready`` une fois amorcés depuis la BDD."""
+
+    def __init__(self) -> None:
+        self._totals: Dict[ScopeKey, _Totals] = {}
+        self.ready = False
+
+    @staticmethod
+    def scope_keys(
+        agent: str, model: str, user_id: Optional[str]
+    ) -> List[ScopeKey]:
+        keys: List[ScopeKey] = [("global", ""), ("agent", agent), ("model", model)]
+        if user_id:
+            keys.append(("user", str(user_id)))
+        return keys
+
+    def add(
+        self,
+        amount: float,
+        *,
+        agent: str,
+        model: str,
+        user_id: Optional[str] = None,
+        moment: Optional[datetime] = None,
+    ) -> None:
+        keys = period_keys(moment)
+        for scope_key in self.scope_keys(agent, model, user_id):
+            totals = self._totals.get(scope_key)
+            if totals is None:
+                totals = self._totals[scope_key] = _Totals()
+            totals.add(amount, keys)
+
+    def summary(
+        self, scope: str = "global", key: str = "", *, moment: Optional[datetime] = None
+    ) -> Dict[str, float]:
+        """Même forme que ``queries.get_costs_summary`` (total/today/this_week/this_month)."""
+        totals = self._totals.get((scope, key))
+        if totals is None:
+            return {"total": 0.0, **dict.fromkeys(PERIODS, 0.0)}
+        return totals.read(period_keys(moment))
+
+    def breakdown(self, scope: str, *, moment: Optional[datetime] = None) -> Dict[str, Dict[str, float]]:
+        """Totaux de toutes les clés d'une portée (ex: par agent)."""
+        keys = period_keys(moment)
+        return {
+            key: totals.read(keys)
+            for (s, key), totals in self._totals.items()
+            if s == scope
+        }
+
+    def replace(
+        self, rollups: Mapping[str, Iterable[Dict[str, Any]]], keys: Dict[str, str]
+    ) -> None:
+        """Remplace les totaux par ceux calculés en SQL (lignes ``queries.get_costs_rollup``)."""
+        fresh: Dict[ScopeKey, _Totals] = {}
+        for scope, rows in rollups.items():
+            for row in rows:
+                totals = _Totals()
+                totals.total = float(row.get("total") or 0.0)
+                for period in PERIODS:
+                    totals.values[period] = float(row.get(period) or 0.0)
+                    totals.keys[period] = keys[period]
+                fresh[(scope, str(row.get("key") or ""))] = totals
+        self._totals = fresh
+        self.ready = True
+
+    def __len__(self) -> int:
+        return len(self._totals)
@@ -1,11 +1,14 @@
 # src/backend/core/cost_tracker.py
 # V13.2 - Télémétrie Prometheus pour coûts LLM (requests, tokens, cost par agent/model)
+# V13.3 - File d'ajout sans verrou + insertions groupées + totaux glissants en mémoire
 import logging
 import asyncio
 import os
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from datetime import datetime, timezone
 
+from .buffered_flusher import DROP_CLOSED, DROP_FULL, BufferedFlusher
+from .cost_aggregates import SCOPE_COLUMNS, SpendAggregates, period_keys
 from backend.core.database.manager import DatabaseManager
 from backend.core.database import queries as db_queries
 
@@ -55,6 +58,23 @@ if METRICS_ENABLED:
         buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0],
         registry=REGISTRY,
     )
+    llm_response_cache_requests_total = Counter(
+        "llm_response_cache_requests_total",
+        "Structured LLM calls looked up in the persistent response cache",
+        ["call_site", "result"],
+        registry=REGISTRY,
+    )
+    llm_response_cache_saved_usd_total = Counter(
+        "llm_response_cache_saved_usd_total",
+        "Estimated LLM cost avoided by response cache hits (USD)",
+        ["call_site"],
+        registry=REGISTRY,
+    )
+    llm_cost_rows_dropped_total = Counter(
+        "llm_cost_rows_dropped_total",
+        "Cost rows dropped because the write queue stayed full",
+        registry=REGISTRY,
+    )
 else:
     # Stubs si métriques désactivées
     llm_requests_total = None  # type: ignore[assignment]
@@ -62,15 +82,29 @@ else:
     llm_tokens_completion_total = None  # type: ignore[assignment]
     llm_cost_usd_total = None  # type: ignore[assignment]
     llm_latency_seconds = None  # type: ignore[assignment]
+    llm_response_cache_requests_total = None  # type: ignore[assignment]
+    llm_response_cache_saved_usd_total = None  # type: ignore[assignment]
+    llm_cost_rows_dropped_total = None  # type: ignore[assignment]
+
+
+CostRow = Tuple[Any, ...]
 
 
 class CostTracker:
     """
-    COST TRACKER V13.2
-    - Enregistre les coûts (async, aiosqlite).
-    - Fournit un résumé & des alertes avec mapping tolérant des clés.
+    COST TRACKER V13.3
+    - Enregistre les coûts : ``record_cost`` met à jour les totaux en mémoire
+      et ajoute la ligne à une file (deque, sans verrou) ; un flusher en
+      tâche de fond l'insère par lots (``executemany``). File pleine
+      (``COST_MAX_PENDING``) : l'appelant vide lui-même la file avant
+      d'ajouter ; une ligne n'est abandonnée (log + métrique) que si la BDD
+      refuse l'écriture.
+    - Totaux glissants jour/semaine/mois (global, par utilisateur, agent,
+      modèle) amorcés depuis la BDD par ``start()`` et recalés
+      périodiquement : alertes et résumés en O(1).
     - 🆕 V13.2: Télémétrie Prometheus (llm_requests_total, llm_tokens_*, llm_cost_usd_total, llm_latency_seconds).
       Métriques exposées sur /metrics par agent et modèle.
+    - Statistiques du cache de réponses LLM (hits/misses, coût évité) par site d'appel.
     """
 
     DAILY_LIMIT = 3.0
@@ -78,7 +112,6 @@ class CostTracker:
     MONTHLY_LIMIT = 20.0
 
     _instance = None
-    _lock = asyncio.Lock()
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -92,6 +125,30 @@ class CostTracker:
                     "DatabaseManager est requis pour l'initialisation de CostTracker."
                 )
             self.db_manager = db_manager
+            self._cache_stats: Dict[str, Dict[str, float]] = {}
+            self.aggregates = SpendAggregates()
+            self._queue: BufferedFlusher[CostRow] = BufferedFlusher(
+                self._write_batch,
+                name="cost-flusher",
+                capacity=int(os.getenv("COST_MAX_PENDING", "50000")),
+                batch_size=int(os.getenv("COST_FLUSH_BATCH_SIZE", "200")),
+                flush_interval=int(os.getenv("COST_FLUSH_INTERVAL_MS", "500")) / 1000,
+                requeue_failed=True,
+            )
+            self.reconcile_interval = float(os.getenv("COST_RECONCILE_INTERVAL_S", "300"))
+            self._reconciler: Optional["asyncio.Task[None]"] = None
+            # Lignes enregistrées pendant un recalage (ré-appliquées ensuite)
+            self._reconcile_buffer: Optional[List[CostRow]] = None
+            self.stats: Dict[str, float] = {
+                "recorded": 0,
+                "flushed": 0,
+                "flushes": 0,
+                "flush_errors": 0,
+                "dropped": 0,
+                "backpressure_flushes": 0,
+                "reconciles": 0,
+                "last_drift_usd": 0.0,
+            }
             self.initialized = True
             metrics_status = "enabled" if METRICS_ENABLED else "disabled"
             logger.info(
@@ -112,61 +169,254 @@ class CostTracker:
         latency_seconds: Optional[float] = None,
     ) -> None:
         """
-        Enregistre le coût d'une opération via le module requêtes.
+        Enregistre le coût d'une opération : totaux en mémoire immédiatement,
+        insertion BDD différée et groupée (aucun verrou sur le chemin chaud).
         V13.2: Incrémente aussi les métriques Prometheus (requests, tokens, cost).
         """
-        async with self._lock:
-            try:
-                await db_queries.add_cost_log(
-                    db=self.db_manager,
-                    timestamp=datetime.now(timezone.utc),
-                    agent=agent,
-                    model=model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    total_cost=total_cost,
-                    feature=feature,
-                    session_id=session_id,
-                    user_id=user_id,
+        try:
+            now = datetime.now(timezone.utc)
+            row: CostRow = (
+                now.isoformat(),
+                session_id,
+                user_id,
+                agent,
+                model,
+                input_tokens,
+                output_tokens,
+                total_cost,
+                feature,
+            )
+            if len(self._queue) >= self.max_pending:
+                # Backpressure : le flusher ne suit pas, l'appelant écrit lui-même
+                self.stats["backpressure_flushes"] += 1
+                await self.flush()
+            await self._enqueue(row)
+            self.aggregates.add(
+                float(total_cost or 0.0),
+                agent=agent,
+                model=model,
+                user_id=user_id,
+                moment=now,
+            )
+            if self._reconcile_buffer is not None:
+                self._reconcile_buffer.append(row)
+            self.stats["recorded"] += 1
+
+            # V13.2 - Prometheus metrics
+            if METRICS_ENABLED and llm_requests_total:
+                llm_requests_total.labels(agent=agent, model=model).inc()
+                llm_tokens_prompt_total.labels(agent=agent, model=model).inc(
+                    input_tokens
                 )
+                llm_tokens_completion_total.labels(agent=agent, model=model).inc(
+                    output_tokens
+                )
+                llm_cost_usd_total.labels(agent=agent, model=model).inc(total_cost)
+                if latency_seconds is not None and llm_latency_seconds:
+                    llm_latency_seconds.labels(agent=agent, model=model).observe(
+                        latency_seconds
+                    )
+
+            logger.info(
+                f"Coût de {total_cost:.6f} pour '{agent}' ('{model}') enregistré."
+            )
+        except Exception as e:
+            logger.error(
+                f"Erreur lors de l'enregistrement du coût pour {model}: {e}",
+                exc_info=True,
+            )
+
+    # ---------- file d'écriture ----------
+    @property
+    def max_pending(self) -> int:
+        return self._queue.capacity
+
+    @max_pending.setter
+    def max_pending(self, value: int) -> None:
+        self._queue.capacity = max(1, value)
+
+    async def _enqueue(self, row: CostRow) -> None:
+        refused = self._queue.append(row)
+        if refused == DROP_FULL:
+            # La BDD a refusé le flush de backpressure : la plus ancienne ligne cède
+            self._drop(self._queue.buffer.popleft(), "file pleine et BDD indisponible")
+            refused = self._queue.append(row)
+        # Après stop() plus rien ne viderait la file : écriture directe
+        if refused == DROP_CLOSED and not await self._write_batch([row]):
+            self._drop(row, "tracker arrêté et BDD indisponible")
+
+    def _drop(self, row: CostRow, reason: str) -> None:
+        self.stats["dropped"] += 1
+        if METRICS_ENABLED and llm_cost_rows_dropped_total:
+            llm_cost_rows_dropped_total.inc()
+        logger.warning(
+            f"Coût abandonné ({reason}) : ligne du {row[0]} "
+            f"({row[7]} USD, {row[3]}/{row[4]})"
+        )
+
+    async def _write_batch(self, batch: List[CostRow]) -> bool:
+        try:
+            await db_queries.add_cost_logs(self.db_manager, batch)
+        except Exception as e:
+            # Les coûts ne se perdent pas : le lot revient en tête de file
+            self.stats["flush_errors"] += 1
+            logger.error(f"Insertion groupée des coûts impossible ({len(batch)}): {e}")
+            return False
+        self.stats["flushed"] += len(batch)
+        self.stats["flushes"] += 1
+        return True
+
+    async def flush(self) -> int:
+        """Insère toute la file par lots de ``batch_size`` ; retourne le nombre de lignes."""
+        return await self._queue.flush()
 
-                # V13.2 - Prometheus metrics
-                if METRICS_ENABLED and llm_requests_total:
-                    llm_requests_total.labels(agent=agent, model=model).inc()
-                    llm_tokens_prompt_total.labels(agent=agent, model=model).inc(
-                        input_tokens
+    # ---------- totaux en mémoire ----------
+    async def start(self) -> None:
+        """Amorce les totaux depuis la BDD et lance le recalage périodique."""
+        await self.reconcile()
+        self._queue.start()
+        if self.reconcile_interval > 0 and (
+            self._reconciler is None or self._reconciler.done()
+        ):
+            self._reconciler = asyncio.get_running_loop().create_task(
+                self._run_reconciler(), name="cost-reconciler"
+            )
+
+    async def _run_reconciler(self) -> None:
+        while not self._queue.closed:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning(f"Recalage des totaux de coûts échoué: {e}")
+
+    async def reconcile(self) -> float:
+        """
+        Recalcule les totaux en SQL et remplace ceux en mémoire ; retourne la
+        dérive corrigée (USD, total global).
+
+        Le flusher est suspendu pendant la requête : les coûts enregistrés
+        entre-temps restent en file (absents du résultat SQL) et sont
+        ré-appliqués après le remplacement.
+        """
+        async with self._queue.lock():
+            await self._queue.flush_locked()
+            previous = self.aggregates.summary("global")["total"]
+            was_ready = self.aggregates.ready
+            self._reconcile_buffer = []
+            try:
+                keys = period_keys()
+                rollups = {
+                    scope: await db_queries.get_costs_rollup(
+                        self.db_manager, group_by=column, **_rollup_params(keys)
                     )
-                    llm_tokens_completion_total.labels(agent=agent, model=model).inc(
-                        output_tokens
+                    for scope, column in SCOPE_COLUMNS.items()
+                }
+                replayed = self._reconcile_buffer
+                self.aggregates.replace(rollups, keys)
+                current = self.aggregates.summary("global")["total"]
+                drift = abs(current - previous) if was_ready else 0.0
+                for row in replayed:
+                    self.aggregates.add(
+                        float(row[7] or 0.0),
+                        agent=row[3],
+                        model=row[4],
+                        user_id=row[2],
+                        moment=datetime.fromisoformat(row[0]),
                     )
-                    llm_cost_usd_total.labels(agent=agent, model=model).inc(total_cost)
-                    if latency_seconds is not None and llm_latency_seconds:
-                        llm_latency_seconds.labels(agent=agent, model=model).observe(
-                            latency_seconds
-                        )
-
-                logger.info(
-                    f"Coût de {total_cost:.6f} pour '{agent}' ('{model}') enregistré."
-                )
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors de l'enregistrement du coût pour {model}: {e}",
-                    exc_info=True,
+            finally:
+                self._reconcile_buffer = None
+        self.stats["reconciles"] += 1
+        self.stats["last_drift_usd"] = drift
+        if drift > 0.01:
+            logger.warning(f"Totaux de coûts recalés (dérive {drift:.4f} USD)")
+        return drift
+
+    async def stop(self) -> None:
+        """Arrête flusher et recalage puis vide la file (shutdown garanti)."""
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            await asyncio.gather(self._reconciler, return_exceptions=True)
+            self._reconciler = None
+        await self._queue.stop()
+
+    def get_running_totals(
+        self, scope: str = "global", key: str = ""
+    ) -> Dict[str, float]:
+        """Totaux en mémoire d'une portée (global, user, agent, model)."""
+        return self.aggregates.summary(scope, key)
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._queue),
+            "aggregates_ready": self.aggregates.ready,
+            "tracked_scopes": len(self.aggregates),
+        }
+
+    def record_cache_lookup(
+        self,
+        call_site: str,
+        *,
+        hit: bool,
+        cost_saved: float = 0.0,
+        tokens_saved: int = 0,
+    ) -> None:
+        """Comptabilise un accès au cache de réponses LLM (coût évité sur hit)."""
+        stats = self._cache_stats.setdefault(
+            call_site,
+            {"hits": 0, "misses": 0, "cost_saved_usd": 0.0, "tokens_saved": 0},
+        )
+        if hit:
+            stats["hits"] += 1
+            stats["cost_saved_usd"] += cost_saved
+            stats["tokens_saved"] += tokens_saved
+        else:
+            stats["misses"] += 1
+
+        if METRICS_ENABLED and llm_response_cache_requests_total:
+            llm_response_cache_requests_total.labels(
+                call_site=call_site, result="hit" if hit else "miss"
+            ).inc()
+            if hit and cost_saved:
+                llm_response_cache_saved_usd_total.labels(call_site=call_site).inc(
+                    cost_saved
                 )
 
+    def get_cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hits, misses, taux de hit et coût évité par site d'appel (depuis le démarrage)."""
+        result: Dict[str, Dict[str, float]] = {}
+        for call_site, stats in self._cache_stats.items():
+            total = stats["hits"] + stats["misses"]
+            result[call_site] = {
+                **stats,
+                "hit_rate": (stats["hits"] / total) if total else 0.0,
+            }
+        return result
+
     async def get_spending_summary(
         self, *, user_id: Optional[str] = None, session_id: Optional[str] = None
     ) -> Dict[str, float]:
-        """Résumé brut depuis la BDD (clés: total/today/this_week/this_month)."""
-        return await db_queries.get_costs_summary(
+        """
+        Résumé (clés: total/today/this_week/this_month) : totaux en mémoire
+        une fois amorcés (global ou par utilisateur), BDD sinon ou si filtré
+        par session.
+        """
+        if self.aggregates.ready and not session_id:
+            if user_id:
+                return self.aggregates.summary("user", str(user_id))
+            return self.aggregates.summary("global")
+        summary: Dict[str, float] = await db_queries.get_costs_summary(
             db=self.db_manager,
             user_id=user_id,
             session_id=session_id,
+            allow_global=not user_id and not session_id,
         )
+        return summary
 
     async def check_alerts(self) -> List[Tuple[str, float, float]]:
         """
-        Vérifie les seuils journaliers/hebdo/mensuels.
+        Vérifie les seuils journaliers/hebdo/mensuels (dépense globale).
         Tolère les deux schémas de clés:
         - brut BDD: today / this_week / this_month
         - format UI: today_cost / current_week_cost / current_month_cost
@@ -186,3 +436,7 @@ class CostTracker:
         if month_val > self.MONTHLY_LIMIT:
             alerts.append(("mois", month_val, self.MONTHLY_LIMIT))
         return alerts
+
+
+def _rollup_params(keys: Dict[str, str]) -> Dict[str, str]:
+    return {"today": keys["today"], "week": keys["this_week"], "month": keys["this_month"]}
@@ -60,6 +60,25 @@ class PostgreSQLManager:
             f"pool={self.min_size}-{self.max_size})"
         )
 
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "PostgreSQLManager":
+        """
+        Instance configurée par les variables CLOUD_SQL_* / DB_PASSWORD
+        (mêmes conventions que scripts/migrate_sqlite_to_postgres.py).
+        """
+        params: Dict[str, Any] = {
+            "host": os.getenv("CLOUD_SQL_HOST"),
+            "port": int(os.getenv("CLOUD_SQL_PORT", "5432")),
+            "database": os.getenv("CLOUD_SQL_DATABASE", "emergence"),
+            "user": os.getenv("CLOUD_SQL_USER", "emergence-app"),
+            "password": os.getenv("DB_PASSWORD"),
+            "unix_socket": os.getenv("CLOUD_SQL_UNIX_SOCKET"),
+            "min_size": int(os.getenv("CLOUD_SQL_POOL_MIN", "2")),
+            "max_size": int(os.getenv("CLOUD_SQL_POOL_MAX", "10")),
+        }
+        params.update(overrides)
+        return cls(**params)
+
     async def connect(self):
         """Crée le pool de connexions asyncpg"""
         if self.pool is not None:
@@ -5,7 +5,7 @@
 import logging
 import json
 import uuid
-from typing import List, Dict, Any, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
 import aiosqlite
 
@@ -328,6 +328,71 @@ async def add_cost_log(
     )
 
 
+async def add_cost_logs(
+    db: DatabaseManager, rows: List[Tuple[Any, ...]]
+) -> None:
+    """
+    Insertion groupée (un seul executemany + commit). Chaque ligne suit l'ordre
+    (timestamp, session_id, user_id, agent, model, input_tokens, output_tokens,
+    total_cost, feature).
+    """
+    if not rows:
+        return
+    await db.executemany(
+        """
+        INSERT INTO costs (timestamp, session_id, user_id, agent, model, input_tokens, output_tokens, total_cost, feature)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+        commit=True,
+    )
+
+
+_COSTS_ROLLUP_COLUMNS = {"user_id", "agent", "model"}
+
+
+async def get_costs_rollup(
+    db: DatabaseManager,
+    *,
+    group_by: Optional[str],
+    today: str,
+    week: str,
+    month: str,
+) -> List[Dict[str, Any]]:
+    """
+    Totaux (total / jour / semaine / mois) par ``group_by`` (user_id, agent,
+    model) ou globaux si None, pour les clés de période fournies
+    (``%Y-%m-%d``, ``%Y-%W``, ``%Y-%m``). ADMIN / interne uniquement : aucune
+    isolation par utilisateur.
+    """
+    if group_by is not None and group_by not in _COSTS_ROLLUP_COLUMNS:
+        raise ValueError(f"group_by invalide: {group_by}")
+    key_expr = group_by or "''"
+    group_clause = f" GROUP BY {group_by}" if group_by else ""
+    rows = await db.fetch_all(
+        f"""
+        SELECT
+            {key_expr} AS scope_key,
+            SUM(total_cost) AS total_cost,
+            SUM(CASE WHEN date(timestamp) = ? THEN total_cost ELSE 0 END) AS today_cost,
+            SUM(CASE WHEN strftime('%Y-%W', timestamp) = ? THEN total_cost ELSE 0 END) AS week_cost,
+            SUM(CASE WHEN strftime('%Y-%m', timestamp) = ? THEN total_cost ELSE 0 END) AS month_cost
+        FROM costs{group_clause}
+        """,
+        (today, week, month),
+    )
+    return [
+        {
+            "key": row["scope_key"] if row["scope_key"] is not None else "",
+            "total": row["total_cost"] or 0.0,
+            "today": row["today_cost"] or 0.0,
+            "this_week": row["week_cost"] or 0.0,
+            "this_month": row["month_cost"] or 0.0,
+        }
+        for row in rows
+    ]
+
+
 async def _build_costs_where_clause(
     db: DatabaseManager,
     user_id: Optional[str],
@@ -638,11 +703,13 @@ async def insert_document_chunks(
             c.get("content", ""),
             normalized_session,
             user_value,
+            c.get("parent_id"),
+            c.get("kind") or "child",
         )
         for c in chunks
     ]
     await db.executemany(
-        "INSERT INTO document_chunks (id, document_id, chunk_index, content, session_id, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+        "INSERT INTO document_chunks (id, document_id, chunk_index, content, session_id, user_id, parent_id, kind) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
         payload,
         commit=True,
     )
@@ -715,12 +782,32 @@ async def get_document_chunks(
     """Retourne les chunks stockés pour un document donné, ordonnés par index."""
     scope_sql, scope_params = _build_scope_condition(user_id, session_id)
     rows = await db.fetch_all(
-        f"SELECT id, document_id, chunk_index, content FROM document_chunks WHERE document_id = ? AND {scope_sql} ORDER BY chunk_index ASC",
+        f"SELECT id, document_id, chunk_index, content FROM document_chunks WHERE document_id = ? AND kind = 'child' AND {scope_sql} ORDER BY chunk_index ASC",
         (doc_id, *scope_params),
     )
     return [dict(row) for row in rows]
 
 
+async def get_parent_chunks(
+    db: DatabaseManager,
+    parent_ids: List[str],
+    *,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Sections parentes par id (lookup par clé primaire, scope user/session)."""
+    if not parent_ids:
+        return {}
+    scope_sql, scope_params = _build_scope_condition(user_id, session_id)
+    placeholders = ", ".join("?" for _ in parent_ids)
+    rows = await db.fetch_all(
+        f"SELECT id, document_id, chunk_index, content FROM document_chunks "
+        f"WHERE id IN ({placeholders}) AND kind = 'parent' AND {scope_sql}",
+        (*parent_ids, *scope_params),
+    )
+    return {row["id"]: dict(row) for row in rows}
+
+
 async def delete_document_chunks(
     db: DatabaseManager,
     doc_id: int,
@@ -877,6 +964,77 @@ async def update_session_analysis_data(
     )
 
 
+# ------------------- Checkpoints d'analyse mémoire ------------------- #
+async def get_analysis_checkpoint(
+    db: DatabaseManager, thread_id: str
+) -> Optional[Dict[str, Any]]:
+    """Dernier état d'analyse incrémentale d'un thread (None si jamais analysé)."""
+    row = await db.fetch_one(
+        """
+        SELECT thread_id, last_message_key, message_count, summary, concepts, entities, updated_at
+        FROM memory_analysis_checkpoints
+        WHERE thread_id = ?
+        """,
+        (thread_id,),
+    )
+    if row is None:
+        return None
+    checkpoint = dict(row)
+    for field in ("concepts", "entities"):
+        try:
+            value = json.loads(checkpoint.get(field) or "[]")
+        except (TypeError, ValueError):
+            value = []
+        checkpoint[field] = value if isinstance(value, list) else []
+    checkpoint["summary"] = checkpoint.get("summary") or ""
+    checkpoint["message_count"] = int(checkpoint.get("message_count") or 0)
+    return checkpoint
+
+
+async def upsert_analysis_checkpoint(
+    db: DatabaseManager,
+    thread_id: str,
+    *,
+    last_message_key: str,
+    message_count: int,
+    summary: str,
+    concepts: List[str],
+    entities: List[str],
+) -> None:
+    await db.execute(
+        """
+        INSERT INTO memory_analysis_checkpoints
+            (thread_id, last_message_key, message_count, summary, concepts, entities, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(thread_id) DO UPDATE SET
+            last_message_key = excluded.last_message_key,
+            message_count = excluded.message_count,
+            summary = excluded.summary,
+            concepts = excluded.concepts,
+            entities = excluded.entities,
+            updated_at = excluded.updated_at
+        """,
+        (
+            thread_id,
+            last_message_key,
+            int(message_count),
+            summary,
+            json.dumps(concepts, ensure_ascii=False),
+            json.dumps(entities, ensure_ascii=False),
+            datetime.now(timezone.utc).isoformat(),
+        ),
+        commit=True,
+    )
+
+
+async def delete_analysis_checkpoint(db: DatabaseManager, thread_id: str) -> None:
+    await db.execute(
+        "DELETE FROM memory_analysis_checkpoints WHERE thread_id = ?",
+        (thread_id,),
+        commit=True,
+    )
+
+
 # ------------------- Threads / Messages / Thread Docs ------------------- #
 
 
@@ -1193,6 +1351,7 @@ async def delete_thread(
             (thread_id, *scope_params),
             commit=True,
         )
+        await delete_analysis_checkpoint(db, thread_id)
     else:
         # 🔥 FIX: Soft-delete par défaut (évite perte définitive archives)
         now = datetime.now(timezone.utc).isoformat()
@@ -1362,6 +1521,116 @@ async def get_messages(
     return [dict(r) for r in rows][::-1]
 
 
+async def iter_messages_keyset(
+    db: DatabaseManager,
+    thread_id: str,
+    session_id: Optional[str] = None,
+    *,
+    user_id: Optional[str] = None,
+    page_size: int = 500,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Parcourt les messages d'un thread par pages, ordre chronologique.
+
+    Pagination keyset sur ``(created_at, id)`` (index ``idx_messages_thread_created``) :
+    coût constant par page, contrairement à OFFSET.
+    """
+    if not user_id:
+        raise ValueError("user_id est obligatoire pour accéder aux messages")
+
+    scope_sql, scope_params = _build_scope_condition(user_id, session_id)
+    cursor: Optional[Tuple[Any, Any]] = None
+    while True:
+        clauses = ["thread_id = ?", scope_sql]
+        params: list[Any] = [thread_id, *scope_params]
+        if cursor is not None:
+            clauses.append("(created_at > ? OR (created_at = ? AND id > ?))")
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        params.append(page_size)
+        rows = await db.fetch_all(
+            "SELECT * FROM messages WHERE "
+            + " AND ".join(clauses)
+            + " ORDER BY created_at ASC, id ASC LIMIT ?",
+            tuple(params),
+        )
+        if not rows:
+            return
+        page = [dict(r) for r in rows]
+        yield page
+        if len(page) < page_size:
+            return
+        cursor = (page[-1]["created_at"], page[-1]["id"])
+
+
+async def insert_messages_bulk(
+    db: DatabaseManager,
+    thread_id: str,
+    session_id: Optional[str],
+    messages: List[Dict[str, Any]],
+    *,
+    user_id: Optional[str] = None,
+) -> int:
+    """
+    Insère un lot de messages (import) en un seul ``executemany``, sans commit :
+    l'appelant délimite la transaction. Les ``created_at`` d'origine sont conservés.
+    """
+    if not messages:
+        return 0
+    now = datetime.now(timezone.utc).isoformat()
+    id_is_int = await _messages_id_is_integer(db)
+    need_session = await _messages_requires_session_id(db)
+    need_timestamp = await _messages_requires_timestamp(db)
+    has_user_column = await _table_has_column(db, "messages", "user_id")
+    normalized_session = _normalize_scope_identifier(session_id)
+    user_value = _resolve_user_scope(user_id, session_id)
+    session_value = normalized_session or user_value
+
+    cols = ["thread_id", "role", "agent_id", "content", "tokens", "meta", "created_at"]
+    if not id_is_int:
+        cols.insert(0, "id")
+    if need_session:
+        cols.append("session_id")
+    if has_user_column:
+        cols.append("user_id")
+    if need_timestamp:
+        cols.append("timestamp")
+
+    agent_ids: Dict[Any, Optional[str]] = {}
+    rows: List[Tuple[Any, ...]] = []
+    for message in messages:
+        agent_id = message.get("agent_id")
+        if agent_id not in agent_ids:
+            agent_ids[agent_id] = await _maybe_neutralize_agent_id(db, agent_id)
+        meta = message.get("meta")
+        if meta is not None and not isinstance(meta, str):
+            meta = json.dumps(meta)
+        created_at = message.get("created_at") or now
+        values: List[Any] = [
+            thread_id,
+            message.get("role") or "user",
+            agent_ids[agent_id],
+            message.get("content") or "",
+            message.get("tokens"),
+            meta,
+            created_at,
+        ]
+        if not id_is_int:
+            values.insert(0, uuid.uuid4().hex)
+        if need_session:
+            values.append(session_value)
+        if has_user_column:
+            values.append(user_value)
+        if need_timestamp:
+            values.append(created_at)
+        rows.append(tuple(values))
+
+    placeholders = ", ".join(["?"] * len(cols))
+    await db.executemany(
+        f"INSERT INTO messages ({', '.join(cols)}) VALUES ({placeholders})", rows
+    )
+    return len(rows)
+
+
 # -- Thread Docs --
 async def set_thread_docs(
     db: DatabaseManager,
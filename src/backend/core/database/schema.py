@@ -69,6 +69,8 @@ TABLE_DEFINITIONS = [
         content TEXT NOT NULL,
         session_id TEXT NOT NULL,
         user_id TEXT NOT NULL,
+        parent_id TEXT,                       -- section parente (enfants vectorisés)
+        kind TEXT NOT NULL DEFAULT 'child',   -- 'child' | 'parent'
         FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
     );
     """,
@@ -258,6 +260,30 @@ TABLE_DEFINITIONS = [
     CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_expires_at
     ON password_reset_tokens(expires_at);
     """,
+    # -- checkpoints d'analyse mémoire incrémentale --
+    """
+    CREATE TABLE IF NOT EXISTS memory_analysis_checkpoints (
+        thread_id TEXT PRIMARY KEY,
+        last_message_key TEXT NOT NULL,
+        message_count INTEGER NOT NULL DEFAULT 0,
+        summary TEXT,
+        concepts TEXT,
+        entities TEXT,
+        updated_at TEXT NOT NULL
+    );
+    """,
+    # -- checkpoint de la consolidation en lot des archives --
+    """
+    CREATE TABLE IF NOT EXISTS archive_consolidation_progress (
+        run_id TEXT NOT NULL,
+        thread_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        new_items INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, thread_id)
+    );
+    """,
     # -- migrations & monitoring (existant) --
     """
     CREATE TABLE IF NOT EXISTS migrations (
@@ -515,6 +541,14 @@ async def _ensure_costs_enriched_columns(db: DatabaseManager) -> None:
         raise
 
 
+async def _ensure_document_chunks_parent_columns(db: DatabaseManager) -> None:
+    """Colonnes de l'index parent–enfant des chunks (bases antérieures)."""
+    await _add_column_if_missing(db, "document_chunks", "parent_id", "TEXT")
+    await _add_column_if_missing(
+        db, "document_chunks", "kind", "TEXT NOT NULL DEFAULT 'child'"
+    )
+
+
 # ------------------------------------------------------------------------ #
 
 
@@ -616,6 +650,12 @@ async def create_tables(db_manager: DatabaseManager) -> None:
         logger.error(f"[DDL] echec backcompat 'costs': {e}", exc_info=True)
         raise
 
+    try:
+        await _ensure_document_chunks_parent_columns(db_manager)
+    except Exception as e:
+        logger.error(f"[DDL] echec backcompat 'document_chunks': {e}", exc_info=True)
+        raise
+
     try:
         await _ensure_threads_enriched_columns(db_manager)
     except Exception as e:
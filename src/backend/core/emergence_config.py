@@ -75,6 +75,8 @@ FEATURE_DOCUMENT_PROCESSING = "document_processing"
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
 DOCUMENT_COLLECTION_NAME = "emergence_documents"
+# Profils par document (centroïde des chunks) pour la recherche en deux étapes
+DOCUMENT_PROFILE_COLLECTION_NAME = "emergence_document_profiles"
 
 # --- Sécurité HTTP : Deny-list simple (404 early) ---
 # Activable par env: DENYLIST_ENABLED=1|true|on
@@ -0,0 +1,670 @@
+"""
+Magasin d'événements local (append-only) pour l'analyse de performance sans
+pile Prometheus/Grafana.
+
+Les modules de métriques (retrieval RAG, appels LLM, WebSocket, spans de
+trace) y poussent des événements structurés en plus de leurs compteurs
+Prometheus. Chaque type d'événement a un schéma déclaré (``EVENT_SCHEMAS``) :
+dimensions (texte, utilisables en ``group_by``/filtre) et mesures (réels).
+
+Stockage : un fichier SQLite dédié, une table brute par type (colonnes
+typées générées depuis le schéma) et une table de rollups horaires
+(nombre, somme/min/max par mesure, histogramme log de la mesure de
+latence). Cycle de vie :
+
+- ``record()`` pousse dans un buffer borné (O(1), sans await) ; un flusher
+  unique écrit par lots (``executemany``, ``BufferedFlusher``) ;
+- ``compact()`` (périodique) replie les événements bruts plus vieux que
+  ``raw_retention_hours`` (ou au-delà de ``max_raw_rows``) en rollups
+  horaires, purge les rollups plus vieux que ``rollup_retention_days`` et
+  rend l'espace au disque (``incremental_vacuum``) : taille bornée ;
+- ``query()`` fusionne rollups et brut : nombre, moyenne, min/max et
+  percentiles (histogramme, précision ~12 %) par groupe.
+
+Exemple : p95 de latence retrieval par agent sur 7 jours ::
+
+    await store.query("span", group_by=["agent"], filters={"name": "retrieval"},
+                      start=now - timedelta(days=7))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .buffered_flusher import DROP_STATS, BufferedFlusher
+
+try:
+    from prometheus_client import Counter
+
+    _EVENTS_DROPPED = Counter(
+        "event_store_dropped_total",
+        "Local event store events dropped (buffer saturated or write failure)",
+        ["reason"],
+    )
+except (ImportError, ValueError):
+    _EVENTS_DROPPED = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_SECONDS = 3600
+
+# Histogramme log : borne haute du seau i = HIST_BASE * HIST_RATIO**i
+HIST_BASE = 0.1
+HIST_RATIO = 1.25
+HIST_BUCKETS = 72  # 0.1 ms -> ~1.1e6 ms
+
+
+@dataclass(frozen=True)
+class EventSchema:
+    """Colonnes d'un type d'événement ; ``histogram`` = mesure à percentiles."""
+
+    kind: str
+    dimensions: Tuple[str, ...]
+    measures: Tuple[str, ...]
+    histogram: str = "duration_ms"
+
+    @property
+    def raw_table(self) -> str:
+        return f"ev_{self.kind}"
+
+    @property
+    def rollup_table(self) -> str:
+        return f"ev_{self.kind}_hourly"
+
+
+EVENT_SCHEMAS: Dict[str, EventSchema] = {
+    schema.kind: schema
+    for schema in (
+        EventSchema(
+            "retrieval",
+            ("collection", "query_type", "status", "agent"),
+            ("duration_ms", "results", "avg_score"),
+        ),
+        EventSchema(
+            "llm_call",
+            ("agent", "provider", "model", "status"),
+            ("duration_ms", "ttft_ms", "input_tokens", "output_tokens", "cost"),
+        ),
+        EventSchema("ws", ("event", "outcome"), ("duration_ms", "connections")),
+        EventSchema("span", ("name", "agent", "status"), ("duration_ms",)),
+    )
+}
+
+# (kind, ts, valeurs des dimensions, valeurs des mesures)
+_Row = Tuple[str, float, Tuple[str, ...], Tuple[Optional[float], ...]]
+
+
+def hist_index(value: float) -> int:
+    if value <= HIST_BASE:
+        return 0
+    index = math.ceil(math.log(value / HIST_BASE) / math.log(HIST_RATIO))
+    return min(HIST_BUCKETS - 1, index)
+
+
+class _Aggregate:
+    """Agrégat fusionnable (brut ou rollup) d'un groupe."""
+
+    __slots__ = ("count", "n", "total", "low", "high", "hist")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.n = 0
+        self.total = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+        self.hist: Dict[int, int] = {}
+
+    def add(self, value: Optional[float], with_hist: bool) -> None:
+        self.count += 1
+        if value is None:
+            return
+        self.n += 1
+        self.total += value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        if with_hist:
+            index = hist_index(value)
+            self.hist[index] = self.hist.get(index, 0) + 1
+
+    def merge(
+        self,
+        count: int,
+        n: int,
+        total: Optional[float],
+        low: Optional[float],
+        high: Optional[float],
+        hist: Optional[Dict[int, int]] = None,
+    ) -> None:
+        self.count += count
+        if not n:
+            return
+        self.n += n
+        self.total += total or 0.0
+        self.low = min(self.low, low if low is not None else math.inf)
+        self.high = max(self.high, high if high is not None else -math.inf)
+        for index, hits in (hist or {}).items():
+            self.hist[index] = self.hist.get(index, 0) + hits
+
+    def percentile(self, q: float) -> Optional[float]:
+        total = sum(self.hist.values())
+        if not total:
+            return None
+        rank = q / 100.0 * total
+        seen = 0
+        for index in sorted(self.hist):
+            seen += self.hist[index]
+            if seen >= rank:
+                upper = HIST_BASE * HIST_RATIO**index
+                return round(min(max(upper, self.low), self.high), 3)
+        return round(self.high, 3)
+
+    def summary(self, percentiles: Sequence[float]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "avg": round(self.total / self.n, 3) if self.n else None,
+            "min": round(self.low, 3) if self.n else None,
+            "max": round(self.high, 3) if self.n else None,
+        }
+        if self.hist:
+            for q in percentiles:
+                result[f"p{q:g}"] = self.percentile(q)
+        return result
+
+
+class SQLiteEventSegments:
+    """Tables brutes + rollups horaires dans un fichier SQLite dédié."""
+
+    def __init__(
+        self, path: str, schemas: Dict[str, EventSchema] = EVENT_SCHEMAS
+    ) -> None:
+        self.path = path
+        self.schemas = schemas
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Doit précéder la création des tables pour rendre l'espace purgé
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for schema in schemas.values():
+            self._conn.executescript(self._ddl(schema))
+        self._conn.commit()
+
+    @staticmethod
+    def _ddl(schema: EventSchema) -> str:
+        dims = ", ".join(f"{d} TEXT NOT NULL DEFAULT ''" for d in schema.dimensions)
+        measures = ", ".join(f"{m} REAL" for m in schema.measures)
+        rollup_measures = ", ".join(
+            f"{m}_n INTEGER NOT NULL DEFAULT 0, {m}_sum REAL, {m}_min REAL, {m}_max REAL"
+            for m in schema.measures
+        )
+        return f"""
+            CREATE TABLE IF NOT EXISTS {schema.raw_table} (
+                ts REAL NOT NULL, {dims}, {measures}
+            );
+            CREATE INDEX IF NOT EXISTS idx_{schema.raw_table}_ts ON {schema.raw_table}(ts);
+            CREATE TABLE IF NOT EXISTS {schema.rollup_table} (
+                bucket INTEGER NOT NULL, {dims},
+                events INTEGER NOT NULL DEFAULT 0, {rollup_measures},
+                hist TEXT,
+                PRIMARY KEY (bucket, {", ".join(schema.dimensions)})
+            );
+        """
+
+    # ---- Écriture ----
+
+    def write_batch(self, rows: List[_Row]) -> None:
+        by_kind: Dict[str, List[Tuple[Any, ...]]] = {}
+        for kind, ts, dims, measures in rows:
+            by_kind.setdefault(kind, []).append((ts, *dims, *measures))
+        with self._lock, self._conn:
+            for kind, values in by_kind.items():
+                schema = self.schemas[kind]
+                columns = ("ts", *schema.dimensions, *schema.measures)
+                self._conn.executemany(
+                    f"INSERT INTO {schema.raw_table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    values,
+                )
+
+    # ---- Compaction ----
+
+    def compact(
+        self,
+        now: float,
+        raw_retention_s: float,
+        rollup_retention_s: float,
+        max_raw_rows: int,
+    ) -> Dict[str, int]:
+        """Replie le brut ancien en rollups horaires et purge le plus vieux."""
+        stats = {"compacted": 0, "rollups_written": 0, "rollups_purged": 0}
+        with self._lock:
+            for schema in self.schemas.values():
+                # Heures entières uniquement : un bucket n'est jamais coupé en deux
+                cutoff = now - raw_retention_s
+                cutoff -= cutoff % ROLLUP_SECONDS
+                total = self._conn.execute(
+                    f"SELECT COUNT(*) FROM {schema.raw_table}"
+                ).fetchone()[0]
+                if total > max_raw_rows:
+                    # Au-delà du plafond : replier jusqu'à l'heure du plus récent
+                    # événement en trop (inclus)
+                    row = self._conn.execute(
+                        f"SELECT ts FROM {schema.raw_table} ORDER BY ts LIMIT 1 OFFSET ?",
+                        (total - max_raw_rows - 1,),
+                    ).fetchone()
+                    if row is not None:
+                        cutoff = max(
+                            cutoff, row[0] - row[0] % ROLLUP_SECONDS + ROLLUP_SECONDS
+                        )
+                with self._conn:
+                    compacted, written = self._rollup(schema, cutoff)
+                    purged = self._conn.execute(
+                        f"DELETE FROM {schema.rollup_table} WHERE bucket < ?",
+                        (int(now - rollup_retention_s),),
+                    ).rowcount
+                stats["compacted"] += compacted
+                stats["rollups_written"] += written
+                stats["rollups_purged"] += purged
+            if stats["compacted"] or stats["rollups_purged"]:
+                self._conn.execute("PRAGMA incremental_vacuum")
+        return stats
+
+    def _rollup(self, schema: EventSchema, cutoff: float) -> Tuple[int, int]:
+        rows = self._conn.execute(
+            f"SELECT ts, {', '.join(schema.dimensions + schema.measures)} "
+            f"FROM {schema.raw_table} WHERE ts < ?",
+            (cutoff,),
+        ).fetchall()
+        if not rows:
+            return 0, 0
+        width = len(schema.dimensions)
+        groups: Dict[Tuple[Any, ...], List[_Aggregate]] = {}
+        for row in rows:
+            key = (int(row[0]) - int(row[0]) % ROLLUP_SECONDS, *row[1 : 1 + width])
+            aggs = groups.get(key)
+            if aggs is None:
+                aggs = groups[key] = [_Aggregate() for _ in schema.measures]
+            for measure, agg, value in zip(schema.measures, aggs, row[1 + width :]):
+                agg.add(value, measure == schema.histogram)
+
+        key_columns = ("bucket", *schema.dimensions)
+        where = " AND ".join(f"{c} = ?" for c in key_columns)
+        for key, aggs in groups.items():
+            # Événements tardifs : fusion avec un rollup déjà écrit
+            existing = self._conn.execute(
+                f"SELECT * FROM {schema.rollup_table} WHERE {where}", key
+            ).fetchone()
+            if existing is not None:
+                _merge_rollup_row(schema, aggs, existing[len(key_columns) :])
+            values: List[Any] = [*key, aggs[0].count]
+            hist: Dict[int, int] = {}
+            for measure, agg in zip(schema.measures, aggs):
+                values.extend(
+                    [
+                        agg.n,
+                        agg.total if agg.n else None,
+                        agg.low if agg.n else None,
+                        agg.high if agg.n else None,
+                    ]
+                )
+                if measure == schema.histogram:
+                    hist = agg.hist
+            values.append(json.dumps(hist) if hist else None)
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {schema.rollup_table} "
+                f"VALUES ({', '.join('?' for _ in values)})",
+                values,
+            )
+        self._conn.execute(f"DELETE FROM {schema.raw_table} WHERE ts < ?", (cutoff,))
+        return len(rows), len(groups)
+
+    # ---- Lecture ----
+
+    def query(
+        self,
+        schema: EventSchema,
+        measure: str,
+        group_by: Sequence[str],
+        filters: Dict[str, str],
+        start: float,
+        end: float,
+    ) -> Dict[Tuple[str, ...], _Aggregate]:
+        with_hist = measure == schema.histogram
+        clauses = [f"{d} = ?" for d in filters]
+        params = list(filters.values())
+        group_columns = ", ".join(group_by) + ", " if group_by else ""
+        groups: Dict[Tuple[str, ...], _Aggregate] = {}
+        rollup_where = " AND ".join(["bucket >= ?", "bucket < ?", *clauses])
+        rollup_sql = (
+            f"SELECT {group_columns}events, {measure}_n, {measure}_sum, {measure}_min, "
+            f"{measure}_max, hist FROM {schema.rollup_table} WHERE {rollup_where}"
+        )
+        raw_where = " AND ".join(["ts >= ?", "ts < ?", *clauses])
+        raw_sql = (
+            f"SELECT {group_columns}{measure} FROM {schema.raw_table} WHERE {raw_where}"
+        )
+        width = len(group_by)
+        with self._lock:
+            rollups = self._conn.execute(
+                rollup_sql, (int(start - start % ROLLUP_SECONDS), end, *params)
+            ).fetchall()
+            raw = self._conn.execute(raw_sql, (start, end, *params)).fetchall()
+        for row in rollups:
+            agg = groups.setdefault(tuple(row[:width]), _Aggregate())
+            hist = (
+                {int(k): v for k, v in json.loads(row[width + 5]).items()}
+                if with_hist and row[width + 5]
+                else None
+            )
+            agg.merge(
+                row[width],
+                row[width + 1],
+                row[width + 2],
+                row[width + 3],
+                row[width + 4],
+                hist,
+            )
+        for row in raw:
+            groups.setdefault(tuple(row[:width]), _Aggregate()).add(
+                row[width], with_hist
+            )
+        return groups
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                kind: {
+                    "raw": self._conn.execute(
+                        f"SELECT COUNT(*) FROM {s.raw_table}"
+                    ).fetchone()[0],
+                    "rollups": self._conn.execute(
+                        f"SELECT COUNT(*) FROM {s.rollup_table}"
+                    ).fetchone()[0],
+                }
+                for kind, s in self.schemas.items()
+            }
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return int(pages * page_size)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _merge_rollup_row(
+    schema: EventSchema, aggs: List[_Aggregate], stored: Sequence[Any]
+) -> None:
+    """Ajoute un rollup stocké (colonnes après la clé) aux agrégats en mémoire."""
+    events, hist_raw = stored[0], stored[-1]
+    hist = {int(k): v for k, v in json.loads(hist_raw).items()} if hist_raw else None
+    for i, (measure, agg) in enumerate(zip(schema.measures, aggs)):
+        n, total, low, high = stored[1 + 4 * i : 5 + 4 * i]
+        agg.merge(
+            events, n, total, low, high, hist if measure == schema.histogram else None
+        )
+
+
+class EventStore:
+    """Buffer borné + flusher/compacteur unique vers ``SQLiteEventSegments``."""
+
+    def __init__(
+        self,
+        segments: SQLiteEventSegments,
+        *,
+        capacity: int = 20_000,
+        batch_size: int = 1000,
+        flush_interval_ms: int = 2000,
+        raw_retention_hours: float = 48,
+        rollup_retention_days: float = 90,
+        max_raw_rows: int = 500_000,
+        compact_interval_s: float = 900,
+    ) -> None:
+        self.segments = segments
+        self.schemas = segments.schemas
+        self.raw_retention_s = raw_retention_hours * 3600
+        self.rollup_retention_s = rollup_retention_days * 86400
+        self.max_raw_rows = max(1, max_raw_rows)
+        self.compact_interval_s = compact_interval_s
+        self._queue: BufferedFlusher[_Row] = BufferedFlusher(
+            self._write_batch,
+            name="event-store-flusher",
+            capacity=capacity,
+            batch_size=batch_size,
+            flush_interval=max(1, flush_interval_ms) / 1000.0,
+            on_tick=self._maybe_compact,
+        )
+        self._last_compaction = 0.0
+        self.stats: Dict[str, int] = {
+            "recorded": 0,
+            "flushed": 0,
+            "dropped_full": 0,
+            "dropped_closed": 0,
+            "dropped_invalid": 0,
+            "dropped_write_error": 0,
+            "compactions": 0,
+            "compacted": 0,
+        }
+
+    def record(self, kind: str, *, ts: Optional[float] = None, **fields: Any) -> bool:
+        """Ajoute un événement sans bloquer ; False s'il a été abandonné."""
+        schema = self.schemas.get(kind)
+        if schema is None:
+            self.stats["dropped_invalid"] += 1
+            return False
+        dims = tuple(str(fields.get(d) or "") for d in schema.dimensions)
+        measures = tuple(_as_float(fields.get(m)) for m in schema.measures)
+        refused = self._queue.append(
+            (kind, time.time() if ts is None else ts, dims, measures)
+        )
+        if refused is not None:
+            self.stats[DROP_STATS[refused]] += 1
+            if _EVENTS_DROPPED is not None:
+                _EVENTS_DROPPED.labels(reason=refused).inc()
+            return False
+        self.stats["recorded"] += 1
+        return True
+
+    @property
+    def capacity(self) -> int:
+        return self._queue.capacity
+
+    async def _write_batch(self, batch: List[_Row]) -> bool:
+        try:
+            await asyncio.to_thread(self.segments.write_batch, batch)
+        except Exception as e:
+            self.stats["dropped_write_error"] += len(batch)
+            if _EVENTS_DROPPED is not None:
+                _EVENTS_DROPPED.labels(reason="write_error").inc(len(batch))
+            logger.warning(f"[EventStore] Lot abandonné ({len(batch)}): {e}")
+            return False
+        self.stats["flushed"] += len(batch)
+        return True
+
+    async def _maybe_compact(self) -> None:
+        if time.time() - self._last_compaction >= self.compact_interval_s:
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.warning(f"[EventStore] Compaction échouée: {e}")
+
+    async def flush(self) -> int:
+        """Écrit tout le buffer (par lots de ``batch_size``)."""
+        return await self._queue.flush()
+
+    async def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Replie le brut ancien en rollups horaires et purge au-delà de la rétention."""
+        await self.flush()
+        now = time.time() if now is None else now
+        async with self._queue.lock():
+            result = await asyncio.to_thread(
+                self.segments.compact,
+                now,
+                self.raw_retention_s,
+                self.rollup_retention_s,
+                self.max_raw_rows,
+            )
+        self._last_compaction = now
+        self.stats["compactions"] += 1
+        self.stats["compacted"] += result["compacted"]
+        return result
+
+    async def query(
+        self,
+        kind: str,
+        *,
+        measure: Optional[str] = None,
+        group_by: Iterable[str] = (),
+        filters: Optional[Dict[str, str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        percentiles: Sequence[float] = (50, 95, 99),
+    ) -> Dict[str, Any]:
+        """
+        Statistiques d'une mesure par groupe sur ``[start, end)`` (défaut : 24h).
+
+        Lève ``ValueError`` pour un type, une mesure ou une dimension inconnus
+        (les noms de colonnes ne viennent jamais de l'appelant).
+        """
+        schema = self.schemas.get(kind)
+        if schema is None:
+            raise ValueError(f"Type d'événement inconnu: {kind}")
+        measure = measure or schema.histogram
+        if measure not in schema.measures:
+            raise ValueError(f"Mesure inconnue pour {kind}: {measure}")
+        group_by = list(group_by)
+        filters = dict(filters or {})
+        unknown = [d for d in (*group_by, *filters) if d not in schema.dimensions]
+        if unknown:
+            raise ValueError(
+                f"Dimension(s) inconnue(s) pour {kind}: {', '.join(unknown)}"
+            )
+
+        await self.flush()
+        end_ts = _epoch(end or datetime.now(timezone.utc))
+        start_ts = _epoch(start) if start else end_ts - 86400
+        groups = await asyncio.to_thread(
+            self.segments.query, schema, measure, group_by, filters, start_ts, end_ts
+        )
+        rows = [
+            {**dict(zip(group_by, key)), **agg.summary(percentiles)}
+            for key, agg in groups.items()
+        ]
+        rows.sort(key=lambda r: r["count"], reverse=True)
+        return {
+            "kind": kind,
+            "measure": measure,
+            "group_by": group_by,
+            "filters": filters,
+            "start": datetime.fromtimestamp(start_ts, timezone.utc).isoformat(),
+            "end": datetime.fromtimestamp(end_ts, timezone.utc).isoformat(),
+            "groups": rows,
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            kind: {
+                "dimensions": list(s.dimensions),
+                "measures": list(s.measures),
+                "percentiles_on": s.histogram,
+            }
+            for kind, s in self.schemas.items()
+        }
+
+    async def stop(self) -> None:
+        """Arrête le flusher et vide le buffer (shutdown garanti)."""
+        await self._queue.stop()
+
+    async def get_stats(self) -> Dict[str, Any]:
+        counts = await asyncio.to_thread(self.segments.counts)
+        size = await asyncio.to_thread(self.segments.size_bytes)
+        return {
+            **self.stats,
+            "pending": len(self._queue),
+            "capacity": self.capacity,
+            "tables": counts,
+            "size_bytes": size,
+            "raw_retention_hours": self.raw_retention_s / 3600,
+            "rollup_retention_days": self.rollup_retention_s / 86400,
+        }
+
+
+def _epoch(moment: datetime) -> float:
+    """Timestamp epoch ; un datetime naïf est interprété en UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _as_float(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_event_store: Optional[EventStore] = None
+
+
+def get_event_store(create: bool = False) -> Optional[EventStore]:
+    """
+    Instance globale (None tant qu'elle n'est pas créée ou si désactivée).
+
+    ``create=True`` (démarrage de l'app) l'instancie depuis l'env :
+    EVENT_STORE_ENABLED (défaut true), EVENT_STORE_DB_PATH
+    (défaut ./data/event_store.db), EVENT_STORE_RAW_RETENTION_HOURS (48),
+    EVENT_STORE_ROLLUP_RETENTION_DAYS (90), EVENT_STORE_MAX_RAW_ROWS (500000),
+    EVENT_STORE_BUFFER_SIZE (20000).
+    """
+    global _event_store
+    if _event_store is not None or not create:
+        return _event_store
+    if os.getenv("EVENT_STORE_ENABLED", "true").lower() != "true":
+        return None
+    path = os.getenv("EVENT_STORE_DB_PATH", "./data/event_store.db")
+    try:
+        _event_store = EventStore(
+            SQLiteEventSegments(path),
+            capacity=int(os.getenv("EVENT_STORE_BUFFER_SIZE", "20000")),
+            raw_retention_hours=float(
+                os.getenv("EVENT_STORE_RAW_RETENTION_HOURS", "48")
+            ),
+            rollup_retention_days=float(
+                os.getenv("EVENT_STORE_ROLLUP_RETENTION_DAYS", "90")
+            ),
+            max_raw_rows=int(os.getenv("EVENT_STORE_MAX_RAW_ROWS", "500000")),
+        )
+        logger.info(f"[EventStore] Segments SQLite: {path}")
+    except Exception as e:
+        logger.warning(f"[EventStore] Magasin d'événements indisponible ({path}): {e}")
+        return None
+    return _event_store
+
+
+def record_event(kind: str, **fields: Any) -> None:
+    """Point d'entrée des modules de métriques : no-op si le magasin est inactif."""
+    store = _event_store
+    if store is None:
+        return
+    try:
+        store.record(kind, **fields)
+    except Exception as e:  # ne jamais casser le chemin instrumenté
+        logger.debug(f"[EventStore] Événement {kind} ignoré: {e}")
@@ -1,9 +1,16 @@
 """
 Middleware pour monitoring automatique de toutes les requêtes
+
+Pile historique de ``BaseHTTPMiddleware`` : ``create_app`` utilise désormais
+le pipeline ASGI pur de ``backend.core.asgi_pipeline``. Ces classes restent
+disponibles (compatibilité, benchmark ``scripts/benchmarks/bench_middleware_pipeline.py``).
 """
 
+import logging
+import re
 import time
 from fastapi import Request, Response
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 from typing import Any, Callable, cast
@@ -14,6 +21,8 @@ from backend.core.monitoring import (
     log_structured,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class MonitoringMiddleware(BaseHTTPMiddleware):
     """
@@ -356,3 +365,54 @@ class CORSSecurityMiddleware(BaseHTTPMiddleware):
             response.headers["Access-Control-Allow-Credentials"] = "true"
 
         return cast(Response, response)
+
+
+class DenyListMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware deny-list (404 early) pour les chemins de scan connus
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool, patterns: list[str]) -> None:
+        super().__init__(app)
+        self.enabled = enabled
+        self.patterns = [(p, re.compile(p, re.IGNORECASE)) for p in patterns]
+
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Any]
+    ) -> Response:
+        if self.enabled and request.scope.get("type") == "http":
+            path = request.url.path
+            for raw, rx in self.patterns:
+                if rx.search(path):
+                    logger.info(f"DenyList: 404 bloqué path={path} (pattern={raw})")
+                    return PlainTextResponse("Not Found", status_code=404)
+
+        try:
+            response = await call_next(request)
+
+            # Vérifier que la réponse est valide
+            if response is None:
+                logger.error(
+                    f"No response returned in DenyListMiddleware for {request.url.path}"
+                )
+                return PlainTextResponse(
+                    "Internal server error: no response", status_code=500
+                )
+
+            return cast(Response, response)
+        except RuntimeError as exc:
+            # Gérer le cas où call_next() lève "No response returned"
+            if "No response returned" in str(exc):
+                logger.error(
+                    f"RuntimeError in DenyListMiddleware for {request.url.path}: {exc}"
+                )
+                return PlainTextResponse(
+                    "Internal server error: no response", status_code=500
+                )
+            raise
+        except Exception as exc:
+            logger.error(
+                f"Unexpected error in DenyListMiddleware for {request.url.path}: {exc}",
+                exc_info=True,
+            )
+            return PlainTextResponse("Internal server error", status_code=500)
@@ -4,9 +4,10 @@ Centralise logging, métriques et alertes
 """
 
 import logging
+import math
 import time
 from functools import wraps
-from typing import Optional, Any, cast
+from typing import Any, Mapping, Optional
 from datetime import datetime, timezone
 from collections import defaultdict
 from pathlib import Path
@@ -26,67 +27,266 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Export Prometheus par route (template) : cardinalité bornée par les routes
+try:
+    from prometheus_client import Counter, Histogram
+
+    _HTTP_REQUESTS = Counter(
+        "http_requests_total",
+        "HTTP requests by method, route template and status class",
+        ["method", "route", "status_class"],
+    )
+    _HTTP_LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "HTTP latency (time to response headers) by route template",
+        ["method", "route"],
+        buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
+    )
+except (ImportError, ValueError):
+    _HTTP_REQUESTS = None  # type: ignore[assignment]
+    _HTTP_LATENCY = None  # type: ignore[assignment]
+
+
+class LatencySketch:
+    """
+    Histogramme de latence en streaming, mémoire fixe (style DDSketch).
+
+    Buckets logarithmiques d'erreur relative ``relative_accuracy`` : toute
+    valeur entre ``min_value`` et ``max_value`` secondes tombe dans l'un des
+    ~1100 buckets possibles (1 %), quel que soit le nombre d'échantillons.
+    """
+
+    __slots__ = ("_gamma", "_log_gamma", "min_value", "max_value", "bins",
+                 "zero_count", "count", "total", "max_seen")
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        min_value: float = 1e-6,
+        max_value: float = 3600.0,
+    ) -> None:
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.min_value = min_value
+        self.max_value = max_value
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.max_seen = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max_seen:
+            self.max_seen = value
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        value = min(value, self.max_value)
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """Valeur approchée du quantile ``q`` (0..1), 0.0 si vide."""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 2 * self._gamma**index / (self._gamma + 1)
+        return self.max_seen
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+def status_class(status_code: int) -> str:
+    """200 -> "2xx" ; codes invalides -> "other"."""
+    return f"{status_code // 100}xx" if 100 <= status_code < 600 else "other"
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+OVERFLOW_ROUTE = "<other>"
+
+
+def route_template(scope: Mapping[str, Any]) -> str:
+    """
+    Template de la route FastAPI/Starlette résolue pour la requête
+    (``/api/threads/{thread_id}/messages``) plutôt que le chemin brut.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return str(template) if template else UNMATCHED_ROUTE
+
+
+class RouteStats:
+    """Compteurs + histogramme de latence d'une route (méthode, template)."""
+
+    __slots__ = ("requests", "errors", "status_classes", "error_types", "latency")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.status_classes: dict[str, int] = defaultdict(int)
+        self.error_types: dict[str, int] = defaultdict(int)
+        self.latency = LatencySketch()
+
+    def summary(self) -> dict[str, Any]:
+        latency = self.latency
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_latency_ms": round(latency.mean * 1000, 2),
+            "p50_ms": round(latency.quantile(0.50) * 1000, 2),
+            "p95_ms": round(latency.quantile(0.95) * 1000, 2),
+            "p99_ms": round(latency.quantile(0.99) * 1000, 2),
+            "error_rate": round(
+                (self.errors / self.requests) * 100 if self.requests else 0.0, 2
+            ),
+            "status_classes": dict(self.status_classes),
+            "error_types": dict(self.error_types),
+        }
+
 
 class MetricsCollector:
-    """Collecteur de métriques pour monitoring"""
+    """
+    Collecteur de métriques pour monitoring
 
-    def __init__(self):
-        self.request_count = defaultdict(int)
-        self.error_count = defaultdict(int)
-        self.latency_sum = defaultdict(float)
-        self.latency_count = defaultdict(int)
+    Clé = (méthode, template de route) : la cardinalité est bornée par le
+    nombre de routes (``max_routes`` au-delà, regroupées sous ``<other>``).
+    """
+
+    def __init__(self, max_routes: int = 500):
+        self.max_routes = max_routes
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        # Index endpoint -> stats (toutes méthodes) pour les lectures par endpoint
+        self._by_endpoint: dict[str, list[RouteStats]] = defaultdict(list)
+        self.total_requests = 0
+        self.total_errors = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+
+    def _stats(self, endpoint: str, method: str) -> RouteStats:
+        key = (method, endpoint)
+        stats = self.routes.get(key)
+        if stats is None:
+            if len(self.routes) >= self.max_routes:
+                key = (method, OVERFLOW_ROUTE)
+                stats = self.routes.get(key)
+                if stats is not None:
+                    return stats
+                endpoint = OVERFLOW_ROUTE
+            stats = self.routes[key] = RouteStats()
+            self._by_endpoint[endpoint].append(stats)
+        return stats
 
     def record_request(self, endpoint: str, method: str) -> None:
         """Enregistre une requête"""
-        key = f"{method}:{endpoint}"
-        self.request_count[key] += 1
-
-    def record_error(self, endpoint: str, error_type: str) -> None:
+        self._stats(endpoint, method).requests += 1
+        self.total_requests += 1
+
+    def _endpoint_stats(self, endpoint: str, method: Optional[str]) -> RouteStats:
+        """Sans méthode : stats déjà ouvertes pour l'endpoint, sinon clé ``ANY``"""
+        if method is None:
+            existing = self._by_endpoint.get(endpoint)
+            if not existing and len(self.routes) >= self.max_routes:
+                existing = self._by_endpoint.get(OVERFLOW_ROUTE)
+            if existing:
+                return existing[0]
+            method = "ANY"
+        return self._stats(endpoint, method)
+
+    def record_error(
+        self, endpoint: str, error_type: str, method: Optional[str] = None
+    ) -> None:
         """Enregistre une erreur"""
-        key = f"{endpoint}:{error_type}"
-        self.error_count[key] += 1
-
-    def record_latency(self, endpoint: str, duration: float) -> None:
+        stats = self._endpoint_stats(endpoint, method)
+        stats.errors += 1
+        stats.error_types[error_type] += 1
+        self.total_errors += 1
+
+    def record_latency(
+        self, endpoint: str, duration: float, method: Optional[str] = None
+    ) -> None:
         """Enregistre la latence d'une requête"""
-        self.latency_sum[endpoint] += duration
-        self.latency_count[endpoint] += 1
+        self._endpoint_stats(endpoint, method).latency.add(duration)
+        self.latency_total += duration
+        self.latency_count += 1
+
+    def record_response(
+        self,
+        route: str,
+        method: str,
+        status_code: int,
+        duration: float,
+        error_type: Optional[str] = None,
+    ) -> None:
+        """
+        Enregistre une requête terminée en un seul appel (pipeline HTTP) :
+        compteur, classe de statut, latence et erreur (5xx ou exception).
+        """
+        stats = self._stats(route, method)
+        cls = status_class(status_code)
+        stats.requests += 1
+        stats.status_classes[cls] += 1
+        stats.latency.add(duration)
+        self.total_requests += 1
+        self.latency_total += duration
+        self.latency_count += 1
+        if error_type is not None or status_code >= 500:
+            stats.errors += 1
+            stats.error_types[error_type or f"HTTP{status_code}"] += 1
+            self.total_errors += 1
+        if _HTTP_REQUESTS is not None and _HTTP_LATENCY is not None:
+            _HTTP_REQUESTS.labels(method, route, cls).inc()
+            _HTTP_LATENCY.labels(method, route).observe(duration)
 
     def get_avg_latency(self, endpoint: str) -> float:
         """Calcule la latence moyenne"""
-        if self.latency_count[endpoint] == 0:
-            return 0.0
-        return cast(float, self.latency_sum[endpoint] / self.latency_count[endpoint])
+        stats_list = self._by_endpoint.get(endpoint, ())
+        total = sum(s.latency.total for s in stats_list)
+        count = sum(s.latency.count for s in stats_list)
+        return total / count if count else 0.0
 
     def get_error_rate(self, endpoint: str) -> float:
         """Calcule le taux d'erreur"""
-        total_requests = sum(
-            count for key, count in self.request_count.items() if endpoint in key
-        )
-        total_errors = sum(
-            count for key, count in self.error_count.items() if endpoint in key
-        )
+        stats_list = self._by_endpoint.get(endpoint, ())
+        total_requests = sum(s.requests for s in stats_list)
+        total_errors = sum(s.errors for s in stats_list)
         if total_requests == 0:
             return 0.0
-        return cast(float, (total_errors / total_requests) * 100)
+        return (total_errors / total_requests) * 100
+
+    def get_overall_avg_latency(self) -> float:
+        """Latence moyenne toutes routes confondues (secondes)"""
+        return self.latency_total / self.latency_count if self.latency_count else 0.0
 
     def get_metrics_summary(self) -> dict[str, Any]:
-        """Retourne un résumé des métriques"""
+        """Retourne un résumé des métriques (O(routes))"""
         return {
-            "total_requests": sum(self.request_count.values()),
-            "total_errors": sum(self.error_count.values()),
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
             "endpoints": {
-                endpoint: {
-                    "requests": self.request_count[endpoint],
-                    "avg_latency_ms": round(self.get_avg_latency(endpoint) * 1000, 2),
-                    "error_rate": round(self.get_error_rate(endpoint), 2),
-                }
-                for endpoint in set(
-                    list(self.request_count.keys()) + list(self.latency_count.keys())
-                )
+                f"{method}:{route}": stats.summary()
+                for (method, route), stats in self.routes.items()
             },
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
 
+    def reset(self) -> None:
+        self.routes.clear()
+        self._by_endpoint.clear()
+        self.total_requests = 0
+        self.total_errors = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+
 
 # Instance globale
 metrics = MetricsCollector()
@@ -0,0 +1,464 @@
+"""
+Profiler par échantillonnage de piles, activable à chaud (opt-in).
+
+Un thread démon relève ``sys._current_frames()`` à ``hz`` Hz et ne garde
+que la pile du thread de la boucle asyncio (ou de tous les threads avec
+``all_threads``). Chaque échantillon est agrégé en pile « repliée »
+(``racine;...;feuille``) dans des seaux de ``bucket_seconds`` :
+
+- mémoire bornée : fenêtre glissante de ``window_seconds`` et au plus
+  ``max_stacks`` piles distinctes par seau (au-delà : ``[overflow]``) ;
+  les noms de frames sont mis en cache par objet code et partagés ;
+- chaque pile est préfixée par le span de trace et l'agent de la tâche
+  asyncio en cours (``span:retrieval;agent:anima;...``, via
+  ``track_task_spans``) ;
+- les échantillons où la boucle attend des E/S (``selectors``) sont comptés
+  à part (``idle``) et exclus des piles ;
+- le retard de la boucle est mesuré en parallèle par une tâche qui dort
+  ``lag_interval`` et mesure son réveil tardif.
+
+Sorties : piles repliées (flamegraph.pl, speedscope) ou JSON speedscope
+(``sampled``). Surcoût mesuré et exposé (``overhead_ratio``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from backend.core.tracing import trace_manager as _tracing
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import Counter, Histogram
+
+    PROFILER_SAMPLES_TOTAL = Counter(
+        "profiler_samples_total",
+        "Échantillons de piles relevés par le profiler",
+        ["kind"],
+    )
+    EVENT_LOOP_LAG_SECONDS = Histogram(
+        "event_loop_lag_seconds",
+        "Retard de réveil de la boucle asyncio",
+        buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+    )
+    PROMETHEUS_AVAILABLE = True
+except (ImportError, ValueError):
+    PROMETHEUS_AVAILABLE = False
+
+Stack = Tuple[str, ...]
+
+OVERFLOW_STACK: Stack = ("[overflow]",)
+_MAX_FRAME_CACHE = 20_000
+
+
+class _Bucket:
+    __slots__ = (
+        "start",
+        "stacks",
+        "samples",
+        "idle",
+        "overflow",
+        "lags",
+    )
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.stacks: Dict[Stack, int] = {}
+        self.samples = 0
+        self.idle = 0
+        self.overflow = 0
+        self.lags: List[float] = []
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles + mesure du retard de boucle."""
+
+    def __init__(
+        self,
+        *,
+        hz: float = 49.0,
+        window_seconds: float = 600.0,
+        bucket_seconds: float = 10.0,
+        max_stacks: int = 2000,
+        max_depth: int = 96,
+        all_threads: bool = False,
+        lag_interval: float = 0.1,
+        clock: Any = time.time,
+    ) -> None:
+        self.hz = min(1000.0, max(1.0, hz))
+        self.window_seconds = max(bucket_seconds, window_seconds)
+        self.bucket_seconds = max(1.0, bucket_seconds)
+        self.max_stacks = max(1, max_stacks)
+        self.max_depth = max(1, max_depth)
+        self.all_threads = all_threads
+        self.lag_interval = max(0.01, lag_interval)
+        self._clock = clock
+        self._buckets: Deque[_Bucket] = deque()
+        self._lock = threading.Lock()
+        self._frame_names: Dict[CodeType, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._lag_task: Optional[asyncio.Task[None]] = None
+        self._deadline: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._sampling_time = 0.0
+        self.stats: Dict[str, int] = {"samples": 0, "idle": 0, "missed_ticks": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- Cycle de vie ----
+
+    def start(
+        self, *, duration_s: Optional[float] = None, hz: Optional[float] = None
+    ) -> bool:
+        """
+        Démarre l'échantillonnage (à appeler depuis la boucle asyncio).
+
+        ``duration_s`` arrête le profiler automatiquement (session ponctuelle) ;
+        sans durée, il tourne jusqu'à ``stop()`` (mode continu).
+        Retourne False s'il tournait déjà.
+        """
+        if self.running:
+            return False
+        if hz is not None:
+            self.hz = min(1000.0, max(1.0, hz))
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._loop_thread_id = threading.get_ident()
+        self._deadline = time.monotonic() + duration_s if duration_s else None
+        self._started_at = self._clock()
+        self._sampling_time = 0.0
+        self._stop.clear()
+        _tracing.track_task_spans(True)
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+        if self._loop is not None:
+            self._lag_task = self._loop.create_task(
+                self._measure_lag(), name="event-loop-lag"
+            )
+        logger.info(
+            f"[Profiler] Démarré à {self.hz:.0f} Hz"
+            + (f" pour {duration_s:.0f}s" if duration_s else " (continu)")
+        )
+        return True
+
+    async def stop(self) -> None:
+        """Arrête le thread d'échantillonnage et la mesure de retard."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            await asyncio.to_thread(thread.join, 2.0)
+        self._thread = None
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        if self._lag_task is not None and not self._lag_task.done():
+            self._lag_task.cancel()
+        self._lag_task = None
+        _tracing.track_task_spans(False)
+
+    # ---- Échantillonnage (thread dédié) ----
+
+    def _run(self) -> None:
+        interval = 1.0 / self.hz
+        own_id = threading.get_ident()
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                break
+            began = time.perf_counter()
+            try:
+                self._sample(own_id)
+            except Exception as e:  # ne doit jamais tuer le thread
+                logger.debug(f"[Profiler] Échantillon ignoré: {e}")
+            now = time.perf_counter()
+            self._sampling_time += now - began
+            next_tick += interval
+            if next_tick < now:
+                self.stats["missed_ticks"] += 1
+                next_tick = now
+            self._stop.wait(next_tick - now)
+        if self._deadline is not None and not self._stop.is_set():
+            logger.info("[Profiler] Durée écoulée, arrêt automatique")
+            try:
+                if self._loop is None:
+                    raise RuntimeError("pas de boucle")
+                self._loop.call_soon_threadsafe(self._cleanup)
+            except RuntimeError:  # boucle absente ou fermée
+                _tracing.track_task_spans(False)
+
+    def _sample(self, own_id: int) -> None:
+        frames = sys._current_frames()
+        if self.all_threads:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, thread_frame in frames.items():
+                if ident != own_id:
+                    self._record(
+                        thread_frame, ident, (f"thread:{names.get(ident, ident)}",)
+                    )
+        else:
+            loop_frame: Optional[FrameType] = frames.get(self._loop_thread_id or -1)
+            if loop_frame is not None:
+                self._record(loop_frame, self._loop_thread_id, ())
+
+    def _record(
+        self, frame: Optional[FrameType], ident: Optional[int], prefix: Stack
+    ) -> None:
+        stack: List[str] = []
+        # Boucle en attente d'E/S : feuille = BaseSelector.select (selectors.py)
+        idle = (
+            frame is not None
+            and frame.f_code.co_name == "select"
+            and frame.f_code.co_filename.endswith("selectors.py")
+        )
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        if frame is not None:
+            stack.append("[truncated]")
+        stack.reverse()
+
+        key: Stack = ()
+        if not idle:
+            key = prefix + self._tags(ident) + tuple(stack)
+        now = self._clock()
+        with self._lock:
+            bucket = self._bucket(now)
+            bucket.samples += 1
+            if idle:
+                bucket.idle += 1
+            elif key in bucket.stacks or len(bucket.stacks) < self.max_stacks:
+                bucket.stacks[key] = bucket.stacks.get(key, 0) + 1
+            else:
+                bucket.overflow += 1
+                bucket.stacks[OVERFLOW_STACK] = bucket.stacks.get(OVERFLOW_STACK, 0) + 1
+        self.stats["samples"] += 1
+        if idle:
+            self.stats["idle"] += 1
+        if PROMETHEUS_AVAILABLE:
+            PROFILER_SAMPLES_TOTAL.labels(kind="idle" if idle else "busy").inc()
+
+    def _tags(self, ident: Optional[int]) -> Stack:
+        """Span / agent de la tâche asyncio en cours (thread de la boucle)."""
+        loop = self._loop
+        if loop is None or ident != self._loop_thread_id:
+            return ()
+        task = asyncio.current_task(loop)
+        if task is None:
+            return ()
+        span = _tracing.task_span(task)
+        if span is None:
+            return ()
+        agent = span.attributes.get("agent")
+        return (
+            (f"span:{span.name}", f"agent:{agent}") if agent else (f"span:{span.name}",)
+        )
+
+    def _frame_name(self, code: CodeType) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            if len(self._frame_names) >= _MAX_FRAME_CACHE:
+                self._frame_names.clear()
+            name = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._frame_names[code] = name
+        return name
+
+    def _bucket(self, now: float) -> _Bucket:
+        """Seau courant (sous ``_lock``) ; purge ceux sortis de la fenêtre."""
+        start = now - now % self.bucket_seconds
+        if not self._buckets or self._buckets[-1].start < start:
+            self._buckets.append(_Bucket(start))
+        horizon = now - self.window_seconds
+        while self._buckets and self._buckets[0].start + self.bucket_seconds < horizon:
+            self._buckets.popleft()
+        return self._buckets[-1]
+
+    # ---- Retard de boucle (tâche asyncio) ----
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.running:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.record_lag(max(0.0, loop.time() - expected))
+
+    def record_lag(self, lag: float) -> None:
+        with self._lock:
+            self._bucket(self._clock()).lags.append(lag)
+        if PROMETHEUS_AVAILABLE:
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+
+    # ---- Lecture ----
+
+    def _window(self, seconds: Optional[float]) -> List[_Bucket]:
+        horizon = self._clock() - (seconds if seconds else self.window_seconds)
+        with self._lock:
+            return [b for b in self._buckets if b.start + self.bucket_seconds > horizon]
+
+    def collapsed(
+        self, seconds: Optional[float] = None, focus: Optional[str] = None
+    ) -> Dict[Stack, int]:
+        """Piles repliées agrégées sur les ``seconds`` dernières secondes."""
+        merged: Dict[Stack, int] = {}
+        for bucket in self._window(seconds):
+            with self._lock:
+                items = list(bucket.stacks.items())
+            for stack, count in items:
+                if focus and not any(focus in frame for frame in stack):
+                    continue
+                merged[stack] = merged.get(stack, 0) + count
+        return merged
+
+    def collapsed_text(
+        self, seconds: Optional[float] = None, focus: Optional[str] = None
+    ) -> str:
+        """Format « collapsed stacks » (une pile par ligne : ``a;b;c N``)."""
+        stacks = self.collapsed(seconds, focus)
+        lines = [
+            f"{';'.join(frame.replace(';', ',') for frame in stack)} {count}"
+            for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(
+        self, seconds: Optional[float] = None, focus: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Profil speedscope (type ``sampled``, poids en secondes)."""
+        stacks = self.collapsed(seconds, focus)
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict[str, Any]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        interval = 1.0 / self.hz
+        for stack, count in stacks.items():
+            indexes = []
+            for name in stack:
+                index = frame_index.get(name)
+                if index is None:
+                    index = frame_index[name] = len(frames)
+                    frames.append(_speedscope_frame(name))
+                indexes.append(index)
+            samples.append(indexes)
+            weights.append(round(count * interval, 6))
+        total = round(sum(weights), 6)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": "emergence-backend",
+            "exporter": "backend.core.profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": f"event loop ({self.hz:.0f} Hz)",
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": total,
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def loop_lag(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        buckets = self._window(seconds)
+        with self._lock:
+            lags = sorted(lag for b in buckets for lag in b.lags)
+        if not lags:
+            return {"count": 0, "avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": len(lags),
+            "avg_ms": round(sum(lags) / len(lags) * 1000, 3),
+            "p99_ms": round(lags[min(len(lags) - 1, int(0.99 * len(lags)))] * 1000, 3),
+            "max_ms": round(lags[-1] * 1000, 3),
+        }
+
+    def get_stats(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        buckets = self._window(seconds)
+        with self._lock:
+            busy = sum(b.samples - b.idle for b in buckets)
+            idle = sum(b.idle for b in buckets)
+            overflow = sum(b.overflow for b in buckets)
+            distinct = sum(len(b.stacks) for b in buckets)
+        elapsed = (self._clock() - self._started_at) if self._started_at else 0.0
+        return {
+            **self.stats,
+            "running": self.running,
+            "hz": self.hz,
+            "all_threads": self.all_threads,
+            "window_seconds": self.window_seconds,
+            "window": {
+                "busy_samples": busy,
+                "idle_samples": idle,
+                "overflow_samples": overflow,
+                "stored_stacks": distinct,
+            },
+            "overhead_ratio": round(self._sampling_time / elapsed, 5)
+            if elapsed
+            else 0.0,
+            "event_loop_lag": self.loop_lag(seconds),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+        self._frame_names.clear()
+
+
+def _short_path(filename: str) -> str:
+    """Chemin lisible : relatif à ``src/`` ou ``site-packages/`` si possible."""
+    normalized = filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/src/", "/lib/python"):
+        index = normalized.rfind(marker)
+        if index != -1:
+            return normalized[index + len(marker) :]
+    return os.path.basename(normalized)
+
+
+def _speedscope_frame(name: str) -> Dict[str, Any]:
+    # "func (path:line)" → champs speedscope ; pseudo-frames (span:, agent:) tels quels
+    if name.endswith(")") and " (" in name:
+        func, _, location = name[:-1].rpartition(" (")
+        path, _, line = location.rpartition(":")
+        if line.isdigit():
+            return {"name": func, "file": path, "line": int(line)}
+    return {"name": name}
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    """
+    Profiler du processus (non démarré par défaut).
+
+    Env: PROFILER_HZ (49), PROFILER_WINDOW_SECONDS (600),
+    PROFILER_MAX_STACKS (2000 par seau de 10s), PROFILER_ALL_THREADS (false).
+    PROFILER_ENABLED=true le démarre en continu au lifespan.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(
+            hz=float(os.getenv("PROFILER_HZ", "49")),
+            window_seconds=float(os.getenv("PROFILER_WINDOW_SECONDS", "600")),
+            max_stacks=int(os.getenv("PROFILER_MAX_STACKS", "2000")),
+            all_threads=os.getenv("PROFILER_ALL_THREADS", "false").lower() == "true",
+        )
+    return _profiler
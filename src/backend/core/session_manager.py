@@ -2,7 +2,6 @@
 # V13.3 - FIX: Ajout du système de timeout d'inactivité (3 minutes)
 import logging
 import json
-import asyncio
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional, Tuple, Set
 from uuid import uuid4
@@ -13,6 +12,7 @@ from backend.core.database.manager import DatabaseManager
 from backend.core.database import queries  # Import du module queries
 from backend.features.memory.analyzer import MemoryAnalyzer
 from backend.core.interfaces import NotificationService
+from backend.core.timer_wheel import TimerHandle, get_timer_wheel
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +20,15 @@ logger = logging.getLogger(__name__)
 import os  # noqa: E402
 
 INACTIVITY_TIMEOUT_MINUTES = int(os.getenv("SESSION_INACTIVITY_TIMEOUT_MINUTES", "30"))
-CLEANUP_INTERVAL_SECONDS = int(os.getenv("SESSION_CLEANUP_INTERVAL_SECONDS", "60"))
 WARNING_BEFORE_TIMEOUT_SECONDS = int(
     os.getenv("SESSION_WARNING_BEFORE_TIMEOUT_SECONDS", "120")
 )
+if os.getenv("SESSION_CLEANUP_INTERVAL_SECONDS"):
+    # Plus de balayage périodique : chaque session arme ses timers (TimerWheel)
+    logger.warning(
+        "SESSION_CLEANUP_INTERVAL_SECONDS est obsolète et ignoré "
+        "(timeouts d'inactivité gérés par timers par session)"
+    )
 
 # Métriques Prometheus pour le monitoring des sessions
 try:
@@ -78,8 +83,9 @@ class SessionManager:
         self._session_alias_to_canonical: Dict[str, str] = {}
         self._session_canonical_to_aliases: Dict[str, Set[str]] = {}
 
-        # Tâche de nettoyage périodique
-        self._cleanup_task: Optional[asyncio.Task[None]] = None
+        # Timers d'inactivité (un par session, réarmé à chaque activité)
+        self._timer_wheel = get_timer_wheel()
+        self._inactivity_timers: Dict[str, TimerHandle] = {}
         self._is_running = False
 
         is_ready = self.memory_analyzer is not None
@@ -100,42 +106,82 @@ class SessionManager:
             raise ReferenceError("SessionManager: memory_analyzer manquant.")
 
     def start_cleanup_task(self):
-        """Démarre la tâche de nettoyage automatique des sessions inactives."""
-        if self._cleanup_task is None or self._cleanup_task.done():
-            self._is_running = True
-            self._cleanup_task = asyncio.create_task(
-                self._cleanup_inactive_sessions_loop()
-            )
-            logger.info("Tâche de nettoyage des sessions inactives démarrée.")
+        """Active les timeouts d'inactivité (timers armés par session)."""
+        if self._is_running:
+            return
+        self._is_running = True
+        for session_id in list(self.active_sessions):
+            self._arm_inactivity_timer(session_id)
+        self._timer_wheel.start()
+        logger.info(
+            f"Timeouts d'inactivité actifs ({len(self._inactivity_timers)} session(s) suivie(s))."
+        )
 
     async def stop_cleanup_task(self):
-        """Arrête la tâche de nettoyage automatique."""
+        """Désactive les timeouts d'inactivité et annule les timers armés."""
         self._is_running = False
-        if self._cleanup_task and not self._cleanup_task.done():
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
-            logger.info("Tâche de nettoyage des sessions inactives arrêtée.")
+        for handle in self._inactivity_timers.values():
+            handle.cancel()
+        self._inactivity_timers.clear()
+        logger.info("Timeouts d'inactivité désactivés.")
+
+    def _inactivity_delays(self) -> Tuple[float, float]:
+        """(délai avant avertissement, délai avant timeout) en secondes."""
+        timeout = INACTIVITY_TIMEOUT_MINUTES * 60
+        return max(0, timeout - WARNING_BEFORE_TIMEOUT_SECONDS), timeout
+
+    def _arm_inactivity_timer(self, session_id: str, delay: Optional[float] = None) -> None:
+        """(Ré)arme le timer d'inactivité d'une session en O(1)."""
+        if not self._is_running:
+            return
+        if delay is None:
+            delay = self._inactivity_delays()[0]
+        handle = self._inactivity_timers.get(session_id)
+        if handle is None:
+            self._inactivity_timers[session_id] = self._timer_wheel.schedule(
+                delay, self._on_inactivity_timer, session_id
+            )
+        else:
+            self._timer_wheel.reschedule(handle, delay)
 
-    async def _cleanup_inactive_sessions_loop(self):
-        """Boucle de nettoyage périodique des sessions inactives."""
-        logger.info(
-            f"Démarrage de la boucle de nettoyage (intervalle: {CLEANUP_INTERVAL_SECONDS}s)"
-        )
-        while self._is_running:
-            try:
-                await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
-                await self._cleanup_inactive_sessions()
-            except asyncio.CancelledError:
-                logger.info("Boucle de nettoyage annulée.")
-                break
-            except Exception as e:
-                logger.error(f"Erreur dans la boucle de nettoyage: {e}", exc_info=True)
+    def _disarm_inactivity_timer(self, session_id: str) -> None:
+        handle = self._inactivity_timers.pop(session_id, None)
+        if handle is not None:
+            handle.cancel()
+
+    async def _on_inactivity_timer(self, session_id: str) -> None:
+        """Échéance d'inactivité : avertit, puis révoque au tour suivant."""
+        session = self.active_sessions.get(session_id)
+        if session is None or not self._is_running:
+            self._inactivity_timers.pop(session_id, None)
+            return
+        try:
+            warning_delay, timeout = self._inactivity_delays()
+            last_activity = getattr(session, "last_activity", None) or session.start_time
+            inactive_for = (datetime.now(timezone.utc) - last_activity).total_seconds()
+
+            if getattr(session, "_warning_sent", False) and inactive_for >= timeout:
+                await self._expire_inactive_session(session_id, inactive_for)
+            elif inactive_for >= warning_delay and not getattr(session, "_warning_sent", False):
+                remaining = max(0, int(timeout - inactive_for))
+                session._warning_sent = True
+                self._arm_inactivity_timer(session_id, remaining)
+                await self._send_inactivity_warning(session_id, remaining)
+            else:
+                # Activité enregistrée sans réarmement : viser la prochaine échéance
+                target = timeout if getattr(session, "_warning_sent", False) else warning_delay
+                self._arm_inactivity_timer(session_id, max(0.0, target - inactive_for))
+        except Exception as e:
+            logger.error(
+                f"Erreur lors du timeout d'inactivité pour session {session_id}: {e}",
+                exc_info=True,
+            )
 
     async def _cleanup_inactive_sessions(self):
-        """Nettoie les sessions inactives depuis plus de INACTIVITY_TIMEOUT_MINUTES minutes."""
+        """Balayage complet des sessions inactives (secours/diagnostic).
+
+        Le chemin normal passe par les timers d'inactivité armés par session.
+        """
         now = datetime.now(timezone.utc)
         timeout_threshold = timedelta(minutes=INACTIVITY_TIMEOUT_MINUTES)
         warning_threshold = timedelta(
@@ -188,72 +234,16 @@ class SessionManager:
 
         # Envoyer des avertissements
         for session_id, duration in sessions_to_warn:
-            try:
-                remaining_seconds = int((timeout_threshold - duration).total_seconds())
-                logger.info(
-                    f"Envoi d'avertissement à la session {session_id} (déconnexion dans {remaining_seconds}s)"
-                )
-
-                # Marquer l'avertissement comme envoyé
-                session = self.active_sessions.get(session_id)  # type: ignore[assignment]
-                if session:
-                    setattr(session, "_warning_sent", True)
-
-                # Envoyer l'avertissement via WebSocket
-                if self.notification_service:
-                    notification_payload = {
-                        "notification_type": "inactivity_warning",
-                        "message": f"Votre session sera déconnectée dans {remaining_seconds} secondes en raison d'inactivité.",
-                        "remaining_seconds": remaining_seconds,
-                        "duration": 5000,  # Durée d'affichage en ms
-                    }
-                    logger.info(
-                        f"[Notification] Envoi notification inactivité à {session_id[:8]}... payload: {notification_payload}"
-                    )
-                    await self.notification_service.send_personal_message(
-                        notification_payload, session_id
-                    )
-                    logger.info(
-                        f"[Notification] Notification inactivité envoyée avec succès à {session_id[:8]}..."
-                    )
-                else:
-                    logger.warning(
-                        f"[Notification] ConnectionManager non disponible pour session {session_id[:8]}..."
-                    )
-
-                # Métrique Prometheus
-                if PROMETHEUS_AVAILABLE:
-                    SESSIONS_WARNING_SENT_TOTAL.inc()
-
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors de l'envoi d'avertissement pour session {session_id}: {e}",
-                    exc_info=True,
-                )
+            session = self.active_sessions.get(session_id)  # type: ignore[assignment]
+            if session:
+                session._warning_sent = True
+            await self._send_inactivity_warning(
+                session_id, int((timeout_threshold - duration).total_seconds())
+            )
 
         # Nettoyer les sessions inactives
         for session_id, duration in sessions_to_cleanup:
-            try:
-                logger.info(
-                    f"Session {session_id} inactive depuis {duration.total_seconds():.0f}s, nettoyage..."
-                )
-                await self.handle_session_revocation(
-                    session_id,
-                    reason="inactivity_timeout",
-                    close_connections=True,
-                    close_code=4408,  # Code personnalisé pour timeout d'inactivité
-                )
-
-                # Métriques Prometheus
-                if PROMETHEUS_AVAILABLE:
-                    SESSIONS_TIMEOUT_TOTAL.inc()
-                    SESSION_INACTIVITY_DURATION.observe(duration.total_seconds())
-
-            except Exception as e:
-                logger.error(
-                    f"Erreur lors du nettoyage de la session {session_id}: {e}",
-                    exc_info=True,
-                )
+            await self._expire_inactive_session(session_id, duration.total_seconds())
 
         # Mettre à jour la métrique du nombre de sessions actives
         if PROMETHEUS_AVAILABLE:
@@ -268,6 +258,68 @@ class SessionManager:
                 f"{len(sessions_to_warn)} avertissement(s) d'inactivité envoyé(s)."
             )
 
+    async def _send_inactivity_warning(self, session_id: str, remaining_seconds: int) -> None:
+        """Prévient le client de la déconnexion imminente."""
+        try:
+            logger.info(
+                f"Envoi d'avertissement à la session {session_id} (déconnexion dans {remaining_seconds}s)"
+            )
+            if self.notification_service:
+                notification_payload = {
+                    "notification_type": "inactivity_warning",
+                    "message": f"Votre session sera déconnectée dans {remaining_seconds} secondes en raison d'inactivité.",
+                    "remaining_seconds": remaining_seconds,
+                    "duration": 5000,  # Durée d'affichage en ms
+                }
+                logger.info(
+                    f"[Notification] Envoi notification inactivité à {session_id[:8]}... payload: {notification_payload}"
+                )
+                await self.notification_service.send_personal_message(
+                    notification_payload, session_id
+                )
+                logger.info(
+                    f"[Notification] Notification inactivité envoyée avec succès à {session_id[:8]}..."
+                )
+            else:
+                logger.warning(
+                    f"[Notification] ConnectionManager non disponible pour session {session_id[:8]}..."
+                )
+
+            # Métrique Prometheus
+            if PROMETHEUS_AVAILABLE:
+                SESSIONS_WARNING_SENT_TOTAL.inc()
+
+        except Exception as e:
+            logger.error(
+                f"Erreur lors de l'envoi d'avertissement pour session {session_id}: {e}",
+                exc_info=True,
+            )
+
+    async def _expire_inactive_session(self, session_id: str, inactive_seconds: float) -> None:
+        """Révoque une session arrivée au bout du délai d'inactivité."""
+        try:
+            logger.info(
+                f"Session {session_id} inactive depuis {inactive_seconds:.0f}s, nettoyage..."
+            )
+            await self.handle_session_revocation(
+                session_id,
+                reason="inactivity_timeout",
+                close_connections=True,
+                close_code=4408,  # Code personnalisé pour timeout d'inactivité
+            )
+
+            # Métriques Prometheus
+            if PROMETHEUS_AVAILABLE:
+                SESSIONS_TIMEOUT_TOTAL.inc()
+                SESSION_INACTIVITY_DURATION.observe(inactive_seconds)
+                SESSIONS_ACTIVE_GAUGE.set(len(self.active_sessions))
+
+        except Exception as e:
+            logger.error(
+                f"Erreur lors du nettoyage de la session {session_id}: {e}",
+                exc_info=True,
+            )
+
     def _update_session_activity(self, session_id: str) -> None:
         """Met à jour le timestamp de dernière activité d'une session."""
         session_id = self.resolve_session_id(session_id)
@@ -277,6 +329,7 @@ class SessionManager:
             # Réinitialiser le flag d'avertissement lors d'une nouvelle activité
             if hasattr(session, "_warning_sent"):
                 session._warning_sent = False
+            self._arm_inactivity_timer(session_id)
 
     async def ensure_session(
         self,
@@ -573,6 +626,7 @@ class SessionManager:
                 session.metadata["thread_id"] = thread_id
                 
                 self.active_sessions[session_id] = session
+                self._arm_inactivity_timer(session_id)
                 if session.user_id:
                     uid = str(session.user_id)
                     self._session_user_cache[session_id] = uid
@@ -662,6 +716,7 @@ class SessionManager:
             }
 
             self.active_sessions[session_id] = session  # On la met en cache actif
+            self._arm_inactivity_timer(session_id)
             if session.user_id:
                 uid = str(session.user_id)
                 self._session_user_cache[session_id] = uid
@@ -1104,6 +1159,7 @@ class SessionManager:
 
     async def finalize_session(self, session_id: str) -> None:
         session_id = self.resolve_session_id(session_id)
+        self._disarm_inactivity_timer(session_id)
         session = self.active_sessions.pop(session_id, None)
         if session:
             if getattr(session, "user_id", None):
@@ -1163,6 +1219,7 @@ class SessionManager:
         if had_session:
             await self.finalize_session(session_id)
         else:
+            self._disarm_inactivity_timer(session_id)
             self._session_threads.pop(session_id, None)
             self._session_users.pop(session_id, None)
             keys_to_remove = [
@@ -0,0 +1,368 @@
+"""
+Roue de temporisation hiérarchique partagée (timeouts de session, rappels,
+TTL des caches mémoire).
+
+Plutôt que chaque composant balaie périodiquement toutes ses entrées, il
+arme un timer par échéance et reçoit un rappel quand elle tombe :
+
+- ``schedule`` / ``reschedule`` / ``cancel`` en O(1) (un timer vit dans un
+  seul seau, un dict ordonné) ;
+- à chaque tick, seul le seau courant du niveau 0 est servi ; les niveaux
+  supérieurs (64 seaux chacun, 64x plus larges) ne sont redistribués
+  (« cascade ») que lorsque leur seau arrive à échéance, et les échéances
+  au-delà du dernier niveau attendent dans un seau de débordement ;
+- une seule tâche asyncio pilote la roue, démarrée paresseusement au
+  premier timer et endormie tant qu'aucun timer n'est armé.
+
+Le travail est donc proportionnel à ce qui expire, pas au nombre d'entrées
+suivies. La granularité est d'un tick (1s par défaut) : un timer ne se
+déclenche jamais en avance, au plus un tick en retard (hors retard de la
+boucle, mesuré par ``lag``).
+
+Les rappels peuvent être synchrones ou des coroutines (lancées en tâche) ;
+leurs exceptions sont journalisées sans arrêter la roue. Sans boucle asyncio
+en cours (code synchrone, tests), les timers restent armés et ``advance()``
+permet de servir les échéances à la main.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import Counter, Gauge
+
+    TIMER_WHEEL_ACTIVE = Gauge(
+        "timer_wheel_active_timers", "Timers armés dans la roue de temporisation"
+    )
+    TIMER_WHEEL_FIRED_TOTAL = Counter(
+        "timer_wheel_fired_total", "Timers déclenchés par la roue de temporisation"
+    )
+    TIMER_WHEEL_LAG_SECONDS = Gauge(
+        "timer_wheel_lag_seconds",
+        "Retard du dernier timer déclenché par rapport à son échéance",
+    )
+    PROMETHEUS_AVAILABLE = True
+except (ImportError, ValueError):
+    PROMETHEUS_AVAILABLE = False
+
+DEFAULT_TICK_SECONDS = 1.0
+DEFAULT_SLOTS = 64
+DEFAULT_LEVELS = 4
+
+_Bucket = Dict["TimerHandle", None]
+
+
+class TimerHandle:
+    """Timer armé dans une ``TimerWheel`` ; ``cancel()`` est idempotent."""
+
+    __slots__ = ("deadline", "expiry_tick", "callback", "args", "_wheel", "_bucket")
+
+    def __init__(
+        self,
+        wheel: "TimerWheel",
+        deadline: float,
+        callback: Callable[..., Any],
+        args: Tuple[Any, ...],
+    ) -> None:
+        self._wheel = wheel
+        self.deadline = deadline
+        self.expiry_tick = 0
+        self.callback = callback
+        self.args = args
+        self._bucket: Optional[_Bucket] = None
+
+    @property
+    def active(self) -> bool:
+        return self._bucket is not None
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self._wheel.clock())
+
+    def cancel(self) -> bool:
+        return self._wheel.cancel(self)
+
+
+class TimerWheel:
+    """Roue hiérarchique ``levels`` x ``slots`` pilotée par une seule tâche."""
+
+    def __init__(
+        self,
+        tick_seconds: float = DEFAULT_TICK_SECONDS,
+        slots: int = DEFAULT_SLOTS,
+        levels: int = DEFAULT_LEVELS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if tick_seconds <= 0 or slots < 2 or levels < 1:
+            raise ValueError("tick_seconds > 0, slots >= 2 et levels >= 1 requis")
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self._origin = clock()
+        self._current_tick = 0
+        self._spans = [slots**level for level in range(levels + 1)]
+        self._wheels: List[List[_Bucket]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: _Bucket = {}
+        self._due: _Bucket = {}
+        self._count = 0
+        self._pending_tasks: Set[asyncio.Task[Any]] = set()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats: Dict[str, Any] = {
+            "scheduled": 0,
+            "rescheduled": 0,
+            "cancelled": 0,
+            "fired": 0,
+            "callback_errors": 0,
+            "ticks": 0,
+            "cascaded": 0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # API
+    # ------------------------------------------------------------------ #
+
+    def schedule(
+        self, delay: float, callback: Callable[..., Any], *args: Any
+    ) -> TimerHandle:
+        """Arme ``callback(*args)`` dans ``delay`` secondes."""
+        handle = TimerHandle(self, self.clock() + max(0.0, delay), callback, args)
+        self._arm(handle)
+        self.stats["scheduled"] += 1
+        return handle
+
+    def reschedule(self, handle: TimerHandle, delay: float) -> TimerHandle:
+        """Déplace l'échéance d'un timer (réarme un timer déjà déclenché/annulé)."""
+        self._disarm(handle)
+        handle.deadline = self.clock() + max(0.0, delay)
+        self._arm(handle)
+        self.stats["rescheduled"] += 1
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        if not self._disarm(handle):
+            return False
+        self.stats["cancelled"] += 1
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Sert toutes les échéances jusqu'à ``now`` ; retourne le nombre de timers déclenchés."""
+        now = self.clock() if now is None else now
+        target = int((now - self._origin) // self.tick_seconds)
+        fired = 0
+        while self._current_tick < target:
+            if self._count == 0:
+                # Rien d'armé : sauter directement au tick courant
+                self._current_tick = target
+                break
+            self._current_tick += 1
+            self.stats["ticks"] += 1
+            self._cascade(self._current_tick)
+            self._move(self._wheels[0][self._current_tick % self.slots], self._due)
+            # Un rappel peut annuler ou réarmer un timer encore dans ``_due``
+            while self._due:
+                handle = next(iter(self._due))
+                self._disarm(handle)
+                self._fire(handle, now)
+                fired += 1
+        return fired
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active_timers": self._count,
+            "overflow": len(self._overflow),
+            "per_level": [
+                sum(len(bucket) for bucket in wheel) for wheel in self._wheels
+            ],
+            "tick_seconds": self.tick_seconds,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    # ------------------------------------------------------------------ #
+    # Tâche pilote
+    # ------------------------------------------------------------------ #
+
+    def start(self) -> None:
+        """Démarre la tâche pilote (sans effet hors boucle asyncio)."""
+        self._ensure_driver()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for pending in list(self._pending_tasks):
+            pending.cancel()
+
+    def _ensure_driver(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            if self._wakeup is not None and self._count:
+                self._wakeup.set()
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        wakeup = self._wakeup
+        assert wakeup is not None
+        while True:
+            try:
+                if self._count == 0:
+                    wakeup.clear()
+                    await wakeup.wait()
+                    continue
+                next_tick_at = self._origin + (self._current_tick + 1) * self.tick_seconds
+                delay = next_tick_at - self.clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.advance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[TimerWheel] Erreur de la tâche pilote: {e}", exc_info=True)
+                await asyncio.sleep(self.tick_seconds)
+
+    # ------------------------------------------------------------------ #
+    # Interne
+    # ------------------------------------------------------------------ #
+
+    def _arm(self, handle: TimerHandle) -> None:
+        if self._count == 0:
+            # Roue vide : recaler le tick courant plutôt que rejouer l'inactivité
+            now_tick = int((self.clock() - self._origin) // self.tick_seconds)
+            self._current_tick = max(self._current_tick, now_tick)
+        expiry = math.ceil((handle.deadline - self._origin) / self.tick_seconds)
+        handle.expiry_tick = max(expiry, self._current_tick + 1)
+        self._place(handle)
+        self._count += 1
+        if PROMETHEUS_AVAILABLE:
+            TIMER_WHEEL_ACTIVE.set(self._count)
+        self._ensure_driver()
+
+    def _disarm(self, handle: TimerHandle) -> bool:
+        bucket = handle._bucket
+        if bucket is None:
+            return False
+        bucket.pop(handle, None)
+        handle._bucket = None
+        self._count -= 1
+        if PROMETHEUS_AVAILABLE:
+            TIMER_WHEEL_ACTIVE.set(self._count)
+        return True
+
+    def _place(self, handle: TimerHandle) -> None:
+        delta = handle.expiry_tick - self._current_tick
+        if delta <= 0:
+            bucket = self._due
+        else:
+            for level in range(self.levels):
+                if delta < self._spans[level + 1]:
+                    slot = (handle.expiry_tick // self._spans[level]) % self.slots
+                    bucket = self._wheels[level][slot]
+                    break
+            else:
+                bucket = self._overflow
+        bucket[handle] = None
+        handle._bucket = bucket
+
+    def _move(self, source: _Bucket, target: _Bucket) -> None:
+        for handle in source:
+            target[handle] = None
+            handle._bucket = target
+        source.clear()
+
+    def _cascade(self, tick: int) -> None:
+        """Redescend les seaux des niveaux supérieurs arrivés à échéance à ``tick``."""
+        if tick % self._spans[self.levels] == 0 and self._overflow:
+            self._redistribute(self._overflow)
+        for level in range(self.levels - 1, 0, -1):
+            if tick % self._spans[level]:
+                continue
+            bucket = self._wheels[level][(tick // self._spans[level]) % self.slots]
+            if bucket:
+                self._redistribute(bucket)
+
+    def _redistribute(self, bucket: _Bucket) -> None:
+        handles = list(bucket)
+        bucket.clear()
+        self.stats["cascaded"] += len(handles)
+        for handle in handles:
+            self._place(handle)
+
+    def _fire(self, handle: TimerHandle, now: float) -> None:
+        # Retard mesuré par rapport au tick d'échéance (hors granularité)
+        tick_at = self._origin + handle.expiry_tick * self.tick_seconds
+        lag_ms = max(0.0, (now - tick_at) * 1000)
+        self.stats["fired"] += 1
+        self.stats["last_lag_ms"] = round(lag_ms, 3)
+        self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], round(lag_ms, 3))
+        if PROMETHEUS_AVAILABLE:
+            TIMER_WHEEL_FIRED_TOTAL.inc()
+            TIMER_WHEEL_LAG_SECONDS.set(lag_ms / 1000)
+        try:
+            result = handle.callback(*handle.args)
+        except Exception as e:
+            self.stats["callback_errors"] += 1
+            logger.error(f"[TimerWheel] Rappel {handle.callback!r} en échec: {e}", exc_info=True)
+            return
+        if inspect.isawaitable(result):
+            self._spawn(result)
+
+    def _spawn(self, awaitable: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            logger.warning("[TimerWheel] Rappel asynchrone ignoré hors boucle asyncio")
+            return
+        task = loop.create_task(awaitable)
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task[Any]) -> None:
+        self._pending_tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.stats["callback_errors"] += 1
+            logger.error(f"[TimerWheel] Rappel asynchrone en échec: {error}", exc_info=error)
+
+
+_timer_wheel: Optional[TimerWheel] = None
+
+
+def get_timer_wheel() -> TimerWheel:
+    """Roue partagée du processus (TIMER_WHEEL_TICK_SECONDS, défaut 1s)."""
+    global _timer_wheel
+    if _timer_wheel is None:
+        tick = float(os.getenv("TIMER_WHEEL_TICK_SECONDS", str(DEFAULT_TICK_SECONDS)))
+        _timer_wheel = TimerWheel(tick_seconds=tick)
+    return _timer_wheel
@@ -2,5 +2,13 @@
 # Tracing module for distributed span tracking
 
 from .trace_manager import TraceManager, SpanStatus, trace_span, get_trace_manager
+from .exporters import OTLPJsonFileExporter, spans_to_otlp
 
-__all__ = ["TraceManager", "SpanStatus", "trace_span", "get_trace_manager"]
+__all__ = [
+    "TraceManager",
+    "SpanStatus",
+    "trace_span",
+    "get_trace_manager",
+    "OTLPJsonFileExporter",
+    "spans_to_otlp",
+]
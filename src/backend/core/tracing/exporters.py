@@ -0,0 +1,160 @@
+# src/backend/core/tracing/exporters.py
+# V1.0 - Export des spans conservés au format OTLP-JSON
+#
+# - spans_to_otlp(): construit un ExportTraceServiceRequest (encodage JSON
+#   OTLP : ids hex, timestamps en nanosecondes sous forme de chaînes) ;
+# - OTLPJsonFileExporter: buffer borné + flusher unique (BufferedFlusher),
+#   une requête OTLP par ligne (JSON lines), rotation vers
+#   ``<path>.1`` au-delà de ``max_bytes``. Le fichier est lisible tel quel par
+#   le receiver ``otlpjsonfile`` de l'OpenTelemetry Collector.
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from ..buffered_flusher import DROP_STATS, BufferedFlusher
+from .trace_manager import Span, SpanStatus
+
+logger = logging.getLogger(__name__)
+
+# SpanKind / StatusCode OTLP
+_SPAN_KIND_INTERNAL = 1
+_STATUS_CODES = {SpanStatus.OK: 1, SpanStatus.ERROR: 2, SpanStatus.TIMEOUT: 2}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    start_ns = int(span.start_time * 1e9)
+    end_ns = int((span.end_time or span.start_time) * 1e9)
+    status: Dict[str, Any] = {"code": _STATUS_CODES.get(span.status, 0)}
+    if span.status is SpanStatus.TIMEOUT:
+        status["message"] = "timeout"
+    return {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent_id or "",
+        "name": span.name,
+        "kind": _SPAN_KIND_INTERNAL,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(end_ns),
+        "attributes": [
+            {"key": str(key), "value": _otlp_value(value)}
+            for key, value in span.attributes.items()
+            if value is not None
+        ],
+        "status": status,
+    }
+
+
+def spans_to_otlp(
+    spans: Sequence[Span], service_name: str = "emergence-backend"
+) -> Dict[str, Any]:
+    """ExportTraceServiceRequest OTLP (JSON) pour un lot de spans."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": service_name}}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "backend.core.tracing"},
+                        "spans": [_otlp_span(span) for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class OTLPJsonFileExporter:
+    """Buffer borné de spans + flusher unique vers un fichier OTLP-JSON lines."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        service_name: str = "emergence-backend",
+        capacity: int = 10_000,
+        batch_size: int = 512,
+        flush_interval_ms: int = 2000,
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.service_name = service_name
+        self.max_bytes = max(1, max_bytes)
+        self._queue: BufferedFlusher[Span] = BufferedFlusher(
+            self._write_batch,
+            name="trace-otlp-exporter",
+            capacity=capacity,
+            batch_size=batch_size,
+            flush_interval=max(1, flush_interval_ms) / 1000.0,
+        )
+        self.stats: Dict[str, int] = {
+            "exported": 0,
+            "written": 0,
+            "dropped_full": 0,
+            "dropped_closed": 0,
+            "dropped_write_error": 0,
+            "rotations": 0,
+        }
+
+    def export(self, spans: Sequence[Span]) -> None:
+        """Ajoute les spans sans bloquer (abandonnés si le buffer est plein)."""
+        for span in spans:
+            refused = self._queue.append(span)
+            if refused is not None:
+                self.stats[DROP_STATS[refused]] += 1
+                continue
+            self.stats["exported"] += 1
+
+    async def _write_batch(self, batch: List[Span]) -> bool:
+        line = json.dumps(spans_to_otlp(batch, self.service_name), separators=(",", ":"))
+        try:
+            await asyncio.to_thread(self._write_line, line)
+        except Exception as e:
+            self.stats["dropped_write_error"] += len(batch)
+            logger.warning(f"[Trace] Export OTLP abandonné ({len(batch)}): {e}")
+            return False
+        self.stats["written"] += len(batch)
+        return True
+
+    async def flush(self) -> int:
+        """Écrit le buffer (une ligne OTLP par lot de ``batch_size`` spans)."""
+        return await self._queue.flush()
+
+    def _write_line(self, line: str) -> None:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(line) > self.max_bytes:
+            os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+            self.stats["rotations"] += 1
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+    async def stop(self) -> None:
+        """Arrête le flusher et vide le buffer (shutdown garanti)."""
+        await self._queue.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._queue), "path": str(self.path)}
+
@@ -1,24 +1,49 @@
 # src/backend/core/tracing/trace_manager.py
-# V1.0 - Distributed tracing for ÉMERGENCE V8
+# V2.0 - Distributed tracing for ÉMERGENCE V8
 #
 # Lightweight OpenTelemetry-style tracing without external dependencies.
-# Tracks spans (retrieval, llm_generate, memory_update, tool_call) with:
-# - trace_id: correlates all spans in a conversation
-# - span_id: unique identifier per span
-# - parent_id: parent span for nested traces
-# - duration: computed from start/end timestamps
+# Tracks spans (chat_turn, retrieval, llm_generate, memory_update, tool_call) with:
+# - trace_id / span_id: entiers (compteur process) en interne ; ids publics
+#   (start_span, to_dict, /api/traces) en hex OTLP (32 / 16 caractères)
+# - parent_id: span parent, propagé par contextvars (suit asyncio.create_task)
+# - duration: mesurée via perf_counter
 # - status: OK, ERROR, TIMEOUT
 #
-# Export to Prometheus metrics (counters, histograms) for Grafana visualization.
+# Rétention :
+# - échantillonnage en tête (TRACE_SAMPLE_RATE) décidé à la racine de la trace ;
+# - échantillonnage en queue : une trace non retenue est gardée en attente
+#   jusqu'à la fin de sa racine, puis conservée si elle est lente
+#   (>= TRACE_SLOW_MS) ou contient une erreur ;
+# - spans conservés dans un ring buffer borné (max_spans) + exporters
+#   optionnels (fichier OTLP-JSON, cf. exporters.py).
+#
+# Export to Prometheus metrics (counters, histograms) for Grafana visualization
+# (tous les spans, échantillonnés ou non).
 
 import asyncio
+import itertools
 import logging
+import os
+import random
 import time
-import uuid
+import weakref
+from contextlib import contextmanager
 from contextvars import ContextVar
 from enum import Enum
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, TypeVar, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    TypeVar,
+    Union,
+    cast,
+)
 
 # Import metrics recorder (lazy import pour éviter circular dependency)
 try:
@@ -29,11 +54,80 @@ except ImportError:
     METRICS_AVAILABLE = False
     record_span = None  # type: ignore
 
+from backend.core.event_store import record_event
+
 logger = logging.getLogger(__name__)
 
-# Context var pour propager trace_id/span_id à travers async calls
-_current_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
-_current_span_id: ContextVar[Optional[str]] = ContextVar("span_id", default=None)
+# Préfixe aléatoire par process : rend les trace_id OTLP (128 bits) uniques
+# entre redémarrages / workers alors que les ids internes sont des compteurs.
+PROCESS_TRACE_PREFIX = random.getrandbits(64)
+
+# Compteurs partagés par toutes les instances (ids jamais réutilisés)
+_span_ids = itertools.count(1)
+_trace_ids = itertools.count(1)
+
+# Span courant du contexte : propagé automatiquement aux tâches asyncio
+# (create_task / gather copient le contexte) et restauré à la fin du span.
+_current_span: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+SpanId = Union[int, str]
+
+_ID_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def format_trace_id(trace_id: int) -> str:
+    """trace_id public : hex 128 bits OTLP (préfixe process + compteur)."""
+    return f"{PROCESS_TRACE_PREFIX:016x}{trace_id & _ID_MASK:016x}"
+
+
+def format_span_id(span_id: SpanId) -> str:
+    """span_id public : hex 64 bits OTLP (un id texte passe tel quel)."""
+    if isinstance(span_id, int):
+        return f"{span_id & _ID_MASK:016x}"
+    return span_id
+
+
+def _span_key(span_id: SpanId) -> SpanId:
+    """Clé interne d'un span actif depuis son id public (hex) ou entier."""
+    if isinstance(span_id, str):
+        try:
+            return int(span_id, 16)
+        except ValueError:
+            return span_id
+    return span_id
+
+# Span courant par tâche asyncio, lisible depuis un autre thread (profiler :
+# Task.get_context() n'existe qu'à partir de Python 3.12). None = désactivé.
+_task_spans: Optional["weakref.WeakKeyDictionary[asyncio.Task[Any], Span]"] = None
+
+
+def track_task_spans(enabled: bool) -> None:
+    """Active / désactive le suivi du span courant par tâche (profiler)."""
+    global _task_spans
+    _task_spans = weakref.WeakKeyDictionary() if enabled else None
+
+
+def task_span(task: "asyncio.Task[Any]") -> Optional["Span"]:
+    """Span courant d'une tâche (None si inconnu ou suivi désactivé)."""
+    spans = _task_spans
+    return spans.get(task) if spans is not None else None
+
+
+def _set_current_span(span: Optional["Span"]) -> None:
+    _current_span.set(span)
+    spans = _task_spans
+    if spans is None:
+        return
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return  # hors boucle (thread worker)
+    if task is None:
+        return
+    if span is None:
+        spans.pop(task, None)
+    else:
+        spans[task] = span
 
 
 class SpanStatus(str, Enum):
@@ -48,44 +142,83 @@ class Span:
     """
     Représente un span de trace (une opération trackée).
 
+    Les ids sont des entiers en interne (``_span_id``, ``_trace_id``,
+    ``_parent_id``) et exposés en hex OTLP par les propriétés.
+
     Attributes:
-        span_id: Identifiant unique du span
+        span_id: Identifiant hex du span (16 caractères, unique dans le process)
         name: Nom du span (ex: "retrieval", "llm_generate")
-        trace_id: ID de la trace parente (corrélation)
-        parent_id: ID du span parent (si nested)
+        trace_id: ID hex de la trace (32 caractères, corrélation)
+        parent_id: ID hex du span parent (si nested)
         start_time: Timestamp de début (seconds since epoch)
         end_time: Timestamp de fin (seconds since epoch)
-        duration: Durée en secondes (end_time - start_time)
+        duration: Durée en secondes (perf_counter)
         status: État final (OK, ERROR, TIMEOUT)
         attributes: Métadonnées additionnelles (agent, model, tokens, etc.)
+        sampled: Décision d'échantillonnage en tête de la trace
     """
 
+    __slots__ = (
+        "_span_id",
+        "name",
+        "_trace_id",
+        "_parent_id",
+        "start_time",
+        "end_time",
+        "duration",
+        "status",
+        "attributes",
+        "sampled",
+        "_started",
+        "_previous",
+    )
+
     def __init__(
         self,
         name: str,
-        trace_id: str,
-        parent_id: Optional[str] = None,
+        trace_id: int,
+        parent_id: Optional[SpanId] = None,
         attributes: Optional[Dict[str, Any]] = None,
+        *,
+        span_id: Optional[int] = None,
+        sampled: bool = True,
     ):
-        self.span_id = str(uuid.uuid4())
+        self._span_id = span_id if span_id is not None else next(_span_ids)
         self.name = name
-        self.trace_id = trace_id
-        self.parent_id = parent_id
+        self._trace_id = trace_id
+        self._parent_id = parent_id
         self.start_time = time.time()
         self.end_time: Optional[float] = None
         self.duration: Optional[float] = None
         self.status = SpanStatus.OK
         self.attributes = attributes or {}
+        self.sampled = sampled
+        self._started = time.perf_counter()
+        self._previous: Optional[Span] = None
+
+    @property
+    def span_id(self) -> str:
+        return format_span_id(self._span_id)
+
+    @property
+    def trace_id(self) -> str:
+        return format_trace_id(self._trace_id)
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        if self._parent_id is None:
+            return None
+        return format_span_id(self._parent_id)
 
     def end(self, status: SpanStatus = SpanStatus.OK) -> None:
         """Termine le span et calcule la durée."""
         if self.end_time is None:
-            self.end_time = time.time()
-            self.duration = self.end_time - self.start_time
+            self.duration = time.perf_counter() - self._started
+            self.end_time = self.start_time + self.duration
             self.status = status
 
     def to_dict(self) -> Dict[str, Any]:
-        """Export le span en dict pour logs structurés / export."""
+        """Export le span en dict pour logs structurés / export (ids hex)."""
         return {
             "span_id": self.span_id,
             "name": self.name,
@@ -99,12 +232,78 @@ class Span:
         }
 
 
+class SpanExporter(Protocol):
+    """Reçoit les spans conservés (non bloquant : bufferiser puis écrire)."""
+
+    def export(self, spans: Sequence[Span]) -> None: ...
+
+    async def stop(self) -> None: ...
+
+
+class _SpanRing:
+    """Ring buffer de spans terminés : append O(1), lecture du plus récent."""
+
+    __slots__ = ("_items", "_next", "_size")
+
+    def __init__(self, capacity: int) -> None:
+        self._items: List[Optional[Span]] = [None] * max(1, capacity)
+        self._next = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._items)
+
+    def append(self, span: Span) -> None:
+        self._items[self._next] = span
+        self._next = (self._next + 1) % len(self._items)
+        if self._size < len(self._items):
+            self._size += 1
+
+    def recent(self, limit: Optional[int] = None) -> List[Span]:
+        """Spans du plus récent au plus ancien."""
+        count = self._size if limit is None else max(0, min(limit, self._size))
+        capacity = len(self._items)
+        return [
+            cast(Span, self._items[(self._next - 1 - i) % capacity])
+            for i in range(count)
+        ]
+
+    def resize(self, capacity: int) -> None:
+        kept = self.recent(capacity)[::-1]
+        self._items = [None] * max(1, capacity)
+        self._next = 0
+        self._size = 0
+        for span in kept:
+            self.append(span)
+
+    def clear(self) -> None:
+        self._items = [None] * len(self._items)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _TraceState:
+    """Trace dont la racine est active : décision de tête + spans en attente."""
+
+    __slots__ = ("root_id", "sampled", "error", "pending")
+
+    def __init__(self, root_id: int, sampled: bool) -> None:
+        self.root_id = root_id
+        self.sampled = sampled
+        self.error = False
+        self.pending: List[Span] = []
+
+
 class TraceManager:
     """
     Gestionnaire de traces distribué (léger, sans OpenTelemetry).
 
-    Conserve les spans en mémoire (FIFO, max 1000 par défaut).
-    Expose les spans pour export Prometheus ou logs structurés.
+    Conserve les spans retenus dans un ring buffer (max 1000 par défaut).
+    Expose les spans pour export Prometheus, logs structurés ou OTLP-JSON.
 
     Usage:
         trace_mgr = TraceManager()
@@ -117,55 +316,119 @@ class TraceManager:
         # Terminer le span
         trace_mgr.end_span(span_id, status="OK")
 
+        # Ou en context manager (ERROR si exception)
+        with trace_mgr.span("retrieval.vector_query", agent="AnimA"):
+            ...
+
         # Export pour Prometheus
         spans = trace_mgr.export()
     """
 
-    def __init__(self, max_spans: int = 1000):
-        self._spans: Dict[str, Span] = {}
-        self._completed_spans: List[Span] = []
-        self._max_spans = max_spans
+    def __init__(
+        self,
+        max_spans: int = 1000,
+        *,
+        sample_rate: float = 1.0,
+        slow_ms: float = 8000.0,
+        max_pending_traces: int = 500,
+        exporters: Optional[List[SpanExporter]] = None,
+    ):
+        self._spans: Dict[SpanId, Span] = {}
+        self._completed = _SpanRing(max_spans)
+        self._traces: Dict[int, _TraceState] = {}
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.slow_ms = slow_ms
+        self.max_pending_traces = max(1, max_pending_traces)
+        self.exporters: List[SpanExporter] = list(exporters or [])
+        self.stats: Dict[str, int] = {
+            "traces_started": 0,
+            "traces_sampled": 0,
+            "traces_tail_kept": 0,
+            "spans_kept": 0,
+            "spans_dropped": 0,
+            "pending_evicted": 0,
+        }
+
+    @property
+    def _max_spans(self) -> int:
+        return self._completed.capacity
+
+    @_max_spans.setter
+    def _max_spans(self, value: int) -> None:
+        self._completed.resize(value)
 
     def start_span(
         self,
         name: str,
-        parent_id: Optional[str] = None,
+        parent_id: Optional[SpanId] = None,
         attrs: Optional[Dict[str, Any]] = None,
+        *,
+        new_trace: bool = False,
     ) -> str:
         """
         Démarre un nouveau span.
 
         Args:
             name: Nom du span (ex: "retrieval", "llm_generate")
-            parent_id: ID du span parent (si nested)
+            parent_id: ID du span parent (défaut : span courant du contexte)
             attrs: Attributs supplémentaires (agent, model, tokens, etc.)
+            new_trace: Force une nouvelle trace (racine d'un tour de chat)
 
         Returns:
-            span_id: Identifiant unique du span créé
+            span_id: Identifiant public (hex) du span créé, celui de ``to_dict``
         """
-        # Récupère trace_id du contexte ou génère-en un nouveau
-        trace_id = _current_trace_id.get()
-        if trace_id is None:
-            trace_id = str(uuid.uuid4())
-            _current_trace_id.set(trace_id)
-
-        # Si pas de parent_id fourni, utilise le span courant comme parent
-        if parent_id is None:
-            parent_id = _current_span_id.get()
-
-        span = Span(name=name, trace_id=trace_id, parent_id=parent_id, attributes=attrs)
-        self._spans[span.span_id] = span
+        parent: Optional[Span] = None
+        if parent_id is not None:
+            parent = self._spans.get(_span_key(parent_id))
+        if parent is None and not new_trace:
+            current = _current_span.get()
+            # Parent du contexte valable seulement si sa trace est encore
+            # ouverte dans ce manager (sinon : contexte périmé → nouvelle trace)
+            if current is not None and current._trace_id in self._traces:
+                parent = current
+
+        span_id = next(_span_ids)
+        if parent is not None:
+            trace_id, sampled = parent._trace_id, parent.sampled
+            parent_id = parent._span_id
+        else:
+            trace_id = next(_trace_ids)
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+            self._open_trace(trace_id, span_id, sampled)
+
+        span = Span(
+            name,
+            trace_id,
+            parent_id,
+            attrs,
+            span_id=span_id,
+            sampled=sampled,
+        )
+        span._previous = _current_span.get()
+        self._spans[span_id] = span
 
-        # Propage le span_id dans le contexte pour nested spans
-        _current_span_id.set(span.span_id)
+        # Propage le span dans le contexte pour nested spans / tâches filles
+        _set_current_span(span)
 
         logger.debug(
-            f"[Trace] Started span: {name} (span_id={span.span_id}, trace_id={trace_id})"
+            f"[Trace] Started span: {name} (span_id={span_id}, trace_id={trace_id})"
         )
 
-        return span.span_id
-
-    def end_span(self, span_id: str, status: str = "OK") -> None:
+        return format_span_id(span_id)
+
+    def _open_trace(self, trace_id: int, root_id: int, sampled: bool) -> None:
+        self.stats["traces_started"] += 1
+        if sampled:
+            self.stats["traces_sampled"] += 1
+        self._traces[trace_id] = _TraceState(root_id, sampled)
+        while len(self._traces) > self.max_pending_traces:
+            # Racine jamais terminée (fuite) : on libère la plus ancienne
+            oldest = next(iter(self._traces))
+            evicted = self._traces.pop(oldest)
+            self.stats["pending_evicted"] += 1
+            self.stats["spans_dropped"] += len(evicted.pending)
+
+    def end_span(self, span_id: SpanId, status: str = "OK") -> None:
         """
         Termine un span existant.
 
@@ -173,7 +436,7 @@ class TraceManager:
             span_id: ID du span à terminer
             status: État final ("OK", "ERROR", "TIMEOUT")
         """
-        span = self._spans.get(span_id)
+        span = self._spans.pop(_span_key(span_id), None)
         if span is None:
             logger.warning(f"[Trace] Attempted to end unknown span: {span_id}")
             return
@@ -186,34 +449,90 @@ class TraceManager:
             span_status = SpanStatus.OK
 
         span.end(status=span_status)
+        duration = span.duration or 0.0
 
-        # Déplace vers completed_spans
-        self._completed_spans.append(span)
-        del self._spans[span_id]
+        # Restaure le contexte d'avant le span (seulement si c'est encore lui
+        # le span courant : fin dans une autre tâche / hors ordre)
+        if _current_span.get() is span:
+            _set_current_span(span._previous)
+        span._previous = None
 
-        # FIFO: limite le buffer
-        if len(self._completed_spans) > self._max_spans:
-            self._completed_spans.pop(0)
+        self._retain(span)
 
         logger.debug(
-            f"[Trace] Ended span: {span.name} (duration={span.duration:.3f}s, status={status})"
+            f"[Trace] Ended span: {span.name} (duration={duration:.3f}s, status={status})"
         )
 
         # Export vers Prometheus metrics
-        if METRICS_AVAILABLE and span.duration is not None:
+        if METRICS_AVAILABLE:
             agent = span.attributes.get("agent", "unknown")
             record_span(
                 span_name=span.name,
                 agent=str(agent),
                 status=span.status.value,
-                duration=span.duration,
+                duration=duration,
             )
 
-        # Restaure le contexte parent (si nested)
-        if span.parent_id:
-            _current_span_id.set(span.parent_id)
+        # Magasin d'événements local (latences par agent sans Prometheus)
+        record_event(
+            "span",
+            name=span.name,
+            agent=span.attributes.get("agent", "unknown"),
+            status=span.status.value,
+            duration_ms=duration * 1000,
+        )
+
+    def _retain(self, span: Span) -> None:
+        """Échantillonnage : ring buffer direct, attente de la racine, ou rejet."""
+        state = self._traces.get(span._trace_id)
+        failed = span.status is not SpanStatus.OK
+        if state is not None and failed:
+            state.error = True
+
+        if span.sampled:
+            self._keep([span])
+        elif state is not None:
+            state.pending.append(span)
+        elif failed or (span.duration or 0.0) * 1000 >= self.slow_ms:
+            # Span tardif d'une trace déjà décidée : gardé s'il est notable
+            self._keep([span])
         else:
-            _current_span_id.set(None)
+            self.stats["spans_dropped"] += 1
+
+        if state is None or state.root_id != span._span_id:
+            return
+        # Fin de la racine : décision de queue pour les traces non retenues
+        del self._traces[span._trace_id]
+        if state.sampled:
+            return
+        if state.error or (span.duration or 0.0) * 1000 >= self.slow_ms:
+            self.stats["traces_tail_kept"] += 1
+            self._keep(state.pending)
+        else:
+            self.stats["spans_dropped"] += len(state.pending)
+
+    def _keep(self, spans: List[Span]) -> None:
+        for span in spans:
+            self._completed.append(span)
+        self.stats["spans_kept"] += len(spans)
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.warning(f"[Trace] Exporter {type(exporter).__name__} failed: {e}")
+
+    @contextmanager
+    def span(
+        self, name: str, *, new_trace: bool = False, **attrs: Any
+    ) -> Iterator[str]:
+        """Span en context manager : status ERROR si une exception traverse."""
+        span_id = self.start_span(name, attrs=attrs, new_trace=new_trace)
+        try:
+            yield span_id
+        except BaseException:
+            self.end_span(span_id, status="ERROR")
+            raise
+        self.end_span(span_id, status="OK")
 
     def export(self, limit: int = 100) -> List[Dict[str, Any]]:
         """
@@ -225,18 +544,116 @@ class TraceManager:
         Returns:
             Liste de dicts représentant les spans (du plus récent au plus ancien)
         """
-        # Retourne les `limit` derniers spans (reversed = plus récents d'abord)
-        recent_spans = self._completed_spans[-limit:][::-1]
-        return [span.to_dict() for span in recent_spans]
+        return [span.to_dict() for span in self._completed.recent(limit)]
+
+    def latency_breakdown(
+        self,
+        root_name: Optional[str] = None,
+        slow_ms: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Décompose la latence des traces conservées par étape (spans enfants).
 
-    def get_span(self, span_id: str) -> Optional[Span]:
+        Pour chaque span ``root_name`` (défaut : racines de trace), agrège la
+        durée de ses enfants directs par nom d'étape, sur toutes les traces et
+        sur les lentes (>= ``slow_ms``), et compte l'étape dominante de chaque
+        trace lente. ``self`` = temps de la racine non couvert par ses enfants.
+        """
+        slow_ms = self.slow_ms if slow_ms is None else slow_ms
+        spans = self._completed.recent()
+        children: Dict[SpanId, List[Span]] = {}
+        for span in spans:
+            if span._parent_id is not None:
+                children.setdefault(span._parent_id, []).append(span)
+
+        roots = [
+            s
+            for s in spans
+            if (s.name == root_name if root_name else s._parent_id is None)
+            and s.duration is not None
+        ]
+        all_stages: Dict[str, List[float]] = {}
+        slow_stages: Dict[str, List[float]] = {}
+        dominant: Dict[str, int] = {}
+        root_total = slow_total = 0.0
+        slow_count = 0
+
+        for root in roots:
+            root_ms = (root.duration or 0.0) * 1000
+            per_stage: Dict[str, float] = {}
+            for child in children.get(root._span_id, []):
+                per_stage[child.name] = (
+                    per_stage.get(child.name, 0.0) + (child.duration or 0.0) * 1000
+                )
+            per_stage["self"] = max(0.0, root_ms - sum(per_stage.values()))
+            is_slow = root_ms >= slow_ms
+            root_total += root_ms
+            if is_slow:
+                slow_count += 1
+                slow_total += root_ms
+                top = max(per_stage.items(), key=lambda item: item[1])[0]
+                dominant[top] = dominant.get(top, 0) + 1
+            for stage, ms in per_stage.items():
+                all_stages.setdefault(stage, []).append(ms)
+                if is_slow:
+                    slow_stages.setdefault(stage, []).append(ms)
+
+        return {
+            "root": root_name,
+            "traces": len(roots),
+            "slow_ms": slow_ms,
+            "slow_traces": slow_count,
+            "stages": _summarize_stages(all_stages, root_total),
+            "slow_stages": _summarize_stages(slow_stages, slow_total),
+            "dominant_in_slow": dict(
+                sorted(dominant.items(), key=lambda item: item[1], reverse=True)
+            ),
+        }
+
+    def get_span(self, span_id: SpanId) -> Optional[Span]:
         """Récupère un span actif par ID (pour debugging)."""
-        return self._spans.get(span_id)
+        return self._spans.get(_span_key(span_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "active_spans": len(self._spans),
+            "open_traces": len(self._traces),
+            "buffered_spans": len(self._completed),
+            "capacity": self._completed.capacity,
+        }
 
     def clear(self) -> None:
         """Nettoie tous les spans (utile pour tests)."""
         self._spans.clear()
-        self._completed_spans.clear()
+        self._traces.clear()
+        self._completed.clear()
+
+    async def shutdown(self) -> None:
+        """Vide les exporters (appelé au shutdown du lifespan)."""
+        for exporter in self.exporters:
+            try:
+                await exporter.stop()
+            except Exception as e:
+                logger.warning(f"[Trace] Exporter {type(exporter).__name__} stop failed: {e}")
+
+
+def _summarize_stages(
+    stages: Dict[str, List[float]], total_ms: float
+) -> Dict[str, Dict[str, float]]:
+    summary: Dict[str, Dict[str, float]] = {}
+    for stage, values in stages.items():
+        values.sort()
+        stage_total = sum(values)
+        summary[stage] = {
+            "count": len(values),
+            "avg_ms": round(stage_total / len(values), 3),
+            "p95_ms": round(values[min(len(values) - 1, int(0.95 * len(values)))], 3),
+            "share": round(stage_total / total_ms, 4) if total_ms else 0.0,
+        }
+    return dict(sorted(summary.items(), key=lambda item: item[1]["share"], reverse=True))
 
 
 # Singleton global (accessible via get_trace_manager)
@@ -244,10 +661,32 @@ _global_trace_manager: Optional[TraceManager] = None
 
 
 def get_trace_manager() -> TraceManager:
-    """Retourne le TraceManager global (singleton)."""
+    """
+    Retourne le TraceManager global (singleton).
+
+    Env: TRACE_MAX_SPANS (1000), TRACE_SAMPLE_RATE (1.0), TRACE_SLOW_MS (8000),
+    TRACE_EXPORT_PATH (fichier OTLP-JSON lines, désactivé si vide),
+    TRACE_EXPORT_MAX_MB (50, rotation vers ``.1``).
+    """
     global _global_trace_manager
     if _global_trace_manager is None:
-        _global_trace_manager = TraceManager()
+        exporters: List[SpanExporter] = []
+        export_path = os.getenv("TRACE_EXPORT_PATH", "").strip()
+        if export_path:
+            from .exporters import OTLPJsonFileExporter
+
+            exporters.append(
+                OTLPJsonFileExporter(
+                    export_path,
+                    max_bytes=int(float(os.getenv("TRACE_EXPORT_MAX_MB", "50")) * 1024 * 1024),
+                )
+            )
+        _global_trace_manager = TraceManager(
+            max_spans=int(os.getenv("TRACE_MAX_SPANS", "1000")),
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+            slow_ms=float(os.getenv("TRACE_SLOW_MS", "8000")),
+            exporters=exporters,
+        )
     return _global_trace_manager
 
 
@@ -8,18 +8,23 @@
 # - Reduced error noise in production logs
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional, Callable, cast
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable, cast
 
 from fastapi import APIRouter, WebSocket, HTTPException
 from starlette.websockets import WebSocketDisconnect
 
 from .session_manager import SessionManager
 from .ws_outbox import WsOutbox
+from backend.core.event_store import record_event
 from backend.core.interfaces import NotificationService
 from backend.shared import dependencies  # auth WS (allowlist + sub=uid)
 
 logger = logging.getLogger(__name__)
 
+# Deltas de streaming : trop nombreux pour le magasin d'événements local
+_UNRECORDED_WS_TYPES = frozenset({"ws:chat_stream_chunk"})
+
 
 class ConnectionManager(NotificationService):
     def __init__(self, session_manager: SessionManager):
@@ -27,6 +32,8 @@ class ConnectionManager(NotificationService):
         # Map WebSocket -> WsOutbox
         self.outboxes: Dict[WebSocket, WsOutbox] = {}
         self.session_manager = session_manager
+        # Appelés quand le dernier client d'une session se déconnecte
+        self._disconnect_listeners: List[Callable[[str], Awaitable[None]]] = []
 
         # 🆕 Handshake handler for agent-specific context sync
         self.handshake_handler = None
@@ -88,6 +95,7 @@ class ConnectionManager(NotificationService):
         *,
         client_session_id: Optional[str] = None,
     ) -> str:
+        connect_started = time.perf_counter()
         await self._accept_with_subprotocol(websocket)
 
         history_limit = 200
@@ -191,6 +199,14 @@ class ConnectionManager(NotificationService):
             await self.disconnect(session_id, websocket)
             return session_id
 
+        record_event(
+            "ws",
+            event="connect",
+            outcome="new_session" if first_connection else "existing_session",
+            duration_ms=(time.perf_counter() - connect_started) * 1000,
+            connections=len(self.active_connections.get(session_id, [])),
+        )
+
         try:
             history_export = self.session_manager.export_history_for_transport(
                 session_id, limit=history_limit
@@ -222,6 +238,13 @@ class ConnectionManager(NotificationService):
 
         return session_id
 
+    def add_disconnect_listener(
+        self, listener: Callable[[str], Awaitable[None]]
+    ) -> None:
+        """Enregistre un callback async appelé avec l'id de session sans client."""
+        if listener not in self._disconnect_listeners:
+            self._disconnect_listeners.append(listener)
+
     def _resolve_session_id(self, session_id: str) -> str:
         resolver = getattr(self.session_manager, "resolve_session_id", None)
         if callable(resolver):
@@ -244,10 +267,22 @@ class ConnectionManager(NotificationService):
         conns = self.active_connections.get(resolved_id, [])
         if websocket in conns:
             conns.remove(websocket)
+        record_event(
+            "ws",
+            event="disconnect",
+            outcome="last_client" if not conns else "client",
+            connections=len(conns),
+        )
         if not conns:
             if resolved_id in self.active_connections:
                 del self.active_connections[resolved_id]
 
+            for listener in list(self._disconnect_listeners):
+                try:
+                    await listener(resolved_id)
+                except Exception as exc:  # pragma: no cover - logging only
+                    logger.warning("Disconnect listener failed (%s): %s", resolved_id, exc)
+
             async def _finalize() -> None:
                 try:
                     await self.session_manager.finalize_session(resolved_id)
@@ -283,6 +318,8 @@ class ConnectionManager(NotificationService):
         """
         resolved_id = self._resolve_session_id(session_id)
         connections = self.active_connections.get(resolved_id, [])
+        started = time.perf_counter()
+        outcome = "sent" if connections else "no_connection"
         for ws in list(connections):
             try:
                 # 🆕 Envoyer via WsOutbox au lieu de ws.send_json()
@@ -296,6 +333,7 @@ class ConnectionManager(NotificationService):
                     )
                     await ws.send_json(message)
             except WebSocketDisconnect as exc:
+                outcome = "disconnected"
                 logger.info(
                     "Client disconnected during send (session=%s, code=%s)",
                     resolved_id,
@@ -304,6 +342,7 @@ class ConnectionManager(NotificationService):
                 await self.disconnect(resolved_id, ws)
             except RuntimeError as exc:
                 # Connection lost during send (abrupt disconnection)
+                outcome = "disconnected"
                 logger.info(
                     "Client connection lost during send (session=%s): %s",
                     resolved_id,
@@ -312,6 +351,7 @@ class ConnectionManager(NotificationService):
                 await self.disconnect(resolved_id, ws)
             except Exception as exc:
                 # Unexpected error during send
+                outcome = "error"
                 logger.error(
                     "Unexpected send error (session=%s): %s",
                     resolved_id,
@@ -320,6 +360,16 @@ class ConnectionManager(NotificationService):
                 )
                 await self.disconnect(resolved_id, ws)
 
+        message_type = message.get("type") if isinstance(message, dict) else None
+        if message_type not in _UNRECORDED_WS_TYPES:
+            record_event(
+                "ws",
+                event=message_type or "unknown",
+                outcome=outcome,
+                duration_ms=(time.perf_counter() - started) * 1000,
+                connections=len(connections),
+            )
+
     async def send_system_message(
         self, session_id: str, payload: dict[str, Any]
     ) -> None:
@@ -0,0 +1,495 @@
+"""
+Séparation passerelle / workers pour la génération des réponses d'agents.
+
+- ``GenerationGateway`` (processus web) : enfile un ``GenerationJob`` par
+  tour d'agent, relaie les événements publiés par les workers vers le
+  ``ConnectionManager`` propriétaire des WebSockets, et publie une
+  annulation quand le dernier client d'une session se déconnecte.
+- ``GenerationWorker`` : N slots qui prennent des tours dans la file et
+  exécutent ``ChatService._process_agent_response_stream`` (RAG, mémoire,
+  streaming, fallback entre providers) avec un ``RelayConnectionManager`` :
+  chaque message WebSocket devient un événement sur le bus. Un worker ne
+  prend un tour que s'il a un slot libre (backpressure naturelle).
+
+Modes (env ``CHAT_GENERATION_MODE``) :
+- ``inline`` (défaut) : comportement historique, génération dans la tâche web ;
+- ``local`` : bus en mémoire + workers dans le processus web ;
+- ``redis`` : bus Redis, workers lancés à part
+  (``python -m backend.features.chat.generation --concurrency 8``), autant de
+  processus que nécessaire.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from backend.features.chat.generation_bus import (
+    GenerationJob,
+    GenerationQueueFull,
+    InProcessGenerationBus,
+    generation_bus_from_env,
+)
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    _GEN_INFLIGHT = Gauge(
+        "chat_generation_inflight", "Agent turns currently generated by this worker"
+    )
+    _GEN_WAIT = Histogram(
+        "chat_generation_wait_seconds",
+        "Time between enqueue and start of an agent turn",
+        buckets=[0.05, 0.1, 0.25, 0.5, 1, 2, 5, 15, 60],
+    )
+    _GEN_JOBS = Counter(
+        "chat_generation_jobs_total",
+        "Agent turns by outcome (enqueued, rejected, completed, failed, cancelled)",
+        ["outcome"],
+    )
+except (ImportError, ValueError):
+    _GEN_INFLIGHT = None  # type: ignore[assignment]
+    _GEN_WAIT = None  # type: ignore[assignment]
+    _GEN_JOBS = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+MAX_REMEMBERED_CANCELS = 10_000
+# Messages d'historique joints à un tour envoyé à un worker distant
+HISTORY_SNAPSHOT_LIMIT = 200
+
+
+def _count(outcome: str) -> None:
+    if _GEN_JOBS is not None:
+        _GEN_JOBS.labels(outcome=outcome).inc()
+
+
+class RelayConnectionManager:
+    """
+    Remplaçant du ``ConnectionManager`` côté worker : publie les messages sur
+    le canal de la passerelle propriétaire au lieu d'écrire sur un WebSocket.
+    """
+
+    def __init__(self, bus: InProcessGenerationBus, job: GenerationJob) -> None:
+        self.bus = bus
+        self.job = job
+        self.channel = bus.events_channel(job.reply_to)
+
+    async def _publish(self, kind: str, **fields: Any) -> None:
+        await self.bus.publish(
+            self.channel,
+            {
+                "kind": kind,
+                "job_id": self.job.job_id,
+                "session_id": self.job.session_id,
+                **fields,
+            },
+        )
+
+    async def send_personal_message(self, message: Dict[str, Any], session_id: str) -> None:
+        await self._publish("message", message=message)
+
+    async def send_agent_hello(
+        self, session_id: str, agent_id: str, model: str, provider: str, user_id: str
+    ) -> None:
+        await self._publish(
+            "hello",
+            hello={
+                "agent_id": agent_id,
+                "model": model,
+                "provider": provider,
+                "user_id": user_id,
+            },
+        )
+
+    async def send_done(self, status: str) -> None:
+        await self._publish("done", status=status)
+
+
+class GenerationWorker:
+    """Slots de génération alimentés par la file du bus."""
+
+    def __init__(
+        self,
+        bus: InProcessGenerationBus,
+        chat_service: Any,
+        concurrency: int = 4,
+        poll_timeout: float = 1.0,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.bus = bus
+        self.chat_service = chat_service
+        self.concurrency = max(1, concurrency)
+        self.poll_timeout = poll_timeout
+        self.worker_id = worker_id or f"gen-worker-{uuid.uuid4().hex[:8]}"
+        self.running = False
+        self._tasks: List[asyncio.Task[None]] = []
+        self._inflight: Dict[str, asyncio.Task[None]] = {}
+        self._cancelled: "OrderedDict[str, None]" = OrderedDict()
+        self._cancel_sub: Any = None
+        self.stats = {"completed": 0, "failed": 0, "cancelled": 0}
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._cancel_sub = await self.bus.subscribe(self.bus.cancel_channel)
+        self._tasks = [asyncio.create_task(self._cancel_listener())]
+        self._tasks += [
+            asyncio.create_task(self._slot(i)) for i in range(self.concurrency)
+        ]
+        logger.info(
+            f"[Generation] Worker {self.worker_id} démarré ({self.concurrency} slots)"
+        )
+
+    async def stop(self) -> None:
+        self.running = False
+        for task in list(self._inflight.values()) + self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._inflight.values(), return_exceptions=True)
+        self._tasks = []
+        if self._cancel_sub is not None:
+            await self._cancel_sub.close()
+            self._cancel_sub = None
+        logger.info(f"[Generation] Worker {self.worker_id} arrêté: {self.stats}")
+
+    def _remember_cancel(self, job_id: str) -> None:
+        self._cancelled[job_id] = None
+        while len(self._cancelled) > MAX_REMEMBERED_CANCELS:
+            self._cancelled.popitem(last=False)
+
+    async def _cancel_listener(self) -> None:
+        async for event in self._cancel_sub:
+            for job_id in event.get("job_ids") or []:
+                self._remember_cancel(job_id)
+                task = self._inflight.get(job_id)
+                if task is not None:
+                    task.cancel()
+
+    async def _slot(self, slot: int) -> None:
+        while self.running:
+            try:
+                job = await self.bus.dequeue(self.poll_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Generation] Slot {slot}: lecture file impossible: {e}")
+                await asyncio.sleep(self.poll_timeout)
+                continue
+            if job is None:
+                continue
+            if job.job_id in self._cancelled:
+                self.stats["cancelled"] += 1
+                _count("cancelled")
+                continue
+            if _GEN_WAIT is not None:
+                _GEN_WAIT.observe(max(0.0, time.time() - job.enqueued_at))
+            task = asyncio.create_task(self._run(job))
+            self._inflight[job.job_id] = task
+            try:
+                # wait() plutôt que await : l'annulation du tour ne doit pas
+                # remonter dans le slot
+                await asyncio.wait({task})
+            finally:
+                self._inflight.pop(job.job_id, None)
+
+    async def _ensure_session(self, job: GenerationJob) -> None:
+        """
+        Hors processus web, la session est rechargée depuis la BDD puis son
+        historique remplacé par celui joint au tour : une session déjà en
+        mémoire dans le worker ne contient pas le nouveau message utilisateur.
+        """
+        session_manager = self.chat_service.session_manager
+        session = await session_manager.ensure_session(
+            job.session_id, job.user_id or "", thread_id=job.thread_id
+        )
+        if job.history is not None:
+            session.history = [dict(message) for message in job.history]
+
+    async def _run(self, job: GenerationJob) -> None:
+        relay = RelayConnectionManager(self.bus, job)
+        status = "failed"
+        if _GEN_INFLIGHT is not None:
+            _GEN_INFLIGHT.inc()
+        try:
+            if not self.bus.shared_process:
+                await self._ensure_session(job)
+            await self.chat_service._process_agent_response_stream(
+                job.session_id,
+                job.agent_id,
+                job.use_rag,
+                relay,
+                doc_ids=list(job.doc_ids or []),
+                origin_agent_id=job.origin_agent_id,
+                opinion_request=job.opinion_request,
+            )
+            status = "completed"
+        except asyncio.CancelledError:
+            status = "cancelled"
+            logger.info(
+                f"[Generation] Tour {job.job_id} annulé (session {job.session_id})"
+            )
+            raise
+        except Exception as e:
+            logger.error(f"[Generation] Tour {job.job_id} en échec: {e}", exc_info=True)
+        finally:
+            if _GEN_INFLIGHT is not None:
+                _GEN_INFLIGHT.dec()
+            self.stats[status] += 1
+            _count(status)
+            try:
+                await relay.send_done(status)
+            except Exception as e:
+                logger.debug(f"[Generation] Notification fin de tour impossible: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "inflight": len(self._inflight),
+            **self.stats,
+        }
+
+
+class GenerationGateway:
+    """Côté web : enfile les tours et relaie les événements vers les WebSockets."""
+
+    def __init__(
+        self,
+        bus: InProcessGenerationBus,
+        connection_manager: Any,
+        gateway_id: Optional[str] = None,
+    ) -> None:
+        self.bus = bus
+        self.connection_manager = connection_manager
+        self.gateway_id = gateway_id or uuid.uuid4().hex
+        self._jobs_by_session: Dict[str, Set[str]] = {}
+        self._subscription: Any = None
+        self._forward_task: Optional[asyncio.Task[None]] = None
+        self.stats = {"enqueued": 0, "rejected": 0, "cancel_requests": 0}
+
+    async def start(self) -> None:
+        if self._forward_task is not None:
+            return
+        self._subscription = await self.bus.subscribe(
+            self.bus.events_channel(self.gateway_id)
+        )
+        self._forward_task = asyncio.create_task(self._forward_loop())
+        add_listener = getattr(self.connection_manager, "add_disconnect_listener", None)
+        if callable(add_listener):
+            add_listener(self.cancel_session)
+        logger.info(f"[Generation] Passerelle {self.gateway_id} démarrée")
+
+    async def stop(self) -> None:
+        if self._forward_task is not None:
+            self._forward_task.cancel()
+            await asyncio.gather(self._forward_task, return_exceptions=True)
+            self._forward_task = None
+        if self._subscription is not None:
+            await self._subscription.close()
+            self._subscription = None
+
+    def _session_history(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        session_manager = getattr(self.connection_manager, "session_manager", None)
+        if session_manager is None:
+            return None
+        try:
+            history = session_manager.get_full_history(session_id)
+        except Exception as e:
+            logger.warning(f"[Generation] Historique de {session_id} illisible: {e}")
+            return None
+        return [dict(message) for message in history[-HISTORY_SNAPSHOT_LIMIT:]]
+
+    def _session_context(self, session_id: str) -> Tuple[Optional[str], Optional[str]]:
+        session_manager = getattr(self.connection_manager, "session_manager", None)
+        if session_manager is None:
+            return None, None
+        try:
+            user_id = session_manager.get_user_id_for_session(session_id)
+        except Exception:
+            user_id = None
+        try:
+            thread_id = session_manager.get_thread_id_for_session(session_id)
+        except Exception:
+            thread_id = None
+        return user_id, thread_id
+
+    async def submit(
+        self,
+        session_id: str,
+        agent_id: str,
+        *,
+        use_rag: bool = False,
+        doc_ids: Optional[List[int]] = None,
+        origin_agent_id: Optional[str] = None,
+        opinion_request: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """Enfile un tour d'agent ; ``None`` (et ``ws:error``) si la file est pleine."""
+        user_id, thread_id = self._session_context(session_id)
+        job = GenerationJob(
+            session_id=session_id,
+            agent_id=agent_id,
+            reply_to=self.gateway_id,
+            use_rag=use_rag,
+            doc_ids=list(doc_ids or []),
+            origin_agent_id=origin_agent_id,
+            opinion_request=opinion_request,
+            user_id=user_id,
+            thread_id=thread_id,
+            history=None if self.bus.shared_process else self._session_history(session_id),
+        )
+        try:
+            await self.bus.enqueue(job)
+        except GenerationQueueFull as e:
+            self.stats["rejected"] += 1
+            _count("rejected")
+            logger.warning(f"[Generation] Tour refusé pour {session_id}: {e}")
+            await self.connection_manager.send_personal_message(
+                {
+                    "type": "ws:error",
+                    "payload": {
+                        "message": f"Serveur saturé, réessaie dans un instant (agent {agent_id}).",
+                        "code": "generation_overloaded",
+                    },
+                },
+                session_id,
+            )
+            return None
+        self._jobs_by_session.setdefault(session_id, set()).add(job.job_id)
+        self.stats["enqueued"] += 1
+        _count("enqueued")
+        job_id: str = job.job_id
+        return job_id
+
+    async def cancel_session(self, session_id: str) -> None:
+        """Annule les tours en attente ou en cours d'une session (client parti)."""
+        job_ids = self._jobs_by_session.pop(session_id, None)
+        if not job_ids:
+            return
+        self.stats["cancel_requests"] += 1
+        await self.bus.publish(
+            self.bus.cancel_channel,
+            {"session_id": session_id, "job_ids": sorted(job_ids)},
+        )
+
+    async def _forward_loop(self) -> None:
+        async for event in self._subscription:
+            try:
+                await self._dispatch(event)
+            except Exception as e:
+                logger.error(f"[Generation] Relais d'événement impossible: {e}", exc_info=True)
+
+    def _mirror_final_message(self, session_id: str, payload: Dict[str, Any]) -> None:
+        """
+        Worker distant : le message est déjà persisté, on aligne seulement
+        l'historique en mémoire de la session côté web.
+        """
+        session_manager = getattr(self.connection_manager, "session_manager", None)
+        session = session_manager.get_session(session_id) if session_manager else None
+        if session is not None:
+            session.history.append(dict(payload))
+
+    async def _dispatch(self, event: Dict[str, Any]) -> None:
+        kind = event.get("kind")
+        session_id = str(event.get("session_id") or "")
+        if kind == "message":
+            message = event.get("message") or {}
+            if (
+                not self.bus.shared_process
+                and message.get("type") == "ws:chat_stream_end"
+            ):
+                self._mirror_final_message(session_id, message.get("payload") or {})
+            await self.connection_manager.send_personal_message(message, session_id)
+        elif kind == "hello":
+            hello = event.get("hello") or {}
+            send_hello = getattr(self.connection_manager, "send_agent_hello", None)
+            if callable(send_hello):
+                await send_hello(session_id=session_id, **hello)
+        elif kind == "done":
+            jobs = self._jobs_by_session.get(session_id)
+            if jobs is not None:
+                jobs.discard(str(event.get("job_id")))
+                if not jobs:
+                    self._jobs_by_session.pop(session_id, None)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return {
+            "gateway_id": self.gateway_id,
+            "depth": await self.bus.depth(),
+            "sessions_in_flight": len(self._jobs_by_session),
+            **self.stats,
+        }
+
+
+async def setup_generation(
+    container: Any,
+) -> Tuple[Optional[GenerationGateway], Optional[GenerationWorker]]:
+    """
+    Câblage côté web selon CHAT_GENERATION_MODE (``inline`` : rien).
+    CHAT_GENERATION_WORKERS : slots dans le processus web (défaut 4 en
+    ``local``, 0 en ``redis`` où les workers tournent à part).
+    """
+    mode = os.getenv("CHAT_GENERATION_MODE", "inline").strip().lower()
+    if mode not in ("local", "redis"):
+        return None, None
+
+    bus = generation_bus_from_env(mode)
+    chat_service = container.chat_service()
+    gateway = GenerationGateway(bus, container.connection_manager())
+    await gateway.start()
+    chat_service.set_generation_gateway(gateway)
+
+    default_workers = "4" if bus.shared_process else "0"
+    concurrency = int(os.getenv("CHAT_GENERATION_WORKERS", default_workers))
+    worker: Optional[GenerationWorker] = None
+    if concurrency > 0:
+        worker = GenerationWorker(bus, chat_service, concurrency=concurrency)
+        await worker.start()
+    return gateway, worker
+
+
+async def run_worker_process(concurrency: int) -> None:
+    """Worker de génération hors du processus web (bus Redis)."""
+    from backend.containers import ServiceContainer
+
+    bus = generation_bus_from_env("redis")
+    if bus.shared_process:
+        raise SystemExit("CHAT_GENERATION_REDIS_URL (ou REDIS_URL) et redis requis")
+    container = ServiceContainer()
+    db_manager = container.db_manager()
+    await db_manager.connect()
+    worker = GenerationWorker(bus, container.chat_service(), concurrency=concurrency)
+    await worker.start()
+    try:
+        while worker.running:
+            await asyncio.sleep(30)
+            logger.info(
+                f"Generation worker stats: {worker.get_stats()} (file: {await bus.depth()})"
+            )
+    finally:
+        await worker.stop()
+        await bus.close()
+        await container.cost_tracker().stop()
+        await db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de génération des agents")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("CHAT_GENERATION_WORKERS", "4")),
+        help="Tours d'agent générés en parallèle par ce processus",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_worker_process(args.concurrency))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,253 @@
+"""
+Transport entre la passerelle WebSocket et les workers de génération.
+
+Deux canaux :
+
+- une file de tours d'agent (``GenerationJob``) bornée : au-delà de
+  ``max_pending`` l'enfilage lève ``GenerationQueueFull`` (backpressure côté
+  web, le client reçoit une erreur au lieu d'attendre indéfiniment) ;
+- un pub/sub d'événements : deltas de tokens vers la passerelle
+  propriétaire de la connexion (``events:<gateway_id>``) et annulations vers
+  les workers (``cancel``).
+
+Implémentations :
+
+- ``InProcessGenerationBus`` : stand-in local (asyncio), workers dans le
+  processus web. Les abonnés ont un tampon borné et ``publish`` attend qu'il
+  se libère : un client lent ralentit le worker au lieu de perdre des deltas.
+- ``RedisGenerationBus`` : liste Redis (LPUSH/BRPOP) + Pub/Sub, workers
+  dans des processus séparés (``python -m backend.features.chat.generation``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PENDING = 256
+DEFAULT_SUBSCRIBER_BUFFER = 1024
+
+
+class GenerationQueueFull(RuntimeError):
+    """La file de génération a atteint ``max_pending``."""
+
+
+@dataclass
+class GenerationJob:
+    """Tour d'agent à produire pour une session WebSocket."""
+
+    session_id: str
+    agent_id: str
+    reply_to: str
+    use_rag: bool = False
+    doc_ids: List[int] = field(default_factory=list)
+    origin_agent_id: Optional[str] = None
+    opinion_request: Optional[Dict[str, Any]] = None
+    user_id: Optional[str] = None
+    thread_id: Optional[str] = None
+    # Historique de la session web au moment de l'envoi (bus inter-processus) :
+    # le worker distant n'a pas le message utilisateur de ce tour en mémoire
+    history: Optional[List[Dict[str, Any]]] = None
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "GenerationJob":
+        data = json.loads(raw)
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+class _LocalSubscription:
+    def __init__(self, bus: "InProcessGenerationBus", channel: str, buffer: int) -> None:
+        self._bus = bus
+        self.channel = channel
+        self.queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=buffer)
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            yield await self.queue.get()
+
+    async def close(self) -> None:
+        self._bus._subscribers.get(self.channel, set()).discard(self)
+
+
+class InProcessGenerationBus:
+    """Stand-in local : file asyncio bornée + pub/sub en mémoire."""
+
+    shared_process = True
+
+    def __init__(
+        self,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        subscriber_buffer: int = DEFAULT_SUBSCRIBER_BUFFER,
+        prefix: str = "emergence:gen",
+    ) -> None:
+        self.max_pending = max_pending
+        self.subscriber_buffer = subscriber_buffer
+        self.prefix = prefix
+        self._jobs: asyncio.Queue[GenerationJob] = asyncio.Queue(maxsize=max_pending)
+        self._subscribers: Dict[str, Set[_LocalSubscription]] = {}
+
+    def events_channel(self, gateway_id: str) -> str:
+        return f"{self.prefix}:events:{gateway_id}"
+
+    @property
+    def cancel_channel(self) -> str:
+        return f"{self.prefix}:cancel"
+
+    async def enqueue(self, job: GenerationJob) -> int:
+        try:
+            self._jobs.put_nowait(job)
+        except asyncio.QueueFull:
+            raise GenerationQueueFull(
+                f"{self._jobs.qsize()} tours en attente (max {self.max_pending})"
+            ) from None
+        return self._jobs.qsize()
+
+    async def dequeue(self, timeout: float) -> Optional[GenerationJob]:
+        try:
+            return await asyncio.wait_for(self._jobs.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def depth(self) -> int:
+        return self._jobs.qsize()
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        for sub in list(self._subscribers.get(channel, ())):
+            await sub.queue.put(event)
+
+    async def subscribe(self, channel: str) -> _LocalSubscription:
+        sub = _LocalSubscription(self, channel, self.subscriber_buffer)
+        self._subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub: Any, channel: str) -> None:
+        self._pubsub = pubsub
+        self.channel = channel
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Dict[str, Any]]:
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                yield json.loads(message["data"])
+            except (TypeError, ValueError):
+                logger.warning(f"[GenerationBus] Message illisible sur {self.channel}")
+
+    async def close(self) -> None:
+        try:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.close()
+        except Exception as e:
+            logger.debug(f"[GenerationBus] Fermeture abonnement {self.channel}: {e}")
+
+
+class RedisGenerationBus(InProcessGenerationBus):
+    """
+    File et pub/sub sur Redis, partagés entre passerelles et workers.
+
+    Redis Pub/Sub n'offre pas de backpressure : le débit est borné côté
+    worker par le nombre de slots et côté client par ``WsOutbox``.
+    """
+
+    shared_process = False
+
+    def __init__(
+        self,
+        redis_manager: Any,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        prefix: str = "emergence:gen",
+    ) -> None:
+        super().__init__(max_pending=max_pending, prefix=prefix)
+        self.redis = redis_manager
+        self.jobs_key = f"{prefix}:jobs"
+
+    async def _client(self) -> Any:
+        if not self.redis.is_connected():
+            await self.redis.connect()
+        return self.redis
+
+    async def enqueue(self, job: GenerationJob) -> int:
+        redis = await self._client()
+        # Borne approximative (LLEN puis LPUSH non atomiques) : suffisant pour
+        # protéger les workers, pas un quota strict.
+        pending = await redis.llen(self.jobs_key)
+        if pending >= self.max_pending:
+            raise GenerationQueueFull(
+                f"{pending} tours en attente (max {self.max_pending})"
+            )
+        return int(await redis.lpush(self.jobs_key, job.to_json()))
+
+    async def dequeue(self, timeout: float) -> Optional[GenerationJob]:
+        redis = await self._client()
+        raw = await redis.brpop(self.jobs_key, timeout=timeout)
+        if raw is None:
+            return None
+        try:
+            return GenerationJob.from_json(raw)
+        except (TypeError, ValueError) as e:
+            logger.error(f"[GenerationBus] Tour illisible ignoré: {e}")
+            return None
+
+    async def depth(self) -> int:
+        redis = await self._client()
+        return int(await redis.llen(self.jobs_key))
+
+    async def publish(self, channel: str, event: Dict[str, Any]) -> None:
+        redis = await self._client()
+        await redis.publish(channel, json.dumps(event))
+
+    async def subscribe(self, channel: str) -> _RedisSubscription:  # type: ignore[override]
+        redis = await self._client()
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(channel)
+        return _RedisSubscription(pubsub, channel)
+
+    async def close(self) -> None:
+        await self.redis.disconnect()
+
+
+def generation_bus_from_env(mode: Optional[str] = None) -> InProcessGenerationBus:
+    """
+    Env: CHAT_GENERATION_MODE (``local`` ou ``redis``),
+    CHAT_GENERATION_REDIS_URL (défaut REDIS_URL), CHAT_GENERATION_MAX_PENDING
+    (défaut 256).
+    """
+    mode = (mode or os.getenv("CHAT_GENERATION_MODE") or "local").strip().lower()
+    max_pending = int(os.getenv("CHAT_GENERATION_MAX_PENDING", str(DEFAULT_MAX_PENDING)))
+    if mode == "redis":
+        url = os.getenv("CHAT_GENERATION_REDIS_URL") or os.getenv("REDIS_URL")
+        if url:
+            try:
+                from backend.core.cache.redis_manager import RedisManager
+
+                return RedisGenerationBus(RedisManager(url=url), max_pending=max_pending)
+            except ImportError:
+                pass
+        logger.warning(
+            "[GenerationBus] Mode redis demandé sans package redis ou URL : bus local"
+        )
+    return InProcessGenerationBus(max_pending=max_pending)
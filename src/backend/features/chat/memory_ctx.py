@@ -1,11 +1,14 @@
-# V1.2 — Outils mémoire/RAG (STM/LTM) + cache in-memory préférences (P2.1)
+# V1.3 — Outils mémoire/RAG (STM/LTM) + cache in-memory préférences (P2.1)
 #        + Détection requêtes méta + MemoryQueryTool integration (Phase 1 Sprint 1)
+#        + Cache préférences indexé par génération mémoire (jamais périmé)
 from __future__ import annotations
 import os
 import re
 import logging
 from typing import Any, Dict, List, Optional, Tuple, cast
 from datetime import datetime, timedelta
+from backend.core.timer_wheel import TimerHandle, get_timer_wheel
+from backend.features.memory.generations import get_generation_tracker
 from backend.shared.models import Role
 
 logger = logging.getLogger(__name__)
@@ -62,9 +65,17 @@ class MemoryContextBuilder:
         self.session_manager = session_manager
         self.vector_service = vector_service
 
-        # Cache in-memory préférences (P2.1)
+        # Cache in-memory préférences (P2.1). La génération mémoire de
+        # l'utilisateur fait partie de la clé : le TTL peut être allongé
+        # (MEMORY_PREFS_CACHE_TTL_SECONDS) sans risque de servir du périmé.
         self._prefs_cache: Dict[str, Tuple[str, datetime]] = {}
-        self._cache_ttl = timedelta(minutes=5)  # TTL 5 min
+        self._prefs_generation: Dict[str, int] = {}
+        self._cache_ttl = timedelta(
+            seconds=int(os.getenv("MEMORY_PREFS_CACHE_TTL_SECONDS", "300"))
+        )
+        # Expiration par timer (roue partagée) plutôt qu'un balayage à chaque miss
+        self._timer_wheel = get_timer_wheel()
+        self._prefs_timers: Dict[str, TimerHandle] = {}
 
         # 🆕 Phase 1 Sprint 1: MemoryQueryTool pour requêtes méta
         from backend.features.memory.memory_query_tool import MemoryQueryTool
@@ -96,7 +107,7 @@ class MemoryContextBuilder:
             self.unified_retriever = None
 
         logger.info(
-            "[MemoryContextBuilder] Initialized with in-memory preference cache (TTL=5min) + MemoryQueryTool"
+            f"[MemoryContextBuilder] Initialized with in-memory preference cache (TTL={int(self._cache_ttl.total_seconds())}s) + MemoryQueryTool"
         )
 
     def try_get_session_summary(self, session_id: str) -> str:
@@ -210,7 +221,10 @@ class MemoryContextBuilder:
 
             # 1. Fetch and inject active preferences (with cache P2.1)
             if uid:
-                prefs = self._fetch_active_preferences_cached(knowledge_col, uid)
+                generation = await get_generation_tracker().get(uid)
+                prefs = self._fetch_active_preferences_cached(
+                    knowledge_col, uid, generation=generation
+                )
                 if prefs:
                     sections.append(("Préférences actives", prefs))
 
@@ -304,21 +318,29 @@ class MemoryContextBuilder:
             logger.warning(f"build_memory_context: {e}")
             return ""
 
-    def _fetch_active_preferences_cached(self, collection: Any, user_id: str) -> str:
+    def _fetch_active_preferences_cached(
+        self, collection: Any, user_id: str, generation: int = 0
+    ) -> str:
         """
-        Fetch active preferences with in-memory cache (TTL=5min).
+        Fetch active preferences with in-memory cache (TTL=5min par défaut).
 
         Phase P2.1 optimization:
         - Cache hit: ~2ms (80% des cas après warmup)
         - Cache miss: ~35ms (query ChromaDB)
         - Expected hit rate: >80% (5min TTL couvre ~8-10 messages)
+
+        ``generation`` : génération mémoire courante de l'utilisateur ; une
+        entrée calculée pour une autre génération est ignorée.
         """
         now = datetime.now()
 
         # Check cache
         if user_id in self._prefs_cache:
             prefs, cached_at = self._prefs_cache[user_id]
-            if now - cached_at < self._cache_ttl:
+            if (
+                now - cached_at < self._cache_ttl
+                and self._prefs_generation.get(user_id, 0) == generation
+            ):
                 logger.debug(
                     f"[Cache HIT] Preferences for user {user_id[:8]}... (age={int((now - cached_at).total_seconds())}s)"
                 )
@@ -337,9 +359,17 @@ class MemoryContextBuilder:
 
         # Update cache
         self._prefs_cache[user_id] = (prefs, now)
-
-        # Cleanup old entries (garbage collection)
-        self._cleanup_expired_cache()
+        self._prefs_generation[user_id] = generation
+
+        # Expiration : (ré)armer le timer de l'entrée en O(1)
+        ttl = self._cache_ttl.total_seconds()
+        timer = self._prefs_timers.get(user_id)
+        if timer is None:
+            self._prefs_timers[user_id] = self._timer_wheel.schedule(
+                ttl, self._expire_preferences, user_id
+            )
+        else:
+            self._timer_wheel.reschedule(timer, ttl)
 
         return prefs
 
@@ -371,8 +401,14 @@ class MemoryContextBuilder:
             logger.debug(f"_fetch_active_preferences: {e}")
             return ""
 
+    def _expire_preferences(self, user_id: str) -> None:
+        """Rappel de la roue de temporisation à l'échéance du TTL."""
+        self._prefs_timers.pop(user_id, None)
+        self._prefs_cache.pop(user_id, None)
+        self._prefs_generation.pop(user_id, None)
+
     def _cleanup_expired_cache(self) -> None:
-        """Remove expired entries from cache (garbage collection)."""
+        """Remove expired entries from cache (balayage complet, secours/tests)."""
         now = datetime.now()
         expired_keys = [
             key
@@ -382,6 +418,10 @@ class MemoryContextBuilder:
 
         for key in expired_keys:
             del self._prefs_cache[key]
+            self._prefs_generation.pop(key, None)
+            timer = self._prefs_timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
 
         if expired_keys:
             logger.debug(f"[Cache GC] Removed {len(expired_keys)} expired entries")
@@ -395,6 +435,10 @@ class MemoryContextBuilder:
         Args:
             user_id: Identifiant de l'utilisateur
         """
+        self._prefs_generation.pop(user_id, None)
+        timer = self._prefs_timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
         if user_id in self._prefs_cache:
             del self._prefs_cache[user_id]
             logger.info(
@@ -99,7 +99,7 @@ class MemoryService:
 
         # Tenter de récupérer depuis le cache
         start_time = time.time()
-        cached_result = self.rag_cache.get(
+        cached_result = await self.rag_cache.aget(
             cache_query,
             where_filter,
             agent_id="memory_consolidation",
@@ -182,7 +182,7 @@ class MemoryService:
                         )
 
             # Stocker dans le cache
-            self.rag_cache.set(
+            await self.rag_cache.aset(
                 cache_query,
                 where_filter,
                 agent_id="memory_consolidation",
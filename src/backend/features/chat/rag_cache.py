@@ -2,80 +2,129 @@
 # Phase 3 RAG: Service de cache pour résultats RAG fréquents
 #
 # Architecture:
-# - Support Redis (optionnel) avec fallback vers cache mémoire local
+# - Support Redis asynchrone (optionnel, via RedisManager) avec fallback vers
+#   cache mémoire local
 # - Clé basée sur fingerprint (hash query + filters)
-# - TTL configurable via env
-# - Invalidation sélective par document_id
+# - TTL configurable via env (mémoire : timer par entrée sur la roue partagée,
+#   plus vérification à la lecture)
+# - Invalidation sélective par document_id : index inverse document -> fingerprints
+#   (Sets Redis écrits dans la même transaction que l'entrée, dict en mémoire)
+# - Tier sémantique (optionnel): requêtes quasi-identiques résolues par
+#   similarité cosinus de l'embedding de requête, dans le même scope
+#
+# API:
+# - get/set/invalidate_* (synchrones) : backend mémoire local uniquement
+# - aget/aset/ainvalidate_* (async) : Redis si configuré et joignable, sinon mémoire
+#   (chemin à utiliser dès que l'entrée doit être partagée entre instances)
+# - Le RedisManager est celui de l'application, injecté (voir containers.py)
 
 import hashlib
 import json
 import logging
 import os
+import random
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, cast
 from collections import OrderedDict
 
-try:
-    import redis
+import numpy as np
+import numpy.typing as npt
 
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-    logging.warning("[RAG Cache] redis package not available, using in-memory cache")
+from backend.core.timer_wheel import TimerHandle, get_timer_wheel
 
 logger = logging.getLogger(__name__)
 
+# Recouvrement minimal (Jaccard des chunks) entre résultat caché et résultat
+# frais pour qu'un hit sémantique audité soit jugé correct
+SEMANTIC_AUDIT_MIN_OVERLAP = 0.5
+
+# Délai avant nouvelle tentative de connexion Redis après un échec
+REDIS_RETRY_SECONDS = 30.0
+
+ENTRY_KEY_PREFIX = "rag:query:"
+DOC_INDEX_KEY_PREFIX = "rag:doc:"
+
+
+def _hit_key(hit: Dict[str, Any]) -> str:
+    md = hit.get("metadata") or {}
+    if hit.get("id") is not None:
+        return str(hit["id"])
+    return f"{md.get('document_id')}:{md.get('chunk_index')}:{(hit.get('text') or '')[:40]}"
+
+
+def _entry_doc_ids(entry: Dict[str, Any]) -> Set[str]:
+    """Documents référencés par une entrée (clés de l'index inverse)."""
+    doc_ids: Set[str] = set()
+    for hit in entry.get("doc_hits") or []:
+        md = (hit.get("metadata") or {}) if isinstance(hit, dict) else {}
+        if md.get("document_id") is not None:
+            doc_ids.add(str(md["document_id"]))
+    return doc_ids
+
 
 class RAGCache:
     """
     Service de cache pour résultats RAG avec support Redis optionnel.
 
     Features:
-    - Cache distribué (Redis) ou local (OrderedDict LRU)
+    - Cache distribué (Redis async) ou local (OrderedDict LRU)
     - TTL configurable
-    - Invalidation par document_id
+    - Invalidation ciblée par document_id (index inverse)
     - Fingerprinting intelligent de requêtes
+    - Tier sémantique : index local (par scope filtres/agent/documents) des
+      embeddings de requêtes récentes, recherche brute-force cosinus
     """
 
     def __init__(
         self,
-        redis_url: Optional[str] = None,
         ttl_seconds: int = 3600,
         max_memory_items: int = 500,
+        semantic_threshold: float = 0.0,
+        max_semantic_items_per_scope: int = 64,
+        semantic_audit_rate: float = 0.0,
+        redis_manager: Optional[Any] = None,
     ):
         """
         Initialize RAG cache.
 
         Args:
-            redis_url: Redis connection URL (ex: redis://localhost:6379/0)
             ttl_seconds: Time-to-live pour les entrées cache
             max_memory_items: Taille max du cache mémoire (si Redis indisponible)
+            semantic_threshold: Similarité cosinus minimale pour un hit
+                sémantique (0 = tier désactivé)
+            max_semantic_items_per_scope: Nombre max d'embeddings gardés par scope
+            semantic_audit_rate: Fraction des hits sémantiques ré-exécutés pour
+                mesurer les faux positifs (0 = pas d'audit)
+            redis_manager: RedisManager partagé de l'application (None = mémoire)
         """
         self.ttl_seconds = ttl_seconds
         self.max_memory_items = max_memory_items
-        self.redis_client: Optional["redis.Redis"] = None
         self.memory_cache: OrderedDict[str, Tuple[datetime, Any]] = OrderedDict()
         self.enabled = True
 
-        # Tentative de connexion Redis
-        if REDIS_AVAILABLE and redis_url:
-            try:
-                self.redis_client = redis.from_url(
-                    redis_url,
-                    decode_responses=True,
-                    socket_connect_timeout=2,
-                    socket_timeout=2,
-                )
-                # Test de connexion
-                self.redis_client.ping()
-                logger.info(f"[RAG Cache] Connected to Redis: {redis_url}")
-            except Exception as e:
-                logger.warning(
-                    f"[RAG Cache] Redis connection failed: {e}, using memory cache"
-                )
-                self.redis_client = None
-        else:
+        # Index inverse mémoire : document_id -> fingerprints (et réciproque)
+        self._memory_doc_index: Dict[str, Set[str]] = {}
+        self._memory_entry_docs: Dict[str, Set[str]] = {}
+        # Timers d'expiration mémoire : fingerprint -> handle
+        self._timer_wheel = get_timer_wheel()
+        self._memory_timers: Dict[str, TimerHandle] = {}
+
+        self.semantic_threshold = semantic_threshold
+        self.max_semantic_items_per_scope = max(1, max_semantic_items_per_scope)
+        self.semantic_audit_rate = semantic_audit_rate
+        # scope -> fingerprint -> (horodatage monotonic, embedding normalisé)
+        self._semantic_index: OrderedDict[
+            str, OrderedDict[str, Tuple[float, npt.NDArray[np.float32]]]
+        ] = OrderedDict()
+
+        # Backend Redis async : connexion paresseuse au premier appel a*()
+        self.redis_manager: Optional[Any] = redis_manager
+        self._redis_retry_at = 0.0
+        if self.redis_manager is None:
             logger.info("[RAG Cache] Using in-memory cache (Redis not configured)")
+        else:
+            logger.info("[RAG Cache] Redis backend configured (shared RedisManager)")
 
     @staticmethod
     def _generate_fingerprint(
@@ -114,18 +163,56 @@ class RAGCache:
 
         return fingerprint
 
+    @staticmethod
+    def _generate_scope(
+        where_filter: Optional[Dict[str, Any]],
+        agent_id: str,
+        selected_doc_ids: Optional[List[int]] = None,
+    ) -> str:
+        """Scope du tier sémantique : même filtre/agent/documents que le tier exact."""
+        filter_str = json.dumps(where_filter, sort_keys=True) if where_filter else ""
+        doc_ids_str = json.dumps(sorted(selected_doc_ids)) if selected_doc_ids else ""
+        composite_key = f"{filter_str}|{agent_id}|{doc_ids_str}"
+        return hashlib.sha256(composite_key.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.enabled and self.semantic_threshold > 0
+
+    @staticmethod
+    def _build_entry(
+        query_text: str,
+        doc_hits: List[Dict[str, Any]],
+        rag_sources: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        return {
+            "doc_hits": doc_hits,
+            "rag_sources": rag_sources,
+            "timestamp": datetime.utcnow().isoformat(),
+            "query_text": query_text[:100],  # Pour debug
+        }
+
+    # ==========================================
+    # API synchrone (backend mémoire local)
+    # ==========================================
+
     def get(
         self,
         query_text: str,
         where_filter: Optional[Dict[str, Any]],
         agent_id: str,
         selected_doc_ids: Optional[List[int]] = None,
+        query_embedding: Optional[Sequence[float]] = None,
     ) -> Optional[Dict[str, Any]]:
         """
-        Récupère un résultat depuis le cache.
+        Récupère un résultat depuis le cache mémoire local.
+
+        Tier exact d'abord ; si ``query_embedding`` est fourni et que le tier
+        sémantique est actif, repli sur la requête la plus proche du scope.
 
         Returns:
-            Dict avec 'doc_hits' et 'rag_sources' si trouvé, None sinon
+            Dict avec 'doc_hits', 'rag_sources' et 'cache_tier' ("exact" ou
+            "semantic") si trouvé, None sinon
         """
         if not self.enabled:
             return None
@@ -135,13 +222,42 @@ class RAGCache:
         )
 
         try:
-            if self.redis_client:
-                return self._get_from_redis(fingerprint)
-            else:
-                return self._get_from_memory(fingerprint)
+            entry = self._get_from_memory(fingerprint)
         except Exception as e:
             logger.error(f"[RAG Cache] Error retrieving cache: {e}")
             return None
+        if entry is not None:
+            return {**entry, "cache_tier": "exact"}
+
+        if query_embedding is None:
+            return None
+        return self.get_similar(
+            query_embedding, where_filter, agent_id, selected_doc_ids
+        )
+
+    def get_similar(
+        self,
+        query_embedding: Sequence[float],
+        where_filter: Optional[Dict[str, Any]],
+        agent_id: str,
+        selected_doc_ids: Optional[List[int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Tier sémantique seul : requête récente la plus proche dans le même scope.
+
+        Returns:
+            Entrée cache avec 'cache_tier'="semantic" et 'similarity', None sinon
+        """
+        scope = self._generate_scope(where_filter, agent_id, selected_doc_ids)
+        try:
+            for fingerprint, similarity in self._rank_similar(scope, query_embedding):
+                entry = self._get_from_memory(fingerprint)
+                if entry is not None:
+                    return self._semantic_hit(scope, fingerprint, similarity, entry)
+                self._forget_semantic(scope, fingerprint)
+        except Exception as e:
+            logger.error(f"[RAG Cache] Error in semantic lookup: {e}")
+        return None
 
     def set(
         self,
@@ -151,9 +267,13 @@ class RAGCache:
         doc_hits: List[Dict[str, Any]],
         rag_sources: List[Dict[str, Any]],
         selected_doc_ids: Optional[List[int]] = None,
+        query_embedding: Optional[Sequence[float]] = None,
     ) -> None:
         """
-        Stocke un résultat dans le cache.
+        Stocke un résultat dans le cache mémoire local.
+
+        ``query_embedding`` (optionnel) indexe aussi la requête dans le tier
+        sémantique de son scope.
         """
         if not self.enabled:
             return
@@ -162,126 +282,410 @@ class RAGCache:
             query_text, where_filter, agent_id, selected_doc_ids
         )
 
-        cache_entry = {
-            "doc_hits": doc_hits,
-            "rag_sources": rag_sources,
-            "timestamp": datetime.utcnow().isoformat(),
-            "query_text": query_text[:100],  # Pour debug
-        }
-
         try:
-            if self.redis_client:
-                self._set_in_redis(fingerprint, cache_entry)
-            else:
-                self._set_in_memory(fingerprint, cache_entry)
+            self._set_in_memory(
+                fingerprint, self._build_entry(query_text, doc_hits, rag_sources)
+            )
         except Exception as e:
             logger.error(f"[RAG Cache] Error storing cache: {e}")
+            return
+
+        self._maybe_index_embedding(
+            where_filter, agent_id, selected_doc_ids, fingerprint, query_embedding
+        )
 
     def invalidate_by_document(self, document_id: int) -> None:
+        """Invalide les entrées mémoire contenant un document_id (index inverse)."""
+        if not self.enabled:
+            return
+
+        try:
+            self._invalidate_memory_by_doc(document_id)
+        except Exception as e:
+            logger.error(f"[RAG Cache] Error invalidating cache: {e}")
+
+    def invalidate_all(self) -> None:
+        """Invalide tout le cache mémoire local."""
+        self._clear_memory()
+        logger.info("[RAG Cache] Memory cache fully invalidated")
+
+    # ==========================================
+    # API asynchrone (Redis partagé si disponible)
+    # ==========================================
+
+    async def aget(
+        self,
+        query_text: str,
+        where_filter: Optional[Dict[str, Any]],
+        agent_id: str,
+        selected_doc_ids: Optional[List[int]] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Équivalent async de ``get`` : lit Redis sans bloquer la boucle."""
+        if not self.enabled:
+            return None
+        redis_manager = await self._redis()
+        if redis_manager is None:
+            return self.get(
+                query_text, where_filter, agent_id, selected_doc_ids, query_embedding
+            )
+
+        fingerprint = self._generate_fingerprint(
+            query_text, where_filter, agent_id, selected_doc_ids
+        )
+        try:
+            entry = await self._get_from_redis(redis_manager, fingerprint)
+        except Exception as e:
+            logger.error(f"[RAG Cache] Error retrieving cache: {e}")
+            return None
+        if entry is not None:
+            return {**entry, "cache_tier": "exact"}
+
+        if query_embedding is None:
+            return None
+        return await self.aget_similar(
+            query_embedding, where_filter, agent_id, selected_doc_ids
+        )
+
+    async def aget_similar(
+        self,
+        query_embedding: Sequence[float],
+        where_filter: Optional[Dict[str, Any]],
+        agent_id: str,
+        selected_doc_ids: Optional[List[int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Équivalent async de ``get_similar`` (entrées lues dans Redis)."""
+        redis_manager = await self._redis()
+        if redis_manager is None:
+            return self.get_similar(
+                query_embedding, where_filter, agent_id, selected_doc_ids
+            )
+
+        scope = self._generate_scope(where_filter, agent_id, selected_doc_ids)
+        try:
+            for fingerprint, similarity in self._rank_similar(scope, query_embedding):
+                entry = await self._get_from_redis(redis_manager, fingerprint)
+                if entry is not None:
+                    return self._semantic_hit(scope, fingerprint, similarity, entry)
+                self._forget_semantic(scope, fingerprint)
+        except Exception as e:
+            logger.error(f"[RAG Cache] Error in semantic lookup: {e}")
+        return None
+
+    async def aset(
+        self,
+        query_text: str,
+        where_filter: Optional[Dict[str, Any]],
+        agent_id: str,
+        doc_hits: List[Dict[str, Any]],
+        rag_sources: List[Dict[str, Any]],
+        selected_doc_ids: Optional[List[int]] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> None:
+        """Équivalent async de ``set`` : entrée + index inverse en une transaction."""
+        if not self.enabled:
+            return
+        redis_manager = await self._redis()
+        if redis_manager is None:
+            self.set(
+                query_text,
+                where_filter,
+                agent_id,
+                doc_hits,
+                rag_sources,
+                selected_doc_ids,
+                query_embedding=query_embedding,
+            )
+            return
+
+        fingerprint = self._generate_fingerprint(
+            query_text, where_filter, agent_id, selected_doc_ids
+        )
+        try:
+            await self._set_in_redis(
+                redis_manager,
+                fingerprint,
+                self._build_entry(query_text, doc_hits, rag_sources),
+            )
+        except Exception as e:
+            logger.error(f"[RAG Cache] Error storing cache: {e}")
+            return
+
+        self._maybe_index_embedding(
+            where_filter, agent_id, selected_doc_ids, fingerprint, query_embedding
+        )
+
+    async def ainvalidate_by_document(self, document_id: int) -> int:
         """
-        Invalide toutes les entrées cache contenant un document_id donné.
+        Invalide les entrées (Redis et mémoire) contenant un document_id.
 
-        Note: En mode Redis, on invalide tout le cache (pattern scan trop coûteux).
-        En mode mémoire, on scanne les entrées.
+        Returns:
+            Nombre d'entrées supprimées
         """
         if not self.enabled:
-            return
+            return 0
 
+        removed = 0
         try:
-            if self.redis_client:
-                # En production Redis, on préfère un flush complet (pattern scan = coûteux)
-                # Alternative: utiliser Redis Sets pour tracker documents <-> fingerprints
-                logger.info(
-                    f"[RAG Cache] Document {document_id} updated, flushing Redis cache"
+            removed += self._invalidate_memory_by_doc(document_id)
+            redis_manager = await self._redis()
+            if redis_manager is not None:
+                removed += await self._invalidate_redis_by_doc(
+                    redis_manager, document_id
                 )
-                self._flush_redis()
-            else:
-                # En mémoire locale, on peut scanner
-                logger.info(
-                    f"[RAG Cache] Document {document_id} updated, scanning memory cache"
-                )
-                self._invalidate_memory_by_doc(document_id)
         except Exception as e:
             logger.error(f"[RAG Cache] Error invalidating cache: {e}")
+        return removed
 
-    def invalidate_all(self):
-        """Invalide tout le cache."""
+    async def ainvalidate_all(self) -> None:
+        """Invalide tout le cache (Redis et mémoire)."""
+        self._clear_memory()
         try:
-            if self.redis_client:
-                self._flush_redis()
-            else:
-                self.memory_cache.clear()
+            redis_manager = await self._redis()
+            if redis_manager is not None:
+                await self._flush_redis(redis_manager)
             logger.info("[RAG Cache] Cache fully invalidated")
         except Exception as e:
             logger.error(f"[RAG Cache] Error flushing cache: {e}")
 
+    async def close(self) -> None:
+        """Ferme la connexion Redis (si ouverte)."""
+        if self.redis_manager is not None and self.redis_manager.is_connected():
+            await self.redis_manager.disconnect()
+
+    # ==========================================
+    # Audit du tier sémantique
+    # ==========================================
+
+    def should_audit(self, cached_result: Optional[Dict[str, Any]]) -> bool:
+        """Tire au sort les hits sémantiques à ré-exécuter pour audit."""
+        return (
+            cached_result is not None
+            and cached_result.get("cache_tier") == "semantic"
+            and self.semantic_audit_rate > 0
+            and random.random() < self.semantic_audit_rate
+        )
+
+    @staticmethod
+    def audit_semantic_hit(
+        cached_result: Dict[str, Any], fresh_doc_hits: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        Compare un hit sémantique au résultat frais de la même requête.
+
+        Returns:
+            True si faux positif (recouvrement des chunks insuffisant)
+        """
+        cached_keys = {_hit_key(h) for h in cached_result.get("doc_hits") or []}
+        fresh_keys = {_hit_key(h) for h in fresh_doc_hits or []}
+        union = cached_keys | fresh_keys
+        if not union:
+            return False
+        overlap = len(cached_keys & fresh_keys) / len(union)
+        return overlap < SEMANTIC_AUDIT_MIN_OVERLAP
+
     def get_stats(self) -> Dict[str, Any]:
         """Retourne des statistiques sur le cache."""
-        if self.redis_client:
-            try:
-                from typing import cast
-
-                info = cast(Mapping[str, Any], self.redis_client.info("stats"))
-                return {
-                    "backend": "redis",
-                    "keyspace_hits": info.get("keyspace_hits", 0),
-                    "keyspace_misses": info.get("keyspace_misses", 0),
-                    "connected": True,
-                }
-            except Exception:
-                return {"backend": "redis", "connected": False}
-        else:
-            return {
-                "backend": "memory",
-                "size": len(self.memory_cache),
-                "max_size": self.max_memory_items,
-            }
+        semantic = {
+            "enabled": self.semantic_enabled,
+            "threshold": self.semantic_threshold,
+            "scopes": len(self._semantic_index),
+            "vectors": sum(len(b) for b in self._semantic_index.values()),
+        }
+        stats: Dict[str, Any] = {
+            "backend": "memory",
+            "size": len(self.memory_cache),
+            "max_size": self.max_memory_items,
+            "indexed_documents": len(self._memory_doc_index),
+            "semantic": semantic,
+        }
+        if self.redis_manager is not None:
+            stats["backend"] = "redis"
+            stats["connected"] = self.redis_manager.is_connected()
+        return stats
 
     # ==========================================
-    # Redis implementation
+    # Semantic tier (index local, brute-force)
     # ==========================================
 
-    def _get_from_redis(self, fingerprint: str) -> Optional[Dict[str, Any]]:
-        """Récupère depuis Redis."""
-        if self.redis_client is None:
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[npt.NDArray[np.float32]]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if not vector.size or not norm:
+            return None
+        return vector / norm
+
+    def _rank_similar(
+        self, scope: str, query_embedding: Sequence[float]
+    ) -> List[Tuple[str, float]]:
+        """Fingerprints du scope au-dessus du seuil, du plus proche au plus lointain."""
+        if not self.semantic_enabled:
+            return []
+        bucket = self._semantic_index.get(scope)
+        if not bucket:
+            return []
+
+        now = time.monotonic()
+        for fp in [fp for fp, (ts, _) in bucket.items() if now - ts >= self.ttl_seconds]:
+            del bucket[fp]
+        if not bucket:
+            del self._semantic_index[scope]
+            return []
+
+        vector = self._normalize(query_embedding)
+        fingerprints = list(bucket.keys())
+        matrix = np.stack([bucket[fp][1] for fp in fingerprints])
+        if vector is None or vector.shape[0] != matrix.shape[1]:
+            return []
+        scores = matrix @ vector
+        order = np.argsort(-scores)
+        return [
+            (fingerprints[i], float(scores[i]))
+            for i in order
+            if scores[i] >= self.semantic_threshold
+        ]
+
+    def _semantic_hit(
+        self, scope: str, fingerprint: str, similarity: float, entry: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        bucket = self._semantic_index.get(scope)
+        if bucket is not None and fingerprint in bucket:
+            bucket.move_to_end(fingerprint)
+            self._semantic_index.move_to_end(scope)
+        logger.debug(
+            f"[RAG Cache] Semantic HIT: {fingerprint} (similarity={similarity:.3f})"
+        )
+        return {**entry, "cache_tier": "semantic", "similarity": round(similarity, 4)}
+
+    def _forget_semantic(self, scope: str, fingerprint: str) -> None:
+        """Entrée exacte expirée/invalidée : la retirer de l'index sémantique."""
+        bucket = self._semantic_index.get(scope)
+        if bucket is None:
+            return
+        bucket.pop(fingerprint, None)
+        if not bucket:
+            del self._semantic_index[scope]
+
+    def _maybe_index_embedding(
+        self,
+        where_filter: Optional[Dict[str, Any]],
+        agent_id: str,
+        selected_doc_ids: Optional[List[int]],
+        fingerprint: str,
+        query_embedding: Optional[Sequence[float]],
+    ) -> None:
+        if query_embedding is None or not self.semantic_enabled:
+            return
+        try:
+            self._index_embedding(
+                self._generate_scope(where_filter, agent_id, selected_doc_ids),
+                fingerprint,
+                query_embedding,
+            )
+        except Exception as e:
+            logger.error(f"[RAG Cache] Error indexing query embedding: {e}")
+
+    def _index_embedding(
+        self, scope: str, fingerprint: str, embedding: Sequence[float]
+    ) -> None:
+        """Ajoute l'embedding d'une requête au scope (LRU borné)."""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        bucket = self._semantic_index.get(scope)
+        if bucket is None:
+            bucket = OrderedDict()
+            self._semantic_index[scope] = bucket
+            # Borne globale : autant de scopes que d'entrées possibles en cache
+            while len(self._semantic_index) > self.max_memory_items:
+                self._semantic_index.popitem(last=False)
+        elif bucket and next(iter(bucket.values()))[1].shape != vector.shape:
+            # Changement de modèle d'embedding : l'index du scope est obsolète
+            bucket.clear()
+        bucket[fingerprint] = (time.monotonic(), vector)
+        bucket.move_to_end(fingerprint)
+        self._semantic_index.move_to_end(scope)
+        while len(bucket) > self.max_semantic_items_per_scope:
+            bucket.popitem(last=False)
+
+    # ==========================================
+    # Redis implementation (async, RedisManager)
+    # ==========================================
+
+    async def _redis(self) -> Optional[Any]:
+        """RedisManager connecté, ou None (fallback mémoire, reconnexion différée)."""
+        if self.redis_manager is None:
             return None
-        key = f"rag:query:{fingerprint}"
-        cached_raw = self.redis_client.get(key)
+        if self.redis_manager.is_connected():
+            return self.redis_manager
+        now = time.monotonic()
+        if now < self._redis_retry_at:
+            return None
+        try:
+            await self.redis_manager.connect()
+            return self.redis_manager
+        except Exception as e:
+            self._redis_retry_at = now + REDIS_RETRY_SECONDS
+            logger.warning(
+                f"[RAG Cache] Redis connection failed: {e}, using memory cache"
+            )
+            return None
+
+    async def _get_from_redis(
+        self, redis_manager: Any, fingerprint: str
+    ) -> Optional[Dict[str, Any]]:
+        """Récupère depuis Redis."""
+        cached_raw = await redis_manager.get(f"{ENTRY_KEY_PREFIX}{fingerprint}")
         if cached_raw:
             logger.debug(f"[RAG Cache] Redis HIT: {fingerprint}")
-            from typing import cast
-
-            payload = cast(Union[str, bytes, bytearray], cached_raw)
-            return cast(dict[str, Any], json.loads(payload))
+            return cast(Dict[str, Any], json.loads(cached_raw))
         logger.debug(f"[RAG Cache] Redis MISS: {fingerprint}")
         return None
 
-    def _set_in_redis(self, fingerprint: str, entry: Dict[str, Any]) -> None:
-        """Stocke dans Redis avec TTL."""
-        if self.redis_client is None:
-            return
-        key = f"rag:query:{fingerprint}"
-        self.redis_client.setex(key, self.ttl_seconds, json.dumps(entry))
+    async def _set_in_redis(
+        self, redis_manager: Any, fingerprint: str, entry: Dict[str, Any]
+    ) -> None:
+        """
+        Stocke l'entrée et l'index inverse document -> fingerprints (MULTI/EXEC).
+
+        Le TTL des Sets est rafraîchi à chaque écriture : un Set survit donc
+        toujours aux entrées qu'il référence.
+        """
+        pipe = redis_manager.pipeline(transaction=True)
+        pipe.set(
+            f"{ENTRY_KEY_PREFIX}{fingerprint}", json.dumps(entry), ex=self.ttl_seconds
+        )
+        for doc_id in _entry_doc_ids(entry):
+            doc_key = f"{DOC_INDEX_KEY_PREFIX}{doc_id}"
+            pipe.sadd(doc_key, fingerprint)
+            pipe.expire(doc_key, self.ttl_seconds)
+        await pipe.execute()
         logger.debug(f"[RAG Cache] Redis SET: {fingerprint} (TTL={self.ttl_seconds}s)")
 
-    def _flush_redis(self) -> None:
-        """Flush toutes les clés rag:* dans Redis."""
-        # Attention: SCAN peut être coûteux en prod, on flush tout le namespace
-        if self.redis_client is None:
-            return
-        cursor = 0
-        deleted = 0
-        while True:
-            from typing import cast
-
-            cursor, keys = cast(
-                Tuple[int, Sequence[Any]],
-                self.redis_client.scan(cursor, match="rag:query:*", count=100),
-            )
-            if keys:
-                deleted += cast(int, self.redis_client.delete(*keys))
-            if cursor == 0:
-                break
+    async def _invalidate_redis_by_doc(
+        self, redis_manager: Any, document_id: int
+    ) -> int:
+        """Supprime les entrées Redis d'un document via son Set d'index."""
+        doc_key = f"{DOC_INDEX_KEY_PREFIX}{document_id}"
+        fingerprints = sorted(await redis_manager.smembers(doc_key))
+        if not fingerprints:
+            return 0
+        pipe = redis_manager.pipeline(transaction=True)
+        pipe.delete(*(f"{ENTRY_KEY_PREFIX}{fp}" for fp in fingerprints))
+        # SREM (et non DEL) : un fingerprint ajouté entre-temps reste indexé
+        pipe.srem(doc_key, *fingerprints)
+        results = await pipe.execute()
+        deleted = int(results[0] or 0)
+        logger.info(
+            f"[RAG Cache] Invalidated {deleted} Redis entries for doc {document_id}"
+        )
+        return deleted
+
+    async def _flush_redis(self, redis_manager: Any) -> None:
+        """Flush toutes les clés rag:query:* et rag:doc:* (SCAN incrémental)."""
+        deleted = await redis_manager.delete_pattern(f"{ENTRY_KEY_PREFIX}*")
+        deleted += await redis_manager.delete_pattern(f"{DOC_INDEX_KEY_PREFIX}*")
         logger.info(f"[RAG Cache] Flushed {deleted} Redis keys")
 
     # ==========================================
@@ -298,12 +702,10 @@ class RAGCache:
                 # Move to end (LRU)
                 self.memory_cache.move_to_end(fingerprint)
                 logger.debug(f"[RAG Cache] Memory HIT: {fingerprint} (age={age:.1f}s)")
-                from typing import cast
-
-                return cast(dict[str, Any], entry)
+                return cast(Dict[str, Any], entry)
             else:
                 # Expiré
-                del self.memory_cache[fingerprint]
+                self._drop_memory_entry(fingerprint)
                 logger.debug(f"[RAG Cache] Memory EXPIRED: {fingerprint}")
 
         logger.debug(f"[RAG Cache] Memory MISS: {fingerprint}")
@@ -311,33 +713,57 @@ class RAGCache:
 
     def _set_in_memory(self, fingerprint: str, entry: Dict[str, Any]) -> None:
         """Stocke dans cache mémoire avec LRU eviction."""
+        self._drop_memory_entry(fingerprint)
         # Supprimer le plus ancien si plein
-        if len(self.memory_cache) >= self.max_memory_items:
+        while len(self.memory_cache) >= self.max_memory_items:
             oldest_key = next(iter(self.memory_cache))
-            del self.memory_cache[oldest_key]
+            self._drop_memory_entry(oldest_key)
             logger.debug(f"[RAG Cache] Memory evicted: {oldest_key}")
 
         self.memory_cache[fingerprint] = (datetime.utcnow(), entry)
+        self._memory_timers[fingerprint] = self._timer_wheel.schedule(
+            self.ttl_seconds, self._drop_memory_entry, fingerprint
+        )
+        doc_ids = _entry_doc_ids(entry)
+        if doc_ids:
+            self._memory_entry_docs[fingerprint] = doc_ids
+            for doc_id in doc_ids:
+                self._memory_doc_index.setdefault(doc_id, set()).add(fingerprint)
         logger.debug(f"[RAG Cache] Memory SET: {fingerprint}")
 
-    def _invalidate_memory_by_doc(self, document_id: int) -> None:
-        """Invalide les entrées mémoire contenant un document_id."""
-        to_delete = []
-        for fingerprint, (timestamp, entry) in self.memory_cache.items():
-            doc_hits = entry.get("doc_hits", [])
-            for hit in doc_hits:
-                md = hit.get("metadata", {})
-                if md.get("document_id") == document_id:
-                    to_delete.append(fingerprint)
-                    break
-
+    def _drop_memory_entry(self, fingerprint: str) -> None:
+        """Supprime une entrée mémoire et ses références dans l'index inverse."""
+        self.memory_cache.pop(fingerprint, None)
+        timer = self._memory_timers.pop(fingerprint, None)
+        if timer is not None:
+            timer.cancel()
+        for doc_id in self._memory_entry_docs.pop(fingerprint, ()):
+            fingerprints = self._memory_doc_index.get(doc_id)
+            if fingerprints is not None:
+                fingerprints.discard(fingerprint)
+                if not fingerprints:
+                    del self._memory_doc_index[doc_id]
+
+    def _invalidate_memory_by_doc(self, document_id: int) -> int:
+        """Invalide les entrées mémoire d'un document_id (coût ∝ entrées du document)."""
+        to_delete = list(self._memory_doc_index.get(str(document_id), ()))
         for fp in to_delete:
-            del self.memory_cache[fp]
+            self._drop_memory_entry(fp)
 
         if to_delete:
             logger.info(
                 f"[RAG Cache] Invalidated {len(to_delete)} memory entries for doc {document_id}"
             )
+        return len(to_delete)
+
+    def _clear_memory(self) -> None:
+        for timer in self._memory_timers.values():
+            timer.cancel()
+        self._memory_timers.clear()
+        self.memory_cache.clear()
+        self._memory_doc_index.clear()
+        self._memory_entry_docs.clear()
+        self._semantic_index.clear()
 
 
 # ==========================================
@@ -346,25 +772,38 @@ class RAGCache:
 
 
 def create_rag_cache(
-    redis_url: Optional[str] = None, ttl_seconds: Optional[int] = None
+    redis_manager: Optional[Any] = None, ttl_seconds: Optional[int] = None
 ) -> RAGCache:
     """
     Factory pour créer une instance RAGCache avec config depuis env.
 
+    ``redis_manager`` est le RedisManager partagé de l'application (None =
+    cache mémoire local uniquement).
+
     Env variables:
-    - RAG_CACHE_REDIS_URL: URL de connexion Redis
     - RAG_CACHE_TTL_SECONDS: TTL du cache (défaut: 3600)
     - RAG_CACHE_ENABLED: Activer/désactiver le cache (défaut: true)
     - RAG_CACHE_MAX_MEMORY_ITEMS: Taille max cache mémoire (défaut: 500)
+    - RAG_CACHE_SEMANTIC_THRESHOLD: Similarité cosinus du tier sémantique
+      (défaut: 0.95, 0 = désactivé)
+    - RAG_CACHE_SEMANTIC_MAX_PER_SCOPE: Embeddings gardés par scope (défaut: 64)
+    - RAG_CACHE_SEMANTIC_AUDIT_RATE: Fraction de hits sémantiques audités (défaut: 0.02)
     """
     # Lire config depuis env
-    redis_url = redis_url or os.getenv("RAG_CACHE_REDIS_URL")
     ttl_seconds = ttl_seconds or int(os.getenv("RAG_CACHE_TTL_SECONDS", "3600"))
     max_memory_items = int(os.getenv("RAG_CACHE_MAX_MEMORY_ITEMS", "500"))
     enabled = os.getenv("RAG_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+    semantic_threshold = float(os.getenv("RAG_CACHE_SEMANTIC_THRESHOLD", "0.95"))
+    max_per_scope = int(os.getenv("RAG_CACHE_SEMANTIC_MAX_PER_SCOPE", "64"))
+    audit_rate = float(os.getenv("RAG_CACHE_SEMANTIC_AUDIT_RATE", "0.02"))
 
     cache = RAGCache(
-        redis_url=redis_url, ttl_seconds=ttl_seconds, max_memory_items=max_memory_items
+        redis_manager=redis_manager,
+        ttl_seconds=ttl_seconds,
+        max_memory_items=max_memory_items,
+        semantic_threshold=semantic_threshold,
+        max_semantic_items_per_scope=max_per_scope,
+        semantic_audit_rate=audit_rate,
     )
 
     cache.enabled = enabled
@@ -42,6 +42,18 @@ if PROMETHEUS_AVAILABLE:
         "rag_cache_misses_total", "Number of RAG cache misses"
     )
 
+    # Hits par tier (exact = fingerprint, semantic = embedding de requête proche)
+    rag_cache_tier_hits_total = Counter(
+        "rag_cache_tier_hits_total", "Number of RAG cache hits by tier", ["tier"]
+    )
+
+    # Audits des hits sémantiques (ré-exécution de la requête)
+    rag_cache_semantic_audits_total = Counter(
+        "rag_cache_semantic_audits_total",
+        "Audited semantic cache hits",
+        ["outcome"],  # "confirmed" ou "false_positive"
+    )
+
     # Chunks fusionnés
     rag_chunks_merged_total = Counter(
         "rag_chunks_merged_total", "Total number of adjacent chunks merged"
@@ -86,6 +98,28 @@ if PROMETHEUS_AVAILABLE:
         buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0],
     )
 
+    # Recherche documentaire en deux étapes (coarse = profils, chunks = restreinte)
+    rag_retrieval_stage_duration_seconds = Histogram(
+        "rag_retrieval_stage_duration_seconds",
+        "Time spent per document retrieval stage",
+        ["stage"],
+        buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0],
+    )
+
+    rag_retrieval_stage_items = Histogram(
+        "rag_retrieval_stage_items",
+        "Items (profiles or chunks) returned per document retrieval stage",
+        ["stage"],
+        buckets=[1, 5, 10, 25, 50, 100, 250, 500],
+    )
+
+    rag_retrieval_stage_payload_bytes = Histogram(
+        "rag_retrieval_stage_payload_bytes",
+        "Text payload size returned per document retrieval stage",
+        ["stage"],
+        buckets=[1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000],
+    )
+
     # ==========================================
     # Gauges - Valeurs instantanées/moyennes
     # ==========================================
@@ -181,10 +215,19 @@ def record_query(agent_id: str, has_intent: bool = False) -> None:
         rag_queries_total.labels(agent_id=agent_id, has_intent=str(has_intent)).inc()
 
 
-def record_cache_hit() -> None:
-    """Enregistre un cache hit."""
+def record_cache_hit(tier: str = "exact") -> None:
+    """Enregistre un cache hit (tier "exact" ou "semantic")."""
     if PROMETHEUS_AVAILABLE:
         rag_cache_hits_total.inc()
+        rag_cache_tier_hits_total.labels(tier=tier).inc()
+
+
+def record_semantic_audit(false_positive: bool) -> None:
+    """Enregistre le verdict d'audit d'un hit sémantique."""
+    if PROMETHEUS_AVAILABLE:
+        rag_cache_semantic_audits_total.labels(
+            outcome="false_positive" if false_positive else "confirmed"
+        ).inc()
 
 
 def record_cache_miss() -> None:
@@ -199,6 +242,18 @@ def record_chunks_merged(count: int) -> None:
         rag_chunks_merged_total.inc(count)
 
 
+def record_retrieval_stage(
+    stage: str, duration_seconds: float, items: int, payload_bytes: int
+) -> None:
+    """Enregistre latence et payload d'une étape de recherche documentaire."""
+    if PROMETHEUS_AVAILABLE:
+        rag_retrieval_stage_duration_seconds.labels(stage=stage).observe(
+            duration_seconds
+        )
+        rag_retrieval_stage_items.labels(stage=stage).observe(items)
+        rag_retrieval_stage_payload_bytes.labels(stage=stage).observe(payload_bytes)
+
+
 def record_content_type_query(content_type: str) -> None:
     """Enregistre une requête par type de contenu."""
     if PROMETHEUS_AVAILABLE and content_type:
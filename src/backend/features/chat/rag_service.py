@@ -135,8 +135,19 @@ class RAGService:
             
             # Convert to standardized format
             doc_hits = self._convert_results_to_hits(results)  # type: ignore[arg-type]
-            
-            # Merge adjacent chunks
+
+            # Parent–child index: replace child hits by their parent sections
+            expand_parents = getattr(self.document_service, "expand_parent_windows", None)
+            if expand_parents is not None:
+                try:
+                    parent_hits, legacy_hits = await expand_parents(
+                        doc_hits, user_id=user_id, session_id=session_id
+                    )
+                    doc_hits = parent_hits + legacy_hits
+                except Exception as e:
+                    logger.warning(f"[RAG] Parent sections unavailable: {e}")
+
+            # Merge adjacent chunks (legacy chunks without parent only)
             merged_hits = self.merge_chunks(
                 doc_hits=doc_hits,
                 max_blocks=10,
@@ -422,6 +433,10 @@ class RAGService:
         """
         Regroupe les chunks adjacents du même document pour reconstituer les contenus fragmentés.
 
+        Les fenêtres parentes (``metadata.parent_window``) sont conservées telles
+        quelles : la fusion ne concerne plus que les documents indexés avant
+        l'index parent–enfant.
+
         ✅ Phase 2 RAG Optimisation : Reconstruit les contenus longs (poèmes, sections)
         ✅ Phase 3 RAG Optimisation : Re-ranking sémantique multi-critères
 
@@ -436,18 +451,24 @@ class RAGService:
         if not doc_hits:
             return []
 
+        # Les fenêtres parentes (index parent–enfant) sont déjà des sections
+        # complètes : seuls les chunks legacy passent par la fusion adjacente
+        merged_hits = [
+            hit for hit in doc_hits if hit.get("metadata", {}).get("parent_window")
+        ]
+
         # Grouper par document_id
         by_document: Dict[Any, List[Dict[str, Any]]] = {}
         for hit in doc_hits:
             md = hit.get("metadata", {})
+            if md.get("parent_window"):
+                continue
             doc_id = md.get("document_id")
             if doc_id is not None:
                 if doc_id not in by_document:
                     by_document[doc_id] = []
                 by_document[doc_id].append(hit)
 
-        merged_hits = []
-
         for doc_id, chunks in by_document.items():
             # Trier par line_start pour détecter l'adjacence
             chunks_sorted = sorted(
@@ -15,10 +15,11 @@ import json
 import logging
 import os
 import re
+import time
 from collections import Counter
 import yaml  # type: ignore[import-untyped]
 from uuid import uuid4
-from typing import Dict, Any, List, Tuple, Optional, AsyncGenerator, AsyncIterator, cast
+from typing import Dict, Any, List, Set, Tuple, Optional, AsyncGenerator, AsyncIterator, cast
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -30,6 +31,11 @@ from anthropic.types.message_param import MessageParam
 
 from backend.core.session_manager import SessionManager
 from backend.core.cost_tracker import CostTracker
+from backend.core.cache.llm_response_cache import (
+    current_call_site,
+    get_llm_response_cache,
+    make_cache_key,
+)
 from backend.core.websocket import ConnectionManager
 from backend.shared.models import AgentMessage, Role, ChatMessage
 from backend.features.memory.vector_service import VectorService
@@ -45,6 +51,7 @@ from backend.features.memory.proactive_hints import ProactiveHintEngine
 # ✅ Phase 3 RAG : Imports pour métriques et cache
 from backend.features.chat import rag_metrics
 from backend.features.chat.rag_cache import create_rag_cache, RAGCache
+from backend.features.memory.generations import get_generation_tracker
 
 # 🛡️ P2.3 - Garde-fous agents (RoutePolicy, BudgetGuard, ToolCircuitBreaker)
 from backend.shared.agents_guard import (
@@ -55,6 +62,7 @@ from backend.shared.agents_guard import (
 )
 
 # 🔍 Phase 3 Tracing: Distributed tracing pour observabilité
+from backend.core.event_store import record_event
 from backend.core.tracing import get_trace_manager
 
 logger = logging.getLogger(__name__)
@@ -114,12 +122,17 @@ class ChatService:
         document_service: Optional[
             Any
         ] = None,  # ✅ Phase 3 RAG: Injection DocumentService
+        redis_manager: Optional[Any] = None,
     ):
         self.session_manager = session_manager
         self.cost_tracker = cost_tracker
         self.vector_service = vector_service
         self.settings = settings
         self.document_service = document_service  # ✅ Phase 3 RAG
+        # Passerelle vers les workers de génération (None = génération inline)
+        self.generation_gateway: Optional[Any] = None
+        # Envois vers la passerelle en cours (référence gardée jusqu'à la fin)
+        self._gateway_submits: Set[asyncio.Task[Any]] = set()
 
         # Politique hors historique (quand RAG OFF)
         self.off_history_policy = (
@@ -186,7 +199,8 @@ class ChatService:
             )
 
         # ✅ Phase 3 RAG : Cache et métriques
-        self.rag_cache: RAGCache = create_rag_cache()
+        # RedisManager partagé de l'application (None = cache mémoire local)
+        self.rag_cache: RAGCache = create_rag_cache(redis_manager=redis_manager)
         self.rag_metrics_aggregator = rag_metrics.get_aggregator()
         logger.info(f"[Phase 3 RAG] Cache initialisé: {self.rag_cache.get_stats()}")
 
@@ -270,6 +284,10 @@ class ChatService:
             f"ChatService V32.1 initialisé. Prompts chargés: {len(self.prompts)}"
         )
 
+    def set_generation_gateway(self, gateway: Optional[Any]) -> None:
+        """Délègue les tours d'agent aux workers (voir features/chat/generation.py)."""
+        self.generation_gateway = gateway
+
     # ---------- prompts ----------
     def _load_prompts(self, prompts_dir: str) -> Dict[str, Dict[str, str]]:
         """
@@ -818,6 +836,9 @@ class ChatService:
 
         ✅ Phase 2 RAG Optimisation : Reconstruit automatiquement les contenus longs (poèmes, sections, etc.)
         qui ont été découpés en plusieurs chunks lors de l'indexation.
+        Les fenêtres parentes (``metadata.parent_window``, index parent–enfant)
+        sont déjà complètes et passent sans fusion : seuls les chunks legacy
+        (indexés sans section parente) sont regroupés ici.
 
         ✅ Phase 3 RAG Optimisation : Re-ranking sémantique multi-critères avec diversification
 
@@ -840,18 +861,24 @@ class ChatService:
         if not doc_hits:
             return []
 
+        # Les fenêtres parentes (index parent–enfant) sont déjà des sections
+        # complètes : seuls les chunks legacy passent par la fusion adjacente
+        merged_hits = [
+            hit for hit in doc_hits if hit.get("metadata", {}).get("parent_window")
+        ]
+
         # Grouper par document_id
         by_document: Dict[Any, List[Dict[str, Any]]] = {}
         for hit in doc_hits:
             md = hit.get("metadata", {})
+            if md.get("parent_window"):
+                continue
             doc_id = md.get("document_id")
             if doc_id is not None:
                 if doc_id not in by_document:
                     by_document[doc_id] = []
                 by_document[doc_id].append(hit)
 
-        merged_hits = []
-
         for doc_id, chunks in by_document.items():
             # Trier par line_start pour détecter l'adjacence
             chunks_sorted = sorted(
@@ -1353,13 +1380,15 @@ class ChatService:
             )
 
         # Utiliser le cache RAG avec une clé spécifique pour la mémoire consolidée
-        # On préfixe la query pour différencier du cache RAG documents
-        cache_query = f"__CONSOLIDATED_MEMORY__:{query_text}"
+        # On préfixe la query pour différencier du cache RAG documents ; la
+        # génération mémoire de l'utilisateur périme la clé à chaque écriture
+        generation = await get_generation_tracker().get(user_id) if user_id else 0
+        cache_query = f"__CONSOLIDATED_MEMORY__:g{generation}:{query_text}"
         where_filter = {"user_id": user_id} if user_id else None
 
         # Tenter de récupérer depuis le cache
         start_time = time.time()
-        cached_result = self.rag_cache.get(
+        cached_result = await self.rag_cache.aget(
             cache_query,
             where_filter,
             agent_id="memory_consolidation",
@@ -1443,7 +1472,7 @@ class ChatService:
             # Stocker dans le cache
             # Note: RAGCache attend doc_hits et rag_sources
             # On utilise doc_hits pour stocker nos consolidated_entries
-            self.rag_cache.set(
+            await self.rag_cache.aset(
                 cache_query,
                 where_filter,
                 agent_id="memory_consolidation",
@@ -2083,13 +2112,14 @@ class ChatService:
                     intent = self._parse_user_intent(last_user_message)
 
                     # Rechercher dans les documents avec scoring Phase 3
-                    document_results = self.document_service.search_documents(
-                        query=intent.get("expanded_query", last_user_message),
-                        session_id=session_id,
-                        user_id=uid,
-                        top_k=top_k,  # Maintenant peut être 100 pour requêtes exhaustives
-                        intent=intent,
-                    )
+                    with self.trace_manager.span("retrieval.documents", agent=agent_id):
+                        document_results = self.document_service.search_documents(
+                            query=intent.get("expanded_query", last_user_message),
+                            session_id=session_id,
+                            user_id=uid,
+                            top_k=top_k,  # Maintenant peut être 100 pour requêtes exhaustives
+                            intent=intent,
+                        )
 
                     if document_results:
                         logger.info(
@@ -2137,29 +2167,30 @@ class ChatService:
             elif len(clauses) >= 2:
                 where_filter = {"$and": clauses}
 
-            results = self.vector_service.query(
-                collection=knowledge_col,
-                query_text=last_user_message,
-                n_results=top_k,
-                where_filter=where_filter,
-            )
+            with self.trace_manager.span("retrieval.vector_query", agent=agent_id):
+                results = self.vector_service.query(
+                    collection=knowledge_col,
+                    query_text=last_user_message,
+                    n_results=top_k,
+                    where_filter=where_filter,
+                )
 
-            if (not results) and ag and uid:
-                try:
-                    results = self.vector_service.query(
-                        collection=knowledge_col,
-                        query_text=last_user_message,
-                        n_results=top_k,
-                        where_filter={
-                            "$and": [
-                                {"session_id": session_id},
-                                {"user_id": uid},
-                                {"vitality": {"$gte": VITALITY_RECALL_THRESHOLD}},
-                            ]
-                        },
-                    )
-                except Exception:
-                    pass
+                if (not results) and ag and uid:
+                    try:
+                        results = self.vector_service.query(
+                            collection=knowledge_col,
+                            query_text=last_user_message,
+                            n_results=top_k,
+                            where_filter={
+                                "$and": [
+                                    {"session_id": session_id},
+                                    {"user_id": uid},
+                                    {"vitality": {"$gte": VITALITY_RECALL_THRESHOLD}},
+                                ]
+                            },
+                        )
+                    except Exception:
+                        pass
 
             if not results:
                 return ""
@@ -2201,9 +2232,12 @@ class ChatService:
                 touched_metas.append(updated_meta)
             if touched_ids and knowledge_col is not None:
                 try:
-                    self.vector_service.update_metadatas(
-                        knowledge_col, touched_ids, touched_metas
-                    )
+                    with self.trace_manager.span(
+                        "retrieval.vitality_update", agent=agent_id
+                    ):
+                        self.vector_service.update_metadatas(
+                            knowledge_col, touched_ids, touched_metas
+                        )
                 except Exception as err:
                     logger.warning(
                         f"Impossible de mettre à jour la vitalité mémoire: {err}"
@@ -2338,6 +2372,8 @@ class ChatService:
                 logger.error(f"[BudgetGuard] {agent_id} budget exceeded: {e}")
                 raise
 
+        started = time.perf_counter()
+        first_chunk_at: Optional[float] = None
         try:
             if provider == "openai":
                 streamer = self._get_openai_stream(
@@ -2357,6 +2393,8 @@ class ChatService:
                 raise ValueError(f"Fournisseur LLM non supporté: {provider}")
 
             async for chunk in streamer:
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
                 yield chunk
 
             # 🛡️ P2.3 - BudgetGuard: Consommer tokens réels APRÈS stream
@@ -2374,11 +2412,43 @@ class ChatService:
 
             # 🔍 P3 Tracing: End llm_generate span (success)
             self.trace_manager.end_span(span_id, status="OK")
+            self._record_llm_call_event(
+                agent_id, provider, model, "success", started, first_chunk_at,
+                cost_info_container,
+            )
         except Exception:
             # 🔍 P3 Tracing: End span on exception
             self.trace_manager.end_span(span_id, status="ERROR")
+            self._record_llm_call_event(
+                agent_id, provider, model, "error", started, first_chunk_at,
+                cost_info_container,
+            )
             raise
 
+    @staticmethod
+    def _record_llm_call_event(
+        agent_id: str,
+        provider: str,
+        model: str,
+        status: str,
+        started: float,
+        first_chunk_at: Optional[float],
+        cost_info: Dict[str, Any],
+    ) -> None:
+        """Appel LLM vers le magasin d'événements local (latence, TTFT, tokens)."""
+        record_event(
+            "llm_call",
+            agent=agent_id,
+            provider=provider,
+            model=model,
+            status=status,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            ttft_ms=(first_chunk_at - started) * 1000 if first_chunk_at else None,
+            input_tokens=(cost_info or {}).get("input_tokens"),
+            output_tokens=(cost_info or {}).get("output_tokens"),
+            cost=(cost_info or {}).get("total_cost"),
+        )
+
     async def _get_openai_stream(
         self,
         model: str,
@@ -2520,6 +2590,97 @@ class ChatService:
         provider, model, system_prompt = self._get_agent_config(agent_id)
         system_prompt = self._ensure_fr_tutoiement(agent_id, provider, system_prompt)
 
+        # Cache persistant : uniquement pour les sites d'appel qui l'ont demandé
+        policy = current_call_site()
+        cache = get_llm_response_cache() if policy is not None else None
+        cache_key: Optional[str] = None
+        if policy is not None and cache is not None:
+            cache_key = make_cache_key(
+                provider,
+                model,
+                policy.version,
+                system_prompt=system_prompt,
+                prompt=prompt,
+                json_schema=json_schema,
+            )
+            try:
+                entry = await cache.aget(cache_key)
+            except Exception as e:
+                logger.warning(f"[LLMResponseCache] Lecture impossible: {e}")
+                entry = None
+            if entry is not None and isinstance(entry.get("response"), dict):
+                self._record_llm_cache_lookup(policy.name, hit=True, entry=entry)
+                return cast(Dict[str, Any], entry["response"])
+
+        result, usage = await self._call_structured_provider(
+            agent_id, provider, model, system_prompt, prompt, json_schema
+        )
+
+        if policy is not None and cache is not None and cache_key:
+            self._record_llm_cache_lookup(policy.name, hit=False)
+            if isinstance(result, dict) and result:
+                try:
+                    await cache.aput(
+                        cache_key,
+                        result,
+                        policy=policy,
+                        provider=provider,
+                        model=model,
+                        cost_usd=usage["cost_usd"],
+                        input_tokens=usage["input_tokens"],
+                        output_tokens=usage["output_tokens"],
+                    )
+                except Exception as e:
+                    logger.warning(f"[LLMResponseCache] Écriture impossible: {e}")
+        return result
+
+    def _record_llm_cache_lookup(
+        self,
+        call_site: str,
+        *,
+        hit: bool,
+        entry: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        tracker = getattr(self, "cost_tracker", None)
+        record = getattr(tracker, "record_cache_lookup", None)
+        if record is None:
+            return
+        try:
+            record(
+                call_site,
+                hit=hit,
+                cost_saved=float((entry or {}).get("cost_usd", 0.0)),
+                tokens_saved=int((entry or {}).get("input_tokens", 0))
+                + int((entry or {}).get("output_tokens", 0)),
+            )
+        except Exception as e:
+            logger.debug(f"[LLMResponseCache] Stats non enregistrées: {e}")
+
+    @staticmethod
+    def _structured_usage(model: str, input_tokens: Any, output_tokens: Any) -> Dict[str, Any]:
+        try:
+            input_tokens = int(input_tokens or 0)
+            output_tokens = int(output_tokens or 0)
+        except (TypeError, ValueError):
+            input_tokens, output_tokens = 0, 0
+        pricing = MODEL_PRICING.get(model, {"input": 0.0, "output": 0.0})
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": input_tokens * pricing["input"]
+            + output_tokens * pricing["output"],
+        }
+
+    async def _call_structured_provider(
+        self,
+        agent_id: str,
+        provider: str,
+        model: str,
+        system_prompt: str,
+        prompt: str,
+        json_schema: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Appel JSON au provider ; retourne (réponse, usage estimé)."""
         # Timeout configurable pour appels LLM (critique en prod)
         timeout_seconds = float(os.getenv("MEMORY_ANALYSIS_TIMEOUT", "30"))
 
@@ -2536,12 +2697,18 @@ class ChatService:
                     ),
                     timeout=timeout_seconds,
                 )
+                meta = getattr(google_resp, "usage_metadata", None)
+                usage = self._structured_usage(
+                    model,
+                    getattr(meta, "prompt_token_count", 0),
+                    getattr(meta, "candidates_token_count", 0),
+                )
                 text = getattr(google_resp, "text", "") or ""
                 try:
-                    return json.loads(text) if text else {}
+                    return (json.loads(text) if text else {}), usage
                 except Exception:
                     m = re.search(r"\{.*\}", text, re.S)
-                    return json.loads(m.group(0)) if m else {}
+                    return (json.loads(m.group(0)) if m else {}), usage
             except asyncio.TimeoutError:
                 logger.warning(
                     f"[get_structured_llm_response] Timeout Google ({timeout_seconds}s) pour agent={agent_id}, prompt_len={len(prompt)}"
@@ -2561,8 +2728,14 @@ class ChatService:
                     {"role": "user", "content": json_prompt},
                 ],
             )
+            usage_obj = getattr(openai_resp, "usage", None)
+            usage = self._structured_usage(
+                model,
+                getattr(usage_obj, "prompt_tokens", 0),
+                getattr(usage_obj, "completion_tokens", 0),
+            )
             content = (openai_resp.choices[0].message.content or "").strip()
-            return json.loads(content) if content else {}
+            return (json.loads(content) if content else {}), usage
         elif provider == "anthropic":
             anthropic_resp = await self.anthropic_client.messages.create(
                 model=model,
@@ -2571,17 +2744,25 @@ class ChatService:
                 system=system_prompt + "\n\nRéponds strictement en JSON valide.",
                 messages=[{"role": "user", "content": prompt}],
             )
+            usage_obj = getattr(anthropic_resp, "usage", None)
+            usage = self._structured_usage(
+                model,
+                getattr(usage_obj, "input_tokens", 0),
+                getattr(usage_obj, "output_tokens", 0),
+            )
             text = ""
             for block in getattr(anthropic_resp, "content", []) or []:
                 t = getattr(block, "text", "") or ""
                 if t:
                     text += t
             try:
-                return cast(dict[str, Any], json.loads(text))
+                return cast(dict[str, Any], json.loads(text)), usage
             except Exception:
                 m = re.search(r"\{.*\}", text, re.S)
-                return cast(dict[str, Any], json.loads(m.group(0))) if m else {}
-        return {}
+                return (
+                    cast(dict[str, Any], json.loads(m.group(0))) if m else {}
+                ), usage
+        return {}, self._structured_usage(model, 0, 0)
 
     # ---------- pipeline chat (stream) ----------
     async def _process_agent_response_stream(
@@ -2604,6 +2785,14 @@ class ChatService:
         origin = (origin_agent_id or "").strip().lower()
         is_broadcast = origin == "global"
 
+        # 🔍 Tracing: span racine du tour (retrieval, llm_generate... en enfants)
+        turn_span_id = self.trace_manager.start_span(
+            "chat_turn",
+            attrs={"agent": agent_id, "broadcast": is_broadcast},
+            new_trace=True,
+        )
+        turn_status = "OK"
+
         try:
             start_payload: dict[str, Any] = {
                 "agent_id": agent_id,
@@ -2978,25 +3167,92 @@ class ChatService:
                 if user_intent.get("content_type"):
                     rag_metrics.record_content_type_query(user_intent["content_type"])
 
-                # Tenter de récupérer depuis le cache
-                cached_result = self.rag_cache.get(
+                # Tenter de récupérer depuis le cache (tier exact)
+                cached_result = await self.rag_cache.aget(
                     query_text, where_filter, agent_id, selected_doc_ids
                 )
 
+                # Tier sémantique : l'embedding de la requête sert aussi à la
+                # recherche vectorielle en cas de miss (un seul encodage)
+                query_embedding: Optional[List[float]] = None
+                if not cached_result and self.rag_cache.semantic_enabled:
+                    try:
+                        embeddings = await asyncio.to_thread(
+                            self.vector_service.embed_texts, [query_text or " "]
+                        )
+                        query_embedding = embeddings[0] if embeddings else None
+                    except Exception as embed_err:
+                        logger.debug(
+                            f"[RAG Cache] Embedding requête indisponible: {embed_err}"
+                        )
+                    if query_embedding is not None:
+                        cached_result = await self.rag_cache.aget_similar(
+                            query_embedding, where_filter, agent_id, selected_doc_ids
+                        )
+
+                # Audit échantillonné des hits sémantiques : on ré-exécute la requête
+                audited_result: Optional[Dict[str, Any]] = None
+                if self.rag_cache.should_audit(cached_result):
+                    audited_result, cached_result = cached_result, None
+
                 if cached_result:
                     # Cache hit !
-                    rag_metrics.record_cache_hit()
+                    cache_tier = cached_result.get("cache_tier", "exact")
+                    rag_metrics.record_cache_hit(cache_tier)
                     doc_hits = cached_result.get("doc_hits", [])
                     rag_sources = cached_result.get("rag_sources", [])
                     logger.info(
-                        f"[RAG Cache] HIT - Restored {len(doc_hits)} chunks from cache"
+                        f"[RAG Cache] HIT ({cache_tier}) - Restored {len(doc_hits)} chunks from cache"
                     )
                 else:
                     rag_sources = []
                     # Cache miss, exécuter la query
                     rag_metrics.record_cache_miss()
 
+                    # Recherche en deux étapes : les profils documents choisissent
+                    # les candidats, la recherche de chunks est restreinte à eux
+                    search_filter = where_filter
+                    coarse_index = getattr(self.document_service, "coarse_index", None)
+                    if coarse_index is not None and uid and not selected_doc_ids:
+                        try:
+                            (
+                                candidate_ids,
+                                stage_embedding,
+                                coarse_stage,
+                            ) = await asyncio.to_thread(
+                                coarse_index.select_for_query,
+                                self._doc_collection,
+                                query_text,
+                                uid,
+                                query_embedding,
+                            )
+                        except Exception as coarse_err:
+                            logger.warning(
+                                f"[RAG Coarse] Étape 1 ignorée: {coarse_err}"
+                            )
+                            candidate_ids, stage_embedding = None, None
+                        if query_embedding is None:
+                            query_embedding = stage_embedding
+                        if candidate_ids:
+                            search_filter = coarse_index.restrict_filter(
+                                where_filter, candidate_ids
+                            )
+                            rag_metrics.record_retrieval_stage(
+                                "coarse",
+                                coarse_stage["duration_ms"] / 1000,
+                                coarse_stage["items"],
+                                coarse_stage["payload_bytes"],
+                            )
+                            logger.info(
+                                f"[RAG Coarse] {len(candidate_ids)} documents candidats "
+                                f"en {coarse_stage['duration_ms']:.1f}ms"
+                            )
+
                     # ✅ Phase 1 Optimisation: Recherche hybride (vectorielle + BM25)
+                    search_kwargs: Dict[str, Any] = {}
+                    if query_embedding is not None:
+                        search_kwargs["query_embedding"] = query_embedding
+                    chunks_started = time.perf_counter()
                     with rag_metrics.track_duration(
                         rag_metrics.rag_query_phase3_duration_seconds
                     ):
@@ -3004,18 +3260,44 @@ class ChatService:
                             collection=self._doc_collection,
                             query_text=query_text or " ",
                             n_results=30,  # Augmenté à 30 pour récupérer contenus longs fragmentés
-                            where_filter=where_filter,
+                            where_filter=search_filter,
                             alpha=0.6,  # 60% vectoriel, 40% BM25 (équilibré)
                             score_threshold=0.2,  # Abaissé de 0.3 à 0.2 pour plus de résultats
+                            **search_kwargs,
                         )
+                    rag_metrics.record_retrieval_stage(
+                        "chunks",
+                        time.perf_counter() - chunks_started,
+                        len(raw_doc_hits or []),
+                        sum(len(h.get("text") or "") for h in raw_doc_hits or []),
+                    )
 
-                    # ✅ Phase 2 RAG Optimisation : Fusionner les chunks adjacents pour reconstituer contenus complets
+                    # Index parent–enfant : les enfants retrouvés sont remplacés par
+                    # leurs sections parentes (lookup SQL par id, dédupliqué)
+                    candidate_hits = list(raw_doc_hits or [])
+                    expand_parents = getattr(
+                        self.document_service, "expand_parent_windows", None
+                    )
+                    if expand_parents is not None and candidate_hits:
+                        try:
+                            parent_hits, legacy_hits = await expand_parents(
+                                candidate_hits,
+                                user_id=uid,
+                                session_id=session_id,
+                            )
+                            candidate_hits = parent_hits + legacy_hits
+                        except Exception as parent_err:
+                            logger.warning(
+                                f"[RAG Parents] Sections parentes ignorées: {parent_err}"
+                            )
+
+                    # ✅ Phase 2 RAG Optimisation : fusion adjacente conservée pour les chunks legacy (sans parent)
                     # ✅ Phase 3 RAG Optimisation : Utiliser nouveau scoring multi-critères
                     with rag_metrics.track_duration(
                         rag_metrics.rag_merge_duration_seconds
                     ):
                         doc_hits = self._merge_adjacent_chunks(
-                            raw_doc_hits or [],
+                            candidate_hits,
                             max_blocks=10,
                             user_intent=user_intent,  # ✅ Passé pour scoring avancé
                         )
@@ -3073,15 +3355,26 @@ class ChatService:
                             filtered_sources.append(source)
                     rag_sources = filtered_sources
 
+                if audited_result is not None:
+                    false_positive = self.rag_cache.audit_semantic_hit(
+                        audited_result, doc_hits
+                    )
+                    rag_metrics.record_semantic_audit(false_positive)
+                    if false_positive:
+                        logger.info(
+                            f"[RAG Cache] Faux positif sémantique (similarity={audited_result.get('similarity')})"
+                        )
+
                 # ✅ Phase 3 RAG : Stocker dans le cache si cache miss
                 if not cached_result and doc_hits:
-                    self.rag_cache.set(
+                    await self.rag_cache.aset(
                         query_text,
                         where_filter,
                         agent_id,
                         doc_hits,
                         rag_sources,
                         selected_doc_ids,
+                        query_embedding=query_embedding,
                     )
 
                 # ✅ Phase 3 RAG : Collecter métriques qualité
@@ -3515,6 +3808,7 @@ class ChatService:
                 )
 
         except Exception as e:
+            turn_status = "ERROR"
             logger.error(f"Erreur streaming {agent_id}: {e}", exc_info=True)
             try:
                 await connection_manager.send_personal_message(
@@ -3531,11 +3825,13 @@ class ChatService:
                     f"Impossible d'envoyer l'erreur au client (session {session_id}): {send_error}",
                     exc_info=True,
                 )
+        finally:
+            self.trace_manager.end_span(turn_span_id, status=turn_status)
 
     # ===========================
     # Débat (non-stream, async)
     # ===========================
-    async def get_llm_response_for_debate(
+    def _prepare_debate_inputs(
         self,
         agent_id: str,
         prompt: str,
@@ -3544,13 +3840,12 @@ class ChatService:
         use_rag: bool = False,
         session_id: Optional[str] = None,
         history: Optional[List[Any]] = None,
-        max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None,
         doc_ids: Optional[List[int]] = None,
-    ) -> Dict[str, Any]:
+    ) -> Tuple[str, str, str, List[Dict[str, Any]], str]:
         """
-        Réponse unique pour le pipeline Débat (non-stream).
-        Retourne: {"text": str, "provider": str, "model": str, "fallback": bool, "cost_info": {...}}
+        Prépare un tour "one-shot" (débat, voix) : config agent, contexte RAG
+        documentaire et historique brut terminé par le prompt utilisateur.
+        Retourne (provider, model, system_prompt, raw_history, rag_context).
         """
         provider, model, system_prompt = self._get_agent_config(agent_id)
         system_prompt = self._ensure_fr_tutoiement(
@@ -3624,6 +3919,58 @@ class ChatService:
                 except Exception:
                     continue
         raw_history.append({"role": Role.USER, "content": base_prompt})
+        return provider, model, system_prompt, raw_history, rag_context
+
+    async def _record_one_shot_cost(
+        self,
+        agent_id: str,
+        model_used: str,
+        cost_info: Dict[str, Any],
+        feature: str,
+    ) -> None:
+        try:
+            if self.cost_tracker:
+                await self.cost_tracker.record_cost(
+                    agent=agent_id,
+                    model=model_used,
+                    input_tokens=int(cost_info.get("input_tokens", 0) or 0),
+                    output_tokens=int(cost_info.get("output_tokens", 0) or 0),
+                    total_cost=float(cost_info.get("total_cost", 0.0) or 0.0),
+                    feature=feature,
+                )
+        except Exception:
+            logger.debug(
+                "Impossible d'enregistrer le coût (%s)", feature, exc_info=True
+            )
+
+    async def get_llm_response_for_debate(
+        self,
+        agent_id: str,
+        prompt: str,
+        *,
+        system_override: Optional[str] = None,
+        use_rag: bool = False,
+        session_id: Optional[str] = None,
+        history: Optional[List[Any]] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        doc_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Réponse unique pour le pipeline Débat (non-stream).
+        Retourne: {"text": str, "provider": str, "model": str, "fallback": bool, "cost_info": {...}}
+        """
+        provider, model, system_prompt, raw_history, rag_context = (
+            self._prepare_debate_inputs(
+                agent_id,
+                prompt,
+                system_override=system_override,
+                use_rag=use_rag,
+                session_id=session_id,
+                history=history,
+                doc_ids=doc_ids,
+            )
+        )
 
         async def run_once(
             provider_name: str, model_name: str
@@ -3704,18 +4051,7 @@ class ChatService:
         cost_info.setdefault("output_tokens", 0)
         cost_info.setdefault("total_cost", 0.0)
 
-        try:
-            if self.cost_tracker:
-                await self.cost_tracker.record_cost(
-                    agent=agent_id,
-                    model=model_used,
-                    input_tokens=int(cost_info.get("input_tokens", 0) or 0),
-                    output_tokens=int(cost_info.get("output_tokens", 0) or 0),
-                    total_cost=float(cost_info.get("total_cost", 0.0) or 0.0),
-                    feature="debate",
-                )
-        except Exception:
-            logger.debug("Impossible d'enregistrer le coût du débat", exc_info=True)
+        await self._record_one_shot_cost(agent_id, model_used, cost_info, "debate")
 
         return {
             "text": text.strip(),
@@ -3725,6 +4061,88 @@ class ChatService:
             "cost_info": cost_info,
         }
 
+    async def stream_llm_response_for_debate(
+        self,
+        agent_id: str,
+        prompt: str,
+        *,
+        system_override: Optional[str] = None,
+        use_rag: bool = False,
+        session_id: Optional[str] = None,
+        history: Optional[List[Any]] = None,
+        doc_ids: Optional[List[int]] = None,
+        cost_info_container: Optional[Dict[str, Any]] = None,
+        feature: str = "debate",
+    ) -> AsyncGenerator[str, None]:
+        """
+        Variante streamée de get_llm_response_for_debate (pipeline vocal).
+        Le fallback provider n'est tenté que si l'échec survient avant le
+        premier chunk émis (on ne peut pas "reprendre" un texte déjà envoyé).
+        """
+        provider, model, system_prompt, raw_history, rag_context = (
+            self._prepare_debate_inputs(
+                agent_id,
+                prompt,
+                system_override=system_override,
+                use_rag=use_rag,
+                session_id=session_id,
+                history=history,
+                doc_ids=doc_ids,
+            )
+        )
+        cost_info: Dict[str, Any] = (
+            cost_info_container if cost_info_container is not None else {}
+        )
+        candidates = [(provider, model)] + [
+            (p, m) for p, m in CHAT_PROVIDER_FALLBACKS.get(provider, []) if p != provider
+        ]
+
+        model_used = model
+        last_error: Optional[Exception] = None
+        for provider_name, model_name in candidates:
+            normalized = self._normalize_history_for_llm(
+                provider_name, raw_history, rag_context, use_rag, agent_id
+            )
+            local_cost: Dict[str, Any] = {}
+            emitted = False
+            try:
+                stream_iter = await self._ensure_async_stream(
+                    self._get_llm_response_stream(
+                        provider_name,
+                        model_name,
+                        system_prompt,
+                        normalized,
+                        local_cost,
+                        agent_id=agent_id,
+                    )
+                )
+                async for chunk in stream_iter:
+                    if chunk:
+                        emitted = True
+                        yield chunk
+            except Exception as exc:
+                if emitted:
+                    raise
+                last_error = exc
+                logger.warning(
+                    "stream_llm_response_for_debate: %s/%s failed before first chunk (%s)",
+                    provider_name,
+                    model_name,
+                    exc,
+                )
+                continue
+            model_used = model_name
+            cost_info.update(local_cost)
+            break
+        else:
+            if last_error is not None:
+                raise last_error
+
+        cost_info.setdefault("input_tokens", 0)
+        cost_info.setdefault("output_tokens", 0)
+        cost_info.setdefault("total_cost", 0.0)
+        await self._record_one_shot_cost(agent_id, model_used, cost_info, feature)
+
     # ---------- entrypoint WS ----------
     def process_user_message_for_agents(
         self,
@@ -3764,6 +4182,25 @@ class ChatService:
             targets = [agent_id]
             origin_marker = None
 
+        gateway = getattr(self, "generation_gateway", None)
+        if gateway is not None:
+            # Gateway/workers : le processus web ne fait qu'enfiler les tours
+            submits: Set[asyncio.Task[Any]] = getattr(self, "_gateway_submits", set())
+            self._gateway_submits = submits
+            for target_agent in targets:
+                submit = asyncio.create_task(
+                    gateway.submit(
+                        session_id,
+                        target_agent,
+                        use_rag=use_rag,
+                        doc_ids=list(doc_ids or []),
+                        origin_agent_id=origin_marker,
+                    )
+                )
+                submits.add(submit)
+                submit.add_done_callback(self._on_gateway_submit_done)
+            return
+
         # ⚡ Optimisation Phase 2: Parallélisation des appels agents avec asyncio.gather
         tasks = [
             self._process_agent_response_stream(
@@ -3781,6 +4218,17 @@ class ChatService:
         for task in tasks:
             asyncio.create_task(task)
 
+    def _on_gateway_submit_done(self, task: asyncio.Task[Any]) -> None:
+        self._gateway_submits.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(
+                f"[Generation] Envoi du tour à la passerelle en échec: {error}",
+                exc_info=error,
+            )
+
     def _build_opinion_instruction(
         self,
         *,
@@ -35,9 +35,7 @@ class AdminDashboardService:
         """
         try:
             # Get global costs (no user_id or session_id filter, admin mode)
-            costs_global = await db_queries.get_costs_summary(
-                self.db, allow_global=True
-            )
+            costs_global = await self.cost_tracker.get_spending_summary()
 
             # Get all documents and sessions (admin mode)
             documents_all = await db_queries.get_all_documents(
@@ -198,8 +196,8 @@ class AdminDashboardService:
                     continue
 
                 # Get user-specific metrics
-                user_costs = await db_queries.get_costs_summary(
-                    self.db, user_id=user_id
+                user_costs = await self.cost_tracker.get_spending_summary(
+                    user_id=user_id
                 )
                 user_sessions = await db_queries.get_all_sessions_overview(
                     self.db, user_id=user_id
@@ -416,7 +414,7 @@ class AdminDashboardService:
         """
         try:
             # Get user costs
-            costs = await db_queries.get_costs_summary(self.db, user_id=user_id)
+            costs = await self.cost_tracker.get_spending_summary(user_id=user_id)
 
             # Get user sessions with details
             sessions = await db_queries.get_all_sessions_overview(
@@ -762,11 +760,8 @@ class AdminDashboardService:
         from backend.core.monitoring import metrics
 
         # Calculate average latency across all endpoints
-        if not metrics.latency_count:
-            return 0.0
-        total_latency = sum(metrics.latency_sum.values())
-        total_count = sum(metrics.latency_count.values())
-        return total_latency / total_count if total_count > 0 else 0.0
+        latency: float = metrics.get_overall_avg_latency()
+        return latency
 
     async def _count_recent_errors(self) -> int:
         """Count total errors from MetricsCollector."""
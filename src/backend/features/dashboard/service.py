@@ -185,8 +185,8 @@ class DashboardService:
         try:
             # 1) Récupération des données brutes (tolérance None)
             try:
-                costs_raw = await db_queries.get_costs_summary(
-                    self.db,
+                # Totaux en mémoire du CostTracker (O(1)) hors filtre session
+                costs_raw = await self.cost_tracker.get_spending_summary(
                     user_id=user_id,
                     session_id=session_id,
                 )
@@ -0,0 +1,376 @@
+# src/backend/features/documents/coarse_index.py
+# V1.0 - Index grossier par document pour la recherche RAG en deux étapes
+"""
+Index grossier par document (recherche en deux étapes).
+
+Chaque document indexé reçoit un « profil » dans une collection dédiée :
+- à l'ingestion, le centroïde normalisé des embeddings de ses chunks (calculé
+  au passage, sans ré-encodage) ;
+- pour les documents plus anciens (rattrapage), l'embedding d'un court texte
+  descriptif (nom de fichier, sections, mots-clés).
+
+À la requête, l'étape 1 interroge les profils de l'utilisateur (quelques
+vecteurs, sans payload de chunks) pour choisir les documents candidats ;
+l'étape 2 restreint la recherche de chunks à ces documents. En dessous de
+``min_documents`` profils, la restriction n'apporte rien et n'est pas appliquée.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from backend.core import emergence_config as config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANDIDATES = 8
+DEFAULT_MIN_DOCUMENTS = 12
+PROFILE_ID_PREFIX = "docprofile_"
+BACKFILL_PAGE_SIZE = 512
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "")
+    try:
+        return int(raw) if raw else default
+    except (TypeError, ValueError):
+        logger.warning(f"[DocCoarseIndex] Valeur invalide pour {name}: {raw}")
+        return default
+
+
+def _as_doc_id(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class CentroidAccumulator:
+    """Somme courante d'embeddings → centroïde normalisé (L2)."""
+
+    def __init__(self) -> None:
+        self._sum: Optional[List[float]] = None
+        self.count = 0
+
+    def add(self, embeddings: Iterable[Sequence[float]]) -> None:
+        for embedding in embeddings:
+            values = [float(v) for v in embedding]
+            if self._sum is None:
+                self._sum = values
+            elif len(values) == len(self._sum):
+                self._sum = [a + b for a, b in zip(self._sum, values)]
+            else:
+                continue
+            self.count += 1
+
+    def centroid(self) -> Optional[List[float]]:
+        if not self._sum or not self.count:
+            return None
+        norm = math.sqrt(sum(v * v for v in self._sum))
+        if norm == 0:
+            return None
+        return [v / norm for v in self._sum]
+
+
+def describe_document(filename: str, metadatas: Iterable[Dict[str, Any]]) -> str:
+    """Texte descriptif d'un document : nom, titres de sections, mots-clés dominants."""
+    sections: List[str] = []
+    keywords: Counter[str] = Counter()
+    for meta in metadatas:
+        title = str((meta or {}).get("section_title") or "").strip()
+        if title and title not in sections and len(sections) < 10:
+            sections.append(title)
+        for kw in str((meta or {}).get("keywords") or "").split(","):
+            kw = kw.strip().lower()
+            if kw:
+                keywords[kw] += 1
+    parts = [filename or "document"]
+    if sections:
+        parts.append("Sections: " + " | ".join(sections))
+    if keywords:
+        parts.append("Mots-clés: " + ", ".join(k for k, _ in keywords.most_common(15)))
+    return "\n".join(parts)
+
+
+class DocumentCoarseIndex:
+    """Profils par document et sélection des documents candidats (étape 1)."""
+
+    def __init__(
+        self,
+        vector_service: Any,
+        *,
+        max_candidates: Optional[int] = None,
+        min_documents: Optional[int] = None,
+    ) -> None:
+        self.vector_service = vector_service
+        self.max_candidates = max(
+            1,
+            max_candidates
+            if max_candidates is not None
+            else _env_int("DOCUMENT_COARSE_CANDIDATES", DEFAULT_CANDIDATES),
+        )
+        # 0 désactive la recherche en deux étapes
+        self.min_documents = (
+            min_documents
+            if min_documents is not None
+            else _env_int("DOCUMENT_COARSE_MIN_DOCUMENTS", DEFAULT_MIN_DOCUMENTS)
+        )
+        self._collection: Optional[Any] = None
+        # Documents profilés par utilisateur (rempli au rattrapage puis tenu à jour)
+        self._profiled: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_documents > 0
+
+    @property
+    def can_embed(self) -> bool:
+        return callable(getattr(self.vector_service, "embed_texts", None))
+
+    @property
+    def active(self) -> bool:
+        """Activé et capable d'encoder (requêtes, centroïdes, descriptifs)."""
+        return self.enabled and self.can_embed
+
+    def _profiles(self) -> Any:
+        if self._collection is None:
+            self._collection = self.vector_service.get_or_create_collection(
+                config.DOCUMENT_PROFILE_COLLECTION_NAME
+            )
+        return self._collection
+
+    # ------------------------------------------------------------------
+    # Écriture (ingestion / suppression)
+    # ------------------------------------------------------------------
+    def upsert_profile(
+        self,
+        *,
+        doc_id: int,
+        user_id: Optional[str],
+        filename: str,
+        description: str,
+        embedding: Optional[Sequence[float]] = None,
+        chunk_count: int = 0,
+    ) -> bool:
+        """Crée/remplace le profil d'un document (embedding du descriptif si pas de centroïde)."""
+        if not user_id:
+            return False
+        item: Dict[str, Any] = {
+            "id": f"{PROFILE_ID_PREFIX}{int(doc_id)}",
+            "text": description,
+            "metadata": {
+                "document_id": int(doc_id),
+                "user_id": user_id,
+                "filename": filename or "",
+                "chunk_count": int(chunk_count),
+                "profile_kind": "centroid" if embedding is not None else "summary",
+            },
+        }
+        if embedding is not None:
+            item["embedding"] = list(embedding)
+        try:
+            self.vector_service.add_items(collection=self._profiles(), items=[item])
+        except Exception as exc:
+            logger.warning(
+                f"[DocCoarseIndex] Profil non indexé pour le document {doc_id}: {exc}"
+            )
+            return False
+        with self._lock:
+            profiled = self._profiled.get(user_id)
+            if profiled is not None:
+                profiled.add(int(doc_id))
+        return True
+
+    def delete_profile(self, doc_id: int, user_id: Optional[str]) -> None:
+        where: Dict[str, Any] = {"document_id": int(doc_id)}
+        if user_id:
+            where["user_id"] = user_id
+        try:
+            self.vector_service.delete_vectors(
+                collection=self._profiles(), where_filter=where
+            )
+        except Exception as exc:
+            logger.warning(
+                f"[DocCoarseIndex] Purge du profil impossible pour le document {doc_id}: {exc}"
+            )
+        with self._lock:
+            for uid, profiled in self._profiled.items():
+                if user_id is None or uid == user_id:
+                    profiled.discard(int(doc_id))
+
+    # ------------------------------------------------------------------
+    # Rattrapage des documents indexés avant les profils
+    # ------------------------------------------------------------------
+    def ensure_backfilled(self, chunk_collection: Any, user_id: str) -> None:
+        """
+        Une fois par utilisateur et par process : profile les documents qui
+        n'en ont pas encore (embedding du descriptif construit depuis les
+        métadonnées des chunks). En cas d'échec, la recherche reste en une étape.
+        """
+        if not self.enabled or not user_id or chunk_collection is None:
+            return
+        with self._lock:
+            if user_id in self._profiled:
+                return
+        started = time.perf_counter()
+        try:
+            profiled = self._scan_doc_ids(self._profiles(), user_id)
+            chunk_meta = self._scan_chunk_metadatas(chunk_collection, user_id)
+        except Exception as exc:
+            logger.warning(f"[DocCoarseIndex] Rattrapage impossible pour {user_id}: {exc}")
+            return
+
+        missing = {d: metas for d, metas in chunk_meta.items() if d not in profiled}
+        for doc_id, metas in missing.items():
+            filename = str(metas[0].get("filename") or "") if metas else ""
+            # Profil « résumé » : embedding du descriptif (pas de ré-encodage des chunks)
+            if self.upsert_profile(
+                doc_id=doc_id,
+                user_id=user_id,
+                filename=filename,
+                description=describe_document(filename, metas),
+                chunk_count=len(metas),
+            ):
+                profiled.add(doc_id)
+        with self._lock:
+            self._profiled[user_id] = profiled
+        logger.info(
+            f"[DocCoarseIndex] Rattrapage {user_id}: {len(profiled)} documents profilés "
+            f"({len(missing)} nouveaux) en {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    def _scan_doc_ids(self, collection: Any, user_id: str) -> Set[int]:
+        return set(self._scan_chunk_metadatas(collection, user_id).keys())
+
+    def _scan_chunk_metadatas(
+        self, collection: Any, user_id: str
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        by_doc: Dict[int, List[Dict[str, Any]]] = {}
+        cursor: Any = None
+        while True:
+            page, cursor = self.vector_service.get_page(
+                collection,
+                {"user_id": user_id},
+                limit=BACKFILL_PAGE_SIZE,
+                cursor=cursor,
+            )
+            for meta in page.get("metadatas") or []:
+                doc_id = _as_doc_id((meta or {}).get("document_id"))
+                if doc_id is not None:
+                    by_doc.setdefault(doc_id, []).append(meta or {})
+            if cursor is None:
+                return by_doc
+
+    # ------------------------------------------------------------------
+    # Lecture (étape 1)
+    # ------------------------------------------------------------------
+    def profiled_count(self, user_id: str) -> Optional[int]:
+        with self._lock:
+            profiled = self._profiled.get(user_id)
+            return None if profiled is None else len(profiled)
+
+    def should_restrict(self, user_id: str) -> bool:
+        """Vrai si l'utilisateur a assez de documents profilés pour filtrer en étape 1."""
+        count = self.profiled_count(user_id)
+        return (
+            self.enabled
+            and count is not None
+            and count > max(self.min_documents, self.max_candidates)
+        )
+
+    def select_for_query(
+        self,
+        chunk_collection: Any,
+        query_text: str,
+        user_id: Optional[str],
+        query_embedding: Optional[Sequence[float]] = None,
+    ) -> Tuple[Optional[List[int]], Optional[List[float]], Dict[str, Any]]:
+        """
+        Étape 1 complète : rattrapage éventuel, encodage de la requête, sélection.
+
+        Returns:
+            (doc_ids, query_embedding, stage) — l'embedding est renvoyé pour
+            être réutilisé par l'étape 2 (un seul encodage de la requête).
+        """
+        embedding = list(query_embedding) if query_embedding is not None else None
+        if not user_id or not self.active:
+            return None, embedding, self._empty_stage()
+        self.ensure_backfilled(chunk_collection, user_id)
+        if not self.should_restrict(user_id):
+            return None, embedding, self._empty_stage()
+        started = time.perf_counter()
+        if embedding is None:
+            try:
+                embeddings = self.vector_service.embed_texts([query_text or " "])
+                embedding = list(embeddings[0]) if embeddings else None
+            except Exception as exc:
+                logger.warning(f"[DocCoarseIndex] Encodage requête impossible: {exc}")
+                return None, None, self._empty_stage()
+        if embedding is None:
+            return None, None, self._empty_stage()
+        doc_ids, stage = self.select_documents(embedding, user_id)
+        stage["duration_ms"] = (time.perf_counter() - started) * 1000
+        return doc_ids, embedding, stage
+
+    @staticmethod
+    def _empty_stage() -> Dict[str, Any]:
+        return {"stage": "coarse", "duration_ms": 0.0, "items": 0, "payload_bytes": 0}
+
+    def select_documents(
+        self, query_embedding: Sequence[float], user_id: str
+    ) -> Tuple[Optional[List[int]], Dict[str, Any]]:
+        """
+        Documents candidats pour la requête.
+
+        Returns:
+            (doc_ids, stage) — doc_ids vaut None quand aucune restriction ne
+            doit s'appliquer (trop peu de documents, rattrapage absent, erreur).
+            ``stage`` décrit l'étape : durée, nombre de profils lus, octets.
+        """
+        stage = self._empty_stage()
+        if not self.should_restrict(user_id):
+            return None, stage
+
+        started = time.perf_counter()
+        try:
+            neighbors = self.vector_service.nearest_neighbors(
+                self._profiles(),
+                [list(query_embedding)],
+                n_results=self.max_candidates,
+                where_filter={"user_id": user_id},
+            )
+        except Exception as exc:
+            logger.warning(f"[DocCoarseIndex] Étape 1 indisponible: {exc}")
+            return None, stage
+        hits = neighbors[0] if neighbors else []
+        stage["duration_ms"] = (time.perf_counter() - started) * 1000
+        stage["items"] = len(hits)
+        stage["payload_bytes"] = sum(len(h.get("text") or "") for h in hits)
+
+        doc_ids: List[int] = []
+        for hit in hits:
+            doc_id = _as_doc_id((hit.get("metadata") or {}).get("document_id"))
+            if doc_id is not None and doc_id not in doc_ids:
+                doc_ids.append(doc_id)
+        return (doc_ids or None), stage
+
+    @staticmethod
+    def restrict_filter(
+        where_filter: Optional[Dict[str, Any]], doc_ids: Sequence[int]
+    ) -> Dict[str, Any]:
+        """Ajoute la restriction aux documents candidats à un filtre de chunks."""
+        if len(doc_ids) == 1:
+            doc_filter: Dict[str, Any] = {"document_id": doc_ids[0]}
+        else:
+            doc_filter = {"$or": [{"document_id": d} for d in doc_ids]}
+        if not where_filter:
+            return doc_filter
+        if "$and" in where_filter and isinstance(where_filter["$and"], list):
+            return {"$and": [*where_filter["$and"], doc_filter]}
+        clauses = [{k: v} for k, v in where_filter.items()]
+        return {"$and": [*clauses, doc_filter]}
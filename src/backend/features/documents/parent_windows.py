@@ -0,0 +1,161 @@
+"""
+Index parent–enfant des chunks documents.
+
+Le chunker produit de petits chunks « enfants » (vectorisés pour un matching
+précis) regroupés en sections « parentes » (titre markdown/romain ou taille
+maximale atteinte). Le texte complet de chaque parent est stocké une seule
+fois dans ``document_chunks`` (``kind = 'parent'``) ; chaque enfant porte
+l'identifiant de son parent dans ses métadonnées vectorielles.
+
+À la recherche, les enfants retrouvés sont remplacés par leur fenêtre parente
+(dédupliquée par id, lecture SQL par clé primaire) : une section complète
+coûte un lookup par parent, au lieu de la fusion a posteriori des chunks
+adjacents qui ne pouvait recoller que des chunks tous deux retrouvés.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PARENT_KIND = "parent"
+CHILD_KIND = "child"
+
+
+def parent_row_id(doc_id: Any, parent_index: int) -> str:
+    """Identifiant SQL (et métadonnée vectorielle) d'une section parente."""
+    return f"{doc_id}_p{parent_index}"
+
+
+def assign_parent_sections(
+    chunks: List[Dict[str, Any]],
+    lines: List[str],
+    max_chars: int,
+) -> None:
+    """
+    Regroupe les chunks enfants (ordonnés) en sections parentes, sur place.
+
+    Une nouvelle section commence quand un chunk porte un titre de section
+    différent du titre courant, ou quand la section dépasserait ``max_chars``.
+    Chaque enfant reçoit ``parent_index``, ``parent_text`` (même objet str
+    partagé par tous les enfants d'une section), ``parent_line_start`` et
+    ``parent_line_end``. Le texte parent est reconstruit depuis les lignes
+    source : l'overlap entre enfants n'y est pas dupliqué.
+    """
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_title: Optional[str] = None
+    current_size = 0
+
+    for chunk in chunks:
+        title = chunk.get("section_title") or None
+        size = len(chunk.get("text") or "")
+        starts_section = title is not None and title != current_title
+        if current and (starts_section or current_size + size > max_chars):
+            groups.append(current)
+            current, current_size = [], 0
+        if not current:
+            current_title = title
+        current.append(chunk)
+        current_size += size
+
+    if current:
+        groups.append(current)
+
+    for parent_index, group in enumerate(groups):
+        line_start = group[0].get("line_start", 0)
+        line_end = max(c.get("line_end", line_start) for c in group)
+        parent_text = "\n".join(lines[line_start:line_end]).strip()
+        if not parent_text:
+            parent_text = "\n\n".join(c.get("text", "") for c in group)
+        for chunk in group:
+            chunk["parent_index"] = parent_index
+            chunk["parent_text"] = parent_text
+            chunk["parent_line_start"] = line_start
+            chunk["parent_line_end"] = line_end
+
+
+def build_parent_rows(chunk_rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Lignes ``document_chunks`` des sections parentes (une par parent)."""
+    rows: List[Dict[str, Any]] = []
+    seen: set[str] = set()
+    for chunk in chunk_rows:
+        parent_id = chunk.get("parent_id")
+        if not parent_id or parent_id in seen:
+            continue
+        seen.add(parent_id)
+        rows.append(
+            {
+                "id": parent_id,
+                "document_id": chunk.get("document_id"),
+                "chunk_index": chunk.get("parent_index", 0),
+                "content": chunk.get("parent_text", ""),
+                "kind": PARENT_KIND,
+            }
+        )
+    return rows
+
+
+def collect_parent_ids(hits: Iterable[Dict[str, Any]]) -> List[str]:
+    """Ids parents des hits, dédupliqués, dans l'ordre de pertinence."""
+    ids: List[str] = []
+    for hit in hits:
+        parent_id = (hit.get("metadata") or {}).get("parent_id")
+        if parent_id and parent_id not in ids:
+            ids.append(parent_id)
+    return ids
+
+
+def collapse_to_parent_windows(
+    hits: List[Dict[str, Any]],
+    parents: Dict[str, Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Remplace les enfants retrouvés par leur fenêtre parente.
+
+    Args:
+        hits: Chunks enfants retournés par la recherche vectorielle
+        parents: Lignes parentes par id (``id``, ``content``)
+
+    Returns:
+        (fenêtres parentes dédupliquées, hits sans parent résolu). Chaque
+        fenêtre garde la meilleure distance de ses enfants et les métadonnées
+        de l'enfant le mieux classé, étendues aux bornes de la section.
+    """
+    windows: Dict[str, Dict[str, Any]] = {}
+    remaining: List[Dict[str, Any]] = []
+
+    for hit in hits:
+        md = hit.get("metadata") or {}
+        parent_id = str(md.get("parent_id") or "")
+        parent = parents.get(parent_id) if parent_id else None
+        if parent is None:
+            remaining.append(hit)
+            continue
+
+        distance = hit.get("distance", 1.0)
+        window = windows.get(parent_id)
+        if window is not None:
+            window["metadata"]["merged_chunks"] += 1
+            if distance < window["distance"]:
+                window["distance"] = distance
+            continue
+
+        window_md = dict(md)
+        line_start = md.get("parent_line_start", md.get("line_start", 0))
+        line_end = md.get("parent_line_end", md.get("line_end", 0))
+        window_md.update(
+            {
+                "line_start": line_start,
+                "line_end": line_end,
+                "line_range": f"{line_start}-{line_end}",
+                "is_complete": True,
+                "merged_chunks": 1,
+                "parent_window": True,
+            }
+        )
+        windows[parent_id] = {
+            "id": parent_id,
+            "text": (parent.get("content") or "").strip(),
+            "metadata": window_md,
+            "distance": distance,
+        }
+
+    return list(windows.values()), remaining
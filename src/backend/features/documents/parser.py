@@ -1,11 +1,34 @@
 # src/backend/features/documents/parser.py
 import logging
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Type, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Type, Optional
 
 logger = logging.getLogger(__name__)
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+# Extraction PDF parallèle (pool de processus) au-delà de ce nombre de pages
+PDF_PARALLEL_MIN_PAGES = _env_int("DOCUMENTS_PDF_PARALLEL_MIN_PAGES", 64)
+PDF_PAGES_PER_TASK = max(1, _env_int("DOCUMENTS_PDF_PAGES_PER_TASK", 16))
+PDF_MAX_WORKERS = max(1, _env_int("DOCUMENTS_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+# Pool de processus partagé par toutes les extractions PDF (créé à la demande)
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+# Taille des blocs lus pour les fichiers texte en streaming
+TXT_READ_BLOCK_CHARS = 1 << 16
+DOCX_PARAGRAPHS_PER_SEGMENT = 64
+
+
 def _import_pymupdf():
     """
     Import lazily PyMuPDF (fitz).
@@ -45,6 +68,66 @@ def _import_docx():
         raise
 
 
+def _pdf_page_count(filepath: str) -> int:
+    fitz_module = _import_pymupdf()
+    if fitz_module:
+        with fitz_module.open(filepath) as doc:
+            return int(doc.page_count)
+    pdf_reader_cls = _import_pypdf_reader()
+    if pdf_reader_cls is None:
+        raise RuntimeError("Aucun parseur PDF disponible (PyMuPDF/PyPDF2 manquants).")
+    return len(pdf_reader_cls(filepath).pages)
+
+
+def _extract_pdf_pages(filepath: str, start: int, stop: int) -> List[str]:
+    """
+    Extrait le texte des pages [start, stop) d'un PDF.
+
+    Fonction de module (picklable) : exécutée telle quelle dans les workers
+    du pool de processus, chacun rouvrant le fichier.
+    """
+    fitz_module = _import_pymupdf()
+    if fitz_module:
+        with fitz_module.open(filepath) as doc:
+            return [doc.load_page(i).get_text() for i in range(start, stop)]
+
+    pdf_reader_cls = _import_pypdf_reader()
+    if pdf_reader_cls is None:
+        raise RuntimeError("Aucun parseur PDF disponible (PyMuPDF/PyPDF2 manquants).")
+    reader = pdf_reader_cls(filepath)
+    pages: List[str] = []
+    for idx in range(start, stop):
+        try:
+            pages.append(reader.pages[idx].extract_text() or "")
+        except Exception as page_err:  # pragma: no cover - best-effort log
+            logger.warning(
+                "Extraction texte impossible page %s du PDF '%s': %s",
+                idx,
+                filepath,
+                page_err,
+            )
+            pages.append("")
+    return pages
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Pool partagé : créé au premier gros PDF, réutilisé par les suivants."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_MAX_WORKERS)
+        return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Arrête le pool d'extraction PDF (arrêt de l'application)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
 class FileParser(ABC):
     """
     Interface abstraite pour tous les parseurs de fichiers.
@@ -57,59 +140,90 @@ class FileParser(ABC):
         """
         raise NotImplementedError
 
+    def iter_segments(self, filepath: str) -> Iterator[str]:
+        """
+        Extrait le contenu par segments successifs (pages, blocs de paragraphes).
+
+        La concaténation des segments est égale à ``parse(filepath)`` ; seul
+        le segment courant est en mémoire. Par défaut : un seul segment.
+        """
+        yield self.parse(filepath)
+
 
 class PDFParser(FileParser):
-    """Parseur pour les fichiers PDF."""
+    """Parseur pour les fichiers PDF (page par page, pool de processus si gros)."""
 
     def parse(self, filepath: str) -> str:
-        fitz_module = _import_pymupdf()
-        if fitz_module:
-            try:
-                doc = fitz_module.open(filepath)
-                text_parts = [page.get_text() for page in doc]
-                full_text = "".join(text_parts)
-                doc.close()
-                if not full_text.strip():
-                    logger.warning(
-                        "Le fichier PDF '%s' ne contient aucun texte extractible.",
-                        filepath,
-                    )
-                    return ""
-                return full_text
-            except Exception as e:
-                logger.error("Echec du parsing PyMuPDF pour '%s': %s", filepath, e)
-                raise
+        full_text = "".join(self.iter_segments(filepath))
+        if not full_text.strip():
+            logger.warning(
+                "Le fichier PDF '%s' ne contient aucun texte extractible.",
+                filepath,
+            )
+            return ""
+        return full_text
 
-        # Fallback PyPDF2 lorsque PyMuPDF est absent
-        pdf_reader_cls = _import_pypdf_reader()
-        if pdf_reader_cls is None:
+    def iter_segments(self, filepath: str) -> Iterator[str]:
+        """Une page par segment, dans l'ordre du document."""
+        if _import_pymupdf() is None and _import_pypdf_reader() is None:
             raise RuntimeError(
                 "Aucun parseur PDF disponible (PyMuPDF/PyPDF2 manquants)."
             )
-
         try:
-            reader = pdf_reader_cls(filepath)
-            text_parts = []
-            for idx, page in enumerate(reader.pages):
-                try:
-                    text_parts.append(page.extract_text() or "")
-                except Exception as page_err:  # pragma: no cover - best-effort log
-                    logger.warning(
-                        "Extraction texte impossible page %s du PDF '%s': %s",
-                        idx,
-                        filepath,
-                        page_err,
-                    )
-            full_text = "".join(text_parts)
-            if not full_text.strip():
-                logger.warning(
-                    "Le fichier PDF '%s' ne contient aucun texte extractible (fallback PyPDF2).",
-                    filepath,
+            page_count = _pdf_page_count(filepath)
+        except Exception as e:
+            logger.error("Echec de l'ouverture du PDF '%s': %s", filepath, e)
+            raise
+
+        if page_count >= PDF_PARALLEL_MIN_PAGES and PDF_MAX_WORKERS > 1:
+            yield from self._iter_pages_parallel(filepath, page_count)
+            return
+
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            try:
+                pages = _extract_pdf_pages(
+                    filepath, start, min(start + PDF_PAGES_PER_TASK, page_count)
                 )
-            return full_text
+            except Exception as e:
+                logger.error("Echec du parsing PDF '%s': %s", filepath, e)
+                raise
+            yield from pages
+
+    def _iter_pages_parallel(self, filepath: str, page_count: int) -> Iterator[str]:
+        """
+        Extraction par plages de pages dans le pool de processus partagé.
+
+        Les plages sont soumises au fil de l'eau (au plus 2 par worker en
+        vol) et rendues dans l'ordre : la mémoire reste bornée par la fenêtre
+        de plages en cours, pas par la taille du document.
+        """
+        ranges = [
+            (start, min(start + PDF_PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PDF_PAGES_PER_TASK)
+        ]
+        workers = min(PDF_MAX_WORKERS, len(ranges))
+        logger.info(
+            "Extraction PDF parallèle de '%s': %s pages, %s workers",
+            filepath,
+            page_count,
+            workers,
+        )
+        pool = _get_pdf_pool()
+        pending: Deque["Future[List[str]]"] = deque()
+        next_range = 0
+        try:
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < workers * 2:
+                    start, stop = ranges[next_range]
+                    pending.append(pool.submit(_extract_pdf_pages, filepath, start, stop))
+                    next_range += 1
+                yield from pending.popleft().result()
         except Exception as e:
-            logger.error("Echec du parsing PDF (fallback PyPDF2) '%s': %s", filepath, e)
+            logger.error("Echec du parsing PDF parallèle '%s': %s", filepath, e)
             raise
+        finally:
+            for future in pending:
+                future.cancel()
 
 
 class TXTParser(FileParser):
@@ -123,16 +237,49 @@ class TXTParser(FileParser):
             logger.error("Echec de la lecture du fichier texte '%s': %s", filepath, e)
             raise
 
+    def iter_segments(self, filepath: str) -> Iterator[str]:
+        """Blocs d'environ 64k caractères, coupés sur une fin de ligne."""
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                carry = ""
+                while True:
+                    block = f.read(TXT_READ_BLOCK_CHARS)
+                    if not block:
+                        break
+                    block = carry + block
+                    cut = block.rfind("\n") + 1
+                    if cut <= 0:
+                        carry = block
+                        continue
+                    carry = block[cut:]
+                    yield block[:cut]
+                if carry:
+                    yield carry
+        except Exception as e:
+            logger.error("Echec de la lecture du fichier texte '%s': %s", filepath, e)
+            raise
+
 
 class DocxParser(FileParser):
     """Parseur pour les fichiers DOCX."""
 
     def parse(self, filepath: str) -> str:
+        return "".join(self.iter_segments(filepath))
+
+    def iter_segments(self, filepath: str) -> Iterator[str]:
+        """Blocs de paragraphes (séparateur ``\\n`` conservé entre blocs)."""
         docx_module = _import_docx()
         try:
             doc = docx_module.Document(filepath)
-            full_text = [para.text for para in doc.paragraphs]
-            return "\n".join(full_text)
+            block: List[str] = []
+            first = True
+            for para in doc.paragraphs:
+                block.append(para.text)
+                if len(block) >= DOCX_PARAGRAPHS_PER_SEGMENT:
+                    yield ("" if first else "\n") + "\n".join(block)
+                    block, first = [], False
+            if block:
+                yield ("" if first else "\n") + "\n".join(block)
         except Exception as e:
             logger.error("Echec du parsing du DOCX '%s': %s", filepath, e)
             raise
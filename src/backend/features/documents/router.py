@@ -172,9 +172,24 @@ async def download_document(
     )
 
 
+async def _invalidate_rag_cache(request: Request, document_id: int) -> None:
+    """Invalide (best-effort) les résultats RAG en cache qui citent ce document."""
+    container = getattr(request.app.state, "service_container", None)
+    provider = getattr(container, "chat_service", None)
+    if provider is None:
+        return
+    try:
+        rag_cache = getattr(provider(), "rag_cache", None)
+        if rag_cache is not None:
+            await rag_cache.ainvalidate_by_document(document_id)
+    except Exception as exc:
+        logger.warning("Invalidation cache RAG impossible (doc %s): %s", document_id, exc)
+
+
 @router.post("/{document_id}/reindex", response_model=Dict[str, Any])
 async def reindex_document(
     document_id: int,
+    request: Request,
     session: deps.SessionContext = Depends(deps.get_session_context),
     service: DocumentService = Depends(_get_document_service),
 ) -> Dict[str, Any]:
@@ -183,6 +198,7 @@ async def reindex_document(
         session.session_id,
         user_id=session.user_id,
     )
+    await _invalidate_rag_cache(request, document_id)
     vectorized = bool(result.get("vectorized", True))
     warning = result.get("warning")
     if vectorized and warning:
@@ -200,6 +216,7 @@ async def reindex_document(
 @router.delete("/{document_id}", status_code=200)
 async def delete_document(
     document_id: int,
+    request: Request,
     session: deps.SessionContext = Depends(deps.get_session_context),
     service: DocumentService = Depends(_get_document_service),
 ) -> Dict[str, str]:
@@ -208,5 +225,6 @@ async def delete_document(
         document_id, session.session_id, user_id=session.user_id
     )
     if success:
+        await _invalidate_rag_cache(request, document_id)
         return {"message": "Document supprime avec succes."}
     raise HTTPException(status_code=404, detail="Document introuvable")
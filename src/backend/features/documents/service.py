@@ -1,5 +1,5 @@
 # src/backend/features/documents/service.py
-# V8.3 - Ajout de get_all_documents/delete_document + purge vecteurs par document_id
+# V8.6 - Parsing/chunking en streaming des gros documents (lots bornés)
 import logging
 import math
 import uuid
@@ -7,15 +7,35 @@ import asyncio
 import os
 import re
 import mimetypes
+import time
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Generator, Optional, Tuple
 
 from fastapi import UploadFile, HTTPException
 from pathlib import Path
 
 from backend.core.database.manager import DatabaseManager
 from backend.core.database import queries as db_queries
-from backend.features.documents.parser import ParserFactory
+from backend.features.chat import rag_metrics
+from backend.features.documents.coarse_index import (
+    CentroidAccumulator,
+    DocumentCoarseIndex,
+    describe_document,
+)
+from backend.features.documents.parent_windows import (
+    CHILD_KIND,
+    assign_parent_sections,
+    build_parent_rows,
+    collapse_to_parent_windows,
+    collect_parent_ids,
+    parent_row_id,
+)
+from backend.features.documents.parser import FileParser, ParserFactory
+from backend.features.documents.streaming import (
+    StreamingChunker,
+    iter_spooled_segments,
+    spool_segments,
+)
 from backend.features.memory.vector_service import VectorService
 from backend.core import emergence_config as config
 
@@ -47,8 +67,11 @@ class DocumentService:
         512  # Augmenté de 128 → 512 pour réduire timeouts (moins d'appels DB)
     )
     DEFAULT_MAX_PARAGRAPHS_PER_CHUNK = 2
+    DEFAULT_PARENT_CHUNK_SIZE = 4000  # Taille max d'une section parente (caractères)
     MAX_TOTAL_CHUNKS_ALLOWED = 5000  # Limite absolue pour éviter timeout processing
     MAX_FILE_SIZE_MB = 50  # Limite taille fichier upload
+    DEFAULT_STREAMING_MIN_BYTES = 4 * 1024 * 1024  # Au-delà : parsing/chunking en streaming
+    UPLOAD_READ_BLOCK_BYTES = 1024 * 1024
 
     def __init__(
         self,
@@ -65,6 +88,9 @@ class DocumentService:
         self._vector_warning_logged = False
         self.uploads_dir = Path(uploads_dir).resolve()
         self.uploads_dir.mkdir(parents=True, exist_ok=True)
+        # Profils par document (étape 1 de la recherche en deux étapes)
+        self.coarse_index = DocumentCoarseIndex(vector_service)
+        self.last_search_stats: Dict[str, Any] = {}
         self.max_vector_chunks = self._env_int(
             "DOCUMENTS_MAX_VECTOR_CHUNKS",
             self.DEFAULT_MAX_VECTOR_CHUNKS,
@@ -90,6 +116,20 @@ class DocumentService:
                 self.DEFAULT_MAX_PARAGRAPHS_PER_CHUNK,
             ),
         )
+        self.parent_chunk_size = max(
+            config.CHUNK_SIZE,
+            self._env_int(
+                "DOCUMENTS_PARENT_CHUNK_SIZE",
+                self.DEFAULT_PARENT_CHUNK_SIZE,
+            ),
+        )
+        self.streaming_min_bytes = max(
+            0,
+            self._env_int(
+                "DOCUMENTS_STREAMING_MIN_BYTES",
+                self.DEFAULT_STREAMING_MIN_BYTES,
+            ),
+        )
         if self._ensure_document_collection():
             logger.info(
                 "DocumentService (V8.3) initialisé. Collection: '%s'",
@@ -165,6 +205,8 @@ class DocumentService:
     ) -> None:
         if not chunk_rows:
             return
+        # Sections parentes stockées une fois, à côté de leurs enfants
+        chunk_rows = chunk_rows + build_parent_rows(chunk_rows)
         batch_size = self.chunk_insert_batch_size
         for start in range(0, len(chunk_rows), batch_size):
             batch = chunk_rows[start : start + batch_size]
@@ -182,6 +224,7 @@ class DocumentService:
         *,
         total_chunks: int,
         scope_filter: Optional[Dict[str, Any]] = None,
+        centroid: Optional[CentroidAccumulator] = None,
     ) -> Tuple[bool, Optional[str], int]:
         if not chunk_vectors:
             return True, None, 0
@@ -231,6 +274,25 @@ class DocumentService:
                 logger.info(
                     f"[Vectorisation] Batch {batch_idx}/{total_batches}: traitement de {len(batch)} chunks..."
                 )
+                if centroid is not None:
+                    # Encodage explicite : les mêmes embeddings alimentent le
+                    # centroïde du profil document (pas de second encodage)
+                    try:
+                        embeddings = self.vector_service.embed_texts(
+                            [item["text"] for item in batch]
+                        )
+                        batch = [
+                            {**item, "embedding": emb}
+                            for item, emb in zip(batch, embeddings)
+                        ]
+                        centroid.add(embeddings)
+                    except Exception as exc:
+                        logger.warning(
+                            "Centroïde indisponible pour le document %s: %s",
+                            doc_id,
+                            exc,
+                        )
+                        centroid = None
                 self.vector_service.add_items(
                     collection=self.document_collection,
                     items=batch,
@@ -260,6 +322,203 @@ class DocumentService:
         )
         return True, vector_warning, indexed
 
+    def _new_centroid(self) -> Optional[CentroidAccumulator]:
+        if self.coarse_index.active:
+            return CentroidAccumulator()
+        return None
+
+    def _index_document_profile(
+        self,
+        doc_id: int,
+        filename: str,
+        chunk_vectors: list[dict[str, Any]],
+        user_id: Optional[str],
+        centroid: Optional[CentroidAccumulator],
+    ) -> None:
+        """Profil du document pour l'étape 1 (centroïde des chunks vectorisés)."""
+        if centroid is None or not user_id:
+            return
+        embedding = centroid.centroid()
+        if embedding is None:
+            return
+        self.coarse_index.upsert_profile(
+            doc_id=doc_id,
+            user_id=user_id,
+            filename=filename,
+            description=describe_document(
+                filename, (item.get("metadata") or {} for item in chunk_vectors)
+            ),
+            embedding=embedding,
+            chunk_count=centroid.count,
+        )
+
+    def _iter_chunk_batches(
+        self,
+        spool_path: str,
+        chunker: StreamingChunker,
+    ) -> Generator[list[dict[str, Any]], None, None]:
+        """Lots d'environ ``vector_batch_size`` chunks, jamais coupés au milieu d'une section parente."""
+        batch: list[dict[str, Any]] = []
+        for group in chunker.iter_groups(iter_spooled_segments(spool_path)):
+            batch.extend(group)
+            if len(batch) >= self.vector_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _index_document_streaming(
+        self,
+        parser: FileParser,
+        path: Path,
+        *,
+        doc_id: int,
+        filename: str,
+        session_id: str,
+        user_id: Optional[str],
+        scope_filter: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Parse, découpe, stocke et vectorise un gros document lot par lot.
+
+        Le texte extrait (pool de processus partagé pour les gros PDF) est
+        d'abord écrit sur disque : sa longueur exacte sert à projeter le
+        nombre de chunks. Le chunking tourne ensuite dans un thread ; chaque
+        lot est inséré en base puis vectorisé avant que le suivant soit
+        produit : le pic mémoire est borné par la taille de lot, pas par
+        celle du document, et le nombre de chunks par MAX_TOTAL_CHUNKS_ALLOWED.
+        """
+        spool_path, text_length = await asyncio.to_thread(
+            spool_segments, parser.iter_segments(str(path)), str(self.uploads_dir)
+        )
+        try:
+            return await self._index_spooled_text(
+                spool_path,
+                text_length,
+                doc_id=doc_id,
+                filename=filename,
+                session_id=session_id,
+                user_id=user_id,
+                scope_filter=scope_filter,
+            )
+        finally:
+            Path(spool_path).unlink(missing_ok=True)
+
+    async def _index_spooled_text(
+        self,
+        spool_path: str,
+        text_length: int,
+        *,
+        doc_id: int,
+        filename: str,
+        session_id: str,
+        user_id: Optional[str],
+        scope_filter: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        chunker = StreamingChunker(
+            self._finalize_chunk,
+            filename=filename,
+            chunk_size=config.CHUNK_SIZE,
+            overlap=config.CHUNK_OVERLAP,
+            max_paragraphs=max(1, self.max_paragraphs_per_chunk),
+            parent_chunk_size=self.parent_chunk_size,
+            max_chunks=self.MAX_TOTAL_CHUNKS_ALLOWED,
+            size_hint=text_length,
+        )
+        batches = self._iter_chunk_batches(spool_path, chunker)
+        centroid = self._new_centroid()
+        profile_items: list[dict[str, Any]] = []
+        vector_budget = self.max_vector_chunks or None
+        vectorized = True
+        vector_warning: Optional[str] = None
+        indexed_chunks = 0
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                chunk_rows, chunk_vectors = self._build_chunk_payloads(
+                    doc_id, filename, batch, session_id, user_id
+                )
+                await self._persist_document_chunks(
+                    chunk_rows, session_id=session_id, user_id=user_id
+                )
+                # Profil document : seules les métadonnées légères sont gardées
+                profile_items.extend(
+                    {
+                        "metadata": {
+                            "section_title": item["metadata"]["section_title"],
+                            "keywords": item["metadata"]["keywords"],
+                        }
+                    }
+                    for item in chunk_vectors
+                )
+                if not vectorized:
+                    continue
+                if vector_budget is not None:
+                    chunk_vectors = chunk_vectors[: max(0, vector_budget - indexed_chunks)]
+                if not chunk_vectors:
+                    continue
+                vectorized, batch_warning, indexed = self._vectorize_document_chunks(
+                    doc_id,
+                    chunk_vectors,
+                    total_chunks=len(chunk_rows),
+                    scope_filter=scope_filter if indexed_chunks == 0 else None,
+                    centroid=centroid,
+                )
+                indexed_chunks += indexed
+                if not vectorized:
+                    vector_warning = batch_warning
+        finally:
+            await asyncio.to_thread(batches.close)
+
+        if vectorized and vector_budget is not None and chunker.chunk_count > vector_budget:
+            vector_warning = _trim_error_message(
+                f"Document volumineux: vectorisation limitée à {vector_budget} "
+                f"chunks sur {chunker.chunk_count}."
+            )
+
+        await db_queries.update_document_processing_info(
+            self.db_manager,
+            doc_id=doc_id,
+            session_id=session_id,
+            user_id=user_id,
+            char_count=chunker.char_count,
+            chunk_count=chunker.chunk_count,
+            status="ready",
+        )
+        if vectorized:
+            self._index_document_profile(
+                doc_id, filename, profile_items, user_id, centroid
+            )
+        else:
+            await db_queries.set_document_error_status(
+                self.db_manager,
+                doc_id,
+                session_id=session_id,
+                error_message=_trim_error_message(
+                    vector_warning or "Vector store indisponible"
+                ),
+                user_id=user_id,
+            )
+        logger.info(
+            "Document '%s' (ID: %s) indexé en streaming: %s caractères, %s chunks, "
+            "%s vectorisés%s.",
+            filename,
+            doc_id,
+            chunker.char_count,
+            chunker.chunk_count,
+            indexed_chunks,
+            f", escalades={chunker.escalations}" if chunker.escalations else "",
+        )
+        return {
+            "char_count": chunker.char_count,
+            "chunk_count": chunker.chunk_count,
+            "vectorized": vectorized,
+            "warning": vector_warning,
+            "indexed_chunks": indexed_chunks,
+        }
+
     def _resolve_document_path(self, raw_path: str) -> Path:
         if not raw_path:
             raise HTTPException(
@@ -388,12 +647,20 @@ class DocumentService:
             if chunk_index is None:
                 continue
             chunk_id = f"{doc_id}_{chunk_index}"
+            parent_index = chunk.get("parent_index")
+            parent_id = (
+                parent_row_id(doc_id, parent_index) if parent_index is not None else None
+            )
             chunk_rows.append(
                 {
                     "id": chunk_id,
                     "document_id": doc_id,
                     "chunk_index": chunk_index,
                     "content": text,
+                    "kind": CHILD_KIND,
+                    "parent_id": parent_id,
+                    "parent_index": parent_index,
+                    "parent_text": chunk.get("parent_text", ""),
                 }
             )
             # 🔥 Phase 4.1 RAG: session_id RETIRÉ des metadata pour scope user global
@@ -413,6 +680,10 @@ class DocumentService:
                 "line_end": chunk.get("line_end", 0),
                 "is_complete": chunk.get("is_complete", False),
             }
+            if parent_id:
+                metadata["parent_id"] = parent_id
+                metadata["parent_line_start"] = chunk.get("parent_line_start", 0)
+                metadata["parent_line_end"] = chunk.get("parent_line_end", 0)
             vector_items.append(
                 {
                     "id": chunk_id,
@@ -610,6 +881,7 @@ class DocumentService:
         2. Détecter les poèmes (lignes courtes + espacement régulier)
         3. Découper en respectant les paragraphes (\n\n)
         4. Ajouter overlap de 100 caractères entre chunks
+        5. Regrouper les chunks en sections parentes (titre ou taille max)
 
         Returns:
             Liste de dictionnaires avec :
@@ -620,6 +892,8 @@ class DocumentService:
             - line_start: ligne de début
             - line_end: ligne de fin
             - is_complete: True si le chunk contient un élément complet
+            - parent_index / parent_text: section parente (texte partagé)
+            - parent_line_start / parent_line_end: bornes de la section
         """
         if not text or not text.strip():
             return []
@@ -806,6 +1080,7 @@ class DocumentService:
         apply_overlap(chunks)
         for index, chunk in enumerate(chunks):
             chunk["chunk_index"] = index
+        assign_parent_sections(chunks, lines, self.parent_chunk_size)
 
         logger.info(
             f"Chunking sémantique terminé : {len(chunks)} chunks pour '{filename}' "
@@ -880,23 +1155,32 @@ class DocumentService:
         if not filename:
             raise HTTPException(status_code=400, detail="Nom de fichier manquant.")
 
-        # Vérifier la taille du fichier AVANT de l'écrire
-        file_content = await file.read()
-        file_size_mb = len(file_content) / (1024 * 1024)
+        filepath = self.uploads_dir / f"{uuid.uuid4()}_{filename}"
 
-        if file_size_mb > self.MAX_FILE_SIZE_MB:
+        # Copie par blocs vers le disque : la taille est vérifiée au fil de
+        # l'eau, sans charger tout le fichier en mémoire
+        max_bytes = self.MAX_FILE_SIZE_MB * 1024 * 1024
+        file_size = 0
+        with open(filepath, "wb") as buffer:
+            while True:
+                block = await file.read(self.UPLOAD_READ_BLOCK_BYTES)
+                if not block:
+                    break
+                file_size += len(block)
+                if file_size > max_bytes:
+                    break
+                buffer.write(block)
+        file_size_mb = file_size / (1024 * 1024)
+
+        if file_size > max_bytes:
+            filepath.unlink(missing_ok=True)
             raise HTTPException(
                 status_code=413,
-                detail=f"Fichier trop volumineux ({file_size_mb:.1f}MB). Limite: {self.MAX_FILE_SIZE_MB}MB. "
+                detail=f"Fichier trop volumineux (>{self.MAX_FILE_SIZE_MB}MB). Limite: {self.MAX_FILE_SIZE_MB}MB. "
                 f"Pour les gros documents, découpez-les en plusieurs fichiers plus petits.",
             )
 
-        filepath = self.uploads_dir / f"{uuid.uuid4()}_{filename}"
-
         try:
-            with open(filepath, "wb") as buffer:
-                buffer.write(file_content)
-
             stored_path = self._to_storage_path(filepath)
 
             doc_id = await db_queries.insert_document(
@@ -910,6 +1194,28 @@ class DocumentService:
             )
 
             parser = self.parser_factory.get_parser(filepath.suffix)
+            if file_size >= self.streaming_min_bytes:
+                logger.info(
+                    f"[Document Upload] Indexation en streaming de '{filename}' ({file_size_mb:.1f}MB)..."
+                )
+                outcome = await self._index_document_streaming(
+                    parser,
+                    filepath,
+                    doc_id=doc_id,
+                    filename=filename,
+                    session_id=session_id,
+                    user_id=user_id,
+                )
+                return {
+                    "document_id": doc_id,
+                    "filename": filename,
+                    "status": "ready" if outcome["vectorized"] else "error",
+                    "vectorized": outcome["vectorized"],
+                    "warning": outcome["warning"],
+                    "indexed_chunks": outcome["indexed_chunks"],
+                    "total_chunks": outcome["chunk_count"],
+                }
+
             logger.info(
                 f"[Document Upload] Parsing fichier '{filename}' ({file_size_mb:.1f}MB)..."
             )
@@ -975,16 +1281,22 @@ class DocumentService:
                 logger.info(
                     f"[Document Upload] Vectorisation de {len(chunk_vectors)} chunks..."
                 )
+                centroid = self._new_centroid()
                 vectorized, vector_warning, indexed_chunks = (
                     self._vectorize_document_chunks(
                         doc_id,
                         chunk_vectors,
                         total_chunks=len(chunk_rows),
+                        centroid=centroid,
                     )
                 )
                 logger.info(
                     f"[Document Upload] Vectorisation terminée: {indexed_chunks}/{len(chunk_vectors)} chunks indexés"
                 )
+                if vectorized:
+                    self._index_document_profile(
+                        doc_id, filename, chunk_vectors, user_id, centroid
+                    )
 
             if not vectorized:
                 warning_message = vector_warning or "Vector store indisponible"
@@ -1189,6 +1501,10 @@ class DocumentService:
                 status_code=400,
                 detail="Type de fichier non supporté pour la ré-indexation.",
             ) from exc
+        if path.stat().st_size >= self.streaming_min_bytes:
+            return await self._reindex_document_streaming(
+                parser, path, document, doc_id_int, session_id, user_id
+            )
         try:
             text_content = await asyncio.to_thread(parser.parse, str(path))
         except Exception as exc:
@@ -1263,14 +1579,24 @@ class DocumentService:
             if user_id:
                 scope_filter["user_id"] = user_id
             # Note: session_id retiré - les chunks sont scopés par user_id uniquement
+            centroid = self._new_centroid()
             vectorized, vector_warning, indexed_chunks = (
                 self._vectorize_document_chunks(
                     doc_id_int,
                     chunk_vectors,
                     total_chunks=len(chunk_rows),
                     scope_filter=scope_filter,
+                    centroid=centroid,
                 )
             )
+            if vectorized:
+                self._index_document_profile(
+                    doc_id_int,
+                    document.get("filename") or path.name,
+                    chunk_vectors,
+                    user_id,
+                    centroid,
+                )
 
         if not vectorized:
             warning_message = vector_warning or "Vector store indisponible"
@@ -1306,6 +1632,68 @@ class DocumentService:
             "total_chunks": len(chunk_rows),
         }
 
+    async def _reindex_document_streaming(
+        self,
+        parser: FileParser,
+        path: Path,
+        document: Dict[str, Any],
+        doc_id: int,
+        session_id: str,
+        user_id: Optional[str],
+    ) -> Dict[str, Any]:
+        """Ré-indexation d'un gros document : purge des chunks puis indexation lot par lot."""
+        filename = document.get("filename") or path.name
+        try:
+            await db_queries.delete_document_chunks(
+                self.db_manager,
+                doc_id,
+                session_id=session_id,
+                user_id=user_id,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=403, detail=str(exc)) from exc
+        scope_filter: Dict[str, Any] = {"document_id": doc_id}
+        if user_id:
+            scope_filter["user_id"] = user_id
+        try:
+            outcome = await self._index_document_streaming(
+                parser,
+                path,
+                doc_id=doc_id,
+                filename=filename,
+                session_id=session_id,
+                user_id=user_id,
+                scope_filter=scope_filter,
+            )
+        except Exception as exc:
+            logger.error(
+                "Erreur lors de la ré-indexation en streaming du document %s: %s",
+                doc_id,
+                exc,
+                exc_info=True,
+            )
+            await db_queries.set_document_error_status(
+                self.db_manager,
+                doc_id,
+                session_id,
+                error_message=str(exc)[:512],
+                user_id=user_id,
+            )
+            raise HTTPException(
+                status_code=500, detail="Erreur lors du parsing du document."
+            ) from exc
+        return {
+            "document_id": doc_id,
+            "filename": filename,
+            "chunk_count": outcome["chunk_count"],
+            "char_count": outcome["char_count"],
+            "status": "ready" if outcome["vectorized"] else "error",
+            "vectorized": outcome["vectorized"],
+            "warning": outcome["warning"],
+            "indexed_chunks": outcome["indexed_chunks"],
+            "total_chunks": outcome["chunk_count"],
+        }
+
     async def delete_document(
         self, doc_id: int, session_id: str, user_id: Optional[str] = None
     ) -> bool:
@@ -1333,6 +1721,8 @@ class DocumentService:
                     collection=self.document_collection,
                     where_filter=where_filter,
                 )
+                if self.coarse_index.active:
+                    self.coarse_index.delete_profile(int(doc_id), user_id)
             except Exception as e:
                 logger.warning(f"Echec purge vecteurs pour document {doc_id}: {e}")
         else:
@@ -1389,21 +1779,47 @@ class DocumentService:
             where_filter: Dict[str, Any] = {"user_id": user_id}
             # Note: session_id retiré du filtre - les docs sont scopés par user, pas par session
 
+            # Étape 0 : Documents candidats via les profils (recherche en deux
+            # étapes, seulement si l'utilisateur a assez de documents)
+            candidate_ids, query_embedding, coarse_stage = (
+                self.coarse_index.select_for_query(
+                    self.document_collection, query, user_id
+                )
+            )
+            search_filter: Dict[str, Any] = where_filter
+            if candidate_ids:
+                search_filter = self.coarse_index.restrict_filter(
+                    where_filter, candidate_ids
+                )
+
             # Étape 1 : Recherche vectorielle (récupère plus que nécessaire pour re-ranking)
             # 🆕 Phase 4 RAG : Augmenter multiplicateur (x3 → x10) pour gros documents
             # Limite max 500 chunks pour éviter timeout
             n_results_requested = min(top_k * 10, 500)
 
+            query_kwargs: Dict[str, Any] = {}
+            if query_embedding is not None:
+                query_kwargs["query_embedding"] = query_embedding
+            chunks_started = time.perf_counter()
             results = self.vector_service.query(
                 collection=self.document_collection,
                 query_text=query,
                 n_results=n_results_requested,  # Augmenté de x3 à x10 avec limite 500
-                where_filter=where_filter,
+                where_filter=search_filter,
+                **query_kwargs,
             )
+            chunks_stage = {
+                "stage": "chunks",
+                "duration_ms": (time.perf_counter() - chunks_started) * 1000,
+                "items": len(results or []),
+                "payload_bytes": sum(len(r.get("text") or "") for r in results or []),
+            }
+            self._record_search_stages(candidate_ids, coarse_stage, chunks_stage)
 
             logger.info(
                 f"[RAG Phase 4] Document search: top_k={top_k}, n_results={n_results_requested}, "
-                f"retrieved={len(results) if results else 0} chunks"
+                f"retrieved={len(results) if results else 0} chunks, "
+                f"candidate_docs={len(candidate_ids) if candidate_ids else 'all'}"
             )
 
             if not results:
@@ -1470,6 +1886,60 @@ class DocumentService:
             )
             return []
 
+    async def expand_parent_windows(
+        self,
+        hits: List[Dict[str, Any]],
+        *,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Remplace les chunks enfants retrouvés par leurs sections parentes.
+
+        Returns:
+            (fenêtres parentes dédupliquées, hits restants). Les hits restants
+            viennent de documents indexés avant l'index parent–enfant, ou dont
+            le parent est introuvable : l'appelant garde la fusion legacy.
+        """
+        parent_ids = collect_parent_ids(hits)
+        if not parent_ids or not (user_id or session_id):
+            return [], list(hits)
+        try:
+            parents = await db_queries.get_parent_chunks(
+                self.db_manager,
+                parent_ids,
+                user_id=user_id,
+                session_id=session_id,
+            )
+        except Exception as exc:
+            logger.warning("Sections parentes indisponibles: %s", exc)
+            return [], list(hits)
+        windows: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]] = (
+            collapse_to_parent_windows(hits, parents)
+        )
+        return windows
+
+    def _record_search_stages(
+        self,
+        candidate_ids: Optional[List[int]],
+        *stages: Dict[str, Any],
+    ) -> None:
+        """Latence et payload par étape (Prometheus + dernier rapport consultable)."""
+        self.last_search_stats = {
+            "two_stage": bool(candidate_ids),
+            "candidate_documents": list(candidate_ids or []),
+            "stages": [dict(stage) for stage in stages],
+        }
+        for stage in stages:
+            if stage["stage"] == "coarse" and not candidate_ids:
+                continue
+            rag_metrics.record_retrieval_stage(
+                stage["stage"],
+                stage["duration_ms"] / 1000,
+                stage["items"],
+                stage["payload_bytes"],
+            )
+
     def _compute_keyword_score(
         self, text: str, query: str, chunk_keywords: str
     ) -> float:
@@ -0,0 +1,319 @@
+"""
+Chunking sémantique en streaming pour les gros documents.
+
+Consomme les segments produits par ``FileParser.iter_segments`` (pages PDF,
+blocs de texte, blocs de paragraphes DOCX) et produit les chunks au fil de
+l'eau, groupés par section parente fermée. Seuls le paragraphe, le chunk et
+la section parente en cours sont en mémoire : le pic mémoire est borné par
+le lot de chunks en cours d'indexation, pas par la taille du document.
+
+Mêmes règles que ``DocumentService._chunk_text_semantic`` (paragraphes
+séparés par une ligne vide, limite de paragraphes par chunk, overlap,
+sections parentes). Les replis globaux de la version en mémoire (qui
+re-découpent tout le document) sont remplacés par une escalade en ligne :
+quand la projection du nombre de chunks (d'après la longueur du texte
+extrait) dépasse la limite, la limite de paragraphes est levée, puis la
+taille de chunk doublée, puis les chunks suivants fusionnés par paquets.
+Le dernier chunk autorisé absorbe le reste du document : comme la fusion
+finale de la version en mémoire, la limite n'est jamais dépassée.
+"""
+
+import math
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Un paragraphe sans ligne vide ne doit pas grossir sans limite
+MAX_PARAGRAPH_CHARS_FACTOR = 16
+MAX_CHUNK_SIZE_FACTOR = 16
+# Pas d'escalade avant d'avoir consommé cette fraction du document, ou
+# produit cette fraction de la limite de chunks depuis le dernier palier
+MIN_PROGRESS_FOR_PROJECTION = 0.02
+MIN_WINDOW_CHUNKS_RATIO = 0.01
+MIN_WINDOW_CHUNKS = 4
+SPOOL_READ_BLOCK_CHARS = 1 << 16
+
+
+def spool_segments(segments: Iterable[str], directory: str) -> Tuple[str, int]:
+    """
+    Écrit le texte extrait dans un fichier temporaire de ``directory``.
+
+    Returns:
+        (chemin du fichier, longueur du texte en caractères) : la longueur
+        exacte sert de base à la projection du nombre de chunks.
+    """
+    fd, path = tempfile.mkstemp(prefix=".extract_", suffix=".txt", dir=directory)
+    char_count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as spool:
+            for segment in segments:
+                spool.write(segment)
+                char_count += len(segment)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, char_count
+
+
+def iter_spooled_segments(path: str) -> Iterator[str]:
+    """Relit un fichier produit par ``spool_segments`` par blocs (texte inchangé)."""
+    with open(path, "r", encoding="utf-8", newline="") as spool:
+        while True:
+            block = spool.read(SPOOL_READ_BLOCK_CHARS)
+            if not block:
+                return
+            yield block
+
+
+def iter_paragraphs(
+    segments: Iterable[str], max_chars: int
+) -> Iterator[Dict[str, Any]]:
+    """
+    Paragraphes ``{lines, line_start, line_end}`` d'un flux de segments.
+
+    Même découpage que la version en mémoire (ligne vide = fin de
+    paragraphe, numéros de lignes globaux) ; les lignes coupées entre deux
+    segments sont recollées. Un paragraphe dépassant ``max_chars`` est
+    émis en plusieurs morceaux.
+    """
+    current: List[str] = []
+    current_chars = 0
+    line_start = 0
+    line_no = 0
+    carry = ""
+
+    def lines_of(segment_iter: Iterable[str]) -> Iterator[str]:
+        nonlocal carry
+        for segment in segment_iter:
+            if not segment:
+                continue
+            parts = (carry + segment).split("\n")
+            carry = parts.pop()
+            yield from parts
+        if carry:
+            last, carry = carry, ""
+            yield last
+
+    for line in lines_of(segments):
+        if not line.strip() and current:
+            yield {"lines": current, "line_start": line_start, "line_end": line_no}
+            current, current_chars = [], 0
+            line_start = line_no + 1
+        else:
+            current.append(line)
+            current_chars += len(line) + 1
+            if current_chars > max_chars:
+                yield {
+                    "lines": current,
+                    "line_start": line_start,
+                    "line_end": line_no + 1,
+                }
+                current, current_chars = [], 0
+                line_start = line_no + 1
+        line_no += 1
+
+    if current:
+        yield {"lines": current, "line_start": line_start, "line_end": line_no}
+
+
+class StreamingChunker:
+    """Découpe un flux de segments en groupes de chunks (un groupe par section parente)."""
+
+    def __init__(
+        self,
+        finalize_chunk: Callable[[List[Dict[str, Any]], str, int, int], Dict[str, Any]],
+        *,
+        filename: str,
+        chunk_size: int,
+        overlap: int,
+        max_paragraphs: Optional[int],
+        parent_chunk_size: int,
+        max_chunks: int,
+        size_hint: Optional[int] = None,
+    ) -> None:
+        self.finalize_chunk = finalize_chunk
+        self.filename = filename
+        self.base_chunk_size = chunk_size
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.max_paragraphs = max_paragraphs
+        self.parent_chunk_size = parent_chunk_size
+        self.max_chunks = max_chunks
+        self.size_hint = size_hint if size_hint and size_hint > 0 else None
+        self.char_count = 0
+        self.chunk_count = 0
+        self.merge_factor = 1
+        # Caractères déjà découpés (au paragraphe près) : base de la projection
+        self._progress = 0
+        self.escalations: List[str] = []
+
+        self._chunk_paragraphs: List[Dict[str, Any]] = []
+        self._chunk_chars = 0
+        self._previous_text: Optional[str] = None
+        # Chunks en attente de fusion (mode fusion ou dernier chunk autorisé)
+        self._merge_paragraphs: List[Dict[str, Any]] = []
+        self._merge_pending = 0
+        self._parent_children: List[Dict[str, Any]] = []
+        self._parent_texts: List[str] = []
+        self._parent_title: Optional[str] = None
+        self._parent_chars = 0
+        self._parent_index = 0
+        # Fenêtre d'observation pour la projection (réinitialisée à chaque escalade)
+        self._window_chars = 0
+        self._window_count = 0
+
+    def iter_groups(self, segments: Iterable[str]) -> Iterator[List[Dict[str, Any]]]:
+        """Groupes de chunks enfants, chacun correspondant à une section parente fermée."""
+        paragraph_cap = self.base_chunk_size * MAX_PARAGRAPH_CHARS_FACTOR
+        for para in iter_paragraphs(self._count_chars(segments), paragraph_cap):
+            para_size = len("\n".join(para["lines"]))
+            self._progress += para_size + 2
+
+            if para_size > self.chunk_size:
+                yield from self._flush_chunk()
+                self._chunk_paragraphs = [para]
+                yield from self._flush_chunk()
+                continue
+
+            if (
+                self.max_paragraphs
+                and self._chunk_paragraphs
+                and len(self._chunk_paragraphs) >= self.max_paragraphs
+            ):
+                yield from self._flush_chunk()
+
+            if (
+                self._chunk_paragraphs
+                and self._chunk_chars + para_size > self.chunk_size
+            ):
+                yield from self._flush_chunk()
+
+            self._chunk_paragraphs.append(para)
+            self._chunk_chars += para_size + 2  # +2 pour \n\n
+
+        yield from self._flush_chunk()
+        if self._merge_paragraphs:
+            yield from self._emit_chunk(self._take_merged())
+        group = self._close_parent()
+        if group:
+            yield group
+
+    def _count_chars(self, segments: Iterable[str]) -> Iterator[str]:
+        for segment in segments:
+            self.char_count += len(segment)
+            yield segment
+
+    def _flush_chunk(self) -> Iterator[List[Dict[str, Any]]]:
+        if not self._chunk_paragraphs:
+            return
+        paragraphs = self._chunk_paragraphs
+        self._chunk_paragraphs, self._chunk_chars = [], 0
+
+        last_slot = self.chunk_count >= self.max_chunks - 1
+        if self.merge_factor > 1 or last_slot:
+            if last_slot and "tail_merged" not in self.escalations:
+                self.escalations.append("tail_merged")
+            self._merge_paragraphs.extend(paragraphs)
+            self._merge_pending += 1
+            if not last_slot and self._merge_pending >= self.merge_factor:
+                yield from self._emit_chunk(self._take_merged())
+            return
+        yield from self._emit_chunk(paragraphs)
+
+    def _take_merged(self) -> List[Dict[str, Any]]:
+        paragraphs = self._merge_paragraphs
+        self._merge_paragraphs, self._merge_pending = [], 0
+        return paragraphs
+
+    def _emit_chunk(
+        self, paragraphs: List[Dict[str, Any]]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        chunk = self.finalize_chunk(
+            paragraphs, self.filename, self.chunk_count, self.chunk_size
+        )
+        raw_text = chunk["text"]
+        if (
+            self._previous_text is not None
+            and len(self._previous_text) > self.overlap
+        ):
+            overlap_text = self._previous_text[-self.overlap :]
+            if not raw_text.startswith(overlap_text):
+                chunk["text"] = f"{overlap_text}\n\n{raw_text}"
+                chunk["has_overlap"] = True
+        self._previous_text = chunk["text"]
+        self.chunk_count += 1
+
+        title = chunk.get("section_title") or None
+        starts_section = title is not None and title != self._parent_title
+        if self._parent_children and (
+            starts_section or self._parent_chars + len(chunk["text"]) > self.parent_chunk_size
+        ):
+            yield self._close_parent()
+        if not self._parent_children:
+            self._parent_title = title
+        self._parent_children.append(chunk)
+        self._parent_texts.extend("\n".join(p["lines"]) for p in paragraphs)
+        self._parent_chars += len(chunk["text"])
+
+        self._maybe_escalate()
+
+    def _close_parent(self) -> List[Dict[str, Any]]:
+        children = self._parent_children
+        if not children:
+            return []
+        parent_text = "\n\n".join(self._parent_texts).strip()
+        if not parent_text:
+            parent_text = "\n\n".join(c.get("text", "") for c in children)
+        line_start = children[0].get("line_start", 0)
+        line_end = max(c.get("line_end", line_start) for c in children)
+        for child in children:
+            child["parent_index"] = self._parent_index
+            child["parent_text"] = parent_text
+            child["parent_line_start"] = line_start
+            child["parent_line_end"] = line_end
+        self._parent_index += 1
+        self._parent_children, self._parent_texts = [], []
+        self._parent_title, self._parent_chars = None, 0
+        return children
+
+    def _maybe_escalate(self) -> None:
+        """
+        Escalade en ligne si la projection du nombre de chunks dépasse la limite.
+
+        La projection utilise le débit (chunks par caractère) observé depuis
+        la dernière escalade, pour juger l'effet de chaque palier avant le
+        suivant. Dernier palier : fusion des chunks suivants par paquets
+        (équivalent en ligne de la fusion finale de la version en mémoire).
+        """
+        if self.size_hint is None:
+            return
+        window_chars = self._progress - self._window_chars
+        window_count = self.chunk_count - self._window_count
+        min_window_count = max(MIN_WINDOW_CHUNKS, self.max_chunks * MIN_WINDOW_CHUNKS_RATIO)
+        if not window_chars or (
+            window_chars < self.size_hint * MIN_PROGRESS_FOR_PROJECTION
+            and window_count < min_window_count
+        ):
+            return
+        rate = window_count / window_chars
+        remaining = max(0, self.size_hint - self._progress)
+        projected = self.chunk_count + rate * remaining
+        if projected <= self.max_chunks * 0.9:
+            return
+        if self.max_paragraphs:
+            self.max_paragraphs = None
+            self.escalations.append("paragraph_limit_removed")
+        elif self.chunk_size < self.base_chunk_size * MAX_CHUNK_SIZE_FACTOR:
+            self.chunk_size = min(
+                self.chunk_size * 2, self.base_chunk_size * MAX_CHUNK_SIZE_FACTOR
+            )
+            self.escalations.append(f"chunk_size={self.chunk_size}")
+        else:
+            budget = max(1, int(self.max_chunks * 0.9) - self.chunk_count)
+            factor = math.ceil(self.merge_factor * (projected - self.chunk_count) / budget)
+            if factor <= self.merge_factor:
+                return
+            self.merge_factor = factor
+            self.escalations.append(f"merge_factor={factor}")
+        self._window_chars = self._progress
+        self._window_count = self.chunk_count
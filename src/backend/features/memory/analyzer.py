@@ -1,10 +1,12 @@
 # src/backend/features/memory/analyzer.py
-# V3.7 - Phase P1: Extraction préférences/intentions + enrichissement mémoire
+# V3.8 - Phase P1: Extraction préférences/intentions + enrichissement mémoire
+#  + analyse incrémentale par checkpoint (delta depuis le dernier message analysé)
 import logging
 import hashlib
 import asyncio
 import os
 import re
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, TYPE_CHECKING, Callable
 from datetime import datetime, timedelta
 
@@ -12,7 +14,9 @@ if TYPE_CHECKING:
     from backend.features.chat.service import ChatService
     from backend.core.database.manager import DatabaseManager
 
+from backend.core.cache.llm_response_cache import cached_call_site
 from backend.core.database import queries
+from backend.features.memory.generations import bump_generation
 from backend.features.memory.preference_extractor import PreferenceExtractor
 
 # ⚡ Métriques Prometheus (Phase 3)
@@ -50,6 +54,22 @@ try:
         buckets=[0.5, 1.0, 2.0, 4.0, 6.0, 10.0, 15.0, 20.0, 30.0],
     )
 
+    # Analyse incrémentale (delta depuis le dernier checkpoint)
+    ANALYSIS_MODE_TOTAL = Counter(
+        "memory_analysis_mode_total",
+        "Analyses par mode (full, incremental, unchanged)",
+        ["mode"],
+    )
+    ANALYSIS_PROMPT_TOKENS_TOTAL = Counter(
+        "memory_analysis_prompt_tokens_total",
+        "Tokens de prompt envoyés (estimation) par mode",
+        ["mode"],
+    )
+    ANALYSIS_TOKENS_SAVED_TOTAL = Counter(
+        "memory_analysis_tokens_saved_total",
+        "Tokens de prompt économisés par l'analyse incrémentale (estimation)",
+    )
+
     # 🆕 HOTFIX P1.3: Métriques échecs extraction préférences
     PREFERENCE_EXTRACTION_FAILURES = Counter(
         "memory_preference_extraction_failures_total",
@@ -73,6 +93,18 @@ _ANALYSIS_CACHE: Dict[str, tuple[Dict[str, Any], datetime]] = {}
 MAX_CACHE_SIZE = 100
 EVICTION_THRESHOLD = 80  # Éviction agressive quand >80 entrées
 
+# ⚡ Checkpoints d'analyse incrémentale par thread : LRU par instance
+# (``MemoryAnalyzer._checkpoints``), miroir de la table memory_analysis_checkpoints
+MAX_CHECKPOINTS = 500
+# État courant borné : le prompt incrémental reste compact quelle que soit
+# la longueur du thread
+INCREMENTAL_MAX_CONCEPTS = 10
+INCREMENTAL_MAX_ENTITIES = 20
+
+# Version des templates d'analyse : à incrémenter à chaque modification des
+# prompts ou du schéma pour invalider le cache persistant des réponses LLM
+ANALYSIS_PROMPT_VERSION = "v1"
+
 ANALYSIS_PROMPT_TEMPLATE = """
 Analyse la conversation suivante et extrais les informations clés.
 La conversation est un dialogue entre un utilisateur ("user") et un ou plusieurs assistants IA ("assistant").
@@ -88,6 +120,26 @@ En te basant sur cette conversation, fournis les éléments suivants :
 3.  **entities**: Une liste des noms propres, lieux, ou titres d'œuvres spécifiques mentionnés.
 """
 
+INCREMENTAL_ANALYSIS_PROMPT_TEMPLATE = """
+Tu mets à jour l'analyse d'une conversation déjà partiellement analysée.
+La conversation est un dialogue entre un utilisateur ("user") et un ou plusieurs assistants IA ("assistant").
+
+ÉTAT PRÉCÉDENT:
+- Résumé: {previous_summary}
+- Concepts: {previous_concepts}
+- Entités: {previous_entities}
+
+NOUVEAUX MESSAGES:
+---
+{conversation_text}
+---
+
+En te basant sur l'état précédent et les nouveaux messages, fournis :
+1.  **summary**: Le résumé mis à jour de TOUTE la conversation en 2-3 phrases maximum.
+2.  **concepts**: Une liste de 3 à 5 concepts ou thèmes principaux abordés dans les nouveaux messages. Sois spécifique.
+3.  **entities**: Une liste des noms propres, lieux, ou titres d'œuvres mentionnés dans les nouveaux messages.
+"""
+
 ANALYSIS_JSON_SCHEMA = {
     "type": "object",
     "properties": {
@@ -110,6 +162,24 @@ ANALYSIS_JSON_SCHEMA = {
 }
 
 
+def _merge_unique(primary: Any, secondary: Any, limit: int) -> List[str]:
+    """Union ordonnée (insensible à la casse) de deux listes de chaînes, bornée."""
+    merged: List[str] = []
+    seen: set[str] = set()
+    for source in (primary or [], secondary or []):
+        for item in source:
+            if not isinstance(item, str) or not item.strip():
+                continue
+            lowered = item.strip().lower()
+            if lowered in seen:
+                continue
+            seen.add(lowered)
+            merged.append(item.strip())
+            if len(merged) >= limit:
+                return merged
+    return merged
+
+
 class MemoryAnalyzer:
     """Analyse sémantique de session: summary + concepts + entities (STM)"""
 
@@ -118,6 +188,7 @@ class MemoryAnalyzer:
         db_manager: "DatabaseManager",
         chat_service: Optional["ChatService"] = None,
         enable_offline_mode: Optional[bool] = None,
+        incremental: Optional[bool] = None,
     ):
         self.db_manager = db_manager
         self.chat_service = chat_service
@@ -134,10 +205,24 @@ class MemoryAnalyzer:
         # 🔒 Lock pour accès concurrent au cache (Bug #3 fix)
         self._cache_lock = asyncio.Lock()
         self._offline_warning_emitted = False
+        # ⚡ Analyse incrémentale : checkpoint (dernier message analysé + état
+        # courant) par thread, seul le delta est envoyé au LLM
+        if incremental is None:
+            incremental = os.getenv("MEMORY_ANALYZER_INCREMENTAL", "true").strip().lower() in {"1", "true", "yes"}
+        self.incremental_enabled = bool(incremental)
+        self._checkpoints: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.incremental_stats: Dict[str, int] = {
+            "full": 0,
+            "incremental": 0,
+            "unchanged": 0,
+            "prompt_tokens": 0,
+            "tokens_saved": 0,
+        }
         logger.info(
-            "MemoryAnalyzer V3.7 (P1) initialisé. Prêt=%s | offline_mode=%s",
+            "MemoryAnalyzer V3.8 (P1) initialisé. Prêt=%s | offline_mode=%s | incremental=%s",
             self.is_ready,
             self.offline_mode,
+            self.incremental_enabled,
         )
 
     def set_chat_service(self, chat_service: "ChatService") -> None:
@@ -194,6 +279,148 @@ class MemoryAnalyzer:
         async with self._cache_lock:
             _ANALYSIS_CACHE.pop(key, None)
 
+    # ------------------------------------------------------------------
+    # Analyse incrémentale (checkpoints par thread)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _format_history(history: List[Dict[str, Any]]) -> str:
+        return "\n".join(
+            f"{m.get('role')}: {m.get('content') or m.get('message', '')}"
+            for m in (history or [])
+        )
+
+    @staticmethod
+    def _message_key(message: Dict[str, Any]) -> str:
+        """Identifiant stable d'un message : id si présent, sinon empreinte du contenu."""
+        message_id = message.get("id") or message.get("message_id")
+        if message_id:
+            return str(message_id)
+        raw = f"{message.get('role')}:{message.get('content') or message.get('message', '')}"
+        return "h:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text) // 4  # Approximation
+
+    async def _load_checkpoint(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """Checkpoint du thread (LRU mémoire, puis table memory_analysis_checkpoints)."""
+        async with self._cache_lock:
+            checkpoint = self._checkpoints.get(thread_id)
+            if checkpoint is not None:
+                self._checkpoints.move_to_end(thread_id)
+                return checkpoint
+        try:
+            row = await queries.get_analysis_checkpoint(self.db_manager, thread_id)
+        except Exception as e:
+            logger.debug(f"[MemoryAnalyzer] Checkpoint illisible pour {thread_id}: {e}")
+            return None
+        if not row or not row.get("last_message_key"):
+            return None
+        stored: Dict[str, Any] = dict(row)
+        await self._remember_checkpoint(thread_id, stored)
+        return stored
+
+    async def _remember_checkpoint(
+        self, thread_id: str, checkpoint: Dict[str, Any]
+    ) -> None:
+        async with self._cache_lock:
+            self._checkpoints[thread_id] = checkpoint
+            self._checkpoints.move_to_end(thread_id)
+            while len(self._checkpoints) > MAX_CHECKPOINTS:
+                self._checkpoints.popitem(last=False)
+
+    async def _save_checkpoint(
+        self, thread_id: str, history: List[Dict[str, Any]], result: Dict[str, Any]
+    ) -> None:
+        last_message_key = self._message_key(history[-1])
+        summary = str(result.get("summary", "") or "")
+        concepts = _merge_unique(result.get("concepts"), [], INCREMENTAL_MAX_CONCEPTS)
+        entities = _merge_unique(result.get("entities"), [], INCREMENTAL_MAX_ENTITIES)
+        checkpoint: Dict[str, Any] = {
+            "thread_id": thread_id,
+            "last_message_key": last_message_key,
+            "message_count": len(history),
+            "summary": summary,
+            "concepts": concepts,
+            "entities": entities,
+        }
+        await self._remember_checkpoint(thread_id, checkpoint)
+        try:
+            await queries.upsert_analysis_checkpoint(
+                self.db_manager,
+                thread_id,
+                last_message_key=last_message_key,
+                message_count=len(history),
+                summary=summary,
+                concepts=concepts,
+                entities=entities,
+            )
+        except Exception as e:
+            logger.debug(f"[MemoryAnalyzer] Checkpoint non persisté pour {thread_id}: {e}")
+
+    async def reset_checkpoint(self, thread_id: str) -> None:
+        """Oublie le checkpoint : la prochaine analyse repartira de tout l'historique."""
+        async with self._cache_lock:
+            self._checkpoints.pop(thread_id, None)
+        try:
+            await queries.delete_analysis_checkpoint(self.db_manager, thread_id)
+        except Exception as e:
+            logger.debug(f"[MemoryAnalyzer] Suppression checkpoint échouée pour {thread_id}: {e}")
+
+    def _compute_delta(
+        self, history: List[Dict[str, Any]], checkpoint: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Messages postérieurs au checkpoint, ou None si l'historique ne le
+        prolonge pas (messages édités/supprimés) → analyse complète.
+        """
+        last_key = checkpoint.get("last_message_key")
+        count = int(checkpoint.get("message_count") or 0)
+        if 0 < count <= len(history) and self._message_key(history[count - 1]) == last_key:
+            return history[count:]
+        # Fenêtre glissante (micro-consolidation) : retrouver le dernier message analysé
+        for index in range(len(history) - 1, -1, -1):
+            if self._message_key(history[index]) == last_key:
+                return history[index + 1 :]
+        return None
+
+    @staticmethod
+    def _merge_incremental(
+        checkpoint: Dict[str, Any], delta_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Fusionne l'analyse du delta avec l'état courant (nouveaux concepts en tête)."""
+        summary = str(delta_result.get("summary", "") or "").strip()
+        return {
+            "summary": summary or checkpoint.get("summary", ""),
+            "concepts": _merge_unique(
+                delta_result.get("concepts"),
+                checkpoint.get("concepts"),
+                INCREMENTAL_MAX_CONCEPTS,
+            ),
+            "entities": _merge_unique(
+                delta_result.get("entities"),
+                checkpoint.get("entities"),
+                INCREMENTAL_MAX_ENTITIES,
+            ),
+        }
+
+    def _record_analysis_mode(
+        self, mode: str, prompt_tokens: int, tokens_saved: int
+    ) -> None:
+        self.incremental_stats[mode] += 1
+        self.incremental_stats["prompt_tokens"] += prompt_tokens
+        self.incremental_stats["tokens_saved"] += tokens_saved
+        if PROMETHEUS_AVAILABLE:
+            ANALYSIS_MODE_TOTAL.labels(mode=mode).inc()
+            if prompt_tokens:
+                ANALYSIS_PROMPT_TOKENS_TOTAL.labels(mode=mode).inc(prompt_tokens)
+            if tokens_saved:
+                ANALYSIS_TOKENS_SAVED_TOTAL.inc(tokens_saved)
+
+    def get_incremental_stats(self) -> Dict[str, int]:
+        """Compteurs full/incremental/unchanged et tokens de prompt envoyés/économisés."""
+        return dict(self.incremental_stats)
+
     def _offline_analysis(self, history: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Fallback heuristique (tests/offline) lorsque chat_service est absent."""
         if not history:
@@ -366,10 +593,7 @@ class MemoryAnalyzer:
             )
             return {}
 
-        conversation_text = "\n".join(
-            f"{m.get('role')}: {m.get('content') or m.get('message', '')}"
-            for m in (history or [])
-        )
+        conversation_text = self._format_history(history)
         if not conversation_text.strip():
             logger.warning(f"Historique vide pour {session_id}. Analyse annulée.")
             await self._notify(
@@ -422,43 +646,101 @@ class MemoryAnalyzer:
             if PROMETHEUS_AVAILABLE and persist and not force:
                 CACHE_MISSES_TOTAL.inc()
 
+            # ⚡ Analyse incrémentale : seuls les messages postérieurs au
+            # checkpoint + l'état courant compact partent au LLM
+            full_prompt_tokens = self._estimate_tokens(prompt)
+            analysis_mode = "full"
+            checkpoint: Optional[Dict[str, Any]] = None
+            delta: Optional[List[Dict[str, Any]]] = None
+            if self.incremental_enabled and not force:
+                checkpoint = await self._load_checkpoint(session_id)
+                if checkpoint:
+                    delta = self._compute_delta(history, checkpoint)
+                if checkpoint is not None and delta is not None:
+                    if not delta:
+                        # Aucun nouveau message : l'état courant est à jour, pas
+                        # d'appel LLM (persistance, extraction et notify suivent)
+                        analysis_mode = "unchanged"
+                        provider_used = "checkpoint"
+                        analysis_result = {
+                            "summary": checkpoint.get("summary", ""),
+                            "concepts": list(checkpoint.get("concepts") or []),
+                            "entities": list(checkpoint.get("entities") or []),
+                        }
+                        logger.info(
+                            f"[MemoryAnalyzer] Aucun nouveau message pour {session_id} — état checkpoint réutilisé"
+                        )
+                    else:
+                        analysis_mode = "incremental"
+                        prompt = INCREMENTAL_ANALYSIS_PROMPT_TEMPLATE.format(
+                            previous_summary=checkpoint.get("summary") or "(aucun)",
+                            previous_concepts=", ".join(
+                                checkpoint.get("concepts") or []
+                            )
+                            or "(aucun)",
+                            previous_entities=", ".join(
+                                checkpoint.get("entities") or []
+                            )
+                            or "(aucune)",
+                            conversation_text=self._format_history(delta),
+                        )
+            if analysis_mode == "unchanged":
+                self._record_analysis_mode("unchanged", 0, full_prompt_tokens)
+            else:
+                prompt_tokens = self._estimate_tokens(prompt)
+                self._record_analysis_mode(
+                    analysis_mode,
+                    prompt_tokens,
+                    max(0, full_prompt_tokens - prompt_tokens),
+                )
+            if analysis_mode == "incremental":
+                logger.info(
+                    f"[MemoryAnalyzer] Analyse incrémentale pour {session_id}: "
+                    f"{len(delta or [])}/{len(history)} messages, "
+                    f"~{prompt_tokens} tokens (vs ~{full_prompt_tokens})"
+                )
+
             start_time = datetime.now()
 
             # Tentative primaire : neo_analysis (GPT-4o-mini - rapide pour JSON)
             # Bug #9 (P2): Timeout 30s pour éviter blocage indéfini
-            try:
-                if not chat_service:
-                    raise RuntimeError("ChatService not available (offline mode)")
-                analysis_result = await asyncio.wait_for(
-                    chat_service.get_structured_llm_response(
-                        agent_id="neo_analysis",
-                        prompt=prompt,
-                        json_schema=ANALYSIS_JSON_SCHEMA,
-                    ),
-                    timeout=30.0,
-                )
-                # 📊 Métriques succès
-                if PROMETHEUS_AVAILABLE:
-                    duration = (datetime.now() - start_time).total_seconds()
-                    ANALYSIS_DURATION_SECONDS.labels(provider="neo_analysis").observe(
-                        duration
+            if not analysis_result:
+                try:
+                    if not chat_service:
+                        raise RuntimeError("ChatService not available (offline mode)")
+                    with cached_call_site(
+                        "memory_analysis", version=ANALYSIS_PROMPT_VERSION
+                    ):
+                        analysis_result = await asyncio.wait_for(
+                            chat_service.get_structured_llm_response(
+                                agent_id="neo_analysis",
+                                prompt=prompt,
+                                json_schema=ANALYSIS_JSON_SCHEMA,
+                            ),
+                            timeout=30.0,
+                        )
+                    # 📊 Métriques succès
+                    if PROMETHEUS_AVAILABLE:
+                        duration = (datetime.now() - start_time).total_seconds()
+                        ANALYSIS_DURATION_SECONDS.labels(provider="neo_analysis").observe(
+                            duration
+                        )
+                        ANALYSIS_SUCCESS_TOTAL.labels(provider="neo_analysis").inc()
+                    logger.info(
+                        f"[MemoryAnalyzer] Analyse réussie avec neo_analysis pour session {session_id}"
+                    )
+                except Exception as e:
+                    primary_error = e
+                    error_type = type(e).__name__
+                    # 📊 Métriques échec
+                    if PROMETHEUS_AVAILABLE:
+                        ANALYSIS_FAILURE_TOTAL.labels(
+                            provider="neo_analysis", error_type=error_type
+                        ).inc()
+                    logger.warning(
+                        f"[MemoryAnalyzer] Analyse neo_analysis échouée ({error_type}) pour session {session_id} — fallback Nexus",
+                        exc_info=True,
                     )
-                    ANALYSIS_SUCCESS_TOTAL.labels(provider="neo_analysis").inc()
-                logger.info(
-                    f"[MemoryAnalyzer] Analyse réussie avec neo_analysis pour session {session_id}"
-                )
-            except Exception as e:
-                primary_error = e
-                error_type = type(e).__name__
-                # 📊 Métriques échec
-                if PROMETHEUS_AVAILABLE:
-                    ANALYSIS_FAILURE_TOTAL.labels(
-                        provider="neo_analysis", error_type=error_type
-                    ).inc()
-                logger.warning(
-                    f"[MemoryAnalyzer] Analyse neo_analysis échouée ({error_type}) pour session {session_id} — fallback Nexus",
-                    exc_info=True,
-                )
 
             # Fallback 1 : Nexus (Anthropic - plus fiable)
             if not analysis_result:
@@ -467,14 +749,17 @@ class MemoryAnalyzer:
                 try:
                     if not chat_service:
                         raise RuntimeError("ChatService not available (offline mode)")
-                    analysis_result = await asyncio.wait_for(
-                        chat_service.get_structured_llm_response(
-                            agent_id="nexus",
-                            prompt=prompt,
-                            json_schema=ANALYSIS_JSON_SCHEMA,
-                        ),
-                        timeout=30.0,
-                    )
+                    with cached_call_site(
+                        "memory_analysis", version=ANALYSIS_PROMPT_VERSION
+                    ):
+                        analysis_result = await asyncio.wait_for(
+                            chat_service.get_structured_llm_response(
+                                agent_id="nexus",
+                                prompt=prompt,
+                                json_schema=ANALYSIS_JSON_SCHEMA,
+                            ),
+                            timeout=30.0,
+                        )
                     # 📊 Métriques succès Nexus
                     if PROMETHEUS_AVAILABLE:
                         duration = (datetime.now() - start_time).total_seconds()
@@ -504,13 +789,16 @@ class MemoryAnalyzer:
                             raise RuntimeError(
                                 "ChatService not available (offline mode)"
                             )
-                        analysis_result = (
-                            await chat_service.get_structured_llm_response(
-                                agent_id="anima",
-                                prompt=prompt,
-                                json_schema=ANALYSIS_JSON_SCHEMA,
+                        with cached_call_site(
+                            "memory_analysis", version=ANALYSIS_PROMPT_VERSION
+                        ):
+                            analysis_result = (
+                                await chat_service.get_structured_llm_response(
+                                    agent_id="anima",
+                                    prompt=prompt,
+                                    json_schema=ANALYSIS_JSON_SCHEMA,
+                                )
                             )
-                        )
                         # 📊 Métriques succès Anima
                         if PROMETHEUS_AVAILABLE:
                             duration = (datetime.now() - start_time).total_seconds()
@@ -550,6 +838,15 @@ class MemoryAnalyzer:
                         )
                         raise
 
+            if analysis_result and analysis_mode == "incremental" and checkpoint:
+                analysis_result = self._merge_incremental(checkpoint, analysis_result)
+            if (
+                analysis_result
+                and self.incremental_enabled
+                and analysis_mode != "unchanged"
+            ):
+                await self._save_checkpoint(session_id, history, analysis_result)
+
         summary_value = str(analysis_result.get("summary", "") or "")
         concepts_raw = analysis_result.get("concepts", []) or []
         entities_raw = analysis_result.get("entities", []) or []
@@ -808,6 +1105,10 @@ class MemoryAnalyzer:
                 )
                 # Continue avec les autres préférences
 
+        if saved_count:
+            # Les caches préférences / mémoire consolidée de l'utilisateur deviennent obsolètes
+            await bump_generation(user_id)
+
         return saved_count
 
     async def analyze_session_async(
@@ -0,0 +1,408 @@
+"""
+Moteur de consolidation en lot des threads archivés vers la LTM.
+
+Partagé par les CLI ``consolidate_all_archives`` et ``consolidate_archived_threads``.
+
+- Concurrence bornée : N threads en vol, appels LLM et écritures vectorielles
+  throttlés séparément (sémaphores posés sur ``MemoryGardener``)
+- Détection "déjà consolidé" groupée : une requête SQL (``consolidated_at``) puis
+  une requête vectorielle ``$in`` par page d'IDs (au lieu d'une sonde par thread)
+- Checkpoint SQL par thread (table ``archive_consolidation_progress``, définie
+  dans ``core/database/schema.py``) : un run interrompu reprend là où il
+  s'était arrêté ; un run forcé repart sur un checkpoint neuf
+- Rapport périodique de débit / ETA
+- Décroissance de la LTM exécutée une seule fois en fin de run
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = "archive_consolidation_progress"
+
+# Statuts terminaux : un thread dans l'un de ces états n'est pas retraité à la reprise
+_FINAL_STATUSES = ("consolidated", "skipped")
+
+
+@dataclass
+class ConsolidationRunStats:
+    """Compteurs d'un run + calcul de débit / ETA."""
+
+    run_id: str
+    total: int = 0
+    resumed: int = 0
+    already_consolidated: int = 0
+    consolidated: int = 0
+    skipped: int = 0
+    total_concepts: int = 0
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def processed(self) -> int:
+        return self.consolidated + self.skipped + len(self.errors)
+
+    @property
+    def pending(self) -> int:
+        return max(
+            0, self.total - self.resumed - self.already_consolidated - self.processed
+        )
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def throughput_per_minute(self) -> float:
+        elapsed = self.elapsed_seconds
+        return (self.processed / elapsed) * 60 if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if self.processed == 0:
+            return None
+        return self.pending * (self.elapsed_seconds / self.processed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "total": self.total,
+            "resumed": self.resumed,
+            "already_consolidated": self.already_consolidated,
+            "consolidated": self.consolidated,
+            "skipped": self.skipped,
+            "errors": list(self.errors),
+            "total_concepts": self.total_concepts,
+            "duration_seconds": round(self.elapsed_seconds, 2),
+            "throughput_per_minute": round(self.throughput_per_minute, 2),
+        }
+
+
+def default_run_id(user_id: Optional[str], force: bool = False) -> str:
+    """
+    Identifiant d'un run : stable par périmètre (même périmètre ⇒ même
+    checkpoint), unique pour un run forcé (sinon un second ``--force``
+    reprendrait le checkpoint du premier et ne retraiterait rien).
+    """
+    scope = user_id or "*"
+    if force:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return f"archives:{scope}:force:{stamp}"
+    return f"archives:{scope}"
+
+
+class ArchiveConsolidationRunner:
+    """
+    Consolide les threads archivés avec concurrence bornée et reprise sur checkpoint.
+
+    Usage:
+        runner = ArchiveConsolidationRunner(db, gardener, vector_service, concurrency=4)
+        stats = await runner.run(user_id="u1")
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        gardener: Any,
+        vector_service: Any = None,
+        *,
+        concurrency: int = 4,
+        llm_concurrency: int = 2,
+        vector_concurrency: int = 1,
+        existence_batch_size: int = 200,
+        progress_interval_seconds: float = 10.0,
+    ):
+        self.db = db
+        self.gardener = gardener
+        self.vector_service = vector_service
+        self.concurrency = max(1, concurrency)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.vector_concurrency = max(1, vector_concurrency)
+        self.existence_batch_size = max(1, existence_batch_size)
+        self.progress_interval = progress_interval_seconds
+
+    # ------------------------------------------------------------------
+    # Checkpoint SQL
+    # ------------------------------------------------------------------
+
+    async def load_checkpoint(self, run_id: str) -> Set[str]:
+        """Threads déjà terminés (consolidés ou ignorés) pour ce run."""
+        placeholders = ",".join("?" for _ in _FINAL_STATUSES)
+        rows = await self.db.fetch_all(
+            f"SELECT thread_id FROM {CHECKPOINT_TABLE} "
+            f"WHERE run_id = ? AND status IN ({placeholders})",
+            (run_id, *_FINAL_STATUSES),
+        )
+        return {row["thread_id"] for row in rows}
+
+    async def reset_checkpoint(self, run_id: str) -> None:
+        await self.db.execute(
+            f"DELETE FROM {CHECKPOINT_TABLE} WHERE run_id = ?", (run_id,), commit=True
+        )
+
+    async def _record(
+        self,
+        run_id: str,
+        thread_ids: Iterable[str],
+        status: str,
+        new_items: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [(run_id, tid, status, new_items, error, now) for tid in thread_ids]
+        if not rows:
+            return
+        await self.db.executemany(
+            f"""
+            INSERT INTO {CHECKPOINT_TABLE} (run_id, thread_id, status, new_items, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(run_id, thread_id) DO UPDATE SET
+                status = excluded.status,
+                new_items = excluded.new_items,
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            """,
+            rows,
+            commit=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Sélection des threads
+    # ------------------------------------------------------------------
+
+    async def fetch_archived_threads(
+        self,
+        *,
+        user_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        force: bool = False,
+    ) -> List[Dict[str, Any]]:
+        query = """
+            SELECT id, session_id, user_id, type, title, archived_at, consolidated_at, message_count
+            FROM threads
+            WHERE archived = 1
+        """
+        params: List[Any] = []
+        if not force:
+            query += " AND consolidated_at IS NULL"
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += " ORDER BY archived_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = await self.db.fetch_all(query, tuple(params))
+        return [dict(row) for row in rows]
+
+    def _knowledge_collection(self) -> Any:
+        collection = getattr(self.gardener, "knowledge_collection", None)
+        if collection is None and self.vector_service is not None:
+            collection = self.vector_service.get_or_create_collection(
+                "emergence_knowledge"
+            )
+        return collection
+
+    @staticmethod
+    def _flatten(values: Any) -> List[Any]:
+        if isinstance(values, list) and values and isinstance(values[0], list):
+            return [item for sub in values for item in sub]
+        return list(values or [])
+
+    async def find_already_consolidated(self, thread_ids: List[str]) -> Set[str]:
+        """
+        Threads ayant déjà des vecteurs en LTM (consolidés avant le marquage SQL).
+        Une requête ``$in`` par page d'IDs ; sonde unitaire si le backend ne
+        supporte pas ``$in`` (Qdrant).
+        """
+        if not thread_ids:
+            return set()
+        collection = self._knowledge_collection()
+        if collection is None:
+            return set()
+
+        found: Set[str] = set()
+        backend = getattr(self.vector_service, "backend", None)
+        for start in range(0, len(thread_ids), self.existence_batch_size):
+            page = thread_ids[start : start + self.existence_batch_size]
+            if backend != "qdrant":
+                try:
+                    result = await asyncio.to_thread(
+                        collection.get,
+                        where={"thread_id": {"$in": page}},
+                        include=["metadatas"],
+                    )
+                    for meta in self._flatten(result.get("metadatas")):
+                        tid = (meta or {}).get("thread_id")
+                        if tid:
+                            found.add(tid)
+                    continue
+                except Exception as exc:
+                    logger.debug(
+                        "[ArchiveConsolidation] Bulk existence probe failed (%s), fallback per-thread",
+                        exc,
+                    )
+            for tid in page:
+                try:
+                    result = await asyncio.to_thread(
+                        collection.get, where={"thread_id": tid}, limit=1
+                    )
+                    if self._flatten(result.get("ids")):
+                        found.add(tid)
+                except Exception as exc:
+                    logger.warning(f"Check consolidation failed for {tid}: {exc}")
+        return found
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _log_progress(self, stats: ConsolidationRunStats) -> None:
+        eta = stats.eta_seconds
+        logger.info(
+            "[ArchiveConsolidation] %d/%d traités (%d consolidés, %d ignorés, %d erreurs) "
+            "| %.1f threads/min | ETA %s",
+            stats.processed,
+            stats.total - stats.resumed - stats.already_consolidated,
+            stats.consolidated,
+            stats.skipped,
+            len(stats.errors),
+            stats.throughput_per_minute,
+            f"{eta:.0f}s" if eta is not None else "n/a",
+        )
+
+    async def _process_thread(
+        self, run_id: str, thread: Dict[str, Any], stats: ConsolidationRunStats
+    ) -> None:
+        thread_id = thread["id"]
+        try:
+            result = await self.gardener._tend_single_thread(
+                thread_id=thread_id,
+                session_id=thread.get("session_id"),
+                user_id=thread.get("user_id"),
+                run_decay=False,
+            )
+        except Exception as exc:
+            result = {"status": "error", "message": str(exc), "new_concepts": 0}
+
+        if result.get("status") != "success":
+            message = str(result.get("message") or "unknown error")
+            stats.errors.append({"thread_id": thread_id, "error": message})
+            await self._record(run_id, [thread_id], "error", error=message)
+            logger.error(f"  -> ERREUR thread {thread_id[:8]}: {message}")
+            return
+
+        new_items = int(result.get("new_concepts", 0) or 0)
+        if new_items > 0:
+            stats.consolidated += 1
+            stats.total_concepts += new_items
+            await self._record(run_id, [thread_id], "consolidated", new_items)
+        else:
+            stats.skipped += 1
+            await self._record(run_id, [thread_id], "skipped")
+
+    async def run(
+        self,
+        *,
+        user_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        force: bool = False,
+        run_id: Optional[str] = None,
+        restart: bool = False,
+        threads: Optional[List[Dict[str, Any]]] = None,
+    ) -> ConsolidationRunStats:
+        """
+        Consolide les threads archivés du périmètre.
+
+        Args:
+            user_id: Filtrer par utilisateur (None = tous)
+            limit: Limite de threads à sélectionner
+            force: Reconsolider même si déjà fait (SQL + LTM)
+            run_id: Identifiant de checkpoint (défaut: dérivé du périmètre,
+                neuf pour un run forcé ; le passer pour reprendre un run forcé)
+            restart: Ignorer (et effacer) le checkpoint existant
+            threads: Liste pré-sélectionnée (sinon ``fetch_archived_threads``)
+        """
+        run_id = run_id or default_run_id(user_id, force)
+        logger.info(f"[ArchiveConsolidation] Run {run_id}")
+        if restart:
+            await self.reset_checkpoint(run_id)
+
+        if threads is None:
+            threads = await self.fetch_archived_threads(
+                user_id=user_id, limit=limit, force=force
+            )
+        threads = [t for t in threads if t.get("id")]
+        stats = ConsolidationRunStats(run_id=run_id, total=len(threads))
+
+        done = await self.load_checkpoint(run_id)
+        todo = [t for t in threads if t["id"] not in done]
+        stats.resumed = len(threads) - len(todo)
+        if stats.resumed:
+            logger.info(
+                f"[ArchiveConsolidation] Reprise du run {run_id}: {stats.resumed} thread(s) déjà traités"
+            )
+
+        if not force and todo:
+            existing = await self.find_already_consolidated([t["id"] for t in todo])
+            if existing:
+                stats.already_consolidated = len(existing)
+                await self._record(run_id, existing, "skipped")
+                todo = [t for t in todo if t["id"] not in existing]
+
+        logger.info(
+            f"[ArchiveConsolidation] {len(todo)} thread(s) à consolider "
+            f"(concurrence={self.concurrency}, llm={self.llm_concurrency}, vector={self.vector_concurrency})"
+        )
+        if not todo:
+            return stats
+
+        previous_gates = (
+            getattr(self.gardener, "llm_gate", None),
+            getattr(self.gardener, "vector_gate", None),
+        )
+        self.gardener.llm_gate = asyncio.Semaphore(self.llm_concurrency)
+        self.gardener.vector_gate = asyncio.Semaphore(self.vector_concurrency)
+
+        queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        for thread in todo:
+            queue.put_nowait(thread)
+
+        async def _worker() -> None:
+            while True:
+                try:
+                    thread = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._process_thread(run_id, thread, stats)
+
+        async def _reporter() -> None:
+            while True:
+                await asyncio.sleep(self.progress_interval)
+                self._log_progress(stats)
+
+        reporter = asyncio.create_task(_reporter())
+        try:
+            await asyncio.gather(
+                *(_worker() for _ in range(min(self.concurrency, len(todo))))
+            )
+        finally:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+            self.gardener.llm_gate, self.gardener.vector_gate = previous_gates
+
+        if stats.consolidated:
+            try:
+                await self.gardener._decay_knowledge()
+            except Exception as exc:
+                logger.warning(f"[ArchiveConsolidation] Decay final échoué: {exc}")
+
+        self._log_progress(stats)
+        return stats
@@ -11,6 +11,7 @@ from datetime import datetime, timezone
 from backend.core.database.manager import DatabaseManager
 from backend.features.memory.vector_service import VectorService
 from backend.features.memory.concept_recall_metrics import concept_recall_metrics
+from backend.features.memory.generations import bump_generations
 
 logger = logging.getLogger(__name__)
 
@@ -178,6 +179,7 @@ class ConceptRecallTracker:
         """
         now_iso = datetime.now(timezone.utc).isoformat()
         update_start = time.time()
+        updated_metas: List[Dict[str, Any]] = []
 
         for recall in recalls:
             vector_id = recall.get("vector_id")
@@ -222,6 +224,7 @@ class ConceptRecallTracker:
                     ids=[vector_id],
                     metadatas=[updated_meta],
                 )
+                updated_metas.append(updated_meta)
 
                 logger.debug(
                     f"[ConceptRecallTracker] Concept {vector_id} mis à jour : {mention_count} mentions"
@@ -237,6 +240,8 @@ class ConceptRecallTracker:
                     f"[ConceptRecallTracker] Impossible de mettre à jour {vector_id} : {e}"
                 )
 
+        await bump_generations(updated_metas)
+
         # Record metadata update duration
         update_duration = time.time() - update_start
         self.metrics.record_metadata_update(update_duration)
@@ -16,6 +16,8 @@ import logging
 from typing import Optional
 from prometheus_client import Counter, Histogram, Gauge, Info
 
+from backend.core.event_store import record_event
+
 logger = logging.getLogger(__name__)
 
 # Feature flag: opt-in metrics collection
@@ -221,6 +223,13 @@ class ConceptRecallMetrics:
             return
 
         VECTOR_SEARCH_DURATION.observe(duration_seconds)
+        record_event(
+            "retrieval",
+            collection="concepts",
+            query_type="concept_recall",
+            status="success",
+            duration_ms=duration_seconds * 1000,
+        )
 
     def record_metadata_update(self, duration_seconds: float) -> None:
         """Record metadata update duration."""
@@ -1,27 +1,38 @@
 # src/backend/features/memory/gardener.py
-# V2.10.0 - Fix timestamps réels pour consolidation threads archivés
-#           + Vitality calibration + monitoring metrics
+# V2.11.0 - Dédup sémantique des concepts à l'écriture
+#           (V2.10.0 : timestamps réels threads archivés + vitality calibration)
 import logging
 import os
 import asyncio
+import contextlib
 import uuid
 import json
 import re
 import hashlib
 import unicodedata
-from typing import Any, Dict, List, Optional, Tuple, cast
+from typing import Any, AsyncContextManager, Dict, List, Optional, Tuple, cast
 from datetime import datetime, timezone
 
 from math import isfinite, floor, ceil
 from statistics import mean, median
 
+from prometheus_client import Counter
+
+from backend.core.cache.llm_response_cache import cached_call_site
 from backend.core.database.manager import DatabaseManager
 from backend.features.memory.vector_service import VectorService
 from backend.features.memory.analyzer import MemoryAnalyzer
+from backend.features.memory.generations import bump_generations
 from backend.core.database import queries  # ← NEW: accès threads/messages
 
 logger = logging.getLogger(__name__)
 
+CONCEPT_DEDUP_TOTAL = Counter(
+    "memory_concept_dedup_total",
+    "Concepts traités par la dédup à l'écriture (merged_* = croissance évitée)",
+    ["outcome"],
+)
+
 _CODE_PATTERNS = [
     r"(?:pour\s+(?P<agent>anima|neo|nexus)\s*,?\s*)?(?:mon|ton|ce|le)\s*mot[-\s]?code\s*(?:est|:|=)\s*[«\"'’]?\s*(?P<value>[A-Za-zÀ-ÖØ-öø-ÿ0-9_\- ]+?)\s*[»\"'’]?(?:[.!?,;:\)]|$)",
     r"(?:mon|ton|ce|le)\s*mot[-\s]?code\s*pour\s+(?P<agent>anima|neo|nexus)\s*(?:est|:|=)\s*[«\"'’]?\s*(?P<value>[A-Za-zÀ-ÖØ-öø-ÿ0-9_\- ]+?)\s*[»\"'’]?(?:[.!?,;:\)]|$)",
@@ -72,6 +83,9 @@ _IMPERATIVE_STARTERS = (
 _MAX_PREFERENCE_CANDIDATES = 8
 _PREFERENCE_CONFIDENCE_EVENT_THRESHOLD = 0.6
 
+# Version du prompt de classification (clé du cache persistant des réponses LLM)
+_PREFERENCE_CLASSIFICATION_VERSION = "v1"
+
 _PREFERENCE_CLASSIFICATION_SCHEMA = {
     "type": "object",
     "properties": {
@@ -295,6 +309,15 @@ def _percentile(values: List[float], percentile: float) -> float:
     return lower_val + (upper_val - lower_val) * (k - lower)
 
 
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if not norm_a or not norm_b:
+        return 0.0
+    return float(dot / (norm_a * norm_b))
+
+
 def _agent_norm(name: Optional[str]) -> Optional[str]:
     if not name:
         return None
@@ -347,11 +370,12 @@ def _preference_record_id(
 
 class MemoryGardener:
     """
-    MEMORY GARDENER V2.10.0
+    MEMORY GARDENER V2.11.0
     - Mode historique (sessions) inchangé.
     - Consolidation ciblée d'un THREAD via thread_id (analyse no-persist + vectorisation).
     - Calibration vitalité configurable + métriques monitoring.
     - FIX: Timestamps réels (first_mentioned_at/last_mentioned_at) depuis messages pour threads archivés.
+    - Dédup sémantique des concepts à l'écriture (fusion mention_count / thread_ids_json).
     """
 
     KNOWLEDGE_COLLECTION_NAME = "emergence_knowledge"
@@ -365,6 +389,7 @@ class MemoryGardener:
     MAX_VITALITY = 1.0
     RECALL_THRESHOLD = 0.3
     USAGE_BOOST = 0.25
+    CONCEPT_DEDUP_THRESHOLD = 0.92
 
     def __init__(
         self,
@@ -418,6 +443,20 @@ class MemoryGardener:
             "MEMORY_USAGE_BOOST", self.USAGE_BOOST, min_value=0.0, max_value=1.0
         )
 
+        # Dédup sémantique des concepts à l'écriture (similarité cosinus, 0 = désactivée)
+        self.concept_dedup_threshold = self._load_numeric_env(
+            "MEMORY_CONCEPT_DEDUP_THRESHOLD",
+            self.CONCEPT_DEDUP_THRESHOLD,
+            min_value=0.0,
+            max_value=1.0,
+        )
+        # Croissance évitée = merged_existing + merged_in_batch
+        self.concept_dedup_stats: Dict[str, int] = {
+            "merged_existing": 0,
+            "merged_in_batch": 0,
+            "inserted": 0,
+        }
+
         self.knowledge_collection = self.vector_service.get_or_create_collection(
             self.KNOWLEDGE_COLLECTION_NAME
         )
@@ -425,8 +464,13 @@ class MemoryGardener:
             self.PREFERENCE_COLLECTION_NAME
         )
 
+        # Throttles optionnels (consolidation en lot, cf. archive_consolidation) :
+        # appels LLM et écritures vectorielles limités indépendamment.
+        self.llm_gate: Optional[asyncio.Semaphore] = None
+        self.vector_gate: Optional[asyncio.Semaphore] = None
+
         logger.info(
-            "MemoryGardener V2.10.0 configured (base_decay=%.3f | stale=%dd | archive=%dd | min_v=%.2f | max_v=%.2f)",
+            "MemoryGardener V2.11.0 configured (base_decay=%.3f | stale=%dd | archive=%dd | min_v=%.2f | max_v=%.2f)",
             self.base_decay,
             self.stale_threshold_days,
             self.archive_threshold_days,
@@ -434,6 +478,15 @@ class MemoryGardener:
             self.max_vitality,
         )
 
+    @staticmethod
+    def _throttle(gate: Optional[asyncio.Semaphore]) -> AsyncContextManager[Any]:
+        return gate if gate is not None else contextlib.nullcontext()
+
+    async def _add_vectors(self, collection: Any, payload: List[Dict[str, Any]]) -> None:
+        async with self._throttle(self.vector_gate):
+            await asyncio.to_thread(self.vector_service.add_items, collection, payload)
+        await bump_generations(item.get("metadata") for item in payload)
+
     def _load_numeric_env(
         self,
         env_name: str,
@@ -725,7 +778,14 @@ class MemoryGardener:
         session_id: Optional[str] = None,
         agent_id: Optional[str] = None,
         user_id: Optional[str] = None,
+        run_decay: bool = True,
     ) -> Dict[str, Any]:
+        """
+        Consolide un thread en LTM.
+
+        ``run_decay=False`` permet aux traitements en lot de n'exécuter la passe
+        de décroissance qu'une fois à la fin, au lieu d'une fois par thread.
+        """
         tid = (thread_id or "").strip()
         if not tid:
             return {
@@ -805,11 +865,12 @@ class MemoryGardener:
             facts = self._extract_facts_from_history(history)
 
             # Analyse sémantique sans persistance en table sessions
-            analysis = (
-                await self.analyzer.analyze_history(session_id=sid, history=history)
-                if history
-                else {}
-            )
+            analysis: Dict[str, Any] = {}
+            if history:
+                async with self._throttle(self.llm_gate):
+                    analysis = await self.analyzer.analyze_history(
+                        session_id=sid, history=history
+                    )
             concepts = (
                 self._parse_concepts(analysis.get("concepts")) if analysis else []
             )
@@ -875,7 +936,8 @@ class MemoryGardener:
                 new_items_count += len(all_concepts)
                 added_any = True
 
-            await self._decay_knowledge()
+            if run_decay:
+                await self._decay_knowledge()
 
             # Mark thread as consolidated in database
             if added_any:
@@ -1135,11 +1197,16 @@ class MemoryGardener:
         prompt = "\n".join(prompt_lines)
         result: Dict[str, Any] = {}
         try:
-            result = await chat_service.get_structured_llm_response(
-                agent_id="anima",
-                prompt=prompt,
-                json_schema=_PREFERENCE_CLASSIFICATION_SCHEMA,
-            )
+            async with self._throttle(self.llm_gate):
+                with cached_call_site(
+                    "preference_classification",
+                    version=_PREFERENCE_CLASSIFICATION_VERSION,
+                ):
+                    result = await chat_service.get_structured_llm_response(
+                        agent_id="anima",
+                        prompt=prompt,
+                        json_schema=_PREFERENCE_CLASSIFICATION_SCHEMA,
+                    )
         except Exception as exc:
             logger.warning(
                 f"[MemoryGardener] Classification préférences (anima) échouée : {exc}",
@@ -1147,11 +1214,16 @@ class MemoryGardener:
             )
         if not result:
             try:
-                result = await chat_service.get_structured_llm_response(
-                    agent_id="nexus",
-                    prompt=prompt,
-                    json_schema=_PREFERENCE_CLASSIFICATION_SCHEMA,
-                )
+                async with self._throttle(self.llm_gate):
+                    with cached_call_site(
+                        "preference_classification",
+                        version=_PREFERENCE_CLASSIFICATION_VERSION,
+                    ):
+                        result = await chat_service.get_structured_llm_response(
+                            agent_id="nexus",
+                            prompt=prompt,
+                            json_schema=_PREFERENCE_CLASSIFICATION_SCHEMA,
+                        )
             except Exception as exc:
                 logger.error(
                     f"[MemoryGardener] Classification préférences fallback échouée : {exc}",
@@ -1352,11 +1424,7 @@ class MemoryGardener:
                 inserted += 1
         if vector_items:
             try:
-                await asyncio.to_thread(
-                    self.vector_service.add_items,
-                    self.preference_collection,
-                    vector_items,
-                )
+                await self._add_vectors(self.preference_collection, vector_items)
                 logger.info(f"{len(vector_items)} préférences/intentions vectorisées.")
             except Exception as exc:
                 logger.error(
@@ -1783,9 +1851,15 @@ class MemoryGardener:
             )
         if payload:
             try:
-                await asyncio.to_thread(
-                    self.vector_service.add_items, self.knowledge_collection, payload
+                payload = await self._dedup_concepts(payload, user_id, agent_id)
+            except Exception as exc:
+                # La dédup est une optimisation : en cas d'échec on insère tel quel
+                logger.warning(
+                    f"[Gardener] Dédup concepts indisponible, insertion directe: {exc}"
                 )
+        if payload:
+            try:
+                await self._add_vectors(self.knowledge_collection, payload)
                 logger.info(
                     f"{len(payload)} concepts vectorisés avec métadonnées enrichies."
                 )
@@ -1796,6 +1870,133 @@ class MemoryGardener:
                 )
                 raise
 
+    @staticmethod
+    def _merge_concept_metadata(
+        existing: Dict[str, Any], incoming: Dict[str, Any], max_vitality: float
+    ) -> Dict[str, Any]:
+        """Fusionne une nouvelle mention dans les métadonnées d'un concept existant."""
+        merged = dict(existing)
+        merged["mention_count"] = int(existing.get("mention_count", 1) or 1) + int(
+            incoming.get("mention_count", 1) or 1
+        )
+        try:
+            thread_ids = json.loads(existing.get("thread_ids_json") or "[]")
+        except (TypeError, ValueError):
+            thread_ids = []
+        try:
+            incoming_threads = json.loads(incoming.get("thread_ids_json") or "[]")
+        except (TypeError, ValueError):
+            incoming_threads = []
+        for tid in incoming_threads:
+            if tid and tid not in thread_ids:
+                thread_ids.append(tid)
+        merged["thread_ids_json"] = json.dumps(thread_ids)
+        merged["last_mentioned_at"] = max(
+            str(existing.get("last_mentioned_at") or ""),
+            str(incoming.get("last_mentioned_at") or ""),
+        )
+        merged["last_access_at"] = incoming.get("last_access_at") or merged.get(
+            "last_access_at"
+        )
+        # Concept re-mentionné = de nouveau pertinent
+        merged["vitality"] = max_vitality
+        return merged
+
+    async def _dedup_concepts(
+        self,
+        payload: List[Dict[str, Any]],
+        user_id: Optional[str],
+        agent_id: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        Dédup sémantique à l'écriture.
+
+        Embeddings calculés en lot, une seule recherche du plus proche voisin
+        pour tout le lot (scope user [+ agent]) : au-delà du seuil, la mention
+        est fusionnée dans le vecteur existant (mention_count, thread_ids_json)
+        au lieu d'être insérée. Les doublons internes au lot sont aussi fusionnés.
+        Retourne les items restant à insérer (avec embedding pré-calculé).
+        """
+        threshold = self.concept_dedup_threshold
+        if threshold <= 0 or not user_id or not payload:
+            return payload
+
+        texts = [item["text"] for item in payload]
+        embeddings = await asyncio.to_thread(self.vector_service.embed_texts, texts)
+        clauses: List[Dict[str, Any]] = [{"user_id": user_id}, {"type": "concept"}]
+        normalized_agent = self._normalize_agent_id(agent_id)
+        if normalized_agent:
+            clauses.append({"agent_id": normalized_agent})
+        if not isinstance(embeddings, list) or len(embeddings) != len(payload):
+            return payload
+        neighbors = await asyncio.to_thread(
+            self.vector_service.nearest_neighbors,
+            self.knowledge_collection,
+            embeddings,
+            n_results=1,
+            where_filter={"$and": clauses},
+        )
+        if not isinstance(neighbors, list) or len(neighbors) != len(payload):
+            return payload
+
+        merges: Dict[str, Dict[str, Any]] = {}
+        to_insert: List[Tuple[Dict[str, Any], List[float]]] = []
+        merged_in_batch = 0
+        for item, embedding, hits in zip(payload, embeddings, neighbors):
+            best = hits[0] if hits else None
+            distance = best.get("distance") if best else None
+            if (
+                best is not None
+                and distance is not None
+                and 1.0 - float(distance) >= threshold
+            ):
+                target_id = best["id"]
+                base = merges.get(target_id) or dict(best.get("metadata") or {})
+                merges[target_id] = self._merge_concept_metadata(
+                    base, item["metadata"], self.max_vitality
+                )
+                continue
+
+            duplicate = next(
+                (
+                    pending
+                    for pending, pending_emb in to_insert
+                    if _cosine(embedding, pending_emb) >= threshold
+                ),
+                None,
+            )
+            if duplicate is not None:
+                duplicate["metadata"] = self._merge_concept_metadata(
+                    duplicate["metadata"], item["metadata"], self.max_vitality
+                )
+                merged_in_batch += 1
+                continue
+            item["embedding"] = embedding
+            to_insert.append((item, embedding))
+
+        if merges:
+            async with self._throttle(self.vector_gate):
+                await asyncio.to_thread(
+                    self.vector_service.update_metadatas,
+                    self.knowledge_collection,
+                    list(merges.keys()),
+                    list(merges.values()),
+                )
+            await bump_generations(merges.values())
+        merged_existing = len(payload) - len(to_insert) - merged_in_batch
+        self.concept_dedup_stats["merged_existing"] += merged_existing
+        self.concept_dedup_stats["merged_in_batch"] += merged_in_batch
+        self.concept_dedup_stats["inserted"] += len(to_insert)
+        CONCEPT_DEDUP_TOTAL.labels(outcome="merged_existing").inc(merged_existing)
+        CONCEPT_DEDUP_TOTAL.labels(outcome="merged_in_batch").inc(merged_in_batch)
+        CONCEPT_DEDUP_TOTAL.labels(outcome="inserted").inc(len(to_insert))
+        if len(to_insert) < len(payload):
+            logger.info(
+                f"[Gardener] Dédup concepts: {len(payload) - len(to_insert)}/{len(payload)} "
+                f"fusionnés (seuil={threshold:.2f})"
+            )
+        return [item for item, _ in to_insert]
+
     async def _vectorize_facts(
         self,
         facts: List[Dict[str, Any]],
@@ -1845,9 +2046,7 @@ class MemoryGardener:
             )
         if payload:
             try:
-                await asyncio.to_thread(
-                    self.vector_service.add_items, self.knowledge_collection, payload
-                )
+                await self._add_vectors(self.knowledge_collection, payload)
                 logger.info(f"{len(payload)} faits vectorisés et plantés.")
             except Exception as exc:
                 logger.error(
@@ -1951,6 +2150,7 @@ class MemoryGardener:
         updates_ids: List[str] = []
         updates_meta: List[Dict[str, Any]] = []
         delete_ids: List[str] = []
+        deleted_metas: List[Dict[str, Any]] = []
         vitality_values: List[float] = []
         new_vitality_values: List[float] = []
         age_days_values: List[float] = []
@@ -2022,6 +2222,7 @@ class MemoryGardener:
 
             if new_vitality <= self.min_vitality:
                 delete_ids.append(vec_id)
+                deleted_metas.append(meta)
                 continue
 
             updated_meta = dict(meta)
@@ -2043,6 +2244,7 @@ class MemoryGardener:
         if delete_ids:
             try:
                 self.knowledge_collection.delete(ids=delete_ids)
+                await bump_generations(deleted_metas)
             except Exception as e:
                 logger.warning(
                     f"[decay] delete expired items failed: {e}", exc_info=True
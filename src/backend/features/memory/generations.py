@@ -0,0 +1,179 @@
+"""
+Compteurs de génération mémoire par (utilisateur, agent).
+
+Chaque écriture de connaissance (concepts, faits, préférences) incrémente le
+compteur ; les caches mémoire (mémoire consolidée, préférences actives)
+intègrent la génération courante dans leur clé. Une écriture rend donc
+immédiatement obsolètes les entrées existantes, sans TTL court.
+
+Les compteurs sont partagés via Redis (``INCR``) quand il est configuré, pour
+que toutes les instances voient la même génération ; sinon ils restent
+locaux au process.
+
+Les chemins d'écriture passent par ``bump_generation`` / ``bump_generations``
+(jamais d'exception : un bump raté ne doit pas faire échouer l'écriture).
+
+Usage:
+    await bump_generation(user_id, agent_id)     # après écriture
+    await bump_generations(metadatas)            # après écriture d'items
+    generation = await get_generation_tracker().get(user_id)  # avant lecture cache
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compteur agrégé « tous agents » : incrémenté à chaque écriture, utilisé par
+# les caches dont la clé ne dépend que de l'utilisateur
+ALL_AGENTS = "*"
+
+KEY_PREFIX = "memory:gen:"
+# Durée de vie d'un compteur Redis (rafraîchie à chaque bump) : largement
+# au-dessus de tout TTL de cache, pour qu'une remise à zéro ne puisse pas
+# ressusciter une entrée encore en cache
+KEY_TTL_SECONDS = 30 * 24 * 3600
+REDIS_RETRY_SECONDS = 30.0
+
+
+class MemoryGenerationTracker:
+    """Compteurs de génération (utilisateur, agent), locaux ou partagés via Redis."""
+
+    def __init__(self, redis_manager: Optional[Any] = None):
+        self.redis_manager = redis_manager
+        self._local: Dict[str, int] = {}
+        self._redis_retry_at = 0.0
+
+    @staticmethod
+    def _key(user_id: str, agent_id: Optional[str] = None) -> str:
+        agent = (agent_id or ALL_AGENTS).strip().lower() or ALL_AGENTS
+        return f"{user_id}:{agent}"
+
+    def current(self, user_id: str, agent_id: Optional[str] = None) -> int:
+        """Dernière génération connue localement (sans aller-retour réseau)."""
+        return self._local.get(self._key(user_id, agent_id), 0)
+
+    async def get(self, user_id: str, agent_id: Optional[str] = None) -> int:
+        """Génération courante (Redis si disponible, sinon compteur local)."""
+        key = self._key(user_id, agent_id)
+        redis_manager = await self._redis()
+        if redis_manager is not None:
+            raw = await redis_manager.get(f"{KEY_PREFIX}{key}")
+            try:
+                value = int(raw) if raw is not None else 0
+            except (TypeError, ValueError):
+                value = 0
+            self._local[key] = value
+            return value
+        return self._local.get(key, 0)
+
+    async def bump(self, user_id: str, agent_id: Optional[str] = None) -> int:
+        """
+        Incrémente la génération de (user, agent) et la génération « tous agents ».
+
+        Returns:
+            Nouvelle génération « tous agents » de l'utilisateur
+        """
+        keys = [self._key(user_id, ALL_AGENTS)]
+        if agent_id and self._key(user_id, agent_id) != keys[0]:
+            keys.append(self._key(user_id, agent_id))
+
+        redis_manager = await self._redis()
+        if redis_manager is not None:
+            try:
+                pipe = redis_manager.pipeline(transaction=True)
+                for key in keys:
+                    pipe.incr(f"{KEY_PREFIX}{key}")
+                    pipe.expire(f"{KEY_PREFIX}{key}", KEY_TTL_SECONDS)
+                results = await pipe.execute()
+                for key, value in zip(keys, results[::2]):
+                    self._local[key] = int(value)
+                return self._local[keys[0]]
+            except Exception as e:
+                logger.warning(f"[MemoryGenerations] Redis INCR failed: {e}")
+
+        for key in keys:
+            self._local[key] = self._local.get(key, 0) + 1
+        return self._local[keys[0]]
+
+    async def bump_many(self, pairs: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Incrémente un ensemble de couples (user, agent) distincts."""
+        for user_id, agent_id in sorted(
+            {(u, a or "") for u, a in pairs if u}, key=lambda p: (p[0], p[1])
+        ):
+            await self.bump(user_id, agent_id or None)
+
+    async def _redis(self) -> Optional[Any]:
+        if self.redis_manager is None:
+            return None
+        if self.redis_manager.is_connected():
+            return self.redis_manager
+        now = time.monotonic()
+        if now < self._redis_retry_at:
+            return None
+        try:
+            await self.redis_manager.connect()
+            return self.redis_manager
+        except Exception as e:
+            self._redis_retry_at = now + REDIS_RETRY_SECONDS
+            logger.warning(
+                f"[MemoryGenerations] Redis indisponible ({e}), compteurs locaux"
+            )
+            return None
+
+
+_tracker: Optional[MemoryGenerationTracker] = None
+
+
+def get_generation_tracker() -> MemoryGenerationTracker:
+    """
+    Instance globale du tracker.
+
+    Env: MEMORY_GENERATION_REDIS_URL (défaut: RAG_CACHE_REDIS_URL) pour
+    partager les compteurs entre instances.
+    """
+    global _tracker
+    if _tracker is None:
+        redis_url = os.getenv("MEMORY_GENERATION_REDIS_URL") or os.getenv(
+            "RAG_CACHE_REDIS_URL"
+        )
+        redis_manager = None
+        if redis_url:
+            try:
+                from backend.core.cache.redis_manager import RedisManager
+
+                redis_manager = RedisManager(url=redis_url)
+            except ImportError:
+                logger.warning(
+                    "[MemoryGenerations] Redis configuré mais package redis absent, compteurs locaux"
+                )
+        _tracker = MemoryGenerationTracker(redis_manager=redis_manager)
+    return _tracker
+
+
+async def bump_generation(user_id: Optional[str], agent_id: Optional[str] = None) -> None:
+    """Bump après une écriture de connaissance de ``user_id`` (erreurs journalisées)."""
+    if not user_id:
+        return
+    try:
+        await get_generation_tracker().bump(user_id, agent_id)
+    except Exception as exc:
+        logger.warning(f"[MemoryGenerations] Bump génération impossible: {exc}")
+
+
+async def bump_generations(metadatas: Iterable[Any]) -> None:
+    """Bump des (user, agent) portés par les métadonnées d'items écrits ou supprimés."""
+    pairs: List[Tuple[str, Optional[str]]] = [
+        (
+            str(meta["user_id"]),
+            str(meta["agent_id"]) if meta.get("agent_id") else None,
+        )
+        for meta in metadatas
+        if isinstance(meta, dict) and meta.get("user_id")
+    ]
+    try:
+        await get_generation_tracker().bump_many(pairs)
+    except Exception as exc:
+        logger.warning(f"[MemoryGenerations] Bump génération impossible: {exc}")
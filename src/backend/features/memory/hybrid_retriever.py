@@ -17,7 +17,7 @@ Architecture :
 
 import logging
 import re
-from typing import Any, Dict, List, Optional, Tuple, cast
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
 from collections import Counter
 import math
 
@@ -304,6 +304,7 @@ def hybrid_query(
     bm25_k1: float = 1.5,
     bm25_b: float = 0.75,
     collection_name: str = "default",
+    query_embedding: Optional[Sequence[float]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Effectue une recherche hybride BM25 + vectorielle sur une collection.
@@ -319,16 +320,21 @@ def hybrid_query(
         bm25_k1: Paramètre k1 de BM25
         bm25_b: Paramètre b de BM25
         collection_name: Nom de la collection (pour métriques)
+        query_embedding: Embedding de la requête déjà calculé (optionnel)
 
     Returns:
         Liste de résultats hybrides avec scores détaillés
     """
     # 1. Recherche vectorielle classique
+    query_kwargs: Dict[str, Any] = {}
+    if query_embedding is not None:
+        query_kwargs["query_embedding"] = query_embedding
     vector_results = vector_service.query(
         collection=collection,
         query_text=query_text,
         n_results=n_results * 2,  # Récupérer plus de résultats pour le reranking
         where_filter=where_filter,
+        **query_kwargs,
     )
 
     if not vector_results:
@@ -14,6 +14,11 @@ class IncrementalConsolidator:
     - Déclencher une micro-consolidation tous les N messages (10-15)
     - Traiter seulement les derniers messages (fenêtre glissante)
     - Extraire concepts de façon incrémentale et les merger avec STM existante
+
+    Si le MemoryAnalyzer tient des checkpoints (``incremental_enabled``), tout
+    l'historique lui est transmis : il n'envoie au LLM que les messages
+    postérieurs au dernier checkpoint et renvoie un résumé courant, qui
+    remplace le résumé STM au lieu d'y être concaténé.
     """
 
     def __init__(
@@ -96,10 +101,17 @@ class IncrementalConsolidator:
         3. Update session metadata with enriched summary
         """
         try:
-            # 1. Get sliding window (last 10 messages)
-            window = (
-                recent_messages[-10:] if len(recent_messages) > 10 else recent_messages
-            )
+            # 1. Get sliding window (last 10 messages), ou tout l'historique si
+            # l'analyseur ne traite que le delta depuis son checkpoint
+            checkpointed = getattr(self.memory_analyzer, "incremental_enabled", None) is True
+            if checkpointed:
+                window = recent_messages
+            else:
+                window = (
+                    recent_messages[-10:]
+                    if len(recent_messages) > 10
+                    else recent_messages
+                )
 
             if len(window) < 3:  # Not enough messages to consolidate
                 return {"status": "skipped", "reason": "insufficient_messages"}
@@ -137,8 +149,11 @@ class IncrementalConsolidator:
                             :10
                         ]
 
-                        # Enrich summary (append recent context)
-                        if existing_summary:
+                        # Enrich summary (append recent context) — le résumé
+                        # d'un analyseur checkpointé couvre déjà tout le thread
+                        if checkpointed and new_summary:
+                            enriched_summary = new_summary
+                        elif existing_summary:
                             enriched_summary = (
                                 f"{existing_summary} [Récent: {new_summary}]"
                             )
@@ -5,8 +5,14 @@ from typing import Dict, Any, List, Optional, cast
 from datetime import datetime, timezone, timedelta
 import re
 
+from backend.core.timer_wheel import TimerHandle, get_timer_wheel
+from backend.features.memory.generations import bump_generation
+
 logger = logging.getLogger(__name__)
 
+# Avance du rappel programmé sur l'échéance d'une intention
+REMINDER_LEAD = timedelta(days=1)
+
 
 class IntentTracker:
     """
@@ -15,7 +21,8 @@ class IntentTracker:
     Fonctionnalités:
     - Parser timeframes (demain, cette semaine, dans 3 jours)
     - Suivre intentions avec échéances
-    - Envoyer rappels proactifs via WebSocket
+    - Envoyer rappels proactifs via WebSocket (à la demande ou programmés
+      par timer sur l'échéance, sans balayage périodique)
     - Purger intentions ignorées (3+ rappels)
     """
 
@@ -63,6 +70,9 @@ class IntentTracker:
         self.reminder_counts: Dict[str, int] = {}  # Track reminder count per intent
         # 🔒 Lock pour accès concurrent aux compteurs (Bug #3 fix)
         self._reminder_lock = asyncio.Lock()
+        # Rappels programmés : intent_id -> timer (roue partagée)
+        self._timer_wheel = get_timer_wheel()
+        self._reminder_timers: Dict[str, TimerHandle] = {}
 
     def parse_timeframe(self, text: str) -> Optional[datetime]:
         """
@@ -110,6 +120,9 @@ class IntentTracker:
         """Supprime compteur de rappel de manière thread-safe"""
         async with self._reminder_lock:
             self.reminder_counts.pop(intent_id, None)
+        timer = self._reminder_timers.pop(intent_id, None)
+        if timer is not None:
+            timer.cancel()
 
     async def check_expiring_intents(
         self, user_id: str, lookahead_days: int = 7
@@ -205,44 +218,95 @@ class IntentTracker:
         sent_count = 0
 
         for intent in expiring:
-            # Skip if already reminded 3+ times
-            if intent["reminder_count"] >= 3:
-                logger.info(
-                    f"Intent {intent['id']} ignoré après 3 rappels, purge recommandée"
-                )
-                continue
+            if await self._send_reminder(session_id, intent):
+                sent_count += 1
 
-            # Send reminder via WebSocket
-            if self.connection_manager:
-                try:
-                    await self.connection_manager.send_personal_message(
-                        {
-                            "type": "ws:memory_reminder",
-                            "payload": {
-                                "intent_id": intent["id"],
-                                "text": intent["text"],
-                                "deadline": intent["deadline"],
-                                "days_remaining": intent["days_remaining"],
-                                "reminder_count": intent["reminder_count"] + 1,
-                            },
-                        },
-                        session_id,
-                    )
+        return sent_count
 
-                    # Increment reminder count (thread-safe)
-                    await self.increment_reminder(intent["id"])
-                    sent_count += 1
+    async def _send_reminder(self, session_id: str, intent: Dict[str, Any]) -> bool:
+        """Envoie le rappel d'une intention ; False si ignorée ou non envoyée."""
+        # Skip if already reminded 3+ times
+        if intent["reminder_count"] >= 3:
+            logger.info(
+                f"Intent {intent['id']} ignoré après 3 rappels, purge recommandée"
+            )
+            return False
 
-                    logger.info(
-                        f"Rappel intention envoyé: {intent['id']} "
-                        f"(J-{intent['days_remaining']}, "
-                        f"rappel #{intent['reminder_count'] + 1})"
-                    )
+        if not self.connection_manager:
+            return False
 
-                except Exception as e:
-                    logger.warning(f"Erreur envoi rappel intention {intent['id']}: {e}")
+        # Send reminder via WebSocket
+        try:
+            await self.connection_manager.send_personal_message(
+                {
+                    "type": "ws:memory_reminder",
+                    "payload": {
+                        "intent_id": intent["id"],
+                        "text": intent["text"],
+                        "deadline": intent["deadline"],
+                        "days_remaining": intent["days_remaining"],
+                        "reminder_count": intent["reminder_count"] + 1,
+                    },
+                },
+                session_id,
+            )
+
+            # Increment reminder count (thread-safe)
+            await self.increment_reminder(intent["id"])
+
+            logger.info(
+                f"Rappel intention envoyé: {intent['id']} "
+                f"(J-{intent['days_remaining']}, "
+                f"rappel #{intent['reminder_count'] + 1})"
+            )
+            return True
 
-        return sent_count
+        except Exception as e:
+            logger.warning(f"Erreur envoi rappel intention {intent['id']}: {e}")
+            return False
+
+    async def schedule_intent_reminders(
+        self, session_id: str, user_id: str, lookahead_days: int = 7
+    ) -> int:
+        """
+        Programme un rappel par intention expirante (échéance - REMINDER_LEAD).
+
+        Remplace le sondage périodique de ``send_intent_reminders`` : chaque
+        intention a son timer, réarmé si elle est reprogrammée et annulé par
+        ``mark_intent_completed`` / la purge.
+
+        Returns:
+            Number of reminders scheduled
+        """
+        expiring = await self.check_expiring_intents(user_id, lookahead_days)
+        now = datetime.now(timezone.utc)
+        scheduled = 0
+
+        for intent in expiring:
+            intent_id = intent["id"]
+            if not intent_id or intent["reminder_count"] >= 3:
+                continue
+            remind_at = datetime.fromisoformat(intent["deadline"]) - REMINDER_LEAD
+            delay = max(0.0, (remind_at - now).total_seconds())
+            previous = self._reminder_timers.pop(intent_id, None)
+            if previous is not None:
+                previous.cancel()
+            self._reminder_timers[intent_id] = self._timer_wheel.schedule(
+                delay, self._on_reminder_due, session_id, intent
+            )
+            scheduled += 1
+
+        return scheduled
+
+    async def _on_reminder_due(self, session_id: str, intent: Dict[str, Any]) -> None:
+        self._reminder_timers.pop(intent["id"], None)
+        deadline = datetime.fromisoformat(intent["deadline"])
+        intent = {
+            **intent,
+            "days_remaining": (deadline - datetime.now(timezone.utc)).days,
+            "reminder_count": await self.get_reminder_count(intent["id"]),
+        }
+        await self._send_reminder(session_id, intent)
 
     async def purge_ignored_intents(self, user_id: str) -> int:
         """
@@ -278,6 +342,8 @@ class IntentTracker:
                 except Exception as e:
                     logger.warning(f"Erreur purge intention {intent_id}: {e}")
 
+            if purged:
+                await bump_generation(user_id)
             return purged
 
         except Exception as e:
@@ -0,0 +1,407 @@
+"""
+Stockage persistant des tâches mémoire (MemoryTaskQueue).
+
+Deux implémentations avec la même interface synchrone :
+
+- ``SQLiteJobStore`` : table ``memory_jobs`` dans un fichier SQLite dédié,
+  partageable entre plusieurs processus (transactions ``BEGIN IMMEDIATE``) ;
+- ``InMemoryJobStore`` : équivalent local, non durable (tests, dev).
+
+Sémantique commune :
+- voies de priorité (``interactive`` avant ``bulk``) ;
+- coalescence : une tâche encore en attente avec la même ``dedup_key``
+  (type + thread/session) absorbe la nouvelle au lieu d'en créer une ;
+- bail (lease) avec délai de visibilité : une tâche prise par un worker
+  mort redevient disponible à l'expiration du bail ;
+- ``nack`` : re-planification avec délai, puis statut ``failed`` après
+  ``max_attempts`` tentatives ;
+- ``extend``/``ack``/``nack`` ne s'appliquent qu'au détenteur du bail : un
+  worker dont le bail a expiré et a été repris le voit (``extend``/``ack``
+  renvoient False, ``nack`` renvoie ``"lease_lost"`` au lieu de
+  ``"retried"``/``"failed"``) sans toucher au travail du nouveau détenteur.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+LANES: Dict[str, int] = {"interactive": 0, "bulk": 1}
+
+
+@dataclass
+class JobRecord:
+    """Tâche prise en charge par un worker."""
+
+    id: str
+    task_type: str
+    payload: Dict[str, Any]
+    lane: str
+    attempts: int
+    enqueued_at: float
+    worker: str
+
+
+def merge_payloads(current: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fusion lors d'une coalescence : le plus récent gagne, ``force`` est cumulatif."""
+    merged = {**current, **new}
+    if current.get("force") or new.get("force"):
+        merged["force"] = True
+    return merged
+
+
+def _stronger_lane(a: str, b: str) -> str:
+    return a if LANES.get(a, 99) <= LANES.get(b, 99) else b
+
+
+class InMemoryJobStore:
+    """Stand-in local (non durable) de ``SQLiteJobStore``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def enqueue(
+        self,
+        task_type: str,
+        payload: Dict[str, Any],
+        lane: str,
+        dedup_key: Optional[str] = None,
+    ) -> Tuple[str, bool]:
+        now = time.time()
+        with self._lock:
+            if dedup_key:
+                for job in self._jobs.values():
+                    if job["dedup_key"] == dedup_key and job["status"] == "queued":
+                        job["payload"] = merge_payloads(job["payload"], payload)
+                        job["lane"] = _stronger_lane(job["lane"], lane)
+                        return job["id"], True
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "task_type": task_type,
+                "payload": dict(payload),
+                "lane": lane,
+                "dedup_key": dedup_key,
+                "status": "queued",
+                "attempts": 0,
+                "enqueued_at": now,
+                "available_at": now,
+                "lease_expires_at": 0.0,
+                "leased_by": None,
+                "last_error": None,
+            }
+            return job_id, False
+
+    def lease(
+        self, lanes: Sequence[str], worker: str, visibility_timeout: float
+    ) -> Optional[JobRecord]:
+        now = time.time()
+        with self._lock:
+            for lane in lanes:
+                candidates = [
+                    job
+                    for job in self._jobs.values()
+                    if job["lane"] == lane
+                    and (
+                        (job["status"] == "queued" and job["available_at"] <= now)
+                        or (job["status"] == "leased" and job["lease_expires_at"] <= now)
+                    )
+                ]
+                if not candidates:
+                    continue
+                job = min(candidates, key=lambda j: j["enqueued_at"])
+                job["status"] = "leased"
+                job["attempts"] += 1
+                job["lease_expires_at"] = now + visibility_timeout
+                job["leased_by"] = worker
+                return JobRecord(
+                    id=job["id"],
+                    task_type=job["task_type"],
+                    payload=dict(job["payload"]),
+                    lane=job["lane"],
+                    attempts=job["attempts"],
+                    enqueued_at=job["enqueued_at"],
+                    worker=worker,
+                )
+        return None
+
+    def _held(self, job_id: str, worker: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job and job["status"] == "leased" and job["leased_by"] == worker:
+            return job
+        return None
+
+    def extend(self, job_id: str, worker: str, visibility_timeout: float) -> bool:
+        with self._lock:
+            job = self._held(job_id, worker)
+            if job is None:
+                return False
+            job["lease_expires_at"] = time.time() + visibility_timeout
+            return True
+
+    def ack(self, job_id: str, worker: str) -> bool:
+        with self._lock:
+            if self._held(job_id, worker) is None:
+                return False
+            del self._jobs[job_id]
+            return True
+
+    def nack(
+        self,
+        job_id: str,
+        worker: str,
+        error: str,
+        retry_delay: float,
+        max_attempts: int,
+    ) -> str:
+        with self._lock:
+            job = self._held(job_id, worker)
+            if job is None:
+                return "lease_lost"
+            job["last_error"] = error[:500]
+            if job["attempts"] >= max_attempts:
+                job["status"] = "failed"
+                return "failed"
+            job["status"] = "queued"
+            job["available_at"] = time.time() + retry_delay
+            return "retried"
+
+    def depth(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {lane: 0 for lane in LANES}
+            for job in self._jobs.values():
+                if job["status"] in ("queued", "leased"):
+                    counts[job["lane"]] = counts.get(job["lane"], 0) + 1
+            return counts
+
+    def failed(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {k: job[k] for k in ("id", "task_type", "payload", "attempts", "last_error")}
+                for job in self._jobs.values()
+                if job["status"] == "failed"
+            ][:limit]
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteJobStore:
+    """File persistante SQLite, partageable entre processus."""
+
+    def __init__(self, path: str, *, busy_timeout_ms: int = 5000) -> None:
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS memory_jobs (
+                id TEXT PRIMARY KEY,
+                task_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                lane TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                dedup_key TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                lease_expires_at REAL NOT NULL DEFAULT 0,
+                leased_by TEXT,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_memory_jobs_ready
+                ON memory_jobs(status, priority, enqueued_at);
+            CREATE INDEX IF NOT EXISTS idx_memory_jobs_dedup
+                ON memory_jobs(dedup_key, status);
+            """
+        )
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+    def enqueue(
+        self,
+        task_type: str,
+        payload: Dict[str, Any],
+        lane: str,
+        dedup_key: Optional[str] = None,
+    ) -> Tuple[str, bool]:
+        now = time.time()
+        with self._lock, self._transaction() as conn:
+            if dedup_key:
+                row = conn.execute(
+                    "SELECT id, payload, lane FROM memory_jobs "
+                    "WHERE dedup_key = ? AND status = 'queued' LIMIT 1",
+                    (dedup_key,),
+                ).fetchone()
+                if row is not None:
+                    merged = merge_payloads(json.loads(row[1]), payload)
+                    new_lane = _stronger_lane(row[2], lane)
+                    conn.execute(
+                        "UPDATE memory_jobs SET payload = ?, lane = ?, priority = ? "
+                        "WHERE id = ?",
+                        (json.dumps(merged), new_lane, LANES.get(new_lane, 99), row[0]),
+                    )
+                    return row[0], True
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO memory_jobs (id, task_type, payload, lane, priority, "
+                "dedup_key, enqueued_at, available_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    task_type,
+                    json.dumps(payload),
+                    lane,
+                    LANES.get(lane, 99),
+                    dedup_key,
+                    now,
+                    now,
+                ),
+            )
+            return job_id, False
+
+    def lease(
+        self, lanes: Sequence[str], worker: str, visibility_timeout: float
+    ) -> Optional[JobRecord]:
+        now = time.time()
+        with self._lock, self._transaction() as conn:
+            for lane in lanes:
+                row = conn.execute(
+                    "SELECT id, task_type, payload, attempts, enqueued_at "
+                    "FROM memory_jobs WHERE lane = ? AND ("
+                    "(status = 'queued' AND available_at <= ?) OR "
+                    "(status = 'leased' AND lease_expires_at <= ?)) "
+                    "ORDER BY enqueued_at LIMIT 1",
+                    (lane, now, now),
+                ).fetchone()
+                if row is None:
+                    continue
+                conn.execute(
+                    "UPDATE memory_jobs SET status = 'leased', attempts = attempts + 1, "
+                    "lease_expires_at = ?, leased_by = ? WHERE id = ?",
+                    (now + visibility_timeout, worker, row[0]),
+                )
+                return JobRecord(
+                    id=row[0],
+                    task_type=row[1],
+                    payload=json.loads(row[2]),
+                    lane=lane,
+                    attempts=int(row[3]) + 1,
+                    enqueued_at=float(row[4]),
+                    worker=worker,
+                )
+        return None
+
+    def extend(self, job_id: str, worker: str, visibility_timeout: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE memory_jobs SET lease_expires_at = ? "
+                "WHERE id = ? AND status = 'leased' AND leased_by = ?",
+                (time.time() + visibility_timeout, job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def ack(self, job_id: str, worker: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM memory_jobs "
+                "WHERE id = ? AND status = 'leased' AND leased_by = ?",
+                (job_id, worker),
+            )
+        return cursor.rowcount > 0
+
+    def nack(
+        self,
+        job_id: str,
+        worker: str,
+        error: str,
+        retry_delay: float,
+        max_attempts: int,
+    ) -> str:
+        with self._lock, self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM memory_jobs "
+                "WHERE id = ? AND status = 'leased' AND leased_by = ?",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return "lease_lost"
+            if int(row[0]) >= max_attempts:
+                conn.execute(
+                    "UPDATE memory_jobs SET status = 'failed', last_error = ? "
+                    "WHERE id = ?",
+                    (error[:500], job_id),
+                )
+                return "failed"
+            conn.execute(
+                "UPDATE memory_jobs SET status = 'queued', available_at = ?, "
+                "last_error = ? WHERE id = ?",
+                (time.time() + retry_delay, error[:500], job_id),
+            )
+            return "retried"
+
+    def depth(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT lane, COUNT(*) FROM memory_jobs "
+                "WHERE status IN ('queued', 'leased') GROUP BY lane"
+            ).fetchall()
+        counts = {lane: 0 for lane in LANES}
+        counts.update({row[0]: int(row[1]) for row in rows})
+        return counts
+
+    def failed(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, task_type, payload, attempts, last_error FROM memory_jobs "
+                "WHERE status = 'failed' ORDER BY enqueued_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "task_type": row[1],
+                "payload": json.loads(row[2]),
+                "attempts": row[3],
+                "last_error": row[4],
+            }
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _ImmediateTransaction:
+    """``BEGIN IMMEDIATE`` : verrou d'écriture pris dès le début (multi-processus)."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -15,6 +15,8 @@ import logging
 from typing import List, Dict, Any, Optional, cast
 from datetime import datetime, timedelta, timezone
 
+from backend.features.memory.generations import bump_generations
+
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
@@ -178,6 +180,7 @@ class MemoryGarbageCollector:
         # Archiver candidats
         archived_count = 0
         error_count = 0
+        archived_metas: List[Dict[str, Any]] = []
 
         for candidate in candidates:
             try:
@@ -189,9 +192,11 @@ class MemoryGarbageCollector:
                     embedding=candidate["embedding"],
                 )
                 archived_count += 1
+                archived_metas.append(candidate["metadata"])
             except Exception as e:
                 logger.warning(f"[MemoryGC] Erreur archivage {candidate['id']}: {e}")
                 error_count += 1
+        await bump_generations(archived_metas)
 
         # Métriques Prometheus
         if PROMETHEUS_AVAILABLE:
@@ -408,6 +413,7 @@ class MemoryGarbageCollector:
 
             # Supprimer des archives
             archived_collection.delete(ids=[entry_id])
+            await bump_generations([restored_meta])
 
             logger.info(
                 f"[MemoryGC] {entry_id} restauré : "
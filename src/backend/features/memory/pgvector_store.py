@@ -0,0 +1,641 @@
+"""
+Backend vectoriel PostgreSQL + pgvector pour VectorService.
+
+Chaque collection est stockée dans sa propre table ``vec_<nom>``
+(id, embedding vector(dim), document, metadata jsonb) avec un index ANN
+cosinus (HNSW par défaut, IVFFlat en option) et un index GIN sur les
+métadonnées. Un registre ``vector_collections`` garde le nom logique, la
+table et la dimension.
+
+``PgVectorCollection`` expose la même API que ``chromadb.Collection``
+(upsert/add/query/get/update/delete/count, formats de retour identiques) :
+les chemins Chroma de VectorService fonctionnent sans branche dédiée. Les
+filtres ``where`` (syntaxe Chroma : égalité, $eq/$ne/$gt/$gte/$lt/$lte/
+$in/$nin, $and/$or) sont traduits en prédicats SQL paramétrés.
+
+VectorService est synchrone alors qu'asyncpg est lié à une boucle
+asyncio : le pool du ``PostgreSQLManager`` vit sur une boucle dédiée
+(thread démon) et les appels synchrones y sont soumis. Le code async qui
+veut partager ce pool passe par ``PgVectorStore.run_async``.
+
+Les vecteurs transitent en texte (``'[x,y,...]'::vector``) : pas besoin du
+paquet Python pgvector, seulement de l'extension côté serveur.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_TABLE = "vector_collections"
+TABLE_PREFIX = "vec_"
+MAX_IDENTIFIER_LENGTH = 63  # limite PostgreSQL (NAMEDATALEN - 1)
+
+_COMPARISON_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_IDENTIFIER_RE = re.compile(r"[^a-z0-9_]")
+
+
+def table_name_for(collection_name: str) -> str:
+    """Nom de table (identifiant sûr) d'une collection."""
+    base = _IDENTIFIER_RE.sub("_", collection_name.lower())
+    table = f"{TABLE_PREFIX}{base}"
+    if base != collection_name or len(table) > MAX_IDENTIFIER_LENGTH:
+        digest = hashlib.sha1(collection_name.encode("utf-8")).hexdigest()[:8]
+        table = f"{table[: MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+    return table
+
+
+def vector_literal(values: Sequence[float]) -> str:
+    return "[" + ",".join(repr(float(v)) for v in values) + "]"
+
+
+def parse_vector(text: Optional[str]) -> Optional[List[float]]:
+    if not text:
+        return None
+    return [float(v) for v in text.strip("[]").split(",") if v]
+
+
+def _placeholder(params: List[Any], value: Any) -> str:
+    params.append(value)
+    return f"${len(params)}"
+
+
+def _predicate(key: str, op: str, operand: Any, params: List[Any]) -> str:
+    if op == "$eq":
+        return f"metadata @> {_placeholder(params, json.dumps({key: operand}))}::jsonb"
+    if op == "$ne":
+        return (
+            f"NOT (metadata @> {_placeholder(params, json.dumps({key: operand}))}::jsonb)"
+        )
+    if op in _COMPARISON_OPERATORS:
+        sql_op = _COMPARISON_OPERATORS[op]
+        k = _placeholder(params, key)
+        if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+            v = _placeholder(params, float(operand))
+            return (
+                f"(CASE WHEN jsonb_typeof(metadata -> {k}::text) = 'number' "
+                f"THEN (metadata ->> {k}::text)::float8 END) {sql_op} {v}::float8"
+            )
+        v = _placeholder(params, str(operand))
+        return f"(metadata ->> {k}::text) {sql_op} {v}::text"
+    if op in ("$in", "$nin"):
+        if not isinstance(operand, (list, tuple)):
+            raise ValueError(f"{op} attend une liste (clé '{key}')")
+        k = _placeholder(params, key)
+        values = _placeholder(params, json.dumps(list(operand)))
+        membership = (
+            f"(metadata -> {k}::text) IN "
+            f"(SELECT jsonb_array_elements({values}::jsonb))"
+        )
+        if op == "$in":
+            return membership
+        return f"NOT COALESCE({membership}, FALSE)"
+    raise ValueError(f"Opérateur where non supporté: {op}")
+
+
+def where_to_sql(where: Optional[Dict[str, Any]], params: List[Any]) -> str:
+    """
+    Traduit un filtre ``where`` Chroma en prédicat SQL sur ``metadata``.
+
+    Les valeurs (et les clés) sont ajoutées à ``params`` et référencées par
+    ``$n`` : aucune donnée n'est interpolée dans le SQL.
+    """
+    if not where:
+        return "TRUE"
+    clauses: List[str] = []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(child, params) for child in value or [] if child]
+            if not parts:
+                continue
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(parts) + ")")
+        elif str(key).startswith("$"):
+            raise ValueError(f"Opérateur where non supporté: {key}")
+        elif isinstance(value, dict):
+            for op, operand in value.items():
+                clauses.append(_predicate(key, op, operand, params))
+        else:
+            clauses.append(_predicate(key, "$eq", value, params))
+    if not clauses:
+        return "TRUE"
+    return clauses[0] if len(clauses) == 1 else "(" + " AND ".join(clauses) + ")"
+
+
+class PgVectorStore:
+    """Accès pgvector partagé (pool asyncpg sur une boucle dédiée)."""
+
+    def __init__(
+        self,
+        manager: Any,
+        *,
+        index_type: Optional[str] = None,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construction: Optional[int] = None,
+        hnsw_ef_search: Optional[int] = None,
+        ivfflat_lists: Optional[int] = None,
+    ) -> None:
+        self.manager = manager
+        self.index_type = (
+            index_type or os.getenv("PGVECTOR_INDEX_TYPE") or "hnsw"
+        ).strip().lower()
+        if self.index_type not in ("hnsw", "ivfflat"):
+            raise ValueError(f"PGVECTOR_INDEX_TYPE invalide: {self.index_type}")
+        self.hnsw_m = hnsw_m or int(os.getenv("PGVECTOR_HNSW_M", "16"))
+        self.hnsw_ef_construction = hnsw_ef_construction or int(
+            os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+        )
+        self.hnsw_ef_search = hnsw_ef_search or int(
+            os.getenv("PGVECTOR_HNSW_EF_SEARCH", "0")
+        )
+        self.ivfflat_lists = ivfflat_lists or int(
+            os.getenv("PGVECTOR_IVFFLAT_LISTS", "100")
+        )
+        self._tables: Dict[str, Tuple[str, Optional[int]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._schema_ready = False
+
+    # ---------- Boucle dédiée ----------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="pgvector-loop", daemon=True
+                )
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro: Any, timeout: Optional[float] = None) -> Any:
+        """Exécute une coroutine sur la boucle du pool et attend son résultat."""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("PgVectorStore.run appelé depuis la boucle du pool")
+        if timeout is None:
+            timeout = float(getattr(self.manager, "command_timeout", 60.0)) + 5.0
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    async def run_async(self, coro: Any) -> Any:
+        """Variante async : partage le pool depuis une autre boucle."""
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def close(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            self.run(self.manager.disconnect(), timeout=10.0)
+        except Exception as e:
+            logger.warning(f"[pgvector] Fermeture du pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+
+    # ---------- Schéma ----------
+    def connect(self) -> None:
+        """Ouvre le pool, active l'extension et crée le registre des collections."""
+        self.run(self._ensure_schema())
+
+    async def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        await self.manager.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        await self.manager.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} (
+                name TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL UNIQUE,
+                dimension INTEGER,
+                index_type TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+        for row in await self.manager.fetch_all(
+            f"SELECT name, table_name, dimension FROM {REGISTRY_TABLE}"
+        ):
+            self._tables[row["name"]] = (row["table_name"], row["dimension"])
+        self._schema_ready = True
+
+    async def _load_entry(self, name: str) -> Optional[Tuple[str, Optional[int]]]:
+        """Relit l'entrée du registre (collection créée ou typée par un autre process)."""
+        row = await self.manager.fetch_one(
+            f"SELECT table_name, dimension FROM {REGISTRY_TABLE} WHERE name = $1", name
+        )
+        if row is None:
+            return None
+        self._tables[name] = (row["table_name"], row["dimension"])
+        return self._tables[name]
+
+    async def _register(self, name: str) -> str:
+        await self._ensure_schema()
+        entry = self._tables.get(name)
+        if entry is None or entry[1] is None:
+            entry = await self._load_entry(name)
+        if entry is not None:
+            return entry[0]
+        table = table_name_for(name)
+        await self.manager.execute(
+            f"INSERT INTO {REGISTRY_TABLE} (name, table_name, index_type) "
+            "VALUES ($1, $2, $3) ON CONFLICT (name) DO NOTHING",
+            name,
+            table,
+            self.index_type,
+        )
+        entry = await self._load_entry(name)
+        if entry is None:
+            self._tables[name] = entry = (table, None)
+        return entry[0]
+
+    async def _ensure_table(self, name: str, dimension: int) -> str:
+        """Crée la table et ses index à la première écriture (dimension connue)."""
+        table = await self._register(name)
+        known_dim = self._tables[name][1]
+        if known_dim is not None:
+            if known_dim != dimension:
+                raise ValueError(
+                    f"Dimension {dimension} incompatible avec la collection '{name}' ({known_dim})"
+                )
+            return table
+        if self.index_type == "hnsw":
+            index_sql = (
+                f"USING hnsw (embedding vector_cosine_ops) "
+                f"WITH (m = {int(self.hnsw_m)}, ef_construction = {int(self.hnsw_ef_construction)})"
+            )
+        else:
+            index_sql = (
+                f"USING ivfflat (embedding vector_cosine_ops) "
+                f"WITH (lists = {int(self.ivfflat_lists)})"
+            )
+        async with self.manager.transaction() as conn:
+            await conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS "{table}" (
+                    id TEXT PRIMARY KEY,
+                    seq BIGSERIAL,
+                    embedding vector({int(dimension)}) NOT NULL,
+                    document TEXT,
+                    metadata JSONB NOT NULL DEFAULT '{{}}'::jsonb
+                )
+                """
+            )
+            await conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_ann" ON "{table}" {index_sql}'
+            )
+            await conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_meta" ON "{table}" '
+                "USING gin (metadata jsonb_path_ops)"
+            )
+            await conn.execute(
+                f"UPDATE {REGISTRY_TABLE} SET dimension = $1 WHERE name = $2",
+                int(dimension),
+                name,
+            )
+        self._tables[name] = (table, int(dimension))
+        logger.info(
+            f"[pgvector] Table '{table}' créée (dim={dimension}, index={self.index_type})"
+        )
+        return table
+
+    async def _table_if_exists(self, name: str) -> Optional[str]:
+        """Table de la collection si elle existe ; le registre est relu en cas d'absence."""
+        entry = self._tables.get(name)
+        if entry is None or entry[1] is None:
+            entry = await self._load_entry(name)
+        if entry is None or entry[1] is None:
+            return None
+        return entry[0]
+
+    # ---------- Opérations ----------
+    async def upsert(
+        self,
+        name: str,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[Optional[str]],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        if not ids:
+            return
+        table = await self._ensure_table(name, len(embeddings[0]))
+        conflict = (
+            "DO UPDATE SET embedding = EXCLUDED.embedding, "
+            "document = EXCLUDED.document, metadata = EXCLUDED.metadata"
+            if overwrite
+            else "DO NOTHING"
+        )
+        rows = [
+            (
+                str(item_id),
+                vector_literal(embeddings[i]),
+                documents[i] if i < len(documents) else None,
+                json.dumps(
+                    {
+                        k: v
+                        for k, v in ((metadatas[i] if i < len(metadatas) else None) or {}).items()
+                        if v is not None
+                    },
+                    ensure_ascii=False,
+                ),
+            )
+            for i, item_id in enumerate(ids)
+        ]
+        await self.manager.execute_many(
+            f'INSERT INTO "{table}" (id, embedding, document, metadata) '
+            "VALUES ($1, $2::text::vector, $3, $4::jsonb) "
+            f"ON CONFLICT (id) {conflict}",
+            rows,
+        )
+
+    async def query(
+        self,
+        name: str,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        include_embeddings: bool,
+    ) -> List[List[Dict[str, Any]]]:
+        await self._ensure_schema()
+        table = await self._table_if_exists(name)
+        if table is None:
+            return [[] for _ in query_embeddings]
+        results: List[List[Dict[str, Any]]] = []
+        async with self.manager.transaction() as conn:
+            if self.index_type == "hnsw" and self.hnsw_ef_search > 0:
+                await conn.execute(
+                    f"SET LOCAL hnsw.ef_search = {int(self.hnsw_ef_search)}"
+                )
+            for embedding in query_embeddings:
+                params: List[Any] = [vector_literal(embedding)]
+                predicate = where_to_sql(where, params)
+                limit = _placeholder(params, max(1, int(n_results)))
+                extra = ", embedding::text AS embedding" if include_embeddings else ""
+                rows = await conn.fetch(
+                    f"SELECT id, document, metadata::text AS metadata, "
+                    f"embedding <=> $1::text::vector AS distance{extra} "
+                    f'FROM "{table}" WHERE {predicate} '
+                    f"ORDER BY embedding <=> $1::text::vector LIMIT {limit}",
+                    *params,
+                )
+                results.append([self._row(r, include_embeddings) for r in rows])
+        return results
+
+    async def get(
+        self,
+        name: str,
+        *,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include_embeddings: bool = False,
+    ) -> List[Dict[str, Any]]:
+        await self._ensure_schema()
+        table = await self._table_if_exists(name)
+        if table is None:
+            return []
+        params: List[Any] = []
+        predicate = where_to_sql(where, params)
+        if ids is not None:
+            predicate += f" AND id = ANY({_placeholder(params, [str(i) for i in ids])}::text[])"
+        sql = (
+            "SELECT id, document, metadata::text AS metadata"
+            + (", embedding::text AS embedding" if include_embeddings else "")
+            + f' FROM "{table}" WHERE {predicate} ORDER BY seq'
+        )
+        if limit is not None:
+            sql += f" LIMIT {_placeholder(params, int(limit))}"
+        if offset:
+            sql += f" OFFSET {_placeholder(params, int(offset))}"
+        rows = await self.manager.fetch_all(sql, *params)
+        return [self._row(r, include_embeddings) for r in rows]
+
+    async def update(
+        self,
+        name: str,
+        ids: Sequence[str],
+        *,
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        documents: Optional[Sequence[Optional[str]]] = None,
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """Mise à jour partielle (métadonnées fusionnées, clé à None = suppression)."""
+        await self._ensure_schema()
+        table = await self._table_if_exists(name)
+        if table is None or not ids:
+            return
+        rows = []
+        for i, item_id in enumerate(ids):
+            meta = (metadatas[i] if metadatas and i < len(metadatas) else None) or {}
+            rows.append(
+                (
+                    str(item_id),
+                    json.dumps(
+                        {k: v for k, v in meta.items() if v is not None},
+                        ensure_ascii=False,
+                    ),
+                    [k for k, v in meta.items() if v is None],
+                    documents[i] if documents and i < len(documents) else None,
+                    vector_literal(embeddings[i])
+                    if embeddings and i < len(embeddings)
+                    else None,
+                )
+            )
+        await self.manager.execute_many(
+            f'UPDATE "{table}" SET '
+            "metadata = (metadata || $2::jsonb) - $3::text[], "
+            "document = COALESCE($4, document), "
+            "embedding = COALESCE($5::text::vector, embedding) "
+            "WHERE id = $1",
+            rows,
+        )
+
+    async def delete(
+        self,
+        name: str,
+        *,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        await self._ensure_schema()
+        table = await self._table_if_exists(name)
+        if table is None:
+            return
+        params: List[Any] = []
+        predicate = where_to_sql(where, params)
+        if ids is not None:
+            predicate += f" AND id = ANY({_placeholder(params, [str(i) for i in ids])}::text[])"
+        elif predicate == "TRUE":
+            raise ValueError("Suppression pgvector sans filtre refusée")
+        await self.manager.execute(f'DELETE FROM "{table}" WHERE {predicate}', *params)
+
+    async def count(self, name: str) -> int:
+        await self._ensure_schema()
+        table = await self._table_if_exists(name)
+        if table is None:
+            return 0
+        return int(await self.manager.fetch_val(f'SELECT count(*) FROM "{table}"'))
+
+    @staticmethod
+    def _row(row: Any, include_embeddings: bool) -> Dict[str, Any]:
+        data = dict(row)
+        metadata = data.get("metadata")
+        data["metadata"] = json.loads(metadata) if isinstance(metadata, str) else metadata
+        if include_embeddings:
+            data["embedding"] = parse_vector(data.get("embedding"))
+        return data
+
+
+class PgVectorCollection:
+    """Collection pgvector compatible avec l'API ``chromadb.Collection``."""
+
+    def __init__(self, store: PgVectorStore, name: str, embedding_function: Any = None):
+        self._store = store
+        self.name = name
+        self._embedding_function = embedding_function
+
+    def _embed(self, documents: Optional[Sequence[str]]) -> List[List[float]]:
+        if self._embedding_function is None or not documents:
+            raise ValueError("Embeddings requis (aucune fonction d'embedding)")
+        return [list(v) for v in self._embedding_function(list(documents))]
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        ids = list(ids)
+        embeddings = embeddings if embeddings is not None else self._embed(documents)
+        self._store.run(
+            self._store.upsert(
+                self.name, ids, embeddings, list(documents or []), list(metadatas or [])
+            )
+        )
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        ids = list(ids)
+        embeddings = embeddings if embeddings is not None else self._embed(documents)
+        self._store.run(
+            self._store.upsert(
+                self.name,
+                ids,
+                embeddings,
+                list(documents or []),
+                list(metadatas or []),
+                overwrite=False,
+            )
+        )
+
+    def query(
+        self,
+        query_embeddings: Optional[Sequence[Sequence[float]]] = None,
+        query_texts: Optional[Sequence[str]] = None,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        include = list(include or ["documents", "metadatas", "distances"])
+        if query_embeddings is None:
+            query_embeddings = self._embed(query_texts)
+        rows = self._store.run(
+            self._store.query(
+                self.name,
+                [list(e) for e in query_embeddings],
+                n_results,
+                where,
+                "embeddings" in include,
+            )
+        )
+        result: Dict[str, Any] = {"ids": [[r["id"] for r in hits] for hits in rows]}
+        for key, column in (
+            ("documents", "document"),
+            ("metadatas", "metadata"),
+            ("distances", "distance"),
+            ("embeddings", "embedding"),
+        ):
+            result[key] = (
+                [[r[column] for r in hits] for hits in rows] if key in include else None
+            )
+        return result
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        include = list(include or ["documents", "metadatas"])
+        rows = self._store.run(
+            self._store.get(
+                self.name,
+                ids=list(ids) if ids is not None else None,
+                where=where,
+                limit=limit,
+                offset=offset,
+                include_embeddings="embeddings" in include,
+            )
+        )
+        result: Dict[str, Any] = {"ids": [r["id"] for r in rows]}
+        for key, column in (
+            ("documents", "document"),
+            ("metadatas", "metadata"),
+            ("embeddings", "embedding"),
+        ):
+            result[key] = [r[column] for r in rows] if key in include else None
+        return result
+
+    def update(
+        self,
+        ids: Sequence[str],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+        documents: Optional[Sequence[Optional[str]]] = None,
+    ) -> None:
+        self._store.run(
+            self._store.update(
+                self.name,
+                list(ids),
+                embeddings=embeddings,
+                documents=documents,
+                metadatas=metadatas,
+            )
+        )
+
+    def delete(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._store.run(
+            self._store.delete(
+                self.name, ids=list(ids) if ids is not None else None, where=where
+            )
+        )
+
+    def count(self) -> int:
+        return int(self._store.run(self._store.count(self.name)))
@@ -11,8 +11,13 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from backend.core.cache.llm_response_cache import cached_call_site
+
 logger = logging.getLogger(__name__)
 
+# Version du prompt d'extraction (clé du cache persistant des réponses LLM)
+EXTRACTION_PROMPT_VERSION = "v1"
+
 # ⚡ Métriques Prometheus (P1.3)
 try:
     from prometheus_client import Counter, Histogram
@@ -311,9 +316,12 @@ Réponds UNIQUEMENT en JSON valide :
                             "entities",
                         ],
                     }
-                    result = await self.llm.get_structured_llm_response(
-                        agent_id="neo_analysis", prompt=prompt, json_schema=schema
-                    )
+                    with cached_call_site(
+                        "preference_extraction", version=EXTRACTION_PROMPT_VERSION
+                    ):
+                        result = await self.llm.get_structured_llm_response(
+                            agent_id="neo_analysis", prompt=prompt, json_schema=schema
+                        )
                 else:
                     # Fallback : appel direct (mock ou autre client)
                     import json
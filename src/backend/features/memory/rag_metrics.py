@@ -14,9 +14,12 @@ Métriques exposées :
 """
 
 import logging
+import time
 from prometheus_client import Counter, Gauge, Histogram
 from typing import Any, Optional
 
+from backend.core.event_store import record_event
+
 logger = logging.getLogger(__name__)
 
 # ============================================================
@@ -116,6 +119,9 @@ class RAGMetricsTracker:
         self.query_type = query_type
         self.timer: Any = None
         self.status = "success"
+        self._started = 0.0
+        self._results: Optional[int] = None
+        self._avg_score: Optional[float] = None
 
     def __enter__(self):
         """Démarre le timer de durée"""
@@ -123,6 +129,7 @@ class RAGMetricsTracker:
             collection=self.collection, query_type=self.query_type
         ).time()
         self.timer.__enter__()
+        self._started = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -148,6 +155,17 @@ class RAGMetricsTracker:
         if self.timer:
             self.timer.__exit__(exc_type, exc_val, exc_tb)
 
+        # Magasin d'événements local (analyse sans Prometheus)
+        record_event(
+            "retrieval",
+            collection=self.collection,
+            query_type=self.query_type,
+            status=self.status,
+            duration_ms=(time.perf_counter() - self._started) * 1000,
+            results=self._results,
+            avg_score=self._avg_score,
+        )
+
     def record_results(
         self, results: list[dict[str, Any]], avg_score: Optional[float] = None
     ) -> None:
@@ -172,6 +190,8 @@ class RAGMetricsTracker:
             rag_avg_score.labels(
                 collection=self.collection, query_type=self.query_type
             ).set(avg_score)
+        self._results = len(results)
+        self._avg_score = avg_score
 
         # Scores composants pour requêtes hybrides
         if self.query_type == "hybrid" and results:
@@ -249,6 +269,15 @@ def track_hybrid_query(
             collection=collection, reason="below_threshold"
         ).inc(filtered_count)
 
+    record_event(
+        "retrieval",
+        collection=collection,
+        query_type="hybrid",
+        status="success",
+        results=len(results),
+        avg_score=avg_score,
+    )
+
     logger.debug(
         f"RAG metrics tracked: collection={collection}, "
         f"results={len(results)}, avg_score={avg_score:.3f if avg_score else 0}, "
@@ -6,10 +6,24 @@ import inspect
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Request, Body, Query
+from fastapi.responses import StreamingResponse
 
 from backend.features.memory.gardener import MemoryGardener
+from backend.features.memory.generations import bump_generation
+from backend.features.memory.transfer import (
+    ConceptImportError,
+    import_concepts_stream,
+    iter_concepts_export,
+)
 from backend.core.database import queries
 from backend.shared import dependencies as shared_dependencies
+from backend.shared.ndjson_stream import (
+    ZSTD_AVAILABLE,
+    NDJSONDecodeError,
+    decode_ndjson,
+    encode_ndjson,
+    media_type_for,
+)
 
 router = APIRouter(tags=["Memory & Knowledge"])
 logger = logging.getLogger(__name__)
@@ -214,6 +228,14 @@ async def _purge_stm(db_manager: Any, session_id: str) -> bool:
         return False
 
 
+async def _reset_analysis_checkpoint(container: Any, session_id: str) -> None:
+    """Oublie le checkpoint d'analyse incrémentale (la STM vient d'être purgée)."""
+    provider = getattr(container, "memory_analyzer", None)
+    analyzer = provider() if callable(provider) else None
+    if analyzer is not None:
+        await analyzer.reset_checkpoint(session_id)
+
+
 def _count_ids_from_get_result(got: dict[str, Any]) -> int:
     ids = got.get("ids") or []
     if not isinstance(ids, list):
@@ -569,7 +591,9 @@ async def clear_memory_delete(
         sid, (agent_id or "").strip().lower() or None, uid
     )
     stm_ok = await _purge_stm(container.db_manager(), sid)
+    await _reset_analysis_checkpoint(container, sid)
     n_before, n_deleted = _purge_ltm(container.vector_service(), where_filter)
+    await bump_generation(uid, (agent_id or "").strip().lower() or None)
     payload = {
         "status": "success",
         "cleared": {
@@ -620,7 +644,9 @@ async def clear_memory_post(
         sid, (agent_id or "").strip().lower() or None, uid
     )
     stm_ok = await _purge_stm(container.db_manager(), sid)
+    await _reset_analysis_checkpoint(container, sid)
     n_before, n_deleted = _purge_ltm(container.vector_service(), where_filter)
+    await bump_generation(uid, (agent_id or "").strip().lower() or None)
     payload = {
         "status": "success",
         "cleared": {
@@ -1342,6 +1368,7 @@ async def update_concept(
 
         # Update in ChromaDB
         collection.update(ids=[concept_id], metadatas=[updated_meta])
+        await bump_generation(user_id)
 
         return {
             "status": "success",
@@ -1392,6 +1419,7 @@ async def delete_concept(
 
         # Delete from ChromaDB
         collection.delete(ids=[concept_id])
+        await bump_generation(user_id)
 
         return {
             "status": "success",
@@ -1533,6 +1561,7 @@ async def merge_concepts(
 
         # Delete source concepts
         collection.delete(ids=source_ids)
+        await bump_generation(user_id)
 
         logger.info(
             f"[concepts/merge] Merged {len(source_ids)} concepts into {target_id} for user {user_id}"
@@ -1661,6 +1690,7 @@ async def split_concept(
 
         # Delete source concept
         collection.delete(ids=[source_id])
+        await bump_generation(user_id)
 
         logger.info(
             f"[concepts/split] Split concept {source_id} into {len(new_ids)} concepts for user {user_id}"
@@ -1731,6 +1761,7 @@ async def bulk_delete_concepts(
 
         # Delete all
         collection.delete(ids=concept_ids)
+        await bump_generation(user_id)
 
         logger.info(
             f"[concepts/bulk-delete] Deleted {len(concept_ids)} concepts for user {user_id}"
@@ -1821,6 +1852,7 @@ async def bulk_tag_concepts(
 
         # Update all concepts
         collection.update(ids=found_ids, metadatas=updated_metas)
+        await bump_generation(user_id)
 
         logger.info(
             f"[concepts/bulk-tag] Tagged {len(found_ids)} concepts for user {user_id}"
@@ -1978,6 +2010,7 @@ async def import_concepts(
 
             imported_count += 1
 
+        await bump_generation(user_id)
         logger.info(
             f"[concepts/import] Imported {imported_count} concepts for user {user_id}"
         )
@@ -1993,6 +2026,76 @@ async def import_concepts(
         raise HTTPException(status_code=500, detail=f"Failed to import concepts: {e}")
 
 
+@router.get(
+    "/concepts/export/stream",
+    summary="Streaming export of user concepts (NDJSON)",
+    description="Export all concepts as NDJSON (optionally zstd), paged from the vector store",
+)
+async def export_concepts_stream(
+    request: Request,
+    compress: bool = Query(False, description="Compression zstd"),
+) -> StreamingResponse:
+    """Export streamé des concepts (mémoire constante)."""
+    try:
+        user_id = await shared_dependencies.get_user_id(request)
+    except HTTPException:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if compress and not ZSTD_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Compression zstd indisponible")
+
+    container = _get_container(request)
+    vector_service = container.vector_service()
+    collection_name = os.getenv(_KNOWLEDGE_COLLECTION_ENV, _DEFAULT_KNOWLEDGE_NAME)
+    collection = vector_service.get_or_create_collection(collection_name)
+
+    records = iter_concepts_export(vector_service, collection, user_id=user_id)
+    extension = "ndjson.zst" if compress else "ndjson"
+    return StreamingResponse(
+        encode_ndjson(records, compress=compress),
+        media_type=media_type_for(compress),
+        headers={
+            "Content-Disposition": f'attachment; filename="concepts.{extension}"'
+        },
+    )
+
+
+@router.post(
+    "/concepts/import/stream",
+    response_model=dict[str, Any],
+    summary="Streaming import of concepts (NDJSON)",
+    description="Import an NDJSON concepts export (zstd auto-detected), batched upserts",
+)
+async def import_concepts_stream_endpoint(
+    request: Request,
+    mode: str = Query("merge", pattern="^(merge|replace)$"),
+) -> dict[str, Any]:
+    """Import streamé : corps brut NDJSON, vectorisation par lots."""
+    try:
+        user_id = await shared_dependencies.get_user_id(request)
+    except HTTPException:
+        raise HTTPException(status_code=401, detail="Authentication required")
+
+    container = _get_container(request)
+    vector_service = container.vector_service()
+    collection_name = os.getenv(_KNOWLEDGE_COLLECTION_ENV, _DEFAULT_KNOWLEDGE_NAME)
+    collection = vector_service.get_or_create_collection(collection_name)
+
+    try:
+        result: dict[str, Any] = await import_concepts_stream(
+            vector_service,
+            collection,
+            decode_ndjson(request.stream()),
+            user_id=user_id,
+            mode=mode,
+        )
+    except (ConceptImportError, NDJSONDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"[concepts/import/stream] Failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to import concepts: {e}")
+    return result
+
+
 @router.get(
     "/concepts/graph",
     response_model=dict[str, Any],
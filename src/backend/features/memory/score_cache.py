@@ -9,6 +9,7 @@
 # - Clé = hash(query_text + entry_id + last_used_at)
 # - Invalidation automatique si métadonnées changent
 # - Métriques Prometheus (hit rate, evictions)
+# - Expiration par timer (roue partagée) : pas de balayage des entrées
 #
 # Date création: 2025-10-21
 
@@ -17,6 +18,8 @@ import hashlib
 from typing import Dict, Any, Optional, cast
 from datetime import datetime, timedelta, timezone
 
+from backend.core.timer_wheel import get_timer_wheel
+
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
@@ -59,7 +62,7 @@ class ScoreCache:
     Cache LRU pour scores de mémoire pondérée.
 
     Fonctionnalités:
-    - Cache avec TTL (Time To Live)
+    - Cache avec TTL (Time To Live), expiré par timer + vérification à la lecture
     - Invalidation automatique
     - Métriques Prometheus
     - Thread-safe (via dict avec GIL Python)
@@ -78,6 +81,7 @@ class ScoreCache:
         self._cache: Dict[str, Dict[str, Any]] = {}
         # Map entry_id -> set de clés de cache pour invalidation rapide
         self._entry_to_keys: Dict[str, set[str]] = {}
+        self._timer_wheel = get_timer_wheel()
         logger.info(
             f"[ScoreCache] Initialisé (max_size={max_size}, ttl={ttl_seconds}s)"
         )
@@ -107,7 +111,7 @@ class ScoreCache:
         expires_at = cached["expires_at"]
         if now > expires_at:
             # Expiré → evict
-            del self._cache[cache_key]
+            self._remove(cache_key)
             if PROMETHEUS_AVAILABLE:
                 SCORE_CACHE_OPS.labels(operation="evict").inc()
                 SCORE_CACHE_SIZE.set(len(self._cache))
@@ -133,11 +137,14 @@ class ScoreCache:
             last_used_at: Timestamp last_used_at
             score: Score pondéré à cacher
         """
+        cache_key = self._compute_key(query_text, entry_id, last_used_at)
+        # Ré-insertion en fin de dict : l'ordre d'insertion reste l'ordre de création
+        self._remove(cache_key)
+
         # Eviction LRU si cache plein
         if len(self._cache) >= self.max_size:
             self._evict_oldest()
 
-        cache_key = self._compute_key(query_text, entry_id, last_used_at)
         expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
 
         self._cache[cache_key] = {
@@ -145,6 +152,9 @@ class ScoreCache:
             "expires_at": expires_at,
             "created_at": datetime.now(timezone.utc),
             "entry_id": entry_id,  # Stocker pour invalidation
+            "timer": self._timer_wheel.schedule(
+                self.ttl_seconds, self._expire, cache_key
+            ),
         }
 
         # Associer clé à entry_id pour invalidation rapide
@@ -171,8 +181,7 @@ class ScoreCache:
         keys_to_delete = self._entry_to_keys.get(entry_id, set())
 
         for key in list(keys_to_delete):
-            if key in self._cache:
-                del self._cache[key]
+            self._remove(key)
 
         # Nettoyer la map entry_to_keys
         if entry_id in self._entry_to_keys:
@@ -189,6 +198,8 @@ class ScoreCache:
     def clear(self) -> None:
         """Vide complètement le cache."""
         count = len(self._cache)
+        for cached in self._cache.values():
+            cached["timer"].cancel()
         self._cache.clear()
         self._entry_to_keys.clear()
 
@@ -215,26 +226,39 @@ class ScoreCache:
         raw_key = f"{query_text}|{entry_id}|{last_used_at}"
         return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
 
+    def _remove(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Retire une entrée, son timer et sa référence dans ``_entry_to_keys``."""
+        cached = self._cache.pop(cache_key, None)
+        if cached is None:
+            return None
+        cached["timer"].cancel()
+        entry_id = cached.get("entry_id")
+        if entry_id and entry_id in self._entry_to_keys:
+            self._entry_to_keys[entry_id].discard(cache_key)
+            if not self._entry_to_keys[entry_id]:
+                del self._entry_to_keys[entry_id]
+        return cached
+
+    def _expire(self, cache_key: str) -> None:
+        """Rappel de la roue de temporisation à l'échéance du TTL."""
+        if self._remove(cache_key) is None:
+            return
+        if PROMETHEUS_AVAILABLE:
+            SCORE_CACHE_OPS.labels(operation="evict").inc()
+            SCORE_CACHE_SIZE.set(len(self._cache))
+
     def _evict_oldest(self) -> None:
         """
         Evict l'entrée la plus ancienne (LRU).
 
-        Stratégie simple: supprimer entrée avec created_at le plus vieux.
+        Les entrées sont ré-insérées à chaque ``set`` : la première clé du
+        dict est toujours la plus ancienne (O(1), sans parcours).
         """
         if not self._cache:
             return
 
-        # Trouver clé la plus ancienne
-        oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k]["created_at"])
-
-        # Nettoyer la map entry_to_keys
-        entry_id = self._cache[oldest_key].get("entry_id")
-        if entry_id and entry_id in self._entry_to_keys:
-            self._entry_to_keys[entry_id].discard(oldest_key)
-            if not self._entry_to_keys[entry_id]:
-                del self._entry_to_keys[entry_id]
-
-        del self._cache[oldest_key]
+        oldest_key = next(iter(self._cache))
+        self._remove(oldest_key)
 
         if PROMETHEUS_AVAILABLE:
             SCORE_CACHE_OPS.labels(operation="evict").inc()
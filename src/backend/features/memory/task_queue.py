@@ -1,7 +1,22 @@
 """
-File de tâches asynchrone pour MemoryAnalyzer et MemoryGardener.
+File de tâches persistante pour MemoryAnalyzer et MemoryGardener.
 Évite blocage event loop WebSocket.
 
+- Stockage : ``SQLiteJobStore`` (survit aux redémarrages, partageable entre
+  processus) via ``get_memory_queue()`` ; ``InMemoryJobStore`` par défaut
+  quand la file est construite directement (tests).
+- Voies de priorité : ``interactive`` (analyse de session) passe avant
+  ``bulk`` (consolidation, jardinage) ; avec 2 workers ou plus, le dernier
+  sert ``bulk`` en premier pour éviter la famine.
+- Coalescence : une tâche déjà en attente pour le même (type, thread/session)
+  absorbe les doublons.
+- Bail avec délai de visibilité (renouvelé tant que la tâche tourne) : une
+  tâche d'un worker mort est reprise ; échec → nouvel essai différé, puis
+  ``failed`` après ``max_attempts``.
+- Les workers partagent un seul ``ServiceContainer`` (``set_container``) ;
+  ``python -m backend.features.memory.task_queue`` lance des workers dans un
+  processus séparé sur la même base.
+
 Usage:
     queue = get_memory_queue()
     await queue.start()
@@ -9,14 +24,59 @@ Usage:
     await queue.enqueue("consolidate_thread", {"thread_id": "...", "session_id": "...", "user_id": "..."})
 """
 
+import argparse
 import asyncio
 import logging
-from typing import Any, Callable
+import os
+import time
+from typing import Any, Callable, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from backend.features.memory.job_store import (
+    LANES,
+    InMemoryJobStore,
+    JobRecord,
+    SQLiteJobStore,
+)
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    _QUEUE_DEPTH = Gauge(
+        "memory_queue_depth", "Memory jobs queued or leased", ["lane"]
+    )
+    _QUEUE_WAIT = Histogram(
+        "memory_queue_wait_seconds",
+        "Time between enqueue and lease of a memory job",
+        ["task_type"],
+        buckets=[0.1, 0.5, 1, 5, 15, 60, 300, 1800],
+    )
+    _QUEUE_JOBS = Counter(
+        "memory_queue_jobs_total",
+        "Memory jobs by outcome (enqueued, coalesced, completed, retried, failed)",
+        ["task_type", "outcome"],
+    )
+except (ImportError, ValueError):
+    _QUEUE_DEPTH = None  # type: ignore[assignment]
+    _QUEUE_WAIT = None  # type: ignore[assignment]
+    _QUEUE_JOBS = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
+# Voie par type de tâche (interactive = réponse attendue par l'utilisateur)
+TASK_LANES: dict[str, str] = {
+    "analyze": "interactive",
+    "garden": "bulk",
+    "consolidate_thread": "bulk",
+}
+
+
+def dedup_key_for(task_type: str, payload: dict[str, Any]) -> str | None:
+    """Clé de coalescence : (type, thread) ou (type, session)."""
+    target = payload.get("thread_id") or payload.get("session_id")
+    return f"{task_type}:{target}" if target else None
+
 
 @dataclass
 class MemoryTask:
@@ -26,11 +86,14 @@ class MemoryTask:
     payload: dict[str, Any]
     callback: Callable[[Any], Any] | None = None
     created_at: datetime = field(default_factory=datetime.utcnow)
+    job_id: str | None = None
+    attempts: int = 0
+    error: str | None = None
 
 
 class MemoryTaskQueue:
     """
-    File de tâches asynchrone pour opérations mémoire lourdes.
+    File de tâches persistante pour opérations mémoire lourdes.
 
     Usage:
         queue = MemoryTaskQueue()
@@ -38,11 +101,55 @@ class MemoryTaskQueue:
         await queue.enqueue("analyze", {"session_id": "..."})
     """
 
-    def __init__(self, max_workers: int = 2):
-        self.queue: asyncio.Queue[MemoryTask | None] = asyncio.Queue()
+    def __init__(
+        self,
+        max_workers: int = 2,
+        store: Any = None,
+        *,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 30.0,
+        poll_interval: float = 1.0,
+        container: Any = None,
+    ):
+        self.store = store if store is not None else InMemoryJobStore()
         self.max_workers = max_workers
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
         self.workers: list[asyncio.Task[None]] = []
         self.running = False
+        self._container = container
+        # Callbacks en mémoire (non persistés) : job_id -> callbacks
+        self._callbacks: dict[str, list[Callable[[Any], Any]]] = {}
+        self._wakeup: asyncio.Event | None = None
+        self.stats: dict[str, int] = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "completed": 0,
+            "retried": 0,
+            "failed": 0,
+            "lease_lost": 0,
+        }
+        self._started_at = time.monotonic()
+
+    def set_container(self, container: Any) -> None:
+        """Partage le ServiceContainer de l'application avec les workers"""
+        self._container = container
+
+    def _get_container(self) -> Any:
+        if self._container is None:
+            from backend.containers import ServiceContainer
+
+            self._container = ServiceContainer()
+        return self._container
+
+    def _lanes_for(self, worker_id: int) -> list[str]:
+        lanes = sorted(LANES, key=LANES.__getitem__)
+        if self.max_workers > 1 and worker_id == self.max_workers - 1:
+            lanes.reverse()  # dernier worker : bulk d'abord (anti-famine)
+        return lanes
 
     async def start(self):
         """Démarre les workers de traitement"""
@@ -50,18 +157,18 @@ class MemoryTaskQueue:
             return
 
         self.running = True
+        self._wakeup = asyncio.Event()
+        self._started_at = time.monotonic()
         for i in range(self.max_workers):
             worker = asyncio.create_task(self._worker(i))
             self.workers.append(worker)
         logger.info(f"MemoryTaskQueue started with {self.max_workers} workers")
 
     async def stop(self):
-        """Arrête proprement les workers"""
+        """Arrête proprement les workers (la tâche en cours se termine)"""
         self.running = False
-
-        # Envoyer signal arrêt
-        for _ in range(self.max_workers):
-            await self.queue.put(None)
+        if self._wakeup is not None:
+            self._wakeup.set()
 
         # Attendre fin workers
         await asyncio.gather(*self.workers, return_exceptions=True)
@@ -72,36 +179,122 @@ class MemoryTaskQueue:
         task_type: str,
         payload: dict[str, Any],
         callback: Callable[[Any], Any] | None = None,
-    ) -> None:
-        """Ajoute une tâche à la file"""
-        task = MemoryTask(task_type=task_type, payload=payload, callback=callback)
-        await self.queue.put(task)
-        logger.debug(f"Task enqueued: {task_type} - {payload.get('session_id', 'N/A')}")
+        *,
+        lane: str | None = None,
+    ) -> str:
+        """Ajoute une tâche à la file (coalescée si un doublon attend déjà)"""
+        lane = lane or TASK_LANES.get(task_type, "bulk")
+        job_id: str
+        coalesced: bool
+        job_id, coalesced = await asyncio.to_thread(
+            self.store.enqueue, task_type, payload, lane, dedup_key_for(task_type, payload)
+        )
+        if callback is not None:
+            self._callbacks.setdefault(job_id, []).append(callback)
+        outcome = "coalesced" if coalesced else "enqueued"
+        self.stats[outcome] += 1
+        if _QUEUE_JOBS is not None:
+            _QUEUE_JOBS.labels(task_type, outcome).inc()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.debug(
+            f"Task {outcome}: {task_type} - {payload.get('session_id', 'N/A')} ({lane})"
+        )
+        return job_id
 
     async def _worker(self, worker_id: int) -> None:
         """Worker qui consomme la file"""
         logger.info(f"Worker {worker_id} started")
+        lanes = self._lanes_for(worker_id)
+        name = f"{os.getpid()}:{worker_id}"
+        last_depth_refresh = 0.0
 
         while self.running:
             try:
-                # Attendre tâche (timeout pour vérifier self.running)
-                task = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-
-                if task is None:  # Signal arrêt
-                    break
+                if worker_id == 0 and time.monotonic() - last_depth_refresh > 5.0:
+                    last_depth_refresh = time.monotonic()
+                    await self.get_stats()  # rafraîchit la jauge Prometheus
+                record: Optional[JobRecord] = await asyncio.to_thread(
+                    self.store.lease, lanes, name, self.visibility_timeout
+                )
+                if record is None:
+                    # Rien de prêt : attendre un enqueue local ou le prochain poll
+                    assert self._wakeup is not None
+                    try:
+                        await asyncio.wait_for(
+                            self._wakeup.wait(), timeout=self.poll_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+
+                await self._handle_record(record, worker_id)
 
-                # Traiter tâche
-                await self._process_task(task, worker_id)
-
-            except asyncio.TimeoutError:
-                continue  # Pas de tâche, continuer
             except Exception as e:
                 logger.error(f"Worker {worker_id} error: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
 
         logger.info(f"Worker {worker_id} stopped")
 
-    async def _process_task(self, task: MemoryTask, worker_id: int) -> None:
-        """Traite une tâche mémoire"""
+    async def _handle_record(self, record: JobRecord, worker_id: int) -> None:
+        wait = max(0.0, time.time() - record.enqueued_at)
+        if _QUEUE_WAIT is not None:
+            _QUEUE_WAIT.labels(record.task_type).observe(wait)
+        callbacks = self._callbacks.pop(record.id, [])
+        task = MemoryTask(
+            task_type=record.task_type,
+            payload=record.payload,
+            callback=_chain_callbacks(callbacks),
+            job_id=record.id,
+            attempts=record.attempts,
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(record))
+        try:
+            ok = await self._process_task(task, worker_id)
+        finally:
+            heartbeat.cancel()
+
+        if ok:
+            acked = await asyncio.to_thread(self.store.ack, record.id, record.worker)
+            outcome = "completed" if acked else "lease_lost"
+        else:
+            message = task.error or "task failed"
+            outcome = await asyncio.to_thread(
+                self.store.nack,
+                record.id,
+                record.worker,
+                message,
+                self.retry_delay * record.attempts,
+                self.max_attempts,
+            )
+            if outcome == "retried" and callbacks:
+                self._callbacks.setdefault(record.id, []).extend(callbacks)
+        if outcome == "lease_lost":
+            # Bail expiré puis repris : le nouveau détenteur conclura la tâche
+            logger.warning(
+                f"Bail perdu pour {record.task_type} {record.id} ({record.worker})"
+            )
+        self.stats[outcome] += 1
+        if _QUEUE_JOBS is not None:
+            _QUEUE_JOBS.labels(record.task_type, outcome).inc()
+
+    async def _heartbeat(self, record: JobRecord) -> None:
+        """Renouvelle le bail tant que la tâche tourne (arrêt si le bail est perdu)"""
+        interval = max(1.0, self.visibility_timeout / 3)
+        while True:
+            await asyncio.sleep(interval)
+            held = await asyncio.to_thread(
+                self.store.extend, record.id, record.worker, self.visibility_timeout
+            )
+            if not held:
+                logger.warning(
+                    f"Bail perdu pendant {record.task_type} {record.id} ({record.worker})"
+                )
+                return
+
+    async def _process_task(self, task: MemoryTask, worker_id: int) -> bool:
+        """Traite une tâche mémoire ; False si elle a échoué (exception)"""
         start = datetime.utcnow()
 
         try:
@@ -114,7 +307,7 @@ class MemoryTaskQueue:
                 result = await self._run_thread_consolidation(task.payload)
             else:
                 logger.warning(f"Unknown task type: {task.task_type}")
-                return
+                return True
 
             duration = (datetime.utcnow() - start).total_seconds()
             logger.info(
@@ -124,34 +317,55 @@ class MemoryTaskQueue:
             # Callback si fourni
             if task.callback:
                 await task.callback(result)
+            return True
 
         except Exception as e:
             logger.error(f"Task {task.task_type} failed: {e}", exc_info=True)
+            task.error = f"{type(e).__name__}: {e}"
+            return False
+
+    async def get_stats(self) -> dict[str, Any]:
+        """Profondeur par voie + compteurs (exportés aussi vers Prometheus)"""
+        depth = await asyncio.to_thread(self.store.depth)
+        if _QUEUE_DEPTH is not None:
+            for lane, count in depth.items():
+                _QUEUE_DEPTH.labels(lane).set(count)
+        uptime = max(1e-6, time.monotonic() - self._started_at)
+        return {
+            "depth": depth,
+            **self.stats,
+            "throughput_per_min": round(self.stats["completed"] * 60 / uptime, 2),
+            "workers": self.max_workers,
+            "running": self.running,
+        }
 
     async def _run_analysis(self, payload: dict[str, Any]) -> dict[str, Any]:
         """Exécute MemoryAnalyzer.analyze_session_for_concepts"""
-        from backend.containers import ServiceContainer
-
-        container = ServiceContainer()
+        container = self._get_container()
         analyzer = container.memory_analyzer()
         session_id = payload["session_id"]
         force = payload.get("force", False)
 
-        # Récupérer l'historique depuis la session
-        chat_service = container.chat_service()
-        session_manager = getattr(chat_service, "session_manager", None)
-        if not session_manager:
-            logger.error(f"SessionManager not available for session {session_id}")
-            return {"status": "error", "session_id": session_id}
+        if "history" in payload:
+            # Historique embarqué (workers hors processus : pas de session locale)
+            history = payload.get("history") or []
+            user_id = payload.get("user_id")
+        else:
+            # Récupérer l'historique depuis la session
+            chat_service = container.chat_service()
+            session_manager = getattr(chat_service, "session_manager", None)
+            if not session_manager:
+                logger.error(f"SessionManager not available for session {session_id}")
+                return {"status": "error", "session_id": session_id}
 
-        try:
-            session = session_manager.get_session(session_id)
-            history = getattr(session, "history", [])
-            # ✅ FIX CRITIQUE P2 Sprint 3: Extraire user_id depuis session
-            user_id = getattr(session, "user_id", None)
-        except Exception as e:
-            logger.error(f"Failed to get history for session {session_id}: {e}")
-            return {"status": "error", "session_id": session_id}
+            try:
+                session = session_manager.get_session(session_id)
+                history = getattr(session, "history", [])
+                # ✅ FIX CRITIQUE P2 Sprint 3: Extraire user_id depuis session
+                user_id = getattr(session, "user_id", None)
+            except Exception as e:
+                logger.error(f"Failed to get history for session {session_id}: {e}")
+                return {"status": "error", "session_id": session_id}
 
         result = await analyzer.analyze_session_for_concepts(
             session_id, history=history, force=force, user_id=user_id
@@ -160,9 +374,7 @@ class MemoryTaskQueue:
 
     async def _run_gardening(self, payload: dict[str, Any]) -> dict[str, Any]:
         """Exécute MemoryGardener.garden_thread"""
-        from backend.containers import ServiceContainer
-
-        container = ServiceContainer()
+        container = self._get_container()
         gardener = container.memory_gardener()
         thread_id = payload["thread_id"]
         user_sub = payload.get("user_sub")
@@ -182,7 +394,6 @@ class MemoryTaskQueue:
             - user_id (optional): User ID propriétaire
             - reason (optional): Raison de la consolidation ("archiving", "manual", etc.)
         """
-        from backend.containers import ServiceContainer
         from backend.features.memory.gardener import MemoryGardener
 
         thread_id = payload.get("thread_id")
@@ -194,8 +405,8 @@ class MemoryTaskQueue:
             logger.warning("[MemoryTaskQueue] consolidate_thread sans thread_id")
             return {"status": "error", "message": "Missing thread_id"}
 
-        # Récupérer services depuis container
-        container = ServiceContainer()
+        # Récupérer services depuis le container partagé
+        container = self._get_container()
         memory_analyzer = container.memory_analyzer()
         chat_service = container.chat_service()
 
@@ -233,13 +444,98 @@ class MemoryTaskQueue:
         }
 
 
+def _chain_callbacks(
+    callbacks: list[Callable[[Any], Any]],
+) -> Callable[[Any], Any] | None:
+    """Regroupe les callbacks des tâches coalescées"""
+    if not callbacks:
+        return None
+    if len(callbacks) == 1:
+        return callbacks[0]
+
+    async def _all(result: Any) -> None:
+        for cb in callbacks:
+            await cb(result)
+
+    return _all
+
+
 # Singleton global
 _task_queue: MemoryTaskQueue | None = None
 
 
+def _queue_from_env(max_workers: int | None = None) -> MemoryTaskQueue:
+    """
+    Env: MEMORY_QUEUE_DB_PATH (défaut ./data/memory_queue.db, "memory" pour
+    une file non durable), MEMORY_QUEUE_WORKERS (défaut 2, 0 = ce processus ne
+    fait qu'enfiler), MEMORY_QUEUE_VISIBILITY_TIMEOUT (secondes, défaut 300),
+    MEMORY_QUEUE_MAX_ATTEMPTS (défaut 3).
+    """
+    path = os.getenv("MEMORY_QUEUE_DB_PATH", "./data/memory_queue.db")
+    store: Any
+    if path == "memory":
+        store = InMemoryJobStore()
+    else:
+        try:
+            store = SQLiteJobStore(path)
+        except Exception as e:
+            logger.warning(f"MemoryTaskQueue: store SQLite indisponible ({path}): {e}")
+            store = InMemoryJobStore()
+    return MemoryTaskQueue(
+        max_workers=(
+            max_workers
+            if max_workers is not None
+            else int(os.getenv("MEMORY_QUEUE_WORKERS", "2"))
+        ),
+        store=store,
+        visibility_timeout=float(os.getenv("MEMORY_QUEUE_VISIBILITY_TIMEOUT", "300")),
+        max_attempts=int(os.getenv("MEMORY_QUEUE_MAX_ATTEMPTS", "3")),
+    )
+
+
 def get_memory_queue() -> MemoryTaskQueue:
     """Récupère l'instance globale de la file"""
     global _task_queue
     if _task_queue is None:
-        _task_queue = MemoryTaskQueue(max_workers=2)
+        _task_queue = _queue_from_env()
     return _task_queue
+
+
+async def run_worker_process(workers: int, lanes: list[str] | None = None) -> None:
+    """Workers hors du processus web, sur la même base de tâches"""
+    queue = _queue_from_env(max_workers=workers)
+    if lanes:
+        queue._lanes_for = lambda worker_id: list(lanes)  # type: ignore[method-assign]
+    container = queue._get_container()
+    db_manager = container.db_manager()
+    await db_manager.connect()
+    await queue.start()
+    try:
+        while queue.running:
+            await asyncio.sleep(30)
+            logger.info(f"MemoryTaskQueue worker process stats: {await queue.get_stats()}")
+    finally:
+        await queue.stop()
+        await db_manager.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Workers MemoryTaskQueue hors processus")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument(
+        "--lanes",
+        default="bulk",
+        help="Voies servies, par ordre de priorité (ex: bulk,interactive). "
+        "L'analyse interactive lit la session en mémoire du processus web : "
+        "ne la servir ici que si le payload embarque l'historique.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(
+            run_worker_process(
+                args.workers, [lane for lane in args.lanes.split(",") if lane]
+            )
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,197 @@
+# src/backend/features/memory/transfer.py
+"""
+Export / import streamés des concepts LTM au format NDJSON (optionnellement zstd).
+
+Format :
+    {"type": "header", "kind": "concepts", "version": 1, "exported_at": ...}
+    {"type": "concept", "data": {"id": ..., "text": ..., "metadata": {...}}}
+    {"type": "end", "counts": {"concepts": N}}
+
+L'export lit la collection par pages (``VectorService.get_page``) ; l'import
+vectorise et upsert par lots. Les métadonnées sont exportées telles quelles
+(aller-retour sans perte). Les IDs du fichier ne sont conservés que s'ils
+désignent déjà un concept de l'utilisateur : un fichier forgé ne peut pas
+écraser le concept d'un autre compte.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator
+from datetime import datetime, timezone
+from typing import Any
+
+from backend.features.memory.generations import bump_generation
+from backend.shared.ndjson_stream import NDJSON_FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PAGE_SIZE = 256
+IMPORT_BATCH_SIZE = 128
+
+
+class ConceptImportError(ValueError):
+    """Flux d'import de concepts invalide."""
+
+
+def _user_concepts_filter(user_id: str) -> dict[str, Any]:
+    return {"$and": [{"user_id": user_id}, {"type": "concept"}]}
+
+
+async def iter_concepts_export(
+    vector_service: Any,
+    collection: Any,
+    *,
+    user_id: str,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> AsyncIterator[dict[str, Any]]:
+    """Produit les enregistrements d'export des concepts d'un utilisateur."""
+    yield {
+        "type": "header",
+        "kind": "concepts",
+        "version": NDJSON_FORMAT_VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    where = _user_concepts_filter(user_id)
+    cursor: Any = None
+    count = 0
+    while True:
+        page, cursor = await asyncio.to_thread(
+            vector_service.get_page, collection, where, limit=page_size, cursor=cursor
+        )
+        for concept_id, doc, meta in zip(
+            page["ids"], page["documents"], page["metadatas"]
+        ):
+            count += 1
+            yield {
+                "type": "concept",
+                "data": {"id": concept_id, "text": doc, "metadata": meta or {}},
+            }
+        if cursor is None:
+            break
+
+    yield {"type": "end", "counts": {"concepts": count}}
+
+
+async def _owned_concept_ids(
+    vector_service: Any, collection: Any, user_id: str, page_size: int
+) -> set[str]:
+    """IDs des concepts déjà stockés pour l'utilisateur (lecture paginée)."""
+    where = _user_concepts_filter(user_id)
+    owned: set[str] = set()
+    cursor: Any = None
+    while True:
+        page, cursor = await asyncio.to_thread(
+            vector_service.get_page, collection, where, limit=page_size, cursor=cursor
+        )
+        owned.update(str(concept_id) for concept_id in page["ids"])
+        if cursor is None:
+            return owned
+
+
+def _to_item(
+    data: dict[str, Any], user_id: str, owned_ids: set[str]
+) -> dict[str, Any] | None:
+    metadata = dict(data.get("metadata") or {})
+    text = data.get("text") or metadata.get("concept_text")
+    if not text:
+        return None
+    # ID conservé seulement s'il désigne déjà un concept de l'utilisateur
+    # (ré-import idempotent) ; sinon ID frais, l'upsert ne peut pas écraser
+    # le concept d'un autre compte quelles que soient les métadonnées reçues.
+    concept_id = data.get("id")
+    if not concept_id or str(concept_id) not in owned_ids:
+        concept_id = f"concept_{user_id}_{uuid.uuid4().hex[:8]}"
+    metadata["user_id"] = user_id
+    metadata["type"] = "concept"
+    metadata.setdefault("concept_text", text)
+    metadata.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+    return {"id": concept_id, "text": text, "metadata": metadata}
+
+
+async def import_concepts_stream(
+    vector_service: Any,
+    collection: Any,
+    records: AsyncIterable[dict[str, Any]],
+    *,
+    user_id: str,
+    mode: str = "merge",
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict[str, Any]:
+    """
+    Importe un flux de concepts par lots (embedding + upsert groupés).
+
+    ``mode="replace"`` supprime ensuite les anciens concepts de l'utilisateur
+    absents du flux, une fois tous les lots écrits : un flux invalide ou
+    interrompu ne laisse jamais le compte vide.
+    """
+    header_seen = False
+    batch: list[dict[str, Any]] = []
+    owned_ids: set[str] = set()
+    written_ids: set[str] = set()
+    imported = 0
+    skipped = 0
+
+    async def _flush() -> None:
+        nonlocal imported
+        if not batch:
+            return
+        await asyncio.to_thread(vector_service.add_items, collection, list(batch))
+        written_ids.update(item["id"] for item in batch)
+        imported += len(batch)
+        batch.clear()
+
+    async for record in records:
+        kind = record.get("type")
+        if not header_seen:
+            if kind != "header" or record.get("kind") != "concepts":
+                raise ConceptImportError("En-tête d'export de concepts manquant")
+            if int(record.get("version") or 0) > NDJSON_FORMAT_VERSION:
+                raise ConceptImportError(
+                    f"Version d'export non supportée: {record.get('version')}"
+                )
+            header_seen = True
+            owned_ids = await _owned_concept_ids(
+                vector_service, collection, user_id, EXPORT_PAGE_SIZE
+            )
+            continue
+
+        if kind == "concept":
+            item = _to_item(record.get("data") or {}, user_id, owned_ids)
+            if item is None:
+                skipped += 1
+                continue
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await _flush()
+        elif kind == "end":
+            break
+
+    if not header_seen:
+        raise ConceptImportError("Flux d'import vide")
+    await _flush()
+
+    replaced = 0
+    if mode == "replace":
+        stale = sorted(owned_ids - written_ids)
+        for start in range(0, len(stale), batch_size):
+            await asyncio.to_thread(
+                collection.delete, ids=stale[start : start + batch_size]
+            )
+        replaced = len(stale)
+    if imported or replaced:
+        await bump_generation(user_id)
+
+    logger.info(
+        f"[concepts/import] Import streamé: {imported} concepts pour user {user_id} (mode={mode})"
+    )
+    return {
+        "status": "success",
+        "imported": imported,
+        "skipped": skipped,
+        "replaced": replaced,
+        "mode": mode,
+    }
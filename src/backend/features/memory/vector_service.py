@@ -19,7 +19,7 @@ import types
 import threading
 import uuid
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Union, cast
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union, cast
 
 
 # ---- Force disable telemetry as early as possible (before importing chromadb) ----
@@ -158,6 +158,11 @@ except Exception:  # pragma: no cover - dépendance optionnelle
     QdrantClient = None  # type: ignore
     qdrant_models = None  # type: ignore
 
+from backend.features.memory.pgvector_store import (
+    PgVectorCollection,
+    PgVectorStore,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -610,6 +615,9 @@ class VectorService:
     - Télémétrie Chroma/PostHog durcie (env + shim).
     - Normalisation des filtres where conservée.
     - Backend Qdrant optionnel (via qdrant-client) avec fallback automatique sur Chroma.
+    - Backend pgvector optionnel (VECTOR_BACKEND=pgvector) : collections en tables
+      PostgreSQL, pool asyncpg dédié (PostgreSQLManager injecté ou créé depuis
+      l'environnement), fallback sur Chroma.
     - 🆕 V13.2: Mode READ-ONLY fallback si ChromaDB indisponible au démarrage.
       Écritures bloquées avec logs structurés. Endpoint /health/ready expose status.
     """
@@ -622,6 +630,7 @@ class VectorService:
         backend_preference: str = "auto",
         qdrant_url: Optional[str] = None,
         qdrant_api_key: Optional[str] = None,
+        pg_manager: Optional[Any] = None,
     ):
         self.persist_directory = os.path.abspath(persist_directory)
         self.embed_model_name = embed_model_name
@@ -636,8 +645,10 @@ class VectorService:
         self.model: Any = None
         self.client: Any = None
         self.qdrant_client: Optional[QdrantClient] = None  # type: ignore[assignment]
+        self.pg_manager = pg_manager
+        self.pg_store: Optional[PgVectorStore] = None
 
-        # Backend effectif sélectionné ("chroma" ou "qdrant")
+        # Backend effectif sélectionné ("chroma", "qdrant" ou "pgvector")
         self.backend: str = "chroma"
         self._qdrant_known_collections: Dict[str, int] = {}
 
@@ -694,12 +705,16 @@ class VectorService:
                 return
             if self.backend == "qdrant" and self.qdrant_client is not None:
                 return
+            if self.backend == "pgvector" and self.pg_store is not None:
+                return
         with self._init_lock:
             if self._inited and self.model is not None:
                 if self.backend == "chroma" and self.client is not None:
                     return
                 if self.backend == "qdrant" and self.qdrant_client is not None:
                     return
+                if self.backend == "pgvector" and self.pg_store is not None:
+                    return
 
             # 0) Pré-check : corruption SQLite → backup + reset AVANT Chroma
             if self.auto_reset_on_schema_error and self._is_sqlite_corrupted(
@@ -743,13 +758,19 @@ class VectorService:
                         "VectorService: fallback sur Chroma (init Qdrant impossible)."
                     )
                     backend = "chroma"
+            elif backend == "pgvector":
+                if not self._init_pgvector_store():
+                    logger.warning(
+                        "VectorService: fallback sur Chroma (init pgvector impossible)."
+                    )
+                    backend = "chroma"
 
             if backend == "chroma":
                 self.client = self._init_client_with_guard(
                     self.persist_directory, self.auto_reset_on_schema_error
                 )
             else:
-                logger.info("VectorService: backend Qdrant activé.")
+                logger.info(f"VectorService: backend {backend} activé.")
 
             self.backend = backend
             self._inited = True
@@ -797,6 +818,8 @@ class VectorService:
             return self.client is not None
         if self.backend == "qdrant":
             return self.qdrant_client is not None
+        if self.backend == "pgvector":
+            return self.pg_store is not None
         return False
 
     # ---------- Pré-check SQLite ----------
@@ -891,6 +914,8 @@ class VectorService:
             return "chroma"
         if pref == "qdrant":
             return "qdrant"
+        if pref in {"pgvector", "postgres", "postgresql"}:
+            return "pgvector"
         if pref == "auto":
             if QdrantClient is not None and self.qdrant_url:
                 return "qdrant"
@@ -920,6 +945,32 @@ class VectorService:
             self.qdrant_client = None
             return False
 
+    def _init_pgvector_store(self) -> bool:
+        injected = self.pg_manager is not None
+        if self.pg_manager is None:
+            # Import différé : asyncpg n'est requis que pour ce backend
+            try:
+                from backend.core.database.manager_postgres import PostgreSQLManager
+            except ImportError:
+                logger.warning(
+                    "asyncpg non installé - impossible d'initialiser le backend pgvector."
+                )
+                return False
+            self.pg_manager = PostgreSQLManager.from_env()
+        try:
+            store = PgVectorStore(self.pg_manager)
+            store.connect()
+            self.pg_store = store
+            logger.info(
+                "Backend pgvector connecté (pool PostgreSQL %s, boucle dédiée).",
+                "injecté" if injected else "dédié créé depuis l'environnement",
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Échec initialisation pgvector: {e}", exc_info=True)
+            self.pg_store = None
+            return False
+
     # ---------- Normalisation where (FIX) ----------
     def _normalize_where(
         self, where: Optional[Dict[str, Any]]
@@ -1167,6 +1218,32 @@ class VectorService:
         ]
         return {"ids": ids, "documents": documents, "metadatas": metadatas}
 
+    def _qdrant_get_page(
+        self,
+        collection_name: str,
+        where_filter: Optional[Dict[str, Any]],
+        limit: int,
+        cursor: Any,
+    ) -> Tuple[Dict[str, List[Any]], Any]:
+        if self.qdrant_client is None or qdrant_models is None:
+            return {"ids": [], "documents": [], "metadatas": []}, None
+        page, next_cursor = self.qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=limit,
+            filter=self._build_qdrant_filter(where_filter),
+            with_payload=True,
+            with_vectors=False,
+            offset=cursor,
+        )
+        return {
+            "ids": [str(r.id) for r in page],
+            "documents": [(r.payload or {}).get("text") for r in page],
+            "metadatas": [
+                {k: v for k, v in (r.payload or {}).items() if k != "text"}
+                for r in page
+            ],
+        }, next_cursor
+
     def _qdrant_delete_via_collection(
         self,
         collection_name: str,
@@ -1188,11 +1265,16 @@ class VectorService:
                      Default: Optimized for LTM queries (M=16, space=cosine)
 
         Returns:
-            Collection object (ChromaDB or QdrantCollectionAdapter)
+            Collection object (ChromaDB, QdrantCollectionAdapter or PgVectorCollection)
         """
         self._ensure_inited()
         if self.backend == "qdrant":
             return QdrantCollectionAdapter(self, name)
+        if self.backend == "pgvector" and self.pg_store is not None:
+            # Même API que chromadb.Collection : les chemins Chroma s'appliquent
+            return PgVectorCollection(
+                self.pg_store, name, self._build_collection_embedding_function()
+            )
 
         # Default optimized metadata for LTM collections (P2 performance)
         if metadata is None:
@@ -1301,6 +1383,7 @@ class VectorService:
         mmr_lambda: float = 0.7,  # P2.2 - MMR balance (0.7 = 70% relevance, 30% diversity)
         apply_specificity_boost: bool = True,  # P2.1 - Enable specificity scoring
         apply_rerank: bool = True,  # P2.1 - Enable lexical rerank
+        query_embedding: Optional[Sequence[float]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Recherche vectorielle avec support optionnel de recency decay, MMR, specificity boost et rerank.
@@ -1316,6 +1399,8 @@ class VectorService:
             mmr_lambda: Balance MMR (1.0 = full relevance, 0.0 = full diversity)
             apply_specificity_boost: Appliquer boost spécificité (densité IDF/NER/nombres) (défaut: True)
             apply_rerank: Appliquer rerank lexical avec Jaccard (défaut: True)
+            query_embedding: Embedding de la requête déjà calculé (évite un
+                second encodage, ex: cache RAG sémantique)
 
         Returns:
             Liste de résultats avec {id, text, metadata, distance, [age_days, recency_score, specificity_score, rerank_score]}
@@ -1324,11 +1409,15 @@ class VectorService:
         if not query_text:
             return []
         try:
-            embeddings = self.model.encode([query_text], show_progress_bar=False)  # type: ignore[union-attr]
-            embeddings_list = (
-                embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings
-            )
-            query_embedding = embeddings_list[0] if embeddings_list else []
+            if query_embedding is not None:
+                query_embedding = list(query_embedding)
+                embeddings_list = [query_embedding]
+            else:
+                embeddings = self.model.encode([query_text], show_progress_bar=False)  # type: ignore[union-attr]
+                embeddings_list = (
+                    embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings
+                )
+                query_embedding = embeddings_list[0] if embeddings_list else []
 
             if self.backend == "qdrant":
                 collection_name = getattr(collection, "name", str(collection))
@@ -1518,6 +1607,73 @@ class VectorService:
             )
             return []
 
+    def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        """Encode un lot de textes en un seul appel modèle."""
+        self._ensure_inited()
+        if not texts:
+            return []
+        embeddings = self.model.encode(list(texts), show_progress_bar=False)  # type: ignore[union-attr]
+        return cast(
+            List[List[float]],
+            embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings,
+        )
+
+    def nearest_neighbors(
+        self,
+        collection: Collection,
+        embeddings: List[List[float]],
+        *,
+        n_results: int = 1,
+        where_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Plus proches voisins pour un lot d'embeddings (une seule requête Chroma).
+
+        Retourne, pour chaque embedding, une liste ``{id, text, metadata, distance}``
+        triée par distance croissante (distance cosinus : 0 = identique).
+        Pas de recency/MMR/rerank : destiné aux contrôles d'écriture (dédup).
+        """
+        self._ensure_inited()
+        if not embeddings:
+            return []
+        if self.backend == "qdrant":
+            collection_name = getattr(collection, "name", str(collection))
+            batched: List[List[Dict[str, Any]]] = []
+            for emb in embeddings:
+                hits = self._qdrant_query(collection_name, emb, n_results, where_filter)
+                # Qdrant renvoie un score de similarité cosinus → distance
+                for hit in hits:
+                    if hit.get("distance") is not None:
+                        hit["distance"] = 1.0 - float(hit["distance"])
+                batched.append(hits)
+            return batched
+
+        results = collection.query(
+            query_embeddings=embeddings,
+            n_results=max(1, n_results),
+            where=self._normalize_where(where_filter),
+            include=["documents", "metadatas", "distances"],
+        )
+        ids = results.get("ids") or []
+        docs = results.get("documents") or []
+        metas = results.get("metadatas") or []
+        dists = results.get("distances") or []
+        neighbors: List[List[Dict[str, Any]]] = []
+        for qi in range(len(embeddings)):
+            row_ids = ids[qi] if qi < len(ids) else []
+            row: List[Dict[str, Any]] = []
+            for j, item_id in enumerate(row_ids):
+                row.append(
+                    {
+                        "id": item_id,
+                        "text": docs[qi][j] if qi < len(docs) else None,
+                        "metadata": metas[qi][j] if qi < len(metas) else None,
+                        "distance": dists[qi][j] if qi < len(dists) else None,
+                    }
+                )
+            neighbors.append(row)
+        return neighbors
+
     def update_metadatas(
         self, collection: Collection, ids: List[str], metadatas: List[Dict[str, Any]]
     ) -> None:
@@ -1541,6 +1697,41 @@ class VectorService:
                 f"Echec update metadatas '{collection.name}': {e}", exc_info=True
             )
 
+    def get_page(
+        self,
+        collection: Collection,
+        where_filter: Optional[Dict[str, Any]] = None,
+        *,
+        limit: int = 256,
+        cursor: Any = None,
+    ) -> Tuple[Dict[str, List[Any]], Any]:
+        """
+        Lecture paginée (ids/documents/metadatas à plat) pour les exports streamés.
+
+        Retourne ``(page, next_cursor)`` ; ``next_cursor`` vaut None en fin de
+        collection. Le curseur est opaque : offset entier (Chroma) ou offset de
+        scroll natif (Qdrant).
+        """
+        self._ensure_inited()
+        if self.backend == "qdrant":
+            collection_name = getattr(collection, "name", str(collection))
+            return self._qdrant_get_page(collection_name, where_filter, limit, cursor)
+
+        offset = int(cursor or 0)
+        result = collection.get(
+            where=self._normalize_where(where_filter),
+            limit=limit,
+            offset=offset,
+            include=["documents", "metadatas"],
+        )
+        page = {
+            "ids": list(result.get("ids") or []),
+            "documents": list(result.get("documents") or []),
+            "metadatas": list(result.get("metadatas") or []),
+        }
+        next_cursor = offset + len(page["ids"]) if len(page["ids"]) >= limit else None
+        return page, next_cursor
+
     def _is_filter_empty(self, where_filter: Dict[str, Any]) -> bool:
         """Vérifie récursivement si un filtre est vide ou sans critères valides."""
         if not where_filter:
@@ -1611,6 +1802,7 @@ class VectorService:
         score_threshold: float = 0.0,
         bm25_k1: float = 1.5,
         bm25_b: float = 0.75,
+        query_embedding: Optional[Sequence[float]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Recherche hybride combinant BM25 (lexical) et vectorielle (sémantique).
@@ -1624,6 +1816,7 @@ class VectorService:
             score_threshold: Seuil minimum de score pour retourner un résultat
             bm25_k1: Paramètre k1 de BM25 (saturation TF)
             bm25_b: Paramètre b de BM25 (normalisation longueur)
+            query_embedding: Embedding de la requête déjà calculé (optionnel)
 
         Returns:
             Liste de résultats avec scores hybrides détaillés
@@ -1643,16 +1836,29 @@ class VectorService:
                 score_threshold=score_threshold,
                 bm25_k1=bm25_k1,
                 bm25_b=bm25_b,
+                query_embedding=query_embedding,
             )
         except ImportError:
             logger.warning(
                 "HybridRetriever non disponible, fallback sur query() classique"
             )
-            return self.query(collection, query_text, n_results, where_filter)
+            return self.query(
+                collection,
+                query_text,
+                n_results,
+                where_filter,
+                query_embedding=query_embedding,
+            )
         except Exception as e:
             logger.error(f"Erreur hybrid_query: {e}", exc_info=True)
             # Fallback sur query vectorielle standard
-            return self.query(collection, query_text, n_results, where_filter)
+            return self.query(
+                collection,
+                query_text,
+                n_results,
+                where_filter,
+                query_embedding=query_embedding,
+            )
 
     # ---------- Weighted Retrieval avec décroissance temporelle (P2.3) ----------
     def query_weighted(
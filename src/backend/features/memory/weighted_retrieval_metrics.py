@@ -12,6 +12,8 @@
 import logging
 from typing import Any, Optional, cast
 
+from backend.core.event_store import record_event
+
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
@@ -150,6 +152,14 @@ class WeightedRetrievalMetrics:
             results_count: Nombre de résultats retournés
             duration_seconds: Durée de la requête
         """
+        record_event(
+            "retrieval",
+            collection=collection,
+            query_type="weighted",
+            status=status,
+            duration_ms=duration_seconds * 1000,
+            results=results_count,
+        )
         if not PROMETHEUS_AVAILABLE:
             return
 
@@ -3,9 +3,12 @@
 
 import os
 import logging
-from fastapi import APIRouter, Response
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, HTTPException, Query, Response
 from prometheus_client import REGISTRY, generate_latest, CONTENT_TYPE_LATEST
-from typing import Dict, Any, Union
+from typing import Dict, Any, List, Optional, Union
+
+from backend.core.event_store import EventStore, get_event_store
 
 logger = logging.getLogger(__name__)
 
@@ -134,3 +137,71 @@ async def get_rag_metrics() -> Dict[str, Any]:
             "avg_results_per_query": 0.0,
             "error": str(e),
         }
+
+
+# ============================================================
+# Magasin d'événements local (analyse sans Prometheus/Grafana)
+# ============================================================
+
+
+def _require_event_store() -> EventStore:
+    store = get_event_store()
+    if store is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Event store disabled. Set EVENT_STORE_ENABLED=true to enable.",
+        )
+    return store
+
+
+@router.get("/events/schema")
+async def get_event_schema() -> Dict[str, Any]:
+    """Types d'événements, dimensions (group_by/filtres) et mesures disponibles."""
+    schema: Dict[str, Any] = _require_event_store().describe()
+    return schema
+
+
+@router.get("/events/stats")
+async def get_event_store_stats() -> Dict[str, Any]:
+    """Taille, rétention et compteurs d'ingestion/compaction du magasin."""
+    stats: Dict[str, Any] = await _require_event_store().get_stats()
+    return stats
+
+
+@router.get("/events/query")
+async def query_events(
+    kind: str,
+    measure: Optional[str] = None,
+    group_by: Optional[str] = Query(None, description="Dimensions séparées par des virgules"),
+    filter: List[str] = Query([], description="Filtres dimension=valeur (répétables)"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    since_hours: float = Query(24, gt=0, description="Fenêtre si start est omis"),
+) -> Dict[str, Any]:
+    """
+    Statistiques (count/avg/min/max/p50/p95/p99) d'une mesure par groupe.
+
+    Exemple : ``/events/query?kind=span&group_by=agent&filter=name=retrieval&since_hours=168``
+    donne le p95 de latence retrieval par agent sur la dernière semaine.
+    """
+    store = _require_event_store()
+    filters: Dict[str, str] = {}
+    for item in filter:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise HTTPException(status_code=400, detail=f"Filtre invalide: {item}")
+        filters[name.strip()] = value.strip()
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=since_hours)
+    try:
+        result: Dict[str, Any] = await store.query(
+            kind,
+            measure=measure,
+            group_by=[g.strip() for g in (group_by or "").split(",") if g.strip()],
+            filters=filters,
+            start=start,
+            end=end,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return result
@@ -5,8 +5,8 @@ SÉCURITÉ: Les endpoints sensibles (/metrics, /security/*, /performance/*)
 nécessitent une authentification admin via JWT.
 """
 
-from fastapi import APIRouter, Depends, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Any
 import psutil
@@ -20,6 +20,7 @@ from backend.core.monitoring import (
     performance_monitor,
     export_metrics_json,
 )
+from backend.core.profiler import get_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -311,10 +312,7 @@ async def reset_metrics(_: dict[str, Any] = Depends(verify_admin)) -> dict[str,
     """
     Reset toutes les métriques (utile pour tests)
     """
-    metrics.request_count.clear()
-    metrics.error_count.clear()
-    metrics.latency_sum.clear()
-    metrics.latency_count.clear()
+    metrics.reset()
 
     security_monitor.failed_login_attempts.clear()
     security_monitor.suspicious_patterns.clear()
@@ -611,3 +609,73 @@ def _format_uptime(seconds: float) -> str:
         return f"{hours}h {minutes}m"
     else:
         return f"{minutes}m"
+
+
+# ============================================================
+# 🔥 PROFILER PAR ÉCHANTILLONNAGE (opt-in, admin)
+# ============================================================
+
+
+@router.get("/profiler")
+async def get_profiler_status(
+    seconds: float | None = Query(default=None, gt=0, le=3600),
+    _: dict[str, Any] = Depends(verify_admin),
+) -> dict[str, Any]:
+    """
+    État du profiler : échantillons, surcoût, retard de la boucle asyncio
+    (sur la fenêtre ``seconds``, défaut : fenêtre complète).
+    """
+    return {
+        **get_profiler().get_stats(seconds),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@router.post("/profiler/start")
+async def start_profiler(
+    duration_s: float | None = Query(default=60.0, gt=0, le=3600),
+    hz: float | None = Query(default=None, ge=1, le=1000),
+    _: dict[str, Any] = Depends(verify_admin),
+) -> dict[str, Any]:
+    """
+    Démarre le profiler (arrêt automatique après ``duration_s``).
+    409 s'il tourne déjà (ex: mode continu via PROFILER_ENABLED).
+    """
+    profiler = get_profiler()
+    if not profiler.start(duration_s=duration_s, hz=hz):
+        raise HTTPException(status_code=409, detail="Profiler déjà démarré")
+    return {"running": True, "hz": profiler.hz, "duration_s": duration_s}
+
+
+@router.post("/profiler/stop")
+async def stop_profiler(_: dict[str, Any] = Depends(verify_admin)) -> dict[str, Any]:
+    """Arrête le profiler ; les échantillons restent lisibles."""
+    profiler = get_profiler()
+    await profiler.stop()
+    return {"running": False, "samples": profiler.stats["samples"]}
+
+
+@router.get("/profiler/profile", response_model=None)
+async def get_profile(
+    seconds: float | None = Query(default=60.0, gt=0, le=3600),
+    format: str = Query(default="speedscope", pattern="^(speedscope|collapsed)$"),
+    focus: str | None = Query(
+        default=None,
+        description="Ne garder que les piles contenant ce fragment (ex: chat/service.py)",
+    ),
+    _: dict[str, Any] = Depends(verify_admin),
+) -> dict[str, Any] | PlainTextResponse:
+    """
+    Profil des ``seconds`` dernières secondes.
+
+    - ``speedscope`` : JSON à ouvrir dans https://www.speedscope.app ;
+    - ``collapsed`` : piles repliées (flamegraph.pl, inferno, speedscope).
+
+    Les piles commencent par ``span:<nom>`` / ``agent:<id>`` quand l'échantillon
+    tombe dans une tâche tracée.
+    """
+    profiler = get_profiler()
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed_text(seconds, focus))
+    profile: dict[str, Any] = profiler.speedscope(seconds, focus)
+    return profile
@@ -2,16 +2,17 @@
 Service de synchronisation automatique inter-agents.
 
 Option A - Synchronisation automatique complète :
-- Détection automatique des changements (file watchers)
+- Détection automatique des changements (file watchers inotify, fallback polling,
+  filtrage par (size, mtime_ns) avant tout hash)
 - Consolidation intelligente (triggers basés sur seuils)
 - Scheduler en arrière-plan (tâches périodiques)
 - Monitoring du statut de sync (métriques + logs)
 """
 
 import asyncio
-import hashlib
 import json
 import logging
+import time
 from collections.abc import Callable
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
@@ -20,6 +21,8 @@ from typing import Any
 
 from prometheus_client import Counter, Gauge, Histogram
 
+from .file_watcher import FileStamp, FileWatcher, hash_file_async, stat_files
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,6 +54,12 @@ sync_check_duration = Histogram(
     buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0],
 )
 
+sync_hash_operations = Counter(
+    "sync_hash_operations_total",
+    "Vérifications de fichiers (hashed=contenu relu, skipped=stat inchangé)",
+    ["result"],
+)
+
 sync_consolidation_duration = Histogram(
     "sync_consolidation_duration_seconds",
     "Durée des consolidations",
@@ -71,6 +80,12 @@ class FileChecksum:
     checksum: str
     last_modified: datetime
     agent_owner: str | None = None
+    size: int = -1
+    mtime_ns: int = -1
+
+    def matches(self, stamp: FileStamp) -> bool:
+        """True si le stat courant correspond à celui du dernier hash."""
+        return self.size == stamp.size and self.mtime_ns == stamp.mtime_ns
 
 
 @dataclass
@@ -108,6 +123,8 @@ class AutoSyncService:
         check_interval_seconds: int = 30,
         consolidation_threshold: int = 5,
         consolidation_interval_minutes: int = 60,
+        consolidation_debounce_seconds: float = 10.0,
+        force_polling: bool = False,
     ):
         """
         Initialize AutoSyncService.
@@ -115,13 +132,19 @@ class AutoSyncService:
         Args:
             repo_root: Racine du dépôt Git
             check_interval_seconds: Intervalle de vérification des changements (défaut: 30s)
+                en mode polling ; en mode événementiel, intervalle de réconciliation = 10x
             consolidation_threshold: Nombre de changements avant consolidation (défaut: 5)
             consolidation_interval_minutes: Intervalle min entre consolidations (défaut: 60min)
+            consolidation_debounce_seconds: Silence requis après une rafale de changements
+                avant de déclencher la consolidation par seuil (défaut: 10s)
+            force_polling: Désactive inotify/watchfiles (défaut: False)
         """
         self.repo_root = repo_root
         self.check_interval = check_interval_seconds
         self.consolidation_threshold = consolidation_threshold
         self.consolidation_interval = timedelta(minutes=consolidation_interval_minutes)
+        self.consolidation_debounce = consolidation_debounce_seconds
+        self.force_polling = force_polling
 
         # Fichiers critiques à surveiller (relatifs à repo_root)
         # Nouvelle structure multi-agents (2025-10-26)
@@ -144,11 +167,15 @@ class AutoSyncService:
         self.pending_changes: list[SyncEvent] = []
         self.last_consolidation: datetime | None = None
         self.consolidation_callbacks: list[Callable[[ConsolidationTrigger], None]] = []
+        self._hash_stats = {"hashed": 0, "skipped": 0}
 
         # Tâches asyncio
         self._running = False
+        self._watcher: FileWatcher | None = None
         self._check_task: asyncio.Task[None] | None = None
         self._consolidation_task: asyncio.Task[None] | None = None
+        self._debounce_task: asyncio.Task[None] | None = None
+        self._consolidation_lock = asyncio.Lock()
 
     # ========================================================================
     # LIFECYCLE
@@ -171,6 +198,13 @@ class AutoSyncService:
         await self._initialize_checksums()
 
         # Démarrer les tâches en arrière-plan
+        self._watcher = FileWatcher(
+            self.repo_root,
+            self.watched_files,
+            poll_interval_seconds=self.check_interval,
+            rescan_interval_seconds=self.check_interval * 10,
+            force_polling=self.force_polling,
+        )
         self._running = True
         self._check_task = asyncio.create_task(self._check_loop())
         self._consolidation_task = asyncio.create_task(self._consolidation_loop())
@@ -184,21 +218,19 @@ class AutoSyncService:
 
         logger.info("Stopping AutoSyncService...")
         self._running = False
+        if self._watcher:
+            self._watcher.stop()
 
         # Annuler les tâches
-        if self._check_task:
-            self._check_task.cancel()
-            try:
-                await self._check_task
-            except asyncio.CancelledError:
-                pass
-
-        if self._consolidation_task:
-            self._consolidation_task.cancel()
+        for task in (self._check_task, self._consolidation_task, self._debounce_task):
+            if task is None:
+                continue
+            task.cancel()
             try:
-                await self._consolidation_task
+                await task
             except asyncio.CancelledError:
                 pass
+        self._debounce_task = None
 
         logger.info("AutoSyncService stopped")
 
@@ -212,31 +244,38 @@ class AutoSyncService:
             "Initializing checksums for %d watched files", len(self.watched_files)
         )
 
-        for rel_path in self.watched_files:
-            file_path = self.repo_root / rel_path
-            if file_path.exists():
-                checksum = await self._compute_checksum(file_path)
-                agent_owner = self._detect_agent_owner(rel_path)
-
-                self.checksums[rel_path] = FileChecksum(
-                    path=rel_path,
-                    checksum=checksum,
-                    last_modified=datetime.fromtimestamp(file_path.stat().st_mtime),
-                    agent_owner=agent_owner,
-                )
-
-                sync_status.labels(file_path=rel_path).set(1)  # synced
-            else:
+        stamps = await asyncio.to_thread(stat_files, self.repo_root, self.watched_files)
+        for rel_path, stamp in stamps.items():
+            if stamp is None:
                 logger.warning("Watched file not found: %s", rel_path)
                 sync_status.labels(file_path=rel_path).set(-1)  # error
+                continue
+
+            try:
+                checksum = await self._compute_checksum(self.repo_root / rel_path)
+            except FileNotFoundError:
+                continue
+            self.checksums[rel_path] = self._make_checksum(
+                rel_path, checksum, stamp, self._detect_agent_owner(rel_path)
+            )
+            sync_status.labels(file_path=rel_path).set(1)  # synced
 
     async def _compute_checksum(self, file_path: Path) -> str:
-        """Calcule le checksum MD5 d'un fichier."""
-        md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                md5.update(chunk)
-        return md5.hexdigest()
+        """Calcule le checksum BLAKE2b d'un fichier (hors event loop)."""
+        return await hash_file_async(file_path)
+
+    @staticmethod
+    def _make_checksum(
+        rel_path: str, checksum: str, stamp: FileStamp, agent_owner: str | None
+    ) -> FileChecksum:
+        return FileChecksum(
+            path=rel_path,
+            checksum=checksum,
+            last_modified=datetime.fromtimestamp(stamp.mtime_ns / 1e9),
+            agent_owner=agent_owner,
+            size=stamp.size,
+            mtime_ns=stamp.mtime_ns,
+        )
 
     def _detect_agent_owner(self, rel_path: str) -> str | None:
         """Détecte l'agent propriétaire d'un fichier (basé sur le dernier commit)."""
@@ -245,25 +284,50 @@ class AutoSyncService:
         return None
 
     async def _check_loop(self) -> None:
-        """Boucle de vérification périodique des changements."""
-        while self._running:
-            try:
-                await asyncio.sleep(self.check_interval)
+        """Boucle de vérification pilotée par le watcher (événements ou polling)."""
+        assert self._watcher is not None
+        logger.info("AutoSyncService change detection mode: %s", self._watcher.mode)
+        try:
+            async for batch in self._watcher.changes():
+                if not self._running:
+                    break
+                try:
+                    with sync_check_duration.time():
+                        detected = await self._check_for_changes(batch)
+                    if detected:
+                        self._schedule_debounced_consolidation()
+                except Exception as e:
+                    logger.error("Error in check loop: %s", e, exc_info=True)
+        except asyncio.CancelledError:
+            pass
 
-                with sync_check_duration.time():
-                    await self._check_for_changes()
+    async def _check_for_changes(self, candidates: set[str] | None = None) -> int:
+        """
+        Vérifie les changements dans les fichiers surveillés.
 
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error("Error in check loop: %s", e, exc_info=True)
+        Args:
+            candidates: Chemins signalés par le watcher (None = tous les fichiers)
+
+        Returns:
+            Nombre d'événements ajoutés à ``pending_changes``
+        """
+        rel_paths = (
+            self.watched_files
+            if candidates is None
+            else [p for p in self.watched_files if p in candidates]
+        )
+        if not rel_paths:
+            return 0
+
+        stamps = await asyncio.to_thread(stat_files, self.repo_root, rel_paths)
+        now_ns = time.time_ns()
+        detected = 0
 
-    async def _check_for_changes(self) -> None:
-        """Vérifie les changements dans les fichiers surveillés."""
-        for rel_path in self.watched_files:
+        for rel_path in rel_paths:
             file_path = self.repo_root / rel_path
+            stamp = stamps.get(rel_path)
 
-            if not file_path.exists():
+            if stamp is None:
                 # Fichier supprimé
                 if rel_path in self.checksums:
                     event = SyncEvent(
@@ -281,14 +345,28 @@ class AutoSyncService:
                     sync_changes_detected.labels(
                         file_type=self._get_file_type(rel_path), agent="unknown"
                     ).inc()
+                    detected += 1
 
                     logger.warning("File deleted: %s", rel_path)
                 continue
 
-            # Calculer nouveau checksum
-            new_checksum = await self._compute_checksum(file_path)
+            known = self.checksums.get(rel_path)
+            if known is not None and known.matches(stamp) and not stamp.is_racy(now_ns):
+                # Stat inchangé : inutile de relire le contenu
+                self._hash_stats["skipped"] += 1
+                sync_hash_operations.labels(result="skipped").inc()
+                continue
+
+            # Calculer nouveau checksum (thread pool)
+            try:
+                new_checksum = await self._compute_checksum(file_path)
+            except FileNotFoundError:
+                # Supprimé entre le stat et la lecture : traité au prochain passage
+                continue
+            self._hash_stats["hashed"] += 1
+            sync_hash_operations.labels(result="hashed").inc()
 
-            if rel_path not in self.checksums:
+            if known is None:
                 # Fichier créé
                 event = SyncEvent(
                     file_path=rel_path,
@@ -299,39 +377,33 @@ class AutoSyncService:
                     agent_owner=self._detect_agent_owner(rel_path),
                 )
                 self.pending_changes.append(event)
-
-                self.checksums[rel_path] = FileChecksum(
-                    path=rel_path,
-                    checksum=new_checksum,
-                    last_modified=datetime.fromtimestamp(file_path.stat().st_mtime),
-                    agent_owner=event.agent_owner,
+                self.checksums[rel_path] = self._make_checksum(
+                    rel_path, new_checksum, stamp, event.agent_owner
                 )
 
                 sync_status.labels(file_path=rel_path).set(0)  # out_of_sync
                 sync_changes_detected.labels(
                     file_type=self._get_file_type(rel_path), agent="unknown"
                 ).inc()
+                detected += 1
 
                 logger.info("File created: %s", rel_path)
 
-            elif new_checksum != self.checksums[rel_path].checksum:
+            elif new_checksum != known.checksum:
                 # Fichier modifié
                 event = SyncEvent(
                     file_path=rel_path,
                     event_type="modified",
                     timestamp=datetime.now(),
-                    old_checksum=self.checksums[rel_path].checksum,
+                    old_checksum=known.checksum,
                     new_checksum=new_checksum,
                     agent_owner=self._detect_agent_owner(rel_path),
                 )
                 self.pending_changes.append(event)
-
-                self.checksums[rel_path] = FileChecksum(
-                    path=rel_path,
-                    checksum=new_checksum,
-                    last_modified=datetime.fromtimestamp(file_path.stat().st_mtime),
-                    agent_owner=event.agent_owner,
+                self.checksums[rel_path] = self._make_checksum(
+                    rel_path, new_checksum, stamp, event.agent_owner
                 )
+                detected += 1
 
                 sync_status.labels(file_path=rel_path).set(0)  # out_of_sync
                 sync_changes_detected.labels(
@@ -349,6 +421,14 @@ class AutoSyncService:
                     new_checksum[:8],
                 )
 
+            else:
+                # Stat modifié mais contenu identique (touch) : mémoriser le nouveau stat
+                self.checksums[rel_path] = self._make_checksum(
+                    rel_path, new_checksum, stamp, known.agent_owner
+                )
+
+        return detected
+
     def _get_file_type(self, rel_path: str) -> str:
         """Retourne le type de fichier pour les métriques."""
         if rel_path.endswith(".md"):
@@ -378,6 +458,27 @@ class AutoSyncService:
             except Exception as e:
                 logger.error("Error in consolidation loop: %s", e, exc_info=True)
 
+    def _schedule_debounced_consolidation(self) -> None:
+        """
+        (Ré)arme le déclencheur par seuil : une rafale de changements produit
+        une seule consolidation, une fois le silence revenu.
+        """
+        if len(self.pending_changes) < self.consolidation_threshold:
+            return
+        if self._debounce_task and not self._debounce_task.done():
+            self._debounce_task.cancel()
+        self._debounce_task = asyncio.create_task(self._debounced_consolidation())
+
+    async def _debounced_consolidation(self) -> None:
+        try:
+            await asyncio.sleep(self.consolidation_debounce)
+            # Une consolidation déjà lancée ne doit pas être interrompue par un ré-armement
+            await asyncio.shield(self._check_consolidation_triggers())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Error in debounced consolidation: %s", e, exc_info=True)
+
     async def _check_consolidation_triggers(self) -> None:
         """Vérifie si une consolidation doit être déclenchée."""
         # Trigger 1 : Seuil de changements atteint
@@ -412,6 +513,10 @@ class AutoSyncService:
 
     async def _trigger_consolidation(self, trigger: ConsolidationTrigger) -> None:
         """Déclenche une consolidation."""
+        async with self._consolidation_lock:
+            await self._run_consolidation(trigger)
+
+    async def _run_consolidation(self, trigger: ConsolidationTrigger) -> None:
         logger.info(
             "Triggering consolidation (type=%s, conditions=%s, pending_changes=%d)",
             trigger.trigger_type,
@@ -577,6 +682,9 @@ class AutoSyncService:
             "checksums_tracked": len(self.checksums),
             "consolidation_threshold": self.consolidation_threshold,
             "check_interval_seconds": self.check_interval,
+            "watch_mode": self._watcher.mode if self._watcher else None,
+            "files_hashed": self._hash_stats["hashed"],
+            "hash_skipped": self._hash_stats["skipped"],
         }
 
 
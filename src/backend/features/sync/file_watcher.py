@@ -0,0 +1,176 @@
+"""
+Détection de changements pour AutoSyncService.
+
+- Mode événementiel (inotify/FSEvents via ``watchfiles``) si disponible,
+  sinon polling à intervalle fixe
+- Filtrage par empreinte ``(size, mtime_ns)`` : on ne relit un fichier que
+  si son stat a changé (ou s'il est "racily clean", cf. git)
+- Hash BLAKE2b calculé hors event loop (``asyncio.to_thread``)
+- Les rafales d'événements sont regroupées en un seul lot (debounce)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    from watchfiles import awatch
+
+    WATCHFILES_AVAILABLE = True
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    awatch = None  # type: ignore[assignment]
+    WATCHFILES_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre pendant laquelle un mtime récent ne suffit pas à prouver l'absence
+# de modification (granularité des timestamps FS, cf. "racy git").
+RACY_WINDOW_NS = 2_000_000_000
+
+_HASH_CHUNK_SIZE = 1 << 16
+
+
+@dataclass(frozen=True)
+class FileStamp:
+    """Empreinte stat d'un fichier (taille + mtime en nanosecondes)."""
+
+    size: int
+    mtime_ns: int
+
+    def is_racy(self, now_ns: int | None = None) -> bool:
+        """True si le mtime est trop récent pour se fier au stat seul."""
+        now = now_ns if now_ns is not None else time.time_ns()
+        return now - self.mtime_ns < RACY_WINDOW_NS
+
+
+def stat_files(repo_root: Path, rel_paths: Iterable[str]) -> dict[str, FileStamp | None]:
+    """Stat (bloquant) d'un lot de fichiers. ``None`` si le fichier n'existe pas."""
+    stamps: dict[str, FileStamp | None] = {}
+    for rel_path in rel_paths:
+        try:
+            st = os.stat(repo_root / rel_path)
+        except (FileNotFoundError, NotADirectoryError):
+            stamps[rel_path] = None
+            continue
+        stamps[rel_path] = FileStamp(size=st.st_size, mtime_ns=st.st_mtime_ns)
+    return stamps
+
+
+def hash_file(file_path: Path) -> str:
+    """Hash BLAKE2b-128 (bloquant) d'un fichier, 32 caractères hex."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def hash_file_async(file_path: Path) -> str:
+    """Hash calculé dans un thread pour ne pas bloquer l'event loop."""
+    return await asyncio.to_thread(hash_file, file_path)
+
+
+class FileWatcher:
+    """
+    Source de lots de fichiers potentiellement modifiés.
+
+    ``changes()`` produit soit un ensemble de chemins relatifs (mode
+    événementiel), soit ``None`` qui signifie "re-vérifier tous les fichiers"
+    (polling, ou réconciliation périodique en mode événementiel).
+    """
+
+    def __init__(
+        self,
+        repo_root: Path,
+        rel_paths: Iterable[str],
+        poll_interval_seconds: float = 30.0,
+        debounce_ms: int = 500,
+        rescan_interval_seconds: float = 300.0,
+        force_polling: bool = False,
+    ):
+        self.repo_root = repo_root
+        self.rel_paths = list(rel_paths)
+        self.poll_interval = poll_interval_seconds
+        self.debounce_ms = debounce_ms
+        self.rescan_interval = rescan_interval_seconds
+        self.force_polling = force_polling or not WATCHFILES_AVAILABLE
+        self._stop_event = asyncio.Event()
+
+        self._by_abs_path = {
+            os.path.normcase(str((repo_root / rel).resolve())): rel
+            for rel in self.rel_paths
+        }
+
+    @property
+    def mode(self) -> str:
+        return "polling" if self.force_polling else "events"
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _watch_dirs(self) -> list[Path]:
+        """Répertoires parents existants à surveiller (non récursif)."""
+        dirs: set[Path] = set()
+        for rel in self.rel_paths:
+            parent = (self.repo_root / rel).parent
+            while not parent.exists() and parent != self.repo_root:
+                parent = parent.parent
+            dirs.add(parent.resolve())
+        return sorted(dirs)
+
+    def _map_events(self, raw_changes: Iterable[tuple[object, str]]) -> set[str]:
+        changed: set[str] = set()
+        for _change, abs_path in raw_changes:
+            rel = self._by_abs_path.get(os.path.normcase(abs_path))
+            if rel is not None:
+                changed.add(rel)
+        return changed
+
+    async def _poll(self) -> AsyncIterator[set[str] | None]:
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def changes(self) -> AsyncIterator[set[str] | None]:
+        """Itère sur les lots de changements jusqu'à ``stop()``."""
+        if self.force_polling:
+            async for batch in self._poll():
+                yield batch
+            return
+
+        watch_dirs = self._watch_dirs()
+        try:
+            assert awatch is not None
+            async for raw_changes in awatch(
+                *watch_dirs,
+                debounce=self.debounce_ms,
+                stop_event=self._stop_event,
+                rust_timeout=int(self.rescan_interval * 1000),
+                yield_on_timeout=True,
+                recursive=False,
+            ):
+                if not raw_changes:
+                    # Timeout : réconciliation complète (stat-only, peu coûteuse)
+                    yield None
+                    continue
+                changed = self._map_events(raw_changes)
+                if changed:
+                    yield changed
+        except Exception as e:
+            if self._stop_event.is_set():
+                return
+            logger.warning(
+                "File watcher unavailable (%s), falling back to polling", e
+            )
+            self.force_polling = True
+            async for batch in self._poll():
+                yield batch
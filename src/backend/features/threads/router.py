@@ -1,13 +1,26 @@
 # src/backend/features/threads/router.py
-# V1.6 — Hook consolidation automatique lors archivage (Phase P0)
+# V1.7 — Export/import streamés NDJSON (+zstd)
 from typing import Any, List, Optional, cast
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from backend.core.database.manager import DatabaseManager
 from backend.core.database import queries
+from backend.features.threads.transfer import (
+    ThreadImportError,
+    import_thread_stream,
+    iter_thread_export,
+)
 from backend.shared.dependencies import get_session_context, SessionContext
+from backend.shared.ndjson_stream import (
+    ZSTD_AVAILABLE,
+    NDJSONDecodeError,
+    decode_ndjson,
+    encode_ndjson,
+    media_type_for,
+)
 
 router = APIRouter(tags=["Threads"])  # ← plus de prefix ici (monté par main.py)
 logger = logging.getLogger(__name__)
@@ -17,6 +30,11 @@ def get_db(request: Request) -> DatabaseManager:
     return cast(DatabaseManager, request.app.state.service_container.db_manager())
 
 
+def get_memory_analyzer(request: Request) -> Optional[Any]:
+    provider = getattr(request.app.state.service_container, "memory_analyzer", None)
+    return provider() if callable(provider) else None
+
+
 # ---------- Schemas ----------
 class ThreadCreate(BaseModel):
     type: str = Field(pattern="^(chat|debate)$")
@@ -255,12 +273,16 @@ async def delete_thread(
     thread_id: str,
     session: SessionContext = Depends(get_session_context),
     db: DatabaseManager = Depends(get_db),
+    analyzer: Optional[Any] = Depends(get_memory_analyzer),
 ) -> Response:
     removed = await queries.delete_thread(
         db, thread_id, session.session_id, user_id=session.user_id
     )
     if not removed:
         raise HTTPException(status_code=404, detail="Thread introuvable")
+    # Checkpoint d'analyse incrémentale : ne pas reprendre un thread supprimé
+    if analyzer is not None:
+        await analyzer.reset_checkpoint(thread_id)
     return Response(status_code=204)
 
 
@@ -364,17 +386,66 @@ async def get_docs(
     return {"docs": docs}
 
 
-@router.post("/{thread_id}/export")
+@router.post("/import", status_code=201)
+async def import_thread(
+    request: Request,
+    session: SessionContext = Depends(get_session_context),
+    db: DatabaseManager = Depends(get_db),
+) -> dict[str, Any]:
+    """
+    Import streamé d'un export NDJSON (corps brut, zstd détecté automatiquement).
+    Crée un nouveau thread ; messages insérés par lots transactionnels.
+    """
+    if not session.user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    try:
+        result: dict[str, Any] = await import_thread_stream(
+            db,
+            decode_ndjson(request.stream()),
+            session_id=session.session_id,
+            user_id=session.user_id,
+        )
+    except (ThreadImportError, NDJSONDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    return result
+
+
+@router.post("/{thread_id}/export", response_model=None)
 async def export_thread(
     thread_id: str,
     session: SessionContext = Depends(get_session_context),
     db: DatabaseManager = Depends(get_db),
-) -> dict[str, Any]:
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
+    compress: bool = Query(
+        default=False, description="Compression zstd (format ndjson uniquement)"
+    ),
+) -> dict[str, Any] | StreamingResponse:
     thread = await queries.get_thread(
         db, thread_id, session.session_id, user_id=session.user_id
     )
     if not thread:
         raise HTTPException(status_code=404, detail="Thread introuvable")
+
+    if format == "ndjson":
+        if not session.user_id:
+            raise HTTPException(status_code=401, detail="Authentication required")
+        if compress and not ZSTD_AVAILABLE:
+            raise HTTPException(status_code=501, detail="Compression zstd indisponible")
+        records = iter_thread_export(
+            db, thread, session_id=session.session_id, user_id=session.user_id
+        )
+        extension = "ndjson.zst" if compress else "ndjson"
+        return StreamingResponse(
+            encode_ndjson(records, compress=compress),
+            media_type=media_type_for(compress),
+            headers={
+                "Content-Disposition": f'attachment; filename="thread-{thread_id}.{extension}"'
+            },
+        )
+
+    # Format historique : document JSON unique (limité à 1000 messages)
     messages = await queries.get_messages(
         db,
         thread_id,
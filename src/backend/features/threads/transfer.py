@@ -0,0 +1,212 @@
+# src/backend/features/threads/transfer.py
+"""
+Export / import streamés d'un thread au format NDJSON (optionnellement zstd).
+
+Format (un objet JSON par ligne, champ ``type``) :
+    {"type": "header", "kind": "thread", "version": 1, "exported_at": ...}
+    {"type": "thread", "data": {...}}
+    {"type": "message", "data": {...}}      (ordre chronologique, N lignes)
+    {"type": "doc", "data": {...}}          (documents liés)
+    {"type": "end", "counts": {"messages": N, "docs": M}}
+
+L'export pagine les messages par keyset ; l'import insère par lots dans des
+transactions. La mémoire reste bornée par la taille d'une page / d'un lot.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import AsyncIterable, AsyncIterator
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from backend.core.database import queries
+from backend.core.database.manager import DatabaseManager
+from backend.shared.ndjson_stream import NDJSON_FORMAT_VERSION
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PAGE_SIZE = 500
+IMPORT_BATCH_SIZE = 500
+
+
+class ThreadImportError(ValueError):
+    """Flux d'import invalide (en-tête manquant, enregistrement inattendu...)."""
+
+
+async def iter_thread_export(
+    db: DatabaseManager,
+    thread: dict[str, Any],
+    *,
+    session_id: Optional[str],
+    user_id: str,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> AsyncIterator[dict[str, Any]]:
+    """Produit les enregistrements d'export d'un thread (déjà autorisé)."""
+    thread_id = thread["id"]
+    yield {
+        "type": "header",
+        "kind": "thread",
+        "version": NDJSON_FORMAT_VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    }
+    yield {"type": "thread", "data": thread}
+
+    message_count = 0
+    async for page in queries.iter_messages_keyset(
+        db, thread_id, session_id, user_id=user_id, page_size=page_size
+    ):
+        for message in page:
+            message_count += 1
+            yield {"type": "message", "data": message}
+
+    docs = await queries.get_thread_docs(db, thread_id, session_id, user_id=user_id)
+    for doc in docs:
+        yield {"type": "doc", "data": doc}
+
+    yield {"type": "end", "counts": {"messages": message_count, "docs": len(docs)}}
+
+
+def _decode_meta(meta: Any) -> Optional[dict[str, Any]]:
+    if meta is None or isinstance(meta, dict):
+        return meta
+    try:
+        decoded = json.loads(meta)
+    except (TypeError, ValueError):
+        return None
+    return decoded if isinstance(decoded, dict) else None
+
+
+async def _existing_doc_ids(
+    db: DatabaseManager, doc_ids: list[int], user_id: str
+) -> list[int]:
+    if not doc_ids:
+        return []
+    placeholders = ",".join("?" for _ in doc_ids)
+    rows = await db.fetch_all(
+        f"SELECT id FROM documents WHERE user_id = ? AND id IN ({placeholders})",
+        (user_id, *doc_ids),
+    )
+    return [int(r["id"]) for r in rows]
+
+
+async def import_thread_stream(
+    db: DatabaseManager,
+    records: AsyncIterable[dict[str, Any]],
+    *,
+    session_id: Optional[str],
+    user_id: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict[str, Any]:
+    """
+    Recrée un thread à partir d'un flux d'export (nouvel identifiant).
+
+    Les messages sont insérés par lots (une transaction par lot). En cas
+    d'erreur, le lot courant est annulé et le thread partiellement importé
+    supprimé. Les documents liés ne sont rattachés que s'ils existent pour
+    cet utilisateur.
+    """
+    thread_id: Optional[str] = None
+    header_seen = False
+    batch: list[dict[str, Any]] = []
+    doc_ids: list[int] = []
+    imported = 0
+    last_message_at: Optional[str] = None
+
+    async def _flush() -> None:
+        nonlocal imported, last_message_at
+        if not batch:
+            return
+        assert thread_id is not None
+        imported += await queries.insert_messages_bulk(
+            db, thread_id, session_id, batch, user_id=user_id
+        )
+        await db.commit()
+        last_message_at = max(
+            filter(None, [last_message_at, *(m.get("created_at") for m in batch)]),
+            default=last_message_at,
+        )
+        batch.clear()
+
+    try:
+        async for record in records:
+            kind = record.get("type")
+            if not header_seen:
+                if kind != "header" or record.get("kind") != "thread":
+                    raise ThreadImportError("En-tête d'export de thread manquant")
+                if int(record.get("version") or 0) > NDJSON_FORMAT_VERSION:
+                    raise ThreadImportError(
+                        f"Version d'export non supportée: {record.get('version')}"
+                    )
+                header_seen = True
+                continue
+
+            if kind == "thread":
+                if thread_id is not None:
+                    raise ThreadImportError("Un seul thread par flux d'import")
+                data = record.get("data") or {}
+                thread_type = data.get("type")
+                if thread_type not in ("chat", "debate"):
+                    thread_type = "chat"
+                thread_id = await queries.create_thread(
+                    db,
+                    session_id,
+                    user_id=user_id,
+                    type_=thread_type,
+                    title=data.get("title"),
+                    agent_id=data.get("agent_id"),
+                    meta=_decode_meta(data.get("meta")),
+                )
+            elif kind == "message":
+                if thread_id is None:
+                    raise ThreadImportError("Message reçu avant l'enregistrement thread")
+                batch.append(record.get("data") or {})
+                if len(batch) >= batch_size:
+                    await _flush()
+            elif kind == "doc":
+                doc_id = (record.get("data") or {}).get("doc_id")
+                if doc_id is not None:
+                    doc_ids.append(int(doc_id))
+            elif kind == "end":
+                break
+            else:
+                logger.debug(f"[threads/import] Enregistrement ignoré: {kind}")
+
+        if thread_id is None:
+            raise ThreadImportError("Aucun thread dans le flux d'import")
+        await _flush()
+
+        if imported:
+            await db.execute(
+                "UPDATE threads SET message_count = ?, last_message_at = ?, updated_at = ? WHERE id = ?",
+                (
+                    imported,
+                    last_message_at,
+                    datetime.now(timezone.utc).isoformat(),
+                    thread_id,
+                ),
+                commit=True,
+            )
+        linked = await _existing_doc_ids(db, doc_ids, user_id)
+        if linked:
+            await queries.append_thread_docs(
+                db, thread_id, session_id, linked, user_id=user_id
+            )
+    except Exception:
+        await db.rollback()
+        if thread_id is not None:
+            await queries.delete_thread(
+                db, thread_id, session_id, user_id=user_id, hard_delete=True
+            )
+        raise
+
+    logger.info(
+        f"[threads/import] Thread {thread_id} importé: {imported} messages, {len(linked)} docs"
+    )
+    return {
+        "thread_id": thread_id,
+        "messages": imported,
+        "docs_linked": len(linked),
+        "docs_skipped": len(doc_ids) - len(linked),
+    }
@@ -1,13 +1,14 @@
 # src/backend/features/tracing/router.py
-# V1.0 - Tracing REST API for ÉMERGENCE V8
+# V1.1 - Tracing REST API for ÉMERGENCE V8
 #
 # Endpoints:
 # - GET /api/traces/recent : Retourne les 100 derniers spans (debug/monitoring)
 # - GET /api/traces/stats : Statistiques agrégées (count par span_name, avg duration)
+# - GET /api/traces/breakdown : Latence par étape des traces (lentes vs toutes)
 
 import logging
 from collections import defaultdict
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Query
 
@@ -29,14 +30,15 @@ async def get_recent_traces(
         limit: Nombre de spans à retourner (1-1000, défaut 100)
 
     Returns:
-        Liste de spans avec leurs métadonnées (span_id, name, trace_id, duration, status, etc.)
+        Liste de spans avec leurs métadonnées (span_id, name, trace_id, duration, status, etc.) ;
+        ids hex, identiques à ceux de l'export OTLP
 
     Example response:
         [
             {
-                "span_id": "abc123",
+                "span_id": "000000000000002a",
                 "name": "retrieval",
-                "trace_id": "xyz789",
+                "trace_id": "5f3c9a1e7b2d40c8000000000000000b",
                 "parent_id": null,
                 "start_time": 1698765432.123,
                 "end_time": 1698765432.456,
@@ -123,6 +125,7 @@ async def get_trace_stats() -> Dict[str, Any]:
             "by_name": by_name_stats,
             "by_status": dict(by_status),
             "by_agent": dict(by_agent),
+            "sampling": mgr.get_stats(),
         }
 
         logger.debug(f"[Tracing API] Generated stats for {len(spans)} spans")
@@ -137,3 +140,37 @@ async def get_trace_stats() -> Dict[str, Any]:
             "by_agent": {},
             "error": str(e),
         }
+
+
+@router.get("/breakdown")
+async def get_trace_breakdown(
+    root: Optional[str] = Query(
+        default=None,
+        description="Span dont on décompose les enfants (défaut : racines, ex: chat_turn)",
+    ),
+    slow_ms: Optional[float] = Query(default=None, ge=0),
+) -> Dict[str, Any]:
+    """
+    Décompose la latence des traces conservées par étape (spans enfants directs).
+
+    Example response (root=chat_turn):
+        {
+            "root": "chat_turn",
+            "traces": 40,
+            "slow_ms": 8000.0,
+            "slow_traces": 3,
+            "stages": {
+                "llm_generate": {"count": 40, "avg_ms": 3210.4, "p95_ms": 7480.0, "share": 0.71},
+                "retrieval": {"count": 40, "avg_ms": 910.2, "p95_ms": 2960.1, "share": 0.2}
+            },
+            "slow_stages": {...},
+            "dominant_in_slow": {"retrieval": 2, "llm_generate": 1}
+        }
+
+    Avec ``root=retrieval`` : répartition entre sous-étapes du retrieval
+    (``retrieval.documents``, ``retrieval.vector_query``, ...).
+    """
+    breakdown: Dict[str, Any] = get_trace_manager().latency_breakdown(
+        root_name=root, slow_ms=slow_ms
+    )
+    return breakdown
@@ -26,8 +26,17 @@ class UsageGuardian:
     Génère rapport JSON pour dashboard admin
     """
 
-    def __init__(self, repository: UsageRepository):
+    def __init__(self, repository: UsageRepository, telemetry: Any = None):
         self.repository = repository
+        # UsageTelemetry : si présent, le rapport lit les buckets minute
+        # pré-agrégés par le flusher plutôt que les lignes brutes
+        self.telemetry = telemetry
+
+    def _rollup_source(self) -> Any:
+        sink = getattr(self.telemetry, "sink", None)
+        if sink is not None and hasattr(sink, "get_usage_rollup"):
+            return sink
+        return None
 
     async def generate_report(
         self,
@@ -58,50 +67,24 @@ class UsageGuardian:
                 f"{start_time.isoformat()} -> {end_time.isoformat()}"
             )
 
-            # Récupérer données brutes
-            feature_usages = await self.repository.get_feature_usage_period(
-                start_time, end_time
-            )
-            user_errors = await self.repository.get_user_errors_period(
-                start_time, end_time
-            )
-
-            # Agréger par utilisateur
-            user_stats: defaultdict[str, dict[str, Any]] = defaultdict(
-                lambda: {
-                    "email": "",
-                    "requests_count": 0,
-                    "errors_count": 0,
-                    "features_used": set(),
-                    "errors": [],
-                    "total_time_ms": 0,
-                }
-            )
-
-            # Process feature usage
-            for usage in feature_usages:
-                email = usage.user_email or "anonymous"
-                user = user_stats[email]
-                user["email"] = email
-                user["requests_count"] += 1
-                user["features_used"].add(usage.feature_name)
-                if usage.duration_ms:
-                    user["total_time_ms"] += usage.duration_ms
-
-            # Process errors
-            for error in user_errors:
-                email = error.user_email or "anonymous"
-                user = user_stats[email]
-                user["email"] = email
-                user["errors_count"] += 1
-                user["errors"].append(
-                    {
-                        "endpoint": error.endpoint,
-                        "error": error.error_message,
-                        "timestamp": error.timestamp.isoformat(),
-                        "code": error.error_code,
-                    }
-                )
+            source = self._rollup_source()
+            if source is not None:
+                await self.telemetry.flush()
+                (
+                    user_stats,
+                    total_requests,
+                    total_errors,
+                    top_features,
+                    error_breakdown,
+                ) = await self._collect_from_rollups(source, start_time, end_time)
+            else:
+                (
+                    user_stats,
+                    total_requests,
+                    total_errors,
+                    top_features,
+                    error_breakdown,
+                ) = await self._collect_from_repository(start_time, end_time)
 
             # Construire liste utilisateurs
             users_list = []
@@ -119,18 +102,6 @@ class UsageGuardian:
 
             # Stats globales
             active_users = len(user_stats)
-            total_requests = len(feature_usages)
-            total_errors = len(user_errors)
-
-            # Top features
-            top_features = await self.repository.get_top_features(
-                start_time, end_time, limit=10
-            )
-
-            # Error breakdown
-            error_breakdown = await self.repository.get_error_breakdown(
-                start_time, end_time
-            )
 
             # Construire rapport
             report = UsageReport(
@@ -168,6 +139,112 @@ class UsageGuardian:
                 "error": str(e),
             }
 
+    @staticmethod
+    def _new_user_stats() -> defaultdict[str, dict[str, Any]]:
+        return defaultdict(
+            lambda: {
+                "email": "",
+                "requests_count": 0,
+                "errors_count": 0,
+                "features_used": set(),
+                "errors": [],
+                "total_time_ms": 0,
+            }
+        )
+
+    @staticmethod
+    def _add_errors(
+        user_stats: defaultdict[str, dict[str, Any]], user_errors: list[Any]
+    ) -> None:
+        for error in user_errors:
+            email = error.user_email or "anonymous"
+            user = user_stats[email]
+            user["email"] = email
+            user["errors_count"] += 1
+            user["errors"].append(
+                {
+                    "endpoint": error.endpoint,
+                    "error": error.error_message,
+                    "timestamp": error.timestamp.isoformat(),
+                    "code": error.error_code,
+                }
+            )
+
+    async def _collect_from_repository(
+        self, start_time: datetime, end_time: datetime
+    ) -> tuple[Any, int, int, list[dict[str, Any]], dict[str, int]]:
+        """Agrégation depuis les lignes brutes de la base applicative"""
+        feature_usages = await self.repository.get_feature_usage_period(
+            start_time, end_time
+        )
+        user_errors = await self.repository.get_user_errors_period(
+            start_time, end_time
+        )
+
+        user_stats = self._new_user_stats()
+        for usage in feature_usages:
+            email = usage.user_email or "anonymous"
+            user = user_stats[email]
+            user["email"] = email
+            user["requests_count"] += 1
+            user["features_used"].add(usage.feature_name)
+            if usage.duration_ms:
+                user["total_time_ms"] += usage.duration_ms
+        self._add_errors(user_stats, user_errors)
+
+        top_features = await self.repository.get_top_features(
+            start_time, end_time, limit=10
+        )
+        error_breakdown = await self.repository.get_error_breakdown(
+            start_time, end_time
+        )
+        return (
+            user_stats,
+            len(feature_usages),
+            len(user_errors),
+            top_features,
+            error_breakdown,
+        )
+
+    async def _collect_from_rollups(
+        self, source: Any, start_time: datetime, end_time: datetime
+    ) -> tuple[Any, int, int, list[dict[str, Any]], dict[str, int]]:
+        """
+        Agrégation depuis les buckets minute de la télémétrie (granularité :
+        la minute de ``start_time`` est incluse entière)
+        """
+        rollup = await source.get_usage_rollup(start_time, end_time)
+        user_errors = await source.get_user_errors_period(start_time, end_time)
+        error_breakdown = await source.get_error_rollup(start_time, end_time)
+
+        user_stats = self._new_user_stats()
+        feature_counts: defaultdict[str, int] = defaultdict(int)
+        total_requests = 0
+        for row in rollup:
+            email = row["user_email"] or "anonymous"
+            user = user_stats[email]
+            user["email"] = email
+            user["requests_count"] += row["requests"]
+            user["features_used"].add(row["feature_name"])
+            user["total_time_ms"] += row["duration_ms"]
+            feature_counts[row["feature_name"]] += row["requests"]
+            total_requests += row["requests"]
+        self._add_errors(user_stats, user_errors)
+
+        top_features = [
+            {"name": name, "count": count}
+            for name, count in sorted(
+                feature_counts.items(), key=lambda item: item[1], reverse=True
+            )[:10]
+        ]
+        return (
+            user_stats,
+            total_requests,
+            sum(error_breakdown.values()),
+            top_features,
+            error_breakdown,
+        )
+
     async def save_report_to_file(
         self,
         report: dict[str, Any],
@@ -15,6 +15,7 @@ from backend.shared.dependencies import require_admin_claims
 
 from .repository import UsageRepository
 from .guardian import UsageGuardian
+from .telemetry import get_usage_telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +68,7 @@ async def get_usage_summary(
             f"Admin {admin_claims.get('email')} demande rapport usage ({hours}h)"
         )
 
-        guardian = UsageGuardian(repository)
+        guardian = UsageGuardian(repository, telemetry=get_usage_telemetry())
         report = await guardian.generate_report(hours=hours)
 
         return report
@@ -102,7 +103,7 @@ async def generate_usage_report_file(
             f"Admin {admin_claims.get('email')} génère rapport fichier ({hours}h)"
         )
 
-        guardian = UsageGuardian(repository)
+        guardian = UsageGuardian(repository, telemetry=get_usage_telemetry())
         report, path = await guardian.generate_and_save_report(hours=hours)
 
         return {
@@ -131,10 +132,12 @@ async def usage_tracking_health() -> dict[str, Any]:
     """
     try:
         _ = _get_usage_repository()  # Test repository disponible
+        telemetry = get_usage_telemetry()
         return {
             "status": "healthy",
             "service": "usage-tracking",
             "repository": "available",
+            "telemetry": telemetry.get_stats() if telemetry else None,
         }
     except Exception as e:
         return {
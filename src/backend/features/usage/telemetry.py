@@ -0,0 +1,419 @@
+# src/backend/features/usage/telemetry.py
+"""
+Télémétrie d'usage bufferisée (feature usage + erreurs utilisateur).
+
+Avant : une tâche asyncio par requête HTTP, chacune faisant un INSERT sur la
+connexion SQLite principale (en concurrence avec les écritures du chat).
+
+Maintenant :
+- ``UsageTelemetry.record_*`` pousse l'événement dans un buffer borné en
+  mémoire (O(1), sans await, ``backend.core.buffered_flusher``) ; buffer
+  plein → événement abandonné et compté ;
+- un flusher unique vide le buffer toutes les ``flush_interval_ms`` ou dès
+  ``batch_size`` événements, et écrit le lot d'un coup (``executemany``)
+  dans un sink dédié ;
+- le flusher pré-agrège aussi des buckets par minute (requêtes, durée,
+  erreurs par utilisateur/feature) lus par ``UsageGuardian`` ;
+- ``stop()`` vide le buffer : appelé au shutdown du lifespan.
+
+Le sink par défaut est un fichier SQLite séparé (``SQLiteTelemetrySink``) ;
+tout objet exposant ``write_batch`` peut le remplacer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Tuple, Union
+
+from backend.core.buffered_flusher import DROP_STATS, BufferedFlusher
+
+from .models import FeatureUsage, UserError
+
+try:
+    from prometheus_client import Counter
+
+    _EVENTS_DROPPED = Counter(
+        "usage_telemetry_dropped_total",
+        "Usage telemetry events dropped (buffer saturated or sink failure)",
+        ["reason"],
+    )
+    _EVENTS_FLUSHED = Counter(
+        "usage_telemetry_flushed_total",
+        "Usage telemetry events written to the sink",
+    )
+except (ImportError, ValueError):
+    _EVENTS_DROPPED = None  # type: ignore[assignment]
+    _EVENTS_FLUSHED = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+
+TelemetryEvent = Union[FeatureUsage, UserError]
+# (bucket_start, user_email, feature_name, requests, failures, duration_ms)
+UsageBucketRow = Tuple[int, str, str, int, int, int]
+# (bucket_start, user_email, error_code, errors)
+ErrorBucketRow = Tuple[int, str, int, int]
+
+# Raison d'abandon (label Prometheus) -> compteur de ``UsageTelemetry.stats``
+_DROP_STATS = {**DROP_STATS, "sink_error": "dropped_sink_error"}
+
+
+def bucket_start(ts: datetime) -> int:
+    """Début (epoch, secondes) du bucket minute contenant ``ts``."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    epoch = int(ts.timestamp())
+    return epoch - epoch % BUCKET_SECONDS
+
+
+class TelemetrySink(Protocol):
+    def write_batch(
+        self,
+        usages: List[FeatureUsage],
+        errors: List[UserError],
+        usage_buckets: List[UsageBucketRow],
+        error_buckets: List[ErrorBucketRow],
+    ) -> None: ...
+
+
+def aggregate_batch(
+    usages: List[FeatureUsage], errors: List[UserError]
+) -> Tuple[List[UsageBucketRow], List[ErrorBucketRow]]:
+    """Pré-agrège un lot d'événements en buckets minute."""
+    usage_acc: Dict[Tuple[int, str, str], List[int]] = {}
+    for usage in usages:
+        key = (bucket_start(usage.timestamp), usage.user_email or "anonymous", usage.feature_name)
+        acc = usage_acc.setdefault(key, [0, 0, 0])
+        acc[0] += 1
+        acc[1] += 0 if usage.success else 1
+        acc[2] += usage.duration_ms or 0
+    error_acc: Dict[Tuple[int, str, int], int] = {}
+    for error in errors:
+        key_e = (bucket_start(error.timestamp), error.user_email or "anonymous", error.error_code)
+        error_acc[key_e] = error_acc.get(key_e, 0) + 1
+    return (
+        [(*k, v[0], v[1], v[2]) for k, v in usage_acc.items()],
+        [(*k, v) for k, v in error_acc.items()],
+    )
+
+
+class SQLiteTelemetrySink:
+    """Sink SQLite dédié (fichier séparé de la base applicative)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS feature_usage (
+                id TEXT PRIMARY KEY,
+                user_email TEXT NOT NULL,
+                feature_name TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                method TEXT NOT NULL DEFAULT 'GET',
+                timestamp TEXT NOT NULL,
+                success BOOLEAN NOT NULL DEFAULT 1,
+                error_message TEXT,
+                duration_ms INTEGER,
+                status_code INTEGER NOT NULL DEFAULT 200
+            );
+            CREATE TABLE IF NOT EXISTS user_errors (
+                id TEXT PRIMARY KEY,
+                user_email TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                method TEXT NOT NULL,
+                error_type TEXT NOT NULL,
+                error_code INTEGER NOT NULL,
+                error_message TEXT NOT NULL,
+                stack_trace TEXT,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tel_user_errors_timestamp
+                ON user_errors(timestamp);
+            CREATE TABLE IF NOT EXISTS usage_minute_buckets (
+                bucket_start INTEGER NOT NULL,
+                user_email TEXT NOT NULL,
+                feature_name TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                duration_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket_start, user_email, feature_name)
+            );
+            CREATE TABLE IF NOT EXISTS error_minute_buckets (
+                bucket_start INTEGER NOT NULL,
+                user_email TEXT NOT NULL,
+                error_code INTEGER NOT NULL,
+                errors INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket_start, user_email, error_code)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def write_batch(
+        self,
+        usages: List[FeatureUsage],
+        errors: List[UserError],
+        usage_buckets: List[UsageBucketRow],
+        error_buckets: List[ErrorBucketRow],
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO feature_usage (id, user_email, feature_name, "
+                "endpoint, method, timestamp, success, error_message, duration_ms, "
+                "status_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        u.id,
+                        u.user_email or "anonymous",
+                        u.feature_name,
+                        u.endpoint,
+                        u.method,
+                        u.timestamp.isoformat(),
+                        int(u.success),
+                        u.error_message,
+                        u.duration_ms,
+                        u.status_code,
+                    )
+                    for u in usages
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO user_errors (id, user_email, endpoint, method, "
+                "error_type, error_code, error_message, stack_trace, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        e.id,
+                        e.user_email or "anonymous",
+                        e.endpoint,
+                        e.method,
+                        e.error_type,
+                        e.error_code,
+                        e.error_message,
+                        e.stack_trace,
+                        e.timestamp.isoformat(),
+                    )
+                    for e in errors
+                ],
+            )
+            self._conn.executemany(
+                "INSERT INTO usage_minute_buckets (bucket_start, user_email, "
+                "feature_name, requests, failures, duration_ms) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(bucket_start, user_email, feature_name) DO UPDATE SET "
+                "requests = requests + excluded.requests, "
+                "failures = failures + excluded.failures, "
+                "duration_ms = duration_ms + excluded.duration_ms",
+                usage_buckets,
+            )
+            self._conn.executemany(
+                "INSERT INTO error_minute_buckets (bucket_start, user_email, "
+                "error_code, errors) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(bucket_start, user_email, error_code) DO UPDATE SET "
+                "errors = errors + excluded.errors",
+                error_buckets,
+            )
+
+    # ---- Lecture (UsageGuardian) ----
+
+    def _fetch_all(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    async def get_usage_rollup(
+        self, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        """Requêtes / échecs / durée par (utilisateur, feature) sur la période."""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT user_email, feature_name, SUM(requests), SUM(failures), "
+            "SUM(duration_ms) FROM usage_minute_buckets "
+            "WHERE bucket_start >= ? AND bucket_start < ? "
+            "GROUP BY user_email, feature_name",
+            (bucket_start(start), int(end.timestamp())),
+        )
+        return [
+            {
+                "user_email": row[0],
+                "feature_name": row[1],
+                "requests": int(row[2]),
+                "failures": int(row[3]),
+                "duration_ms": int(row[4]),
+            }
+            for row in rows
+        ]
+
+    async def get_error_rollup(
+        self, start: datetime, end: datetime
+    ) -> Dict[str, int]:
+        """Nombre d'erreurs par code HTTP sur la période."""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT error_code, SUM(errors) AS total FROM error_minute_buckets "
+            "WHERE bucket_start >= ? AND bucket_start < ? "
+            "GROUP BY error_code ORDER BY total DESC",
+            (bucket_start(start), int(end.timestamp())),
+        )
+        return {str(row[0]): int(row[1]) for row in rows}
+
+    async def get_user_errors_period(
+        self, start: datetime, end: datetime
+    ) -> List[UserError]:
+        """Détail des erreurs (rares) pour le rapport par utilisateur."""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT id, user_email, endpoint, method, error_type, error_code, "
+            "error_message, stack_trace, timestamp FROM user_errors "
+            "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp ASC",
+            (start.isoformat(), end.isoformat()),
+        )
+        return [
+            UserError(
+                id=row[0],
+                user_email=row[1],
+                endpoint=row[2],
+                method=row[3],
+                error_type=row[4],
+                error_code=row[5],
+                error_message=row[6],
+                stack_trace=row[7],
+                timestamp=datetime.fromisoformat(row[8]),
+            )
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class UsageTelemetry:
+    """Buffer borné + flusher unique (``BufferedFlusher``) vers un ``TelemetrySink``."""
+
+    def __init__(
+        self,
+        sink: TelemetrySink,
+        *,
+        capacity: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_ms: int = 1000,
+    ) -> None:
+        self.sink = sink
+        self._queue: BufferedFlusher[TelemetryEvent] = BufferedFlusher(
+            self._write_batch,
+            name="usage-telemetry-flusher",
+            capacity=capacity,
+            batch_size=batch_size,
+            flush_interval=max(1, flush_interval_ms) / 1000.0,
+        )
+        self.stats: Dict[str, int] = {
+            "recorded": 0,
+            "flushed": 0,
+            "dropped_full": 0,
+            "dropped_closed": 0,
+            "dropped_sink_error": 0,
+            "flushes": 0,
+        }
+
+    @property
+    def capacity(self) -> int:
+        capacity: int = self._queue.capacity
+        return capacity
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def record_feature_usage(self, usage: FeatureUsage) -> bool:
+        return self._record(usage)
+
+    def record_user_error(self, error: UserError) -> bool:
+        return self._record(error)
+
+    def _record(self, event: TelemetryEvent) -> bool:
+        """Ajoute l'événement sans bloquer ; False s'il a été abandonné."""
+        refused = self._queue.append(event)
+        if refused is not None:
+            self._drop(refused, 1)
+            return False
+        self.stats["recorded"] += 1
+        return True
+
+    def _drop(self, reason: str, count: int) -> None:
+        stat = _DROP_STATS[reason]
+        self.stats[stat] += count
+        if _EVENTS_DROPPED is not None:
+            _EVENTS_DROPPED.labels(reason=reason).inc(count)
+
+    async def _write_batch(self, batch: List[TelemetryEvent]) -> bool:
+        usages = [e for e in batch if isinstance(e, FeatureUsage)]
+        errors = [e for e in batch if isinstance(e, UserError)]
+        usage_buckets, error_buckets = aggregate_batch(usages, errors)
+        try:
+            await asyncio.to_thread(
+                self.sink.write_batch, usages, errors, usage_buckets, error_buckets
+            )
+        except Exception as e:
+            self._drop("sink_error", len(batch))
+            logger.warning(f"[UsageTelemetry] Lot abandonné ({len(batch)}): {e}")
+            return False
+        self.stats["flushed"] += len(batch)
+        self.stats["flushes"] += 1
+        if _EVENTS_FLUSHED is not None:
+            _EVENTS_FLUSHED.inc(len(batch))
+        return True
+
+    async def flush(self) -> int:
+        """Écrit tout le buffer dans le sink (par lots de ``batch_size``)."""
+        written: int = await self._queue.flush()
+        return written
+
+    async def stop(self) -> None:
+        """Arrête le flusher et vide le buffer (shutdown garanti)."""
+        await self._queue.stop()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "pending": len(self._queue), "capacity": self.capacity}
+
+
+_telemetry: Optional[UsageTelemetry] = None
+
+
+def get_usage_telemetry() -> Optional[UsageTelemetry]:
+    """
+    Instance globale (None si désactivée ou indisponible).
+
+    Env: USAGE_TELEMETRY_ENABLED (défaut true), USAGE_TELEMETRY_DB_PATH
+    (défaut ./data/usage_telemetry.db), USAGE_TELEMETRY_BUFFER_SIZE (10000),
+    USAGE_TELEMETRY_BATCH_SIZE (500), USAGE_TELEMETRY_FLUSH_MS (1000).
+    """
+    global _telemetry
+    if _telemetry is not None:
+        return _telemetry
+    if os.getenv("USAGE_TELEMETRY_ENABLED", "true").lower() != "true":
+        return None
+    path = os.getenv("USAGE_TELEMETRY_DB_PATH", "./data/usage_telemetry.db")
+    try:
+        _telemetry = UsageTelemetry(
+            SQLiteTelemetrySink(path),
+            capacity=int(os.getenv("USAGE_TELEMETRY_BUFFER_SIZE", "10000")),
+            batch_size=int(os.getenv("USAGE_TELEMETRY_BATCH_SIZE", "500")),
+            flush_interval_ms=int(os.getenv("USAGE_TELEMETRY_FLUSH_MS", "1000")),
+        )
+        logger.info(f"[UsageTelemetry] Sink SQLite: {path}")
+    except Exception as e:
+        logger.warning(f"[UsageTelemetry] Télémétrie indisponible ({path}): {e}")
+        return None
+    return _telemetry
@@ -18,6 +18,10 @@ class VoiceServiceConfig(BaseModel):
     stt_model: str = Field(
         default="whisper-1", description="Modèle utilisé pour le STT."
     )
+    stt_base_url: str = Field(
+        default="https://api.openai.com/v1",
+        description="URL de base de l'API STT (surchargeable pour tests/proxy).",
+    )
 
     tts_provider: str = Field(
         default="elevenlabs", description="Fournisseur du service Text-to-Speech."
@@ -31,6 +35,27 @@ class VoiceServiceConfig(BaseModel):
         description="ID de la voix spécifique pour le TTS (fallback).",
     )
 
+    tts_base_url: str = Field(
+        default="https://api.elevenlabs.io/v1",
+        description="URL de base de l'API TTS (surchargeable pour tests/proxy).",
+    )
+
+    # Pipeline phrase par phrase (LLM streamé → TTS par phrase)
+    pipeline_enabled: bool = Field(
+        default=True,
+        description="Synthétise chaque phrase dès qu'elle est générée au lieu d'attendre la réponse complète.",
+    )
+    tts_max_concurrency: int = Field(
+        default=2,
+        ge=1,
+        description="Nombre max de requêtes TTS simultanées en mode pipeline.",
+    )
+    sentence_min_chars: int = Field(
+        default=40,
+        ge=1,
+        description="Longueur min d'un segment envoyé au TTS (les fragments plus courts sont fusionnés).",
+    )
+
     # Mapping agent_id → voice_id pour voix différentes par agent
     agent_voices: Dict[str, str] = Field(
         default_factory=dict,
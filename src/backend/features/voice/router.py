@@ -1,5 +1,5 @@
 # src/backend/features/voice/router.py
-# V1.2 - Fix DI container leak (utilise app.state au lieu de créer nouveau container)
+# V1.3 - Mode pipeline phrase par phrase + audio envoyé en frames binaires
 import logging
 from typing import AsyncGenerator
 
@@ -66,10 +66,16 @@ async def voice_chat_ws(
     websocket: WebSocket,
     agent_name: str,
     session_id: str = Query(...),
+    pipelined: bool | None = Query(None),
     service: VoiceService = Depends(_ensure_voice_service),
     user_id: str = Depends(dependencies.get_user_id_from_websocket),
 ) -> None:
-    """Interaction vocale bi-directionnelle entre un utilisateur et un agent."""
+    """
+    Interaction vocale bi-directionnelle entre un utilisateur et un agent.
+
+    Les chunks audio sont envoyés en frames binaires (précédées du message
+    texte de leur phrase), le reste en JSON.
+    """
     await websocket.accept()
     logger.info(
         "WebSocket connecte pour l'agent '%s' (Session: %s, User: %s)",
@@ -84,10 +90,14 @@ async def voice_chat_ws(
             audio_stream=audio_stream,
             agent_name=agent_name,
             session_id=session_id,
+            pipelined=pipelined,
         )
 
         async for response_part in response_generator:
-            await websocket.send_json(response_part)
+            if response_part.get("type") == "audio":
+                await websocket.send_bytes(response_part["data"])
+            else:
+                await websocket.send_json(response_part)
 
     except HTTPException as exc:
         logger.warning(f"Erreur de dependance WebSocket: {exc}")
@@ -0,0 +1,66 @@
+# src/backend/features/voice/segmenter.py
+# V1.0 - Découpage incrémental du flux LLM en phrases pour le TTS pipeliné
+
+import re
+from typing import List
+
+# Fin de phrase : ponctuation forte (+ guillemets/parenthèses fermants) suivie d'un blanc,
+# ou saut de ligne (listes, paragraphes).
+_BOUNDARY_RE = re.compile(r"[.!?…]+[\"'»)\]]*\s+|\n+")
+
+# Abréviations courantes qui ne terminent pas une phrase.
+_ABBREVIATIONS = frozenset(
+    {"m.", "mme.", "mlle.", "dr.", "p.", "ex.", "etc.", "cf.", "vs.", "env."}
+)
+
+
+class SentenceSegmenter:
+    """
+    Accumule des tokens LLM et émet des phrases complètes dès qu'une
+    frontière est rencontrée. Les fragments trop courts sont fusionnés
+    avec la phrase suivante pour éviter des requêtes TTS minuscules
+    (coût + prosodie hachée).
+    """
+
+    def __init__(self, min_chars: int = 40, max_chars: int = 400):
+        self.min_chars = max(1, min_chars)
+        self.max_chars = max(self.min_chars, max_chars)
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        """Ajoute un token et retourne les phrases désormais complètes."""
+        if not token:
+            return []
+        self._buffer += token
+        sentences: List[str] = []
+        search_from = 0
+
+        while True:
+            match = _BOUNDARY_RE.search(self._buffer, search_from)
+            if match is None:
+                break
+            candidate = self._buffer[: match.end()].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if len(candidate) < self.min_chars or last_word in _ABBREVIATIONS:
+                # Trop court (ou abréviation) : on attend la frontière suivante
+                search_from = match.end()
+                continue
+            sentences.append(candidate)
+            self._buffer = self._buffer[match.end() :]
+            search_from = 0
+
+        # Phrase interminable (pas de ponctuation) : coupe au dernier espace
+        while len(self._buffer) > self.max_chars:
+            cut = self._buffer.rfind(" ", 0, self.max_chars)
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(self._buffer[:cut].strip())
+            self._buffer = self._buffer[cut:].lstrip()
+
+        return [s for s in sentences if s]
+
+    def flush(self) -> str:
+        """Retourne (et vide) le reliquat en fin de flux."""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        return tail
@@ -1,14 +1,34 @@
 # src/backend/features/voice/service.py
-# V1.1 - Correction du chemin d'importation
+# V1.2 - Pipeline phrase par phrase (LLM streamé → TTS concurrent borné, audio ordonné)
+import asyncio
 import httpx
 import logging
-from typing import AsyncGenerator, List, Dict, Any
+import time
+from typing import AsyncGenerator, List, Dict, Any, Optional, Tuple, Union
+
+from prometheus_client import Counter, Histogram
 
 from .models import VoiceServiceConfig
+from .segmenter import SentenceSegmenter
 from backend.features.chat.service import ChatService
 
 logger = logging.getLogger(__name__)
 
+voice_time_to_first_audio = Histogram(
+    "voice_time_to_first_audio_seconds",
+    "Délai entre la fin de la transcription et le premier chunk audio envoyé",
+    ["mode"],
+    buckets=[0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0],
+)
+voice_tts_segments = Counter(
+    "voice_tts_segments_total",
+    "Nombre de segments (phrases) envoyés au TTS",
+    ["mode"],
+)
+
+# Élément de la file audio d'un segment : chunk, fin (None) ou erreur
+_AudioItem = Union[bytes, None, BaseException]
+
 
 class VoiceService:
     def __init__(
@@ -24,8 +44,12 @@ class VoiceService:
 
     async def transcribe_audio(self, audio_stream: AsyncGenerator[bytes, None]) -> str:
         logger.info("Debut de la transcription audio avec l'API OpenAI...")
-        audio_bytes_list: List[bytes] = [chunk async for chunk in audio_stream]
-        audio_data = b"".join(audio_bytes_list)
+        # Whisper exige le fichier complet : on accumule dans un seul buffer
+        # (évite la liste de chunks + copie du join).
+        buffer = bytearray()
+        async for chunk in audio_stream:
+            buffer.extend(chunk)
+        audio_data = bytes(buffer)
 
         if not audio_data:
             logger.warning("Aucune donnee audio recue pour la transcription.")
@@ -34,7 +58,7 @@ class VoiceService:
         files = {"file": ("audio.webm", audio_data, "audio/webm")}
         data = {"model": self.config.stt_model}
         headers = {"Authorization": f"Bearer {self.config.stt_api_key}"}
-        url = "https://api.openai.com/v1/audio/transcriptions"
+        url = f"{self.config.stt_base_url.rstrip('/')}/audio/transcriptions"
 
         try:
             response = await self.http_client.post(
@@ -80,7 +104,7 @@ class VoiceService:
             )
             raise ValueError("ID de voix ElevenLabs non configure ou invalide.")
 
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+        url = f"{self.config.tts_base_url.rstrip('/')}/text-to-speech/{voice_id}/stream"
         headers = {
             "Accept": "audio/mpeg",
             "Content-Type": "application/json",
@@ -119,14 +143,20 @@ class VoiceService:
         audio_stream: AsyncGenerator[bytes, None],
         agent_name: str,
         session_id: str,
+        pipelined: Optional[bool] = None,
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Gere l'interaction vocale complete et renvoie des dictionnaires structures.
         - {'type': 'text', 'data': str} pour la reponse textuelle
+          (en mode pipeline : une entree par phrase, avec 'index')
         - {'type': 'audio', 'data': bytes} pour les chunks audio
+        - {'type': 'metrics', 'data': {...}} en fin d'interaction (latences en ms)
         """
+        use_pipeline = self.config.pipeline_enabled if pipelined is None else pipelined
         try:
+            t_start = time.perf_counter()
             user_text = await self.transcribe_audio(audio_stream)
+            stt_ms = (time.perf_counter() - t_start) * 1000
             if not user_text:
                 logger.warning("Transcription vide, interaction annulee.")
                 yield {
@@ -151,6 +181,15 @@ class VoiceService:
                 )
             except Exception:
                 history_snapshot = []
+
+            if use_pipeline:
+                async for part in self._process_pipelined(
+                    user_text, agent_name, session_id, history_snapshot, stt_ms
+                ):
+                    yield part
+                return
+
+            t_llm = time.perf_counter()
             response_payload = await self.chat_service.get_llm_response_for_debate(
                 agent_id=agent_name,
                 prompt=user_text,
@@ -164,11 +203,34 @@ class VoiceService:
                     "Je suis desole, je n'ai pas de reponse pour le moment."
                 )
 
+            llm_ms = (time.perf_counter() - t_llm) * 1000
+
             yield {"type": "text", "data": agent_response_text}
 
-            async for audio_chunk in self.synthesize_speech(agent_response_text):
+            voice_tts_segments.labels(mode="sequential").inc()
+            first_audio_ms: Optional[float] = None
+            async for audio_chunk in self.synthesize_speech(
+                agent_response_text, agent_id=agent_name
+            ):
+                if first_audio_ms is None:
+                    first_audio_ms = (time.perf_counter() - t_llm) * 1000
+                    voice_time_to_first_audio.labels(mode="sequential").observe(
+                        first_audio_ms / 1000
+                    )
                 yield {"type": "audio", "data": audio_chunk}
 
+            yield {
+                "type": "metrics",
+                "data": {
+                    "mode": "sequential",
+                    "stt_ms": round(stt_ms, 1),
+                    "llm_ms": round(llm_ms, 1),
+                    "time_to_first_audio_ms": _round_or_none(first_audio_ms),
+                    "total_ms": round((time.perf_counter() - t_start) * 1000, 1),
+                    "segments": 1,
+                },
+            }
+
         except Exception as exc:
             logger.error(
                 "Erreur majeure dans le cycle vocal: %s",
@@ -185,3 +247,112 @@ class VoiceService:
                     "Impossible de generer le message d'erreur vocal: %s",
                     synth_error,
                 )
+
+    async def _process_pipelined(
+        self,
+        user_text: str,
+        agent_name: str,
+        session_id: str,
+        history: List[Dict[str, Any]],
+        stt_ms: float,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Pipeline vocal : le LLM est streamé, découpé en phrases, et chaque
+        phrase part au TTS dès qu'elle est complète (concurrence bornée par
+        ``tts_max_concurrency``). L'audio est rendu dans l'ordre des phrases,
+        en streamant la phrase courante pendant que les suivantes se synthétisent.
+        """
+        t_llm = time.perf_counter()
+        segmenter = SentenceSegmenter(min_chars=self.config.sentence_min_chars)
+        tts_slots = asyncio.Semaphore(self.config.tts_max_concurrency)
+        segments: "asyncio.Queue[Optional[Tuple[int, str, asyncio.Queue[_AudioItem]]]]" = (
+            asyncio.Queue()
+        )
+        tts_tasks: List["asyncio.Task[None]"] = []
+        llm_done_at: Dict[str, float] = {}
+
+        async def _synthesize_into(text: str, out: "asyncio.Queue[_AudioItem]") -> None:
+            async with tts_slots:
+                try:
+                    async for chunk in self.synthesize_speech(text, agent_id=agent_name):
+                        out.put_nowait(chunk)
+                    out.put_nowait(None)
+                except BaseException as exc:  # propagé au consommateur
+                    out.put_nowait(exc)
+                    if isinstance(exc, asyncio.CancelledError):
+                        raise
+
+        def _dispatch(text: str) -> None:
+            out: "asyncio.Queue[_AudioItem]" = asyncio.Queue()
+            tts_tasks.append(asyncio.create_task(_synthesize_into(text, out)))
+            segments.put_nowait((len(tts_tasks) - 1, text, out))
+            voice_tts_segments.labels(mode="pipelined").inc()
+
+        async def _produce() -> None:
+            try:
+                async for token in self.chat_service.stream_llm_response_for_debate(
+                    agent_id=agent_name,
+                    prompt=user_text,
+                    session_id=session_id,
+                    use_rag=False,
+                    history=history,
+                    feature="voice",
+                ):
+                    for sentence in segmenter.feed(token):
+                        _dispatch(sentence)
+                tail = segmenter.flush()
+                if tail:
+                    _dispatch(tail)
+                if not tts_tasks:
+                    _dispatch("Je suis desole, je n'ai pas de reponse pour le moment.")
+            finally:
+                llm_done_at["t"] = time.perf_counter()
+                segments.put_nowait(None)
+
+        producer = asyncio.create_task(_produce())
+        first_audio_ms: Optional[float] = None
+        try:
+            while True:
+                item = await segments.get()
+                if item is None:
+                    break
+                index, text, out = item
+                yield {"type": "text", "data": text, "index": index}
+                while True:
+                    audio = await out.get()
+                    if audio is None:
+                        break
+                    if isinstance(audio, BaseException):
+                        raise audio
+                    if first_audio_ms is None:
+                        first_audio_ms = (time.perf_counter() - t_llm) * 1000
+                        voice_time_to_first_audio.labels(mode="pipelined").observe(
+                            first_audio_ms / 1000
+                        )
+                    yield {"type": "audio", "data": audio, "index": index}
+
+            # Remonte une éventuelle erreur LLM survenue en cours de génération
+            await producer
+
+            now = time.perf_counter()
+            yield {
+                "type": "metrics",
+                "data": {
+                    "mode": "pipelined",
+                    "stt_ms": round(stt_ms, 1),
+                    "llm_ms": round((llm_done_at.get("t", now) - t_llm) * 1000, 1),
+                    "time_to_first_audio_ms": _round_or_none(first_audio_ms),
+                    "total_ms": round(stt_ms + (now - t_llm) * 1000, 1),
+                    "segments": len(tts_tasks),
+                },
+            }
+        finally:
+            # Client déconnecté / erreur : on n'abandonne pas de requêtes TTS en vol
+            producer.cancel()
+            for task in tts_tasks:
+                task.cancel()
+            await asyncio.gather(producer, *tts_tasks, return_exceptions=True)
+
+
+def _round_or_none(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
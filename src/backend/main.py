@@ -3,7 +3,6 @@ from __future__ import annotations
 
 import logging
 import os
-import re
 import sys
 from pathlib import Path
 
@@ -16,19 +15,15 @@ try:
 except ImportError:
     pass  # python-dotenv non installé, variables déjà dans l'environnement
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Callable, cast
+from typing import Any, AsyncGenerator
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import (
     JSONResponse,
     RedirectResponse,
-    PlainTextResponse,
-    Response,
 )
 from fastapi.routing import APIRouter
 from starlette.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
 
 logger = logging.getLogger("emergence")
 logging.basicConfig(
@@ -288,54 +283,6 @@ async def _startup(container: ServiceContainer) -> None:
         )
 
 
-# --- Middleware Deny-list (404 early) ---
-class DenyListMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, enabled: bool, patterns: list[str]) -> None:
-        super().__init__(app)
-        self.enabled = enabled
-        self.patterns = [(p, re.compile(p, re.IGNORECASE)) for p in patterns]
-
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Any]
-    ) -> Response:
-        if self.enabled and request.scope.get("type") == "http":
-            path = request.url.path
-            for raw, rx in self.patterns:
-                if rx.search(path):
-                    logger.info(f"DenyList: 404 bloqué path={path} (pattern={raw})")
-                    return PlainTextResponse("Not Found", status_code=404)
-
-        try:
-            response = await call_next(request)
-
-            # Vérifier que la réponse est valide
-            if response is None:
-                logger.error(
-                    f"No response returned in DenyListMiddleware for {request.url.path}"
-                )
-                return PlainTextResponse(
-                    "Internal server error: no response", status_code=500
-                )
-
-            return cast(Response, response)
-        except RuntimeError as exc:
-            # Gérer le cas où call_next() lève "No response returned"
-            if "No response returned" in str(exc):
-                logger.error(
-                    f"RuntimeError in DenyListMiddleware for {request.url.path}: {exc}"
-                )
-                return PlainTextResponse(
-                    "Internal server error: no response", status_code=500
-                )
-            raise
-        except Exception as exc:
-            logger.error(
-                f"Unexpected error in DenyListMiddleware for {request.url.path}: {exc}",
-                exc_info=True,
-            )
-            return PlainTextResponse("Internal server error", status_code=500)
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
@@ -351,16 +298,57 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         logger.error(f"Lifespan startup: _startup failed: {e}", exc_info=True)
 
+    # 🔧 CostTracker : totaux de dépense amorcés depuis la BDD + recalage
+    try:
+        await container.cost_tracker().start()
+        logger.info("CostTracker running totals seeded")
+    except Exception as e:
+        logger.warning(f"CostTracker startup failed: {e}")
+
+    # 📊 Magasin d'événements local (retrieval, LLM, WS, spans → /events/*)
+    try:
+        from backend.core.event_store import get_event_store
+
+        if get_event_store(create=True) is not None:
+            logger.info("Local event store ready")
+    except Exception as e:
+        logger.warning(f"Event store startup failed: {e}")
+
+    # 🔥 Profiler par échantillonnage en continu (opt-in, sinon via /api/monitoring/profiler/start)
+    if os.getenv("PROFILER_ENABLED", "false").lower() == "true":
+        try:
+            from backend.core.profiler import get_profiler
+
+            get_profiler().start()
+        except Exception as e:
+            logger.warning(f"Profiler startup failed: {e}")
+
     # 🔧 Démarrer MemoryTaskQueue (P1.1)
     try:
         from backend.features.memory.task_queue import get_memory_queue
 
         queue = get_memory_queue()
+        # Les workers partagent le container (singletons DB/vector/LLM) de l'app
+        queue.set_container(container)
         await queue.start()
         logger.info("MemoryTaskQueue started")
     except Exception as e:
         logger.warning(f"MemoryTaskQueue startup failed: {e}")
 
+    # 🔧 Génération des agents via passerelle/workers (CHAT_GENERATION_MODE)
+    try:
+        from backend.features.chat.generation import setup_generation
+
+        gateway, worker = await setup_generation(container)
+        app.state.generation_gateway = gateway
+        app.state.generation_worker = worker
+        if gateway is not None:
+            logger.info(
+                f"Generation gateway started (workers in-process: {worker is not None})"
+            )
+    except Exception as e:
+        logger.warning(f"Generation gateway startup failed: {e}")
+
     # 🔧 Démarrer AutoSyncService
     try:
         from backend.features.sync.auto_sync_service import get_auto_sync_service
@@ -375,7 +363,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     try:
         session_manager = container.session_manager()
         session_manager.start_cleanup_task()
-        logger.info("SessionManager cleanup task started (inactivity timeout: 3 min)")
+        logger.info("SessionManager inactivity timers armed (shared timer wheel)")
     except Exception as e:
         logger.warning(f"SessionManager cleanup task startup failed: {e}")
 
@@ -406,6 +394,49 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         logger.warning(f"MemoryTaskQueue shutdown failed: {e}")
 
+    # 🔧 Arrêter workers puis passerelle de génération
+    try:
+        worker = getattr(app.state, "generation_worker", None)
+        if worker is not None:
+            await worker.stop()
+        gateway = getattr(app.state, "generation_gateway", None)
+        if gateway is not None:
+            await gateway.stop()
+            await gateway.bus.close()
+            logger.info("Generation gateway stopped")
+    except Exception as e:
+        logger.warning(f"Generation gateway shutdown failed: {e}")
+
+    # 🔧 Vider le buffer de télémétrie d'usage (flush garanti)
+    try:
+        from backend.features.usage.telemetry import get_usage_telemetry
+
+        telemetry = get_usage_telemetry()
+        if telemetry is not None:
+            await telemetry.stop()
+            logger.info(f"Usage telemetry flushed: {telemetry.get_stats()}")
+    except Exception as e:
+        logger.warning(f"Usage telemetry shutdown failed: {e}")
+
+    # 📊 Vider le magasin d'événements local
+    try:
+        from backend.core.event_store import get_event_store
+
+        event_store = get_event_store()
+        if event_store is not None:
+            await event_store.stop()
+            logger.info("Event store flushed")
+    except Exception as e:
+        logger.warning(f"Event store shutdown failed: {e}")
+
+    # 🔍 Vider les exporters de traces (OTLP-JSON)
+    try:
+        from backend.core.tracing import get_trace_manager
+
+        await get_trace_manager().shutdown()
+    except Exception as e:
+        logger.warning(f"Trace exporters shutdown failed: {e}")
+
     # 🔧 Arrêter AutoSyncService
     try:
         from backend.features.sync.auto_sync_service import get_auto_sync_service
@@ -424,6 +455,32 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         logger.warning(f"SessionManager cleanup task shutdown failed: {e}")
 
+    # 🔥 Arrêter le profiler (no-op s'il ne tourne pas)
+    try:
+        from backend.core.profiler import get_profiler
+
+        await get_profiler().stop()
+    except Exception as e:
+        logger.warning(f"Profiler shutdown failed: {e}")
+
+    # 📄 Arrêter le pool d'extraction PDF (créé au premier gros PDF)
+    try:
+        from backend.features.documents.parser import shutdown_pdf_pool
+
+        shutdown_pdf_pool()
+    except Exception as e:
+        logger.warning(f"PDF extraction pool shutdown failed: {e}")
+
+    # ⏱️ Arrêter la roue de temporisation partagée (timeouts, TTL caches)
+    try:
+        from backend.core.timer_wheel import get_timer_wheel
+
+        timer_wheel = get_timer_wheel()
+        await timer_wheel.stop()
+        logger.info(f"Timer wheel stopped: {timer_wheel.get_stats()}")
+    except Exception as e:
+        logger.warning(f"Timer wheel shutdown failed: {e}")
+
     # 🔗 Arrêter le delivery service des webhooks
     try:
         if hasattr(app.state, "_webhook_delivery_service"):
@@ -432,6 +489,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         logger.warning(f"Webhook delivery service shutdown failed: {e}")
 
+    # 🔧 Vider la file des coûts (insertions groupées en attente)
+    try:
+        cost_tracker = container.cost_tracker()
+        await cost_tracker.stop()
+        logger.info(f"CostTracker flushed: {cost_tracker.get_queue_stats()}")
+    except Exception as e:
+        logger.warning(f"CostTracker shutdown failed: {e}")
+
     # Fermer DB
     try:
         await container.db_manager().disconnect()
@@ -469,39 +534,38 @@ def create_app() -> FastAPI:
     # 🔒 Redirige automatiquement /route ↔ /route/
     app.router.redirect_slashes = True
 
-    # Monitoring middlewares (première couche)
+    # Pipeline ASGI pur (deny-list, usage, rate limit, sécurité, monitoring) :
+    # une seule passe par requête, le streaming traverse sans ré-encapsulation
     try:
-        from backend.core.middleware import (
-            MonitoringMiddleware,
-            SecurityMiddleware,
-            RateLimitMiddleware,
+        from backend.core.asgi_pipeline import (
+            ASGIPipelineMiddleware,
+            DenyListStage,
+            MonitoringStage,
+            RateLimitStage,
+            SecurityStage,
         )
-
-        app.add_middleware(MonitoringMiddleware)
-        app.add_middleware(SecurityMiddleware)
-        app.add_middleware(
-            RateLimitMiddleware, requests_per_minute=300
-        )  # 300 req/min global
-        logger.info("Monitoring middlewares activés (dont rate limiting 300/min)")
-    except Exception as e:
-        logger.warning(f"Monitoring middlewares non activés: {e}")
-
-    # 🔧 Phase 2 Guardian Cloud: Usage tracking middleware
-    try:
-        from backend.middleware.usage_tracking import UsageTrackingMiddleware
+        from backend.middleware.usage_tracking import UsageTrackingStage
         from backend.features.usage.repository import UsageRepository
+        from backend.features.usage.telemetry import get_usage_telemetry
 
-        usage_middleware = UsageTrackingMiddleware(app)
-        # Injecter repository getter via DI
-        usage_middleware.set_repository_getter(
-            lambda: UsageRepository(container.db_manager())
+        app.add_middleware(
+            ASGIPipelineMiddleware,
+            stages=[
+                DenyListStage(DENYLIST_PATTERNS, enabled=DENYLIST_ENABLED),
+                UsageTrackingStage(
+                    repository_getter=lambda: UsageRepository(container.db_manager()),
+                    telemetry=get_usage_telemetry(),
+                ),
+                RateLimitStage(requests_per_minute=300),  # 300 req/min global
+                SecurityStage(),
+                MonitoringStage(),
+            ],
         )
-        app.add_middleware(UsageTrackingMiddleware)
-        logger.info("Usage tracking middleware activé")
+        logger.info("Pipeline ASGI activé (dont rate limiting 300/min)")
     except Exception as e:
-        logger.warning(f"Usage tracking middleware non activé: {e}")
+        logger.warning(f"Pipeline ASGI non activé: {e}")
 
-    # CORS d'abord...
+    # CORS en dernier = outermost (les preflights ne traversent pas le pipeline)
     # Sécurité : allow_origins=["*"] + allow_credentials=True est une vulnérabilité
     # On utilise des origines explicites via env ou fallback dev-friendly
     cors_origins_raw = os.getenv("CORS_ALLOWED_ORIGINS", "")
@@ -523,10 +587,6 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    # ...puis DenyList en dernier pour être outermost (court-circuit rapide)
-    app.add_middleware(
-        DenyListMiddleware, enabled=DENYLIST_ENABLED, patterns=DENYLIST_PATTERNS
-    )
 
     @app.get("/api/health", tags=["Health"])
     async def health():
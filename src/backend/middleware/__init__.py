@@ -3,4 +3,4 @@
 Middleware pour ÉMERGENCE V8
 """
 
-__all__ = ["UsageTrackingMiddleware"]
+__all__ = ["UsageTrackingMiddleware", "UsageTrackingStage"]
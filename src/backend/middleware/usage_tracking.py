@@ -15,6 +15,8 @@ Capture automatiquement toutes les requêtes API pour monitoring
 from __future__ import annotations
 
 import asyncio
+import base64
+import json
 import logging
 import time
 from typing import Any, Callable, Optional, cast
@@ -24,19 +26,73 @@ from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from ..core.asgi_pipeline import PipelineStage, RequestContext
+
 logger = logging.getLogger(__name__)
 
 
-class UsageTrackingMiddleware(BaseHTTPMiddleware):
+SKIP_PREFIXES = (
+    "/health",
+    "/metrics",
+    "/favicon.ico",
+    "/static/",
+    "/_next/",
+    "/assets/",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+)
+
+
+def _email_from_request_data(
+    claims: Any, get_header: Callable[[str], Optional[str]]
+) -> str:
     """
-    Middleware qui track automatiquement l'usage des endpoints.
-    Fire-and-forget (pas de await bloquant) pour performance maximale.
+    Extrait email utilisateur depuis les claims JWT déjà résolus, les headers
+    dev ou le JWT brut (non vérifié, juste pour l'email).
     """
+    # 1. Claims déjà résolus par get_auth_claims (request.state.auth_claims)
+    if claims and isinstance(claims, dict):
+        email = claims.get("email")
+        if email:
+            return str(email).strip()
+
+    # 2. Fallback: headers dev bypass
+    dev_email = get_header("x-user-email")
+    if dev_email:
+        return str(dev_email).strip()
+
+    # 3. Fallback: essayer de lire JWT directement (pas vérifié)
+    auth_header = get_header("authorization") or ""
+    if auth_header.startswith("Bearer "):
+        token = auth_header.split(" ", 1)[1].strip()
+        try:
+            parts = token.split(".")
+            if len(parts) == 3:
+                payload_b64 = parts[1] + "=" * (-len(parts[1]) % 4)
+                payload = json.loads(
+                    base64.urlsafe_b64decode(payload_b64).decode("utf-8")
+                )
+                email = payload.get("email")
+                if email:
+                    return str(email).strip()
+        except Exception:
+            pass
 
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
-        self._repository_getter: Optional[Callable[[], Any]] = None
-        self._initialized = False
+    return "anonymous"
+
+
+class _UsageRecorder:
+    """Logique commune (DI repository, extraction, logs fire-and-forget)."""
+
+    _repository_getter: Optional[Callable[[], Any]] = None
+    _initialized = False
+    # Buffer de télémétrie (UsageTelemetry) : prioritaire sur le repository
+    _telemetry: Any = None
+
+    def set_telemetry(self, telemetry: Any) -> None:
+        """Injecte le buffer de télémétrie (écritures groupées, base dédiée)"""
+        self._telemetry = telemetry
 
     def set_repository_getter(self, getter: Callable[[], Any]) -> None:
         """Injecte getter pour UsageRepository (DI)"""
@@ -53,50 +109,6 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
             logger.debug(f"UsageRepository indisponible: {e}")
             return None
 
-    def _extract_user_email(self, request: Request) -> Optional[str]:
-        """
-        Extrait email utilisateur depuis JWT token ou headers dev
-        Utilise le cache request.state.auth_claims si déjà résolu
-        """
-        try:
-            # 1. Essayer depuis request.state (déjà résolu par get_auth_claims)
-            claims = getattr(request.state, "auth_claims", None)
-            if claims and isinstance(claims, dict):
-                email = claims.get("email")
-                if email:
-                    return str(email).strip()
-
-            # 2. Fallback: headers dev bypass
-            dev_email = request.headers.get("X-User-Email")
-            if dev_email:
-                return str(dev_email).strip()
-
-            # 3. Fallback: essayer de lire JWT directement (pas vérifié)
-            auth_header = request.headers.get("Authorization", "")
-            if auth_header.startswith("Bearer "):
-                token = auth_header.split(" ", 1)[1].strip()
-                # Simple parse sans vérification signature (juste pour email)
-                import base64
-                import json
-
-                try:
-                    parts = token.split(".")
-                    if len(parts) == 3:
-                        payload_b64 = parts[1] + "=" * (-len(parts[1]) % 4)
-                        payload = json.loads(
-                            base64.urlsafe_b64decode(payload_b64).decode("utf-8")
-                        )
-                        email = payload.get("email")
-                        if email:
-                            return str(email).strip()
-                except Exception:
-                    pass
-
-            return "anonymous"
-        except Exception as e:
-            logger.debug(f"Erreur extraction user email: {e}")
-            return "anonymous"
-
     def _extract_feature_name(self, endpoint: str) -> str:
         """
         Convertit endpoint en feature_name plus lisible
@@ -109,18 +121,113 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
 
     def _should_skip_endpoint(self, path: str) -> bool:
         """Endpoints à ne PAS tracker (health, metrics, static files)"""
-        skip_prefixes = (
-            "/health",
-            "/metrics",
-            "/favicon.ico",
-            "/static/",
-            "/_next/",
-            "/assets/",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-        )
-        return any(path.startswith(prefix) for prefix in skip_prefixes)
+        return path.startswith(SKIP_PREFIXES)
+
+    def _log_feature_usage_background(
+        self,
+        user_email: str | None,
+        feature_name: str,
+        endpoint: str,
+        method: str,
+        success: bool,
+        status_code: int,
+        duration_ms: int,
+        error_message: Optional[str],
+    ) -> None:
+        """Log feature usage en background (fire-and-forget)"""
+        try:
+            telemetry = self._telemetry
+            repo = None if telemetry is not None else self._get_repository()
+            if telemetry is None and repo is None:
+                return
+
+            from backend.features.usage.models import FeatureUsage
+
+            usage = FeatureUsage(
+                user_email=user_email,
+                feature_name=feature_name,
+                endpoint=endpoint,
+                method=method,
+                timestamp=datetime.now(timezone.utc),
+                success=success,
+                error_message=error_message,
+                duration_ms=duration_ms,
+                status_code=status_code,
+            )
+
+            if telemetry is not None:
+                telemetry.record_feature_usage(usage)
+            elif repo is not None:
+                # Fire-and-forget (pas de await pour pas bloquer)
+                asyncio.create_task(repo.log_feature_usage(usage))
+        except Exception as e:
+            # Silent fail (ne doit jamais casser les requêtes)
+            logger.debug(f"Erreur log feature usage: {e}")
+
+    def _log_user_error_background(
+        self,
+        user_email: str | None,
+        endpoint: str,
+        method: str,
+        error_type: str,
+        error_code: int,
+        error_message: str,
+    ) -> None:
+        """Log user error en background (fire-and-forget)"""
+        try:
+            telemetry = self._telemetry
+            repo = None if telemetry is not None else self._get_repository()
+            if telemetry is None and repo is None:
+                return
+
+            from backend.features.usage.models import UserError
+
+            error = UserError(
+                user_email=user_email,
+                endpoint=endpoint,
+                method=method,
+                error_type=error_type,
+                error_code=error_code,
+                error_message=error_message,
+                stack_trace=None,  # TODO: extraire si besoin
+                timestamp=datetime.now(timezone.utc),
+            )
+
+            if telemetry is not None:
+                telemetry.record_user_error(error)
+            elif repo is not None:
+                # Fire-and-forget
+                asyncio.create_task(repo.log_user_error(error))
+        except Exception as e:
+            logger.debug(f"Erreur log user error: {e}")
+
+
+class UsageTrackingMiddleware(_UsageRecorder, BaseHTTPMiddleware):
+    """
+    Middleware qui track automatiquement l'usage des endpoints.
+    Fire-and-forget (pas de await bloquant) pour performance maximale.
+
+    Conservé pour compatibilité : ``create_app`` utilise désormais
+    ``UsageTrackingStage`` dans le pipeline ASGI pur.
+    """
+
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+        self._repository_getter = None
+        self._initialized = False
+
+    def _extract_user_email(self, request: Request) -> Optional[str]:
+        """
+        Extrait email utilisateur depuis JWT token ou headers dev
+        Utilise le cache request.state.auth_claims si déjà résolu
+        """
+        try:
+            return _email_from_request_data(
+                getattr(request.state, "auth_claims", None), request.headers.get
+            )
+        except Exception as e:
+            logger.debug(f"Erreur extraction user email: {e}")
+            return "anonymous"
 
     async def dispatch(
         self, request: Request, call_next: Callable[[Request], Any]
@@ -192,72 +299,57 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
             # Re-raise pour que FastAPI gère l'erreur normalement
             raise
 
-    def _log_feature_usage_background(
-        self,
-        user_email: str | None,
-        feature_name: str,
-        endpoint: str,
-        method: str,
-        success: bool,
-        status_code: int,
-        duration_ms: int,
-        error_message: Optional[str],
-    ) -> None:
-        """Log feature usage en background (fire-and-forget)"""
-        try:
-            repo = self._get_repository()
-            if repo is None:
-                return
 
-            from backend.features.usage.models import FeatureUsage
+class UsageTrackingStage(_UsageRecorder, PipelineStage):
+    """
+    Étape usage du pipeline ASGI (``backend.core.asgi_pipeline``).
 
-            usage = FeatureUsage(
-                user_email=user_email,
-                feature_name=feature_name,
-                endpoint=endpoint,
-                method=method,
-                timestamp=datetime.now(timezone.utc),
-                success=success,
-                error_message=error_message,
-                duration_ms=duration_ms,
-                status_code=status_code,
-            )
+    Même contenu loggué que ``UsageTrackingMiddleware`` ; l'email est lu à la
+    fin de la requête, donc les claims résolus par l'auth sont pris en compte.
+    """
 
-            # Fire-and-forget (pas de await pour pas bloquer)
-            asyncio.create_task(repo.log_feature_usage(usage))
-        except Exception as e:
-            # Silent fail (ne doit jamais casser les requêtes)
-            logger.debug(f"Erreur log feature usage: {e}")
+    name = "usage"
 
-    def _log_user_error_background(
+    def __init__(
         self,
-        user_email: str | None,
-        endpoint: str,
-        method: str,
-        error_type: str,
-        error_code: int,
-        error_message: str,
+        repository_getter: Optional[Callable[[], Any]] = None,
+        telemetry: Any = None,
     ) -> None:
-        """Log user error en background (fire-and-forget)"""
+        if repository_getter is not None:
+            self.set_repository_getter(repository_getter)
+        if telemetry is not None:
+            self.set_telemetry(telemetry)
+
+    def on_complete(self, ctx: RequestContext, exc: Optional[BaseException]) -> None:
+        if self._should_skip_endpoint(ctx.path):
+            return
         try:
-            repo = self._get_repository()
-            if repo is None:
-                return
-
-            from backend.features.usage.models import UserError
-
-            error = UserError(
-                user_email=user_email,
-                endpoint=endpoint,
-                method=method,
-                error_type=error_type,
-                error_code=error_code,
-                error_message=error_message,
-                stack_trace=None,  # TODO: extraire si besoin
-                timestamp=datetime.now(timezone.utc),
+            user_email = _email_from_request_data(
+                ctx.state.get("auth_claims"), ctx.headers.get
             )
-
-            # Fire-and-forget
-            asyncio.create_task(repo.log_user_error(error))
         except Exception as e:
-            logger.debug(f"Erreur log user error: {e}")
+            logger.debug(f"Erreur extraction user email: {e}")
+            user_email = "anonymous"
+        status_code = 500 if exc is not None else ctx.status_code
+        duration_ms = int(ctx.duration * 1000)
+        error_message = str(exc) if exc is not None else None
+
+        self._log_feature_usage_background(
+            user_email=user_email,
+            feature_name=self._extract_feature_name(ctx.path),
+            endpoint=ctx.path,
+            method=ctx.method,
+            success=exc is None and status_code < 400,
+            status_code=status_code,
+            duration_ms=duration_ms,
+            error_message=error_message,
+        )
+        if exc is not None:
+            self._log_user_error_background(
+                user_email=user_email,
+                endpoint=ctx.path,
+                method=ctx.method,
+                error_type=type(exc).__name__,
+                error_code=status_code,
+                error_message=error_message or "",
+            )
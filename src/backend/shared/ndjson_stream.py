@@ -0,0 +1,144 @@
+# src/backend/shared/ndjson_stream.py
+"""
+Flux NDJSON (une ligne JSON par enregistrement), optionnellement compressé zstd.
+
+Utilisé par les exports/imports streamés (threads, mémoire) : mémoire constante
+côté serveur, quelle que soit la taille de l'historique.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any, Optional
+
+from backend.shared.utils import json_serializer
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    zstandard = None  # type: ignore[assignment]
+    ZSTD_AVAILABLE = False
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ZSTD_MEDIA_TYPE = "application/zstd"
+NDJSON_FORMAT_VERSION = 1
+
+# Trame zstd (RFC 8878) : permet de détecter un import compressé sans en-tête HTTP
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Taille cible d'un chunk HTTP émis (les petites lignes sont regroupées)
+_FLUSH_BYTES = 64 * 1024
+# Garde-fou contre une ligne sans fin (fichier corrompu / mauvais format)
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+class NDJSONDecodeError(ValueError):
+    """Ligne NDJSON invalide (numéro de ligne inclus dans le message)."""
+
+
+def media_type_for(compress: bool) -> str:
+    return ZSTD_MEDIA_TYPE if compress else NDJSON_MEDIA_TYPE
+
+
+def encode_record(record: dict[str, Any]) -> bytes:
+    return (
+        json.dumps(
+            record, ensure_ascii=False, separators=(",", ":"), default=json_serializer
+        ).encode("utf-8")
+        + b"\n"
+    )
+
+
+async def encode_ndjson(
+    records: AsyncIterable[dict[str, Any]], *, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """Sérialise un flux d'enregistrements en chunks NDJSON (zstd si ``compress``)."""
+    if compress and not ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard n'est pas installé (compression indisponible)")
+
+    compressor = (
+        zstandard.ZstdCompressor(level=3).compressobj() if compress else None
+    )
+    buffer = bytearray()
+
+    async for record in records:
+        buffer += encode_record(record)
+        if len(buffer) >= _FLUSH_BYTES:
+            data = bytes(buffer)
+            buffer.clear()
+            if compressor is not None:
+                data = compressor.compress(data)
+                if not data:
+                    continue
+            yield data
+
+    tail = bytes(buffer)
+    if compressor is not None:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
+
+
+async def decode_ndjson(
+    chunks: AsyncIterable[bytes], *, compressed: Optional[bool] = None
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Relit un flux NDJSON chunk par chunk.
+
+    ``compressed=None`` : détection automatique via le magic number zstd.
+    """
+    decompressor: Any = None
+    detected = compressed
+    pending = bytearray()
+    line_no = 0
+
+    def _parse(raw: bytes) -> Optional[dict[str, Any]]:
+        nonlocal line_no
+        line_no += 1
+        raw = raw.strip()
+        if not raw:
+            return None
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise NDJSONDecodeError(f"Ligne {line_no}: JSON invalide ({exc})") from exc
+        if not isinstance(record, dict):
+            raise NDJSONDecodeError(f"Ligne {line_no}: objet JSON attendu")
+        return record
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if detected is None:
+            detected = bytes(chunk[:4]) == ZSTD_MAGIC
+        if detected:
+            if decompressor is None:
+                if not ZSTD_AVAILABLE:
+                    raise RuntimeError(
+                        "zstandard n'est pas installé (décompression indisponible)"
+                    )
+                decompressor = zstandard.ZstdDecompressor().decompressobj()
+            chunk = decompressor.decompress(chunk)
+
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end < 0:
+                break
+            record = _parse(bytes(pending[start:end]))
+            start = end + 1
+            if record is not None:
+                yield record
+        del pending[:start]
+        if len(pending) > MAX_LINE_BYTES:
+            raise NDJSONDecodeError(f"Ligne {line_no + 1}: dépasse {MAX_LINE_BYTES} octets")
+
+    if pending:
+        record = _parse(bytes(pending))
+        if record is not None:
+            yield record
+
@@ -0,0 +1,76 @@
+"""Tests BufferedFlusher : lots, refus, remise en file, redémarrage sur une autre boucle."""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from backend.core.buffered_flusher import DROP_CLOSED, DROP_FULL, BufferedFlusher
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+        self.fail = False
+
+    async def write(self, batch: List[int]) -> bool:
+        if self.fail:
+            return False
+        self.batches.append(batch)
+        return True
+
+
+def _flusher(sink: _Sink, **kwargs) -> BufferedFlusher[int]:
+    options = {"capacity": 10, "batch_size": 3, "flush_interval": 60.0, **kwargs}
+    return BufferedFlusher(sink.write, name="test-flusher", **options)
+
+
+@pytest.mark.asyncio
+async def test_batch_size_wakes_the_flusher_and_full_buffer_refuses():
+    sink = _Sink()
+    queue = _flusher(sink, capacity=4, batch_size=3)
+
+    assert [queue.append(i) for i in range(3)] == [None, None, None]
+    for _ in range(50):
+        if sink.batches:
+            break
+        await asyncio.sleep(0.01)
+    assert sink.batches == [[0, 1, 2]]
+
+    assert [queue.append(i) for i in range(5)] == [None] * 4 + [DROP_FULL]
+    await queue.stop()
+    assert sink.batches[1:] == [[0, 1, 2], [3]]
+    assert queue.append(9) == DROP_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_dropped_or_requeued():
+    sink = _Sink()
+    sink.fail = True
+    dropping = _flusher(sink)
+    requeuing = _flusher(sink, requeue_failed=True)
+    for i in range(5):
+        dropping.buffer.append(i)
+        requeuing.buffer.append(i)
+
+    assert await dropping.flush() == 0
+    assert await requeuing.flush() == 0
+    assert len(dropping) == 0
+    assert list(requeuing.buffer) == [0, 1, 2, 3, 4]
+
+    sink.fail = False
+    assert await requeuing.flush() == 5
+
+
+def test_stopped_flusher_reopens_on_a_new_event_loop():
+    sink = _Sink()
+    queue = _flusher(sink)
+
+    async def session(value: int) -> None:
+        assert queue.append(value) is None
+        await queue.stop()
+
+    asyncio.run(session(1))
+    asyncio.run(session(2))
+
+    assert sink.batches == [[1], [2]]
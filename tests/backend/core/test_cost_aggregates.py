@@ -0,0 +1,165 @@
+"""Tests CostTracker V13.3 : file sans verrou, insertions groupées, totaux en mémoire."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend.core.cost_aggregates import SpendAggregates
+from backend.core.cost_tracker import CostTracker
+from backend.core.database import queries as db_queries
+from backend.core.database.manager import DatabaseManager
+from backend.core.database.schema import TABLE_DEFINITIONS
+
+
+@pytest.fixture
+async def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "costs.db"))
+    await manager.connect()
+    for ddl in TABLE_DEFINITIONS:
+        if "TABLE IF NOT EXISTS costs" in ddl:
+            await manager.execute(ddl, commit=True)
+    yield manager
+    await manager.disconnect()
+
+
+@pytest.fixture
+async def tracker(db):
+    CostTracker._instance = None
+    instance = CostTracker(db_manager=db)
+    instance.reconcile_interval = 0
+    yield instance
+    await instance.stop()
+    CostTracker._instance = None
+
+
+async def _count_rows(db) -> int:
+    row = await db.fetch_one("SELECT COUNT(*) AS n FROM costs")
+    return row["n"]
+
+
+async def _insert(db, timestamp: datetime, cost: float, user_id="u1", agent="anima"):
+    await db_queries.add_cost_log(
+        db, timestamp, agent, "gpt-4o", 10, 5, cost, "chat", user_id=user_id
+    )
+
+
+def test_periods_roll_over_without_scanning():
+    aggregates = SpendAggregates()
+    monday = datetime(2025, 3, 3, 12, tzinfo=timezone.utc)
+    aggregates.add(1.0, agent="anima", model="m", user_id="u1", moment=monday)
+    aggregates.add(2.0, agent="neo", model="m", user_id="u1", moment=monday)
+
+    same_day = aggregates.summary("user", "u1", moment=monday)
+    next_day = aggregates.summary("user", "u1", moment=monday + timedelta(days=1))
+    next_week = aggregates.summary("global", moment=monday + timedelta(days=7))
+
+    assert same_day == {"total": 3.0, "today": 3.0, "this_week": 3.0, "this_month": 3.0}
+    assert next_day == {"total": 3.0, "today": 0.0, "this_week": 3.0, "this_month": 3.0}
+    assert next_week["this_week"] == 0.0 and next_week["this_month"] == 3.0
+    assert aggregates.summary("agent", "neo", moment=monday)["today"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_record_cost_is_buffered_then_batched(tracker, db):
+    for _ in range(5):
+        await tracker.record_cost("anima", "gpt-4o", 10, 5, 0.5, "chat", user_id="u1")
+
+    assert tracker.get_running_totals("user", "u1")["today"] == pytest.approx(2.5)
+    with patch.object(db, "executemany", wraps=db.executemany) as executemany:
+        assert await tracker.flush() == 5
+    assert executemany.await_count == 1
+    assert await _count_rows(db) == 5
+    assert tracker.get_queue_stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_start_seeds_totals_and_alerts_skip_sql(tracker, db):
+    now = datetime.now(timezone.utc)
+    await _insert(db, now, 2.0, user_id="u1")
+    await _insert(db, now, 2.5, user_id="u2", agent="neo")
+    await _insert(db, now - timedelta(days=400), 7.0, user_id="u1")
+
+    await tracker.start()
+
+    assert tracker.get_running_totals() == {
+        "total": 11.5,
+        "today": 4.5,
+        "this_week": 4.5,
+        "this_month": 4.5,
+    }
+    assert (await tracker.get_spending_summary(user_id="u1"))["total"] == 9.0
+    assert tracker.get_running_totals("agent", "neo")["today"] == 2.5
+    with patch.object(
+        db_queries, "get_costs_summary", AsyncMock(side_effect=AssertionError("SQL"))
+    ):
+        alerts = await tracker.check_alerts()
+    assert alerts == [("jour", 4.5, CostTracker.DAILY_LIMIT)]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_corrects_drift_and_keeps_concurrent_costs(tracker, db):
+    await tracker.start()
+    await _insert(db, datetime.now(timezone.utc), 1.25)  # autre processus
+
+    real_rollup = db_queries.get_costs_rollup
+    recorded = False
+
+    async def rollup_with_concurrent_record(*args, **kwargs):
+        nonlocal recorded
+        if not recorded:
+            recorded = True
+            await tracker.record_cost("nexus", "gpt-4o", 1, 1, 0.75, "chat", user_id="u3")
+        return await real_rollup(*args, **kwargs)
+
+    with patch.object(db_queries, "get_costs_rollup", rollup_with_concurrent_record):
+        drift = await tracker.reconcile()
+
+    assert drift == pytest.approx(1.25)
+    assert tracker.get_running_totals()["total"] == pytest.approx(2.0)
+    await tracker.flush()
+    assert await _count_rows(db) == 2
+    assert await tracker.reconcile() == pytest.approx(0.0)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_requeued(tracker, db):
+    await tracker.record_cost("anima", "gpt-4o", 10, 5, 0.1, "chat")
+    with patch.object(db_queries, "add_cost_logs", AsyncMock(side_effect=RuntimeError("locked"))):
+        assert await tracker.flush() == 0
+    assert tracker.get_queue_stats()["pending"] == 1
+    assert await tracker.flush() == 1
+    assert tracker.stats["flush_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_flushes_inline_and_drops_only_on_db_failure(tracker, db, caplog):
+    tracker.max_pending = 3
+    for _ in range(4):
+        await tracker.record_cost("anima", "gpt-4o", 10, 5, 0.1, "chat")
+
+    assert tracker.stats["backpressure_flushes"] == 1
+    assert tracker.stats["dropped"] == 0
+    assert await _count_rows(db) == 3
+
+    for _ in range(2):
+        await tracker.record_cost("anima", "gpt-4o", 10, 5, 0.1, "chat")
+    with patch.object(db_queries, "add_cost_logs", AsyncMock(side_effect=RuntimeError("locked"))):
+        with caplog.at_level("WARNING"):
+            await tracker.record_cost("anima", "gpt-4o", 10, 5, 0.1, "chat")
+
+    assert tracker.stats["dropped"] == 1
+    assert tracker.get_queue_stats()["pending"] == 3
+    assert "Coût abandonné" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_cost_recorded_after_stop_is_written_directly(tracker, db):
+    await tracker.start()
+    await tracker.stop()
+
+    await tracker.record_cost("anima", "gpt-4o", 10, 5, 0.2, "chat")
+
+    assert await _count_rows(db) == 1
+    assert tracker.get_queue_stats()["pending"] == 0
+    assert tracker.stats["dropped"] == 0
@@ -0,0 +1,175 @@
+"""Tests magasin d'événements local : ingestion groupée, rollups, rétention, API."""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from backend.core import event_store as event_store_module
+from backend.core.event_store import EventStore, SQLiteEventSegments
+from backend.core.tracing import TraceManager
+from backend.features.metrics.router import router as metrics_router
+
+HOUR = 3600
+
+
+@pytest.fixture
+async def store(tmp_path):
+    instance = EventStore(
+        SQLiteEventSegments(str(tmp_path / "events.db")),
+        raw_retention_hours=24,
+        rollup_retention_days=30,
+    )
+    yield instance
+    await instance.stop()
+    instance.segments.close()
+
+
+@pytest.fixture
+def installed(store, monkeypatch):
+    monkeypatch.setattr(event_store_module, "_event_store", store)
+    return store
+
+
+def _spans(store: EventStore, agent: str, durations, ts: float) -> None:
+    for duration in durations:
+        store.record(
+            "span",
+            ts=ts,
+            name="retrieval",
+            agent=agent,
+            status="OK",
+            duration_ms=duration,
+        )
+
+
+@pytest.mark.asyncio
+async def test_query_groups_with_percentiles(store):
+    now = time.time()
+    _spans(store, "anima", range(1, 101), now)
+    _spans(store, "neo", [500] * 10, now)
+    store.record("span", ts=now, name="llm_generate", agent="anima", duration_ms=9000)
+
+    result = await store.query(
+        "span", group_by=["agent"], filters={"name": "retrieval"}
+    )
+
+    groups = {g["agent"]: g for g in result["groups"]}
+    assert groups["anima"]["count"] == 100
+    assert groups["anima"]["avg"] == pytest.approx(50.5)
+    assert 95 * 0.85 <= groups["anima"]["p95"] <= 95 * 1.25
+    assert groups["neo"]["p50"] == 500
+    assert store.stats["flushed"] == 111
+
+
+@pytest.mark.asyncio
+async def test_compaction_rolls_old_events_into_hourly_segments(store):
+    now = time.time()
+    old = now - 3 * 24 * HOUR
+    _spans(store, "anima", range(1, 201), old)
+    _spans(store, "anima", [1000], now)
+    before = await store.query(
+        "span",
+        group_by=["agent"],
+        start=datetime.fromtimestamp(old - HOUR, timezone.utc),
+    )
+
+    stats = await store.compact(now)
+    after = await store.query(
+        "span",
+        group_by=["agent"],
+        start=datetime.fromtimestamp(old - HOUR, timezone.utc),
+    )
+    tables = (await store.get_stats())["tables"]["span"]
+
+    assert stats["compacted"] == 200
+    assert tables == {"raw": 1, "rollups": 1}
+    assert after["groups"][0]["count"] == before["groups"][0]["count"] == 201
+    assert after["groups"][0]["avg"] == pytest.approx(before["groups"][0]["avg"])
+    assert after["groups"][0]["p95"] == before["groups"][0]["p95"]
+    assert after["groups"][0]["max"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_disk_is_bounded_by_row_cap_and_rollup_retention(tmp_path):
+    store = EventStore(
+        SQLiteEventSegments(str(tmp_path / "capped.db")),
+        raw_retention_hours=24,
+        rollup_retention_days=1,
+        max_raw_rows=10,
+    )
+    now = time.time()
+    hour_start = now - now % HOUR
+    _spans(store, "anima", [5] * 30, hour_start - 2 * HOUR)
+    _spans(store, "anima", [5] * 5, hour_start + 1)
+    _spans(store, "neo", [7], now - 5 * 24 * HOUR)
+
+    await store.compact(now)
+    tables = (await store.get_stats())["tables"]["span"]
+    await store.stop()
+    store.segments.close()
+
+    assert tables["raw"] <= 10
+    assert tables["rollups"] == 1  # le rollup "neo" (5 jours) est purgé
+
+
+@pytest.mark.asyncio
+async def test_unknown_columns_are_rejected(store):
+    with pytest.raises(ValueError):
+        await store.query("span", group_by=["agent; DROP TABLE ev_span"])
+    with pytest.raises(ValueError):
+        await store.query("span", measure="tokens")
+    assert store.record("unknown_kind", foo=1) is False
+
+
+@pytest.mark.asyncio
+async def test_trace_spans_and_metrics_router(installed):
+    manager = TraceManager()
+    span_id = manager.start_span("retrieval", attrs={"agent": "nexus"})
+    manager.end_span(span_id, status="OK")
+
+    app = FastAPI()
+    app.include_router(metrics_router)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/events/query",
+            params={"kind": "span", "group_by": "agent", "filter": "name=retrieval"},
+        )
+        bad = await client.get(
+            "/events/query", params={"kind": "span", "group_by": "nope"}
+        )
+        schema = await client.get("/events/schema")
+
+    assert response.status_code == 200
+    assert [g["agent"] for g in response.json()["groups"]] == ["nexus"]
+    assert bad.status_code == 400
+    assert "llm_call" in schema.json()
+
+
+@pytest.mark.asyncio
+async def test_router_reports_disabled_store(monkeypatch):
+    monkeypatch.setattr(event_store_module, "_event_store", None)
+    app = FastAPI()
+    app.include_router(metrics_router)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/events/stats")
+    assert response.status_code == 503
+
+
+def test_naive_datetimes_are_utc():
+    naive = datetime(2025, 1, 1, 12)
+    assert (
+        event_store_module._epoch(naive)
+        == naive.replace(tzinfo=timezone.utc).timestamp()
+    )
+    assert (
+        event_store_module._epoch(naive + timedelta(hours=1))
+        - event_store_module._epoch(naive)
+        == HOUR
+    )
@@ -0,0 +1,81 @@
+"""Tests du MetricsCollector : clés par template de route et percentiles en streaming."""
+
+import random
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from backend.core import monitoring
+from backend.core.asgi_pipeline import ASGIPipelineMiddleware, MonitoringStage
+from backend.core.monitoring import LatencySketch, MetricsCollector
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-3, 1) for _ in range(20_000)]
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for v in values:
+        sketch.add(v)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+    # Mémoire fixe : nombre de buckets indépendant du nombre d'échantillons
+    assert len(sketch.bins) < 1200
+    assert sketch.count == 20_000
+
+
+def test_route_stats_errors_and_status_classes():
+    collector = MetricsCollector()
+    for status in (200, 200, 404, 503):
+        collector.record_response("/api/threads/{thread_id}", "GET", status, 0.05)
+    collector.record_response("/api/threads/{thread_id}", "GET", 500, 0.2, "RuntimeError")
+
+    summary = collector.get_metrics_summary()
+    route = summary["endpoints"]["GET:/api/threads/{thread_id}"]
+    assert summary["total_requests"] == 5
+    assert summary["total_errors"] == 2
+    assert route["status_classes"] == {"2xx": 2, "4xx": 1, "5xx": 2}
+    assert route["error_types"] == {"HTTP503": 1, "RuntimeError": 1}
+    assert route["error_rate"] == 40.0
+    assert route["p99_ms"] >= route["p50_ms"] > 0
+    assert collector.get_error_rate("/api/threads/{thread_id}") == 40.0
+
+
+def test_cardinality_is_bounded_and_reset():
+    collector = MetricsCollector(max_routes=3)
+    for i in range(50):
+        collector.record_request(f"/raw/{i}", "GET")
+        collector.record_latency(f"/raw/{i}", 0.01)
+
+    assert len(collector.routes) <= 4
+    assert collector.routes[("GET", monitoring.OVERFLOW_ROUTE)].requests == 47
+    assert collector.get_overall_avg_latency() == pytest.approx(0.01)
+    collector.reset()
+    assert collector.get_metrics_summary()["endpoints"] == {}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_route_template(monkeypatch):
+    collector = MetricsCollector()
+    monkeypatch.setattr(monitoring, "metrics", collector)
+    monkeypatch.setattr("backend.core.asgi_pipeline.metrics", collector)
+
+    app = FastAPI()
+
+    @app.get("/api/threads/{thread_id}/messages")
+    async def messages(thread_id: str):
+        return {"thread": thread_id}
+
+    app.add_middleware(ASGIPipelineMiddleware, stages=[MonitoringStage()])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for i in range(5):
+            await client.get(f"/api/threads/t{i}/messages")
+        await client.get("/nope")
+
+    keys = set(collector.get_metrics_summary()["endpoints"])
+    assert keys == {"GET:/api/threads/{thread_id}/messages", "GET:<unmatched>"}
+    assert collector.routes[("GET", "/api/threads/{thread_id}/messages")].requests == 5
@@ -0,0 +1,155 @@
+"""Tests profiler par échantillonnage : piles taguées, bornes mémoire, retard de boucle."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from backend.core.profiler import OVERFLOW_STACK, SamplingProfiler
+from backend.core.tracing import TraceManager
+from backend.core.tracing import trace_manager as tracing
+from backend.features.monitoring import router as monitoring
+
+
+def _busy_retrieval(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+@pytest.mark.asyncio
+async def test_samples_loop_stacks_tagged_with_current_span():
+    profiler = SamplingProfiler(hz=250)
+    mgr = TraceManager()
+    assert profiler.start()
+    try:
+        with mgr.span("retrieval", new_trace=True, agent="anima"):
+            _busy_retrieval(0.3)
+        await asyncio.sleep(0.1)  # boucle au repos : échantillons "idle"
+    finally:
+        await profiler.stop()
+
+    stacks = profiler.collapsed(focus="_busy_retrieval")
+    assert stacks
+    tagged = max(stacks, key=stacks.get)
+    assert tagged[:2] == ("span:retrieval", "agent:anima")
+    assert sum(stacks.values()) >= 20
+
+    stats = profiler.get_stats()
+    assert stats["running"] is False
+    assert stats["idle"] > 0
+    assert stats["overhead_ratio"] < 0.5
+    assert tracing._task_spans is None  # suivi désactivé à l'arrêt
+
+    text = profiler.collapsed_text(focus="_busy_retrieval")
+    assert text.splitlines()[0].startswith("span:retrieval;agent:anima;")
+
+    profile = profiler.speedscope(focus="_busy_retrieval")
+    frames = profile["shared"]["frames"]
+    sampled = profile["profiles"][0]
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert any(f["name"] == "_busy_retrieval" and "line" in f for f in frames)
+    assert all(i < len(frames) for sample in sampled["samples"] for i in sample)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_is_measured_while_profiling():
+    profiler = SamplingProfiler(hz=50, lag_interval=0.02)
+    profiler.start()
+    try:
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # bloque la boucle
+        await asyncio.sleep(0.05)
+    finally:
+        await profiler.stop()
+
+    lag = profiler.loop_lag()
+    assert lag["count"] >= 2
+    assert lag["max_ms"] >= 150
+
+
+@pytest.mark.asyncio
+async def test_duration_stops_sampler_automatically():
+    profiler = SamplingProfiler(hz=100)
+    profiler.start(duration_s=0.05)
+    await asyncio.sleep(0.2)
+
+    assert profiler.running is False
+    assert profiler.start() is True  # redémarrable
+    await profiler.stop()
+
+
+def test_all_threads_sampling_prefixes_stacks_with_thread_name():
+    import threading
+
+    profiler = SamplingProfiler(all_threads=True)
+    release = threading.Event()
+    worker = threading.Thread(target=release.wait, name="embed-worker")
+    worker.start()
+    try:
+        profiler._sample(threading.get_ident())
+    finally:
+        release.set()
+        worker.join()
+
+    stacks = profiler.collapsed()
+    assert any(stack[0] == "thread:embed-worker" for stack in stacks)
+    assert profiler.stats["samples"] >= 1
+
+
+def test_memory_is_bounded_by_stack_cap_and_window():
+    clock = [1000.0]
+    profiler = SamplingProfiler(
+        max_stacks=2, window_seconds=30, bucket_seconds=10, clock=lambda: clock[0]
+    )
+
+    def frame_at(depth: int):
+        import sys
+
+        if depth:
+            return frame_at(depth - 1)
+        return sys._getframe()
+
+    for depth in range(5):
+        profiler._record(frame_at(depth), None, ())
+    stacks = profiler.collapsed()
+    assert len(stacks) == 3
+    assert stacks[OVERFLOW_STACK] == 3
+
+    clock[0] += 45
+    profiler.record_lag(0.01)
+    assert profiler.collapsed() == {}
+    assert len(profiler._buckets) == 1
+
+
+@pytest.mark.asyncio
+async def test_profiler_endpoints_are_admin_only(monkeypatch):
+    profiler = SamplingProfiler(hz=100)
+    monkeypatch.setattr(monitoring, "get_profiler", lambda: profiler)
+    app = FastAPI()
+    app.include_router(monitoring.router)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        denied = await client.get("/api/monitoring/profiler/profile")
+
+        app.dependency_overrides[monitoring.verify_admin] = lambda: {"role": "admin"}
+        started = await client.post("/api/monitoring/profiler/start", params={"duration_s": 5})
+        again = await client.post("/api/monitoring/profiler/start")
+        _busy_retrieval(0.1)
+        collapsed = await client.get(
+            "/api/monitoring/profiler/profile",
+            params={"format": "collapsed", "focus": "_busy_retrieval"},
+        )
+        stopped = await client.post("/api/monitoring/profiler/stop")
+        status = await client.get("/api/monitoring/profiler")
+
+    assert denied.status_code == 401
+    assert started.status_code == 200 and again.status_code == 409
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert "_busy_retrieval" in collapsed.text
+    assert stopped.json()["running"] is False
+    assert status.json()["running"] is False
@@ -0,0 +1,62 @@
+"""Tests RedisManager réel importé avec un module redis.asyncio factice."""
+
+import importlib
+import sys
+import types
+from typing import Any, Dict, Set
+
+import pytest
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.sets: Dict[str, Set[str]] = {}
+
+    async def ping(self) -> bool:
+        return True
+
+    async def sadd(self, key: str, *members: str) -> int:
+        bucket = self.sets.setdefault(key, set())
+        before = len(bucket)
+        bucket.update(members)
+        return len(bucket) - before
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(self.sets.get(key, set()))
+
+    async def close(self) -> None:
+        return None
+
+
+@pytest.fixture
+def redis_manager_module(monkeypatch):
+    client = _FakeRedis()
+
+    async def from_url(url: str, **kwargs: Any) -> _FakeRedis:
+        return client
+
+    package = types.ModuleType("redis")
+    asyncio_module = types.ModuleType("redis.asyncio")
+    asyncio_module.Redis = _FakeRedis  # type: ignore[attr-defined]
+    asyncio_module.from_url = from_url  # type: ignore[attr-defined]
+    package.asyncio = asyncio_module  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "redis", package)
+    monkeypatch.setitem(sys.modules, "redis.asyncio", asyncio_module)
+    monkeypatch.delitem(sys.modules, "backend.core.cache.redis_manager", raising=False)
+
+    module = importlib.import_module("backend.core.cache.redis_manager")
+    yield module
+    sys.modules.pop("backend.core.cache.redis_manager", None)
+
+
+@pytest.mark.asyncio
+async def test_real_manager_imports_and_handles_sets(redis_manager_module):
+    manager = redis_manager_module.RedisManager(url="redis://fake:6379/0")
+    await manager.connect()
+
+    assert await manager.sadd("doc:1", "a", "b") == 2
+    assert await manager.smembers("doc:1") == {"a", "b"}
+    assert await manager.smembers("missing") == set()
+
+    await manager.disconnect()
+    assert manager.is_connected() is False
@@ -0,0 +1,147 @@
+"""Tests roue de temporisation : échéances, cascade, réarmement O(1), intégrations."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from backend.core.session_manager import SessionManager
+from backend.core.timer_wheel import TimerWheel
+from backend.features.memory.score_cache import ScoreCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _run(wheel: TimerWheel, clock: FakeClock, until: float, step: float = 0.25) -> None:
+    while clock.now < until:
+        clock.now = min(until, clock.now + step)
+        wheel.advance()
+
+
+def test_timers_fire_on_time_across_levels_and_overflow(clock):
+    wheel = TimerWheel(tick_seconds=1, slots=4, levels=2, clock=clock)
+    start = clock.now
+    fired = {}
+    delays = [0.5, 3, 5, 15.5, 17, 40, 63.2]
+    for delay in delays:
+        wheel.schedule(delay, lambda d=delay: fired.__setitem__(d, clock.now - start))
+    assert wheel.get_stats()["overflow"] == 4  # au-delà de 4**2 ticks
+
+    _run(wheel, clock, start + 70)
+
+    assert sorted(fired) == delays
+    for delay, at in fired.items():
+        assert delay <= at <= delay + 1.25
+    assert wheel.get_stats()["active_timers"] == 0
+
+
+def test_cancel_and_reschedule_move_a_single_timer(clock):
+    wheel = TimerWheel(tick_seconds=1, clock=clock)
+    start = clock.now
+    fired = []
+    handle = wheel.schedule(10, fired.append, "session")
+    cancelled = wheel.schedule(5, fired.append, "cache")
+
+    assert cancelled.cancel() and not cancelled.cancel()
+    for _ in range(100):
+        wheel.reschedule(handle, 10)  # activité répétée : toujours un seul timer
+    assert len(wheel) == 1
+
+    _run(wheel, clock, start + 9)
+    assert fired == []
+    _run(wheel, clock, start + 11)
+    assert fired == ["session"]
+    assert wheel.get_stats()["cancelled"] == 1
+
+
+def test_callback_can_cancel_a_timer_due_on_the_same_tick(clock):
+    wheel = TimerWheel(tick_seconds=1, clock=clock)
+    fired = []
+    second = None
+
+    def first() -> None:
+        fired.append("first")
+        second.cancel()
+
+    wheel.schedule(2, first)
+    second = wheel.schedule(2, fired.append, "second")
+    clock.now += 3
+    wheel.advance()
+
+    assert fired == ["first"]
+
+
+@pytest.mark.asyncio
+async def test_driver_task_runs_async_callbacks_and_reports_lag():
+    wheel = TimerWheel(tick_seconds=0.01)
+    done = asyncio.Event()
+
+    async def callback() -> None:
+        done.set()
+
+    wheel.schedule(0.02, callback)
+    await asyncio.wait_for(done.wait(), timeout=2)
+    stats = wheel.get_stats()
+    await wheel.stop()
+
+    assert stats["fired"] == 1 and stats["active_timers"] == 0
+    assert stats["running"] is True
+    assert stats["max_lag_ms"] >= 0.0
+
+
+@pytest.mark.asyncio
+async def test_session_inactivity_warns_then_revokes_without_scanning(clock):
+    wheel = TimerWheel(tick_seconds=1, clock=clock)
+    manager = SessionManager(db_manager=Mock(save_session=AsyncMock()))
+    manager._timer_wheel = wheel
+    notifier = Mock(send_personal_message=AsyncMock(), close_session=AsyncMock())
+    manager.set_notification_service(notifier)
+    manager.start_cleanup_task()
+    manager.create_session("s1", "user-1")
+    for _ in range(10):
+        manager._update_session_activity("s1")
+    assert len(wheel) == 1
+
+    warning_delay, timeout = manager._inactivity_delays()
+    session = manager.active_sessions["s1"]
+    session.last_activity = datetime.now(timezone.utc) - timedelta(seconds=warning_delay)
+    clock.now += warning_delay + 1
+    wheel.advance()
+    await asyncio.sleep(0)
+
+    payload = notifier.send_personal_message.await_args.args[0]
+    assert payload["notification_type"] == "inactivity_warning"
+    assert session._warning_sent is True
+
+    session.last_activity = datetime.now(timezone.utc) - timedelta(seconds=timeout)
+    clock.now += timeout - warning_delay + 1
+    wheel.advance()
+    await asyncio.sleep(0)
+
+    assert "s1" not in manager.active_sessions
+    assert notifier.close_session.await_args.kwargs["code"] == 4408
+    assert len(wheel) == 0
+
+
+def test_score_cache_entries_expire_through_the_wheel(clock):
+    cache = ScoreCache(max_size=10, ttl_seconds=60)
+    cache._timer_wheel = TimerWheel(tick_seconds=1, clock=clock)
+    cache.set("q", "entry-1", "t", 0.5)
+    cache.set("q", "entry-1", "t", 0.6)  # ré-écriture : l'ancien timer est annulé
+
+    clock.now += 61
+    assert cache._timer_wheel.advance() == 1
+    assert cache.get_stats()["size"] == 0
+    assert cache._entry_to_keys == {}
@@ -197,3 +197,147 @@ class TestSpanExport:
         assert "attributes" in span_dict
         assert span_dict["attributes"]["agent"] == "anima"
         assert span_dict["attributes"]["top_k"] == 5
+
+
+class TestSamplingAndPropagation:
+    """Tests propagation contextvars, échantillonnage tête/queue, ring buffer."""
+
+    @pytest.mark.asyncio
+    async def test_spans_propagate_across_create_task_fan_out(self):
+        """Test: tâches filles (broadcast) rattachées au span courant."""
+        mgr = TraceManager()
+
+        async def agent(name):
+            span_id = mgr.start_span("llm_generate", attrs={"agent": name})
+            await asyncio.sleep(0)
+            mgr.end_span(span_id)
+
+        root = mgr.start_span("chat_turn", new_trace=True)
+        await asyncio.gather(*(asyncio.create_task(agent(a)) for a in ("anima", "neo")))
+        mgr.end_span(root)
+
+        spans = mgr.export(limit=10)
+        children = [s for s in spans if s["name"] == "llm_generate"]
+        assert {s["parent_id"] for s in children} == {root}
+        assert len({s["trace_id"] for s in spans}) == 1
+
+        # Contexte restauré : le tour suivant ouvre une nouvelle trace
+        next_turn = mgr.start_span("chat_turn")
+        assert mgr.get_span(next_turn).parent_id is None
+        assert mgr.get_span(next_turn).trace_id != spans[0]["trace_id"]
+
+    def test_head_sampling_drops_fast_traces_but_keeps_slow_or_errored(self):
+        """Test: sample_rate=0 → seules les traces lentes / en erreur restent."""
+        mgr = TraceManager(sample_rate=0.0, slow_ms=20)
+
+        fast = mgr.start_span("chat_turn", new_trace=True)
+        mgr.end_span(mgr.start_span("retrieval"))
+        mgr.end_span(fast)
+
+        failed = mgr.start_span("chat_turn", new_trace=True)
+        mgr.end_span(mgr.start_span("retrieval"), status="ERROR")
+        mgr.end_span(failed)
+
+        slow = mgr.start_span("chat_turn", new_trace=True)
+        time.sleep(0.03)
+        mgr.end_span(slow)
+
+        kept = {s["span_id"] for s in mgr.export(limit=10) if s["name"] == "chat_turn"}
+        assert kept == {failed, slow}
+        stats = mgr.get_stats()
+        assert stats["traces_tail_kept"] == 2
+        assert stats["spans_dropped"] == 2
+        assert stats["open_traces"] == 0
+
+    def test_ring_buffer_is_bounded_and_resizable(self):
+        """Test: ring buffer borné, redimensionnement conserve les plus récents."""
+        mgr = TraceManager(max_spans=4)
+        for i in range(10):
+            mgr.end_span(mgr.start_span(f"op_{i}"))
+        assert [s["name"] for s in mgr.export(limit=10)] == ["op_9", "op_8", "op_7", "op_6"]
+
+        mgr._max_spans = 2
+        assert [s["name"] for s in mgr.export(limit=10)] == ["op_9", "op_8"]
+
+    def test_public_ids_are_hex_strings_matching_otlp(self):
+        """Test: start_span / to_dict exposent les ids hex de l'export OTLP."""
+        from backend.core.tracing.exporters import spans_to_otlp
+
+        mgr = TraceManager()
+        root = mgr.start_span("chat_turn", new_trace=True)
+        child = mgr.start_span("retrieval")
+        assert isinstance(root, str) and len(root) == 16
+        assert mgr.get_span(child).name == "retrieval"
+        mgr.end_span(child)
+        mgr.end_span(root)
+
+        exported = {s["name"]: s for s in mgr.export(limit=2)}
+        assert exported["chat_turn"]["span_id"] == root
+        assert exported["retrieval"]["parent_id"] == root
+        assert exported["chat_turn"]["parent_id"] is None
+        otlp = spans_to_otlp(mgr._completed.recent(2))["resourceSpans"][0]
+        otlp_spans = {s["name"]: s for s in otlp["scopeSpans"][0]["spans"]}
+        assert otlp_spans["retrieval"]["traceId"] == exported["retrieval"]["trace_id"]
+        assert otlp_spans["retrieval"]["spanId"] == exported["retrieval"]["span_id"]
+
+    def test_latency_breakdown_finds_dominant_stage_of_slow_turns(self):
+        """Test: répartition par étape et étape dominante des tours lents."""
+        mgr = TraceManager(slow_ms=15)
+        for slow in (False, True):
+            with mgr.span("chat_turn", new_trace=True):
+                with mgr.span("retrieval"):
+                    time.sleep(0.02 if slow else 0.0)
+                with mgr.span("llm_generate"):
+                    pass
+
+        breakdown = mgr.latency_breakdown(root_name="chat_turn")
+        assert breakdown["traces"] == 2
+        assert breakdown["slow_traces"] == 1
+        assert breakdown["dominant_in_slow"] == {"retrieval": 1}
+        assert set(breakdown["stages"]) == {"retrieval", "llm_generate", "self"}
+        assert breakdown["slow_stages"]["retrieval"]["share"] > 0.5
+
+    def test_span_context_manager_marks_errors(self):
+        """Test: exception dans le with → span ERROR, exception propagée."""
+        mgr = TraceManager()
+        with pytest.raises(RuntimeError):
+            with mgr.span("tool_call", agent="nexus"):
+                raise RuntimeError("boom")
+        assert mgr.export(limit=1)[0]["status"] == "ERROR"
+
+
+class TestOTLPExport:
+    """Tests exporter fichier OTLP-JSON."""
+
+    @pytest.mark.asyncio
+    async def test_file_exporter_writes_otlp_json_lines(self, tmp_path):
+        """Test: spans conservés écrits au format ExportTraceServiceRequest."""
+        import json
+
+        from backend.core.tracing import OTLPJsonFileExporter
+
+        path = tmp_path / "traces.jsonl"
+        exporter = OTLPJsonFileExporter(str(path))
+        mgr = TraceManager(exporters=[exporter])
+        with mgr.span("chat_turn", new_trace=True, agent="anima"):
+            with mgr.span("retrieval", top_k=5):
+                pass
+        await mgr.shutdown()
+
+        requests = [json.loads(line) for line in path.read_text().splitlines()]
+        spans = [
+            span
+            for request in requests
+            for resource in request["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        ]
+        by_name = {span["name"]: span for span in spans}
+        assert len(by_name["chat_turn"]["traceId"]) == 32
+        assert by_name["retrieval"]["parentSpanId"] == by_name["chat_turn"]["spanId"]
+        assert by_name["chat_turn"]["parentSpanId"] == ""
+        assert {"key": "top_k", "value": {"intValue": "5"}} in by_name["retrieval"]["attributes"]
+        assert int(by_name["retrieval"]["endTimeUnixNano"]) >= int(
+            by_name["retrieval"]["startTimeUnixNano"]
+        )
+        assert exporter.get_stats()["written"] == 2
@@ -12,7 +12,7 @@ Date: 2025-10-15
 
 import pytest
 import time
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 
 class TestConsolidatedMemoryCache:
@@ -68,8 +68,8 @@ class TestConsolidatedMemoryCache:
         cache.ttl_seconds = 300  # 5 minutes
 
         # Simuler cache vide au départ
-        cache.get = Mock(return_value=None)
-        cache.set = Mock()
+        cache.aget = AsyncMock(return_value=None)
+        cache.aset = AsyncMock()
 
         return cache
 
@@ -108,9 +108,9 @@ class TestConsolidatedMemoryCache:
             duration_miss = time.time() - start
 
             # Assertions
-            assert mock_rag_cache.get.called, "Cache.get devrait être appelé"
-            assert mock_rag_cache.set.called, (
-                "Cache.set devrait être appelé pour stocker"
+            assert mock_rag_cache.aget.called, "Cache.aget devrait être appelé"
+            assert mock_rag_cache.aset.called, (
+                "Cache.aset devrait être appelé pour stocker"
             )
 
             # Vérifier que ChromaDB a été interrogé
@@ -153,8 +153,8 @@ class TestConsolidatedMemoryCache:
             "rag_sources": [],
         }
 
-        mock_rag_cache.get = Mock(return_value=cached_data)
-        mock_rag_cache.set = Mock()
+        mock_rag_cache.aget = AsyncMock(return_value=cached_data)
+        mock_rag_cache.aset = AsyncMock()
 
         settings = Settings()
         cost_tracker = Mock(spec=CostTracker)
@@ -181,9 +181,9 @@ class TestConsolidatedMemoryCache:
             duration_hit = time.time() - start
 
             # Assertions
-            assert mock_rag_cache.get.called, "Cache.get devrait être appelé"
-            assert not mock_rag_cache.set.called, (
-                "Cache.set NE devrait PAS être appelé sur hit"
+            assert mock_rag_cache.aget.called, "Cache.aget devrait être appelé"
+            assert not mock_rag_cache.aset.called, (
+                "Cache.aset NE devrait PAS être appelé sur hit"
             )
 
             # Vérifier que ChromaDB n'a PAS été interrogé
@@ -234,8 +234,8 @@ class TestConsolidatedMemoryCache:
             nonlocal cached_result
             cached_result = {"doc_hits": doc_hits, "rag_sources": rag_sources}
 
-        mock_rag_cache.get = Mock(side_effect=cache_get_side_effect)
-        mock_rag_cache.set = Mock(side_effect=cache_set_side_effect)
+        mock_rag_cache.aget = AsyncMock(side_effect=cache_get_side_effect)
+        mock_rag_cache.aset = AsyncMock(side_effect=cache_set_side_effect)
 
         settings = Settings()
         cost_tracker = Mock(spec=CostTracker)
@@ -385,8 +385,8 @@ class TestConsolidatedMemoryCache:
             )
 
             # Vérifier que la clé cache a le préfixe __CONSOLIDATED_MEMORY__
-            assert mock_rag_cache.get.called
-            call_args = mock_rag_cache.get.call_args
+            assert mock_rag_cache.aget.called
+            call_args = mock_rag_cache.aget.call_args
             cache_query = call_args[0][0]  # Premier argument
 
             assert cache_query.startswith("__CONSOLIDATED_MEMORY__:"), (
@@ -0,0 +1,174 @@
+"""Tests du moteur de consolidation en lot des threads archivés (concurrence + reprise)."""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.core.database.manager import DatabaseManager
+from backend.core.database.schema import TABLE_DEFINITIONS
+from backend.features.memory.archive_consolidation import (
+    CHECKPOINT_TABLE,
+    ArchiveConsolidationRunner,
+    default_run_id,
+)
+
+
+async def _make_db(tmp_path, n_threads: int) -> DatabaseManager:
+    db = DatabaseManager(str(tmp_path / "archives.db"))
+    await db.connect()
+    await db.execute(
+        """
+        CREATE TABLE threads (
+            id TEXT PRIMARY KEY,
+            session_id TEXT,
+            user_id TEXT,
+            type TEXT,
+            title TEXT,
+            archived INTEGER,
+            archived_at TEXT,
+            consolidated_at TEXT,
+            message_count INTEGER
+        )
+        """,
+        commit=True,
+    )
+    for ddl in TABLE_DEFINITIONS:
+        if f"TABLE IF NOT EXISTS {CHECKPOINT_TABLE}" in ddl:
+            await db.execute(ddl, commit=True)
+    await db.executemany(
+        "INSERT INTO threads VALUES (?, ?, ?, 'chat', ?, 1, ?, NULL, 3)",
+        [
+            (f"t{i:02d}", f"s{i:02d}", "u1", f"Thread {i}", f"2025-01-{i + 1:02d}")
+            for i in range(n_threads)
+        ],
+        commit=True,
+    )
+    return db
+
+
+class _FakeCollection:
+    def __init__(self, consolidated: List[str]):
+        self.consolidated = set(consolidated)
+        self.calls: List[Dict[str, Any]] = []
+
+    def get(self, where=None, limit=None, include=None):
+        self.calls.append(where)
+        cond = where["thread_id"]
+        wanted = cond["$in"] if isinstance(cond, dict) else [cond]
+        hits = [tid for tid in wanted if tid in self.consolidated]
+        return {"ids": hits, "metadatas": [{"thread_id": tid} for tid in hits]}
+
+
+class _FakeGardener:
+    """Simule un ``_tend_single_thread`` lent qui passe par les portes LLM/vecteur."""
+
+    def __init__(self, collection: _FakeCollection, fail_on: str = ""):
+        self.knowledge_collection = collection
+        self.llm_gate = None
+        self.vector_gate = None
+        self.fail_on = fail_on
+        self.in_flight = {"threads": 0, "llm": 0, "vector": 0}
+        self.peak = {"threads": 0, "llm": 0, "vector": 0}
+        self.tended: List[str] = []
+        self.decay_calls = 0
+
+    async def _step(self, kind: str, gate: Any) -> None:
+        async with gate:
+            self.in_flight[kind] += 1
+            self.peak[kind] = max(self.peak[kind], self.in_flight[kind])
+            await asyncio.sleep(0.01)
+            self.in_flight[kind] -= 1
+
+    async def _tend_single_thread(self, thread_id, session_id, user_id, run_decay=True):
+        assert run_decay is False
+        self.in_flight["threads"] += 1
+        self.peak["threads"] = max(self.peak["threads"], self.in_flight["threads"])
+        try:
+            await self._step("llm", self.llm_gate)
+            await self._step("vector", self.vector_gate)
+        finally:
+            self.in_flight["threads"] -= 1
+        if thread_id == self.fail_on:
+            raise RuntimeError("LLM timeout")
+        self.tended.append(thread_id)
+        return {"status": "success", "new_concepts": 2}
+
+    async def _decay_knowledge(self):
+        self.decay_calls += 1
+
+
+@pytest.mark.asyncio
+async def test_runner_bounds_concurrency_and_probes_existence_in_bulk(tmp_path):
+    db = await _make_db(tmp_path, 12)
+    collection = _FakeCollection(consolidated=["t00", "t05"])
+    gardener = _FakeGardener(collection)
+    runner = ArchiveConsolidationRunner(
+        db, gardener, concurrency=4, llm_concurrency=2, vector_concurrency=1
+    )
+
+    stats = await runner.run(user_id="u1")
+
+    assert stats.total == 12
+    assert stats.already_consolidated == 2
+    assert stats.consolidated == 10
+    assert stats.total_concepts == 20
+    assert sorted(gardener.tended) == [f"t{i:02d}" for i in range(12) if i not in (0, 5)]
+    assert gardener.peak["threads"] <= 4
+    assert gardener.peak["llm"] <= 2
+    assert gardener.peak["vector"] == 1
+    # Une seule requête $in pour les 12 threads, au lieu de 12 sondes
+    assert len(collection.calls) == 1
+    assert gardener.decay_calls == 1
+    # Portes restaurées après le run
+    assert gardener.llm_gate is None and gardener.vector_gate is None
+    await db.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_runner_resumes_from_checkpoint(tmp_path):
+    db = await _make_db(tmp_path, 6)
+    collection = _FakeCollection(consolidated=[])
+    first = _FakeGardener(collection, fail_on="t03")
+    runner = ArchiveConsolidationRunner(db, first, concurrency=2)
+
+    stats = await runner.run(user_id="u1")
+    assert stats.consolidated == 5
+    assert [e["thread_id"] for e in stats.errors] == ["t03"]
+
+    rows = await db.fetch_all(
+        f"SELECT thread_id, status FROM {CHECKPOINT_TABLE} WHERE run_id = ?",
+        (default_run_id("u1"),),
+    )
+    assert {r["thread_id"]: r["status"] for r in rows}["t03"] == "error"
+
+    # Second run : seul le thread en erreur est retraité
+    second = _FakeGardener(collection)
+    stats = await ArchiveConsolidationRunner(db, second, concurrency=2).run(user_id="u1")
+    assert second.tended == ["t03"]
+    assert stats.resumed == 5
+    assert stats.consolidated == 1
+
+    # --restart repart de zéro
+    third = _FakeGardener(collection)
+    stats = await ArchiveConsolidationRunner(db, third).run(user_id="u1", restart=True)
+    assert len(third.tended) == 6
+    assert stats.resumed == 0
+    await db.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_forced_runs_do_not_reuse_previous_checkpoint(tmp_path):
+    db = await _make_db(tmp_path, 3)
+    collection = _FakeCollection(consolidated=["t00", "t01", "t02"])
+
+    first = _FakeGardener(collection)
+    await ArchiveConsolidationRunner(db, first).run(user_id="u1", force=True)
+    assert len(first.tended) == 3
+
+    # Un second --force sans --restart retraite tout (run id neuf)
+    second = _FakeGardener(collection)
+    stats = await ArchiveConsolidationRunner(db, second).run(user_id="u1", force=True)
+    assert len(second.tended) == 3
+    assert stats.resumed == 0
+    await db.disconnect()
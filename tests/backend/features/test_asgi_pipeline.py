@@ -0,0 +1,175 @@
+"""Tests du pipeline ASGI pur (deny-list, rate limit, sécurité, monitoring, usage)."""
+
+import asyncio
+from typing import Any, List
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from backend.core.asgi_pipeline import (
+    ASGIPipelineMiddleware,
+    DenyListStage,
+    MonitoringStage,
+    RateLimitStage,
+    SecurityStage,
+)
+from backend.middleware.usage_tracking import UsageTrackingStage
+
+
+class _FakeUsageRepository:
+    def __init__(self) -> None:
+        self.usages: List[Any] = []
+        self.errors: List[Any] = []
+
+    async def log_feature_usage(self, usage):
+        self.usages.append(usage)
+
+    async def log_user_error(self, error):
+        self.errors.append(error)
+
+
+def _build_app(repo: _FakeUsageRepository, *, rate_limit: int = 100) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping(request: Request):
+        request.state.auth_claims = {"email": "ana@example.com"}
+        return {"ok": True}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/api/boom")
+    async def boom():
+        raise RuntimeError("kaboom")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(
+        ASGIPipelineMiddleware,
+        stages=[
+            DenyListStage([r"wp-admin", r"\.env$"]),
+            UsageTrackingStage(repository_getter=lambda: repo),
+            RateLimitStage(requests_per_minute=rate_limit),
+            SecurityStage(max_request_bytes=1024),
+            MonitoringStage(),
+        ],
+    )
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_headers_and_usage_logged_once_per_request():
+    repo = _FakeUsageRepository()
+    async with _client(_build_app(repo)) as client:
+        response = await client.get("/api/ping")
+        await client.get("/health")
+        await asyncio.sleep(0)
+
+    assert response.status_code == 200
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["x-ratelimit-limit"] == "100"
+    assert response.headers["x-ratelimit-remaining"] == "99"
+    assert response.headers["x-response-time"].endswith("ms")
+    assert "x-request-id" in response.headers
+    # /health est ignoré ; l'email vient des claims posés par la route
+    assert [u.endpoint for u in repo.usages] == ["/api/ping"]
+    assert repo.usages[0].user_email == "ana@example.com"
+    assert repo.usages[0].feature_name == "ping"
+    assert repo.usages[0].success is True
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_passes_through_untouched():
+    repo = _FakeUsageRepository()
+    async with _client(_build_app(repo)) as client:
+        async with client.stream("GET", "/api/stream") as response:
+            chunks = [chunk async for chunk in response.aiter_bytes()]
+
+    assert b"".join(chunks) == b"chunk-0\nchunk-1\nchunk-2\n"
+    assert response.headers["x-frame-options"] == "DENY"
+
+
+@pytest.mark.asyncio
+async def test_denylist_short_circuits_before_other_stages():
+    repo = _FakeUsageRepository()
+    async with _client(_build_app(repo)) as client:
+        response = await client.get("/wp-admin/setup.php")
+
+    assert response.status_code == 404
+    assert "x-frame-options" not in response.headers
+    assert repo.usages == []
+
+
+@pytest.mark.asyncio
+async def test_oversized_request_and_rate_limit():
+    repo = _FakeUsageRepository()
+    async with _client(_build_app(repo, rate_limit=2)) as client:
+        too_large = await client.post("/api/ping", content=b"x" * 2048)
+        limited = await client.get("/api/ping")
+        await asyncio.sleep(0)
+
+    assert too_large.status_code == 413
+    # 413 compté par le rate limit (étape externe) mais sans headers de sécurité
+    assert too_large.headers["x-ratelimit-remaining"] == "1"
+    assert "x-frame-options" not in too_large.headers
+    assert limited.status_code == 200
+
+    async with _client(_build_app(repo, rate_limit=0)) as client:
+        blocked = await client.get("/api/ping")
+    assert blocked.status_code == 429
+    assert blocked.headers["retry-after"] == "60"
+
+
+@pytest.mark.asyncio
+async def test_unhandled_exception_becomes_500_and_is_tracked():
+    repo = _FakeUsageRepository()
+    async with _client(_build_app(repo)) as client:
+        response = await client.get("/api/boom")
+        await asyncio.sleep(0)
+
+    assert response.status_code == 500
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert repo.usages[0].success is False
+    assert repo.usages[0].error_message == "kaboom"
+    assert repo.errors[0].error_type == "RuntimeError"
+
+
+@pytest.mark.asyncio
+async def test_unhandled_exception_is_reraised_after_completion_hooks():
+    repo = _FakeUsageRepository()
+    transport = httpx.ASGITransport(app=_build_app(repo))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with pytest.raises(RuntimeError, match="kaboom"):
+            await client.get("/api/boom")
+        await asyncio.sleep(0)
+
+    assert repo.errors[0].error_type == "RuntimeError"
+
+
+@pytest.mark.asyncio
+async def test_non_http_scopes_bypass_pipeline():
+    seen = []
+
+    async def inner(scope, receive, send):
+        seen.append(scope["type"])
+
+    pipeline = ASGIPipelineMiddleware(inner, stages=[RateLimitStage(requests_per_minute=0)])
+    await pipeline({"type": "lifespan"}, None, None)
+    await pipeline({"type": "websocket", "path": "/ws"}, None, None)
+    assert seen == ["lifespan", "websocket"]
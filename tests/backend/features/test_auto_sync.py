@@ -335,3 +335,68 @@ async def test_file_type_detection(sync_service: AutoSyncService) -> None:
     )
     assert sync_service._get_file_type("README.md") == "docs"
     assert sync_service._get_file_type("config.yaml") == "other"
+
+
+@pytest.mark.asyncio
+async def test_unchanged_stat_skips_hashing(
+    sync_service: AutoSyncService, temp_repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Un fichier dont (size, mtime_ns) n'a pas bougé n'est pas relu."""
+    import os
+
+    from backend.features.sync import file_watcher
+
+    await sync_service._initialize_checksums()
+
+    # Vieillir les mtimes pour sortir de la fenêtre "racy"
+    old_ns = 1_600_000_000 * 10**9
+    for rel in sync_service.checksums:
+        os.utime(temp_repo / rel, ns=(old_ns, old_ns))
+    sync_service.checksums.clear()
+    await sync_service._initialize_checksums()
+
+    hashed: list[Path] = []
+    original = file_watcher.hash_file
+
+    def _spy(path: Path) -> str:
+        hashed.append(path)
+        return original(path)
+
+    monkeypatch.setattr(file_watcher, "hash_file", _spy)
+
+    assert await sync_service._check_for_changes() == 0
+    assert hashed == []
+    assert sync_service.get_status()["hash_skipped"] == len(sync_service.checksums)
+
+    # Touch sans modification de contenu : hash recalculé, aucun événement
+    os.utime(temp_repo / "AGENTS.md", ns=(old_ns + 10**9, old_ns + 10**9))
+    assert await sync_service._check_for_changes({"AGENTS.md"}) == 0
+    assert len(hashed) == 1
+    assert sync_service.pending_changes == []
+
+
+@pytest.mark.asyncio
+async def test_burst_of_changes_triggers_single_consolidation(temp_repo: Path) -> None:
+    """Une rafale de changements au-dessus du seuil ne déclenche qu'une consolidation."""
+    service = AutoSyncService(
+        repo_root=temp_repo,
+        check_interval_seconds=1,
+        consolidation_threshold=2,
+        consolidation_debounce_seconds=0.2,
+        force_polling=True,
+    )
+    service.watched_files = ["AGENTS.md", "CODEV_PROTOCOL.md", "docs/passation.md"]
+    triggers: list[ConsolidationTrigger] = []
+    service.register_consolidation_callback(triggers.append)
+
+    await service._initialize_checksums()
+    for i, rel in enumerate(service.watched_files):
+        (temp_repo / rel).write_text(f"burst {i} " * (i + 2), encoding="utf-8")
+        assert await service._check_for_changes({rel}) == 1
+        service._schedule_debounced_consolidation()
+
+    await asyncio.sleep(0.5)
+
+    assert [t.trigger_type for t in triggers] == ["threshold"]
+    assert service.pending_changes == []
+    assert service.get_status()["watch_mode"] is None
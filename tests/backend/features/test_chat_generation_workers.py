@@ -0,0 +1,230 @@
+"""Tests passerelle/workers de génération : relais des deltas, backpressure, annulation."""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from backend.core.websocket import ConnectionManager
+from backend.features.chat.generation import GenerationGateway, GenerationWorker
+from backend.features.chat.generation_bus import GenerationJob, InProcessGenerationBus
+from backend.features.chat.service import ChatService
+
+
+async def _wait_until(predicate, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition non atteinte")
+
+
+class RecordingConnectionManager:
+    def __init__(self) -> None:
+        self.sent: List[Tuple[str, Dict[str, Any]]] = []
+        self.session_manager = Mock()
+        self.session_manager.get_user_id_for_session.return_value = "user-1"
+        self.session_manager.get_thread_id_for_session.return_value = "thread-1"
+
+    async def send_personal_message(self, message: Dict[str, Any], session_id: str) -> None:
+        self.sent.append((session_id, message))
+
+
+class StreamingChatService:
+    """Imite ``_process_agent_response_stream`` : start, chunks, end."""
+
+    def __init__(self, chunks: List[str], block: Optional[asyncio.Event] = None) -> None:
+        self.chunks = chunks
+        self.block = block
+        self.started: List[str] = []
+
+    async def _process_agent_response_stream(
+        self, session_id, agent_id, use_rag, connection_manager, **kwargs
+    ) -> None:
+        self.started.append(agent_id)
+        await connection_manager.send_personal_message(
+            {"type": "ws:chat_stream_start", "payload": {"agent_id": agent_id}}, session_id
+        )
+        for chunk in self.chunks:
+            if self.block is not None:
+                await self.block.wait()
+            await connection_manager.send_personal_message(
+                {"type": "ws:chat_stream_chunk", "payload": {"chunk": chunk}}, session_id
+            )
+        await connection_manager.send_personal_message(
+            {"type": "ws:chat_stream_end", "payload": {"agent_id": agent_id}}, session_id
+        )
+
+
+@pytest.mark.asyncio
+async def test_worker_streams_deltas_back_to_owning_gateway():
+    bus = InProcessGenerationBus()
+    cm = RecordingConnectionManager()
+    gateway = GenerationGateway(bus, cm)
+    other_cm = RecordingConnectionManager()
+    other_gateway = GenerationGateway(bus, other_cm)
+    worker = GenerationWorker(bus, StreamingChatService(["Bon", "jour"]), concurrency=2)
+    await gateway.start()
+    await other_gateway.start()
+    await worker.start()
+
+    job_id = await gateway.submit("s1", "anima", use_rag=True)
+    await _wait_until(lambda: worker.stats["completed"] == 1 and not gateway._jobs_by_session)
+    await worker.stop()
+    await gateway.stop()
+    await other_gateway.stop()
+
+    assert job_id is not None
+    types = [message["type"] for _, message in cm.sent]
+    assert types == [
+        "ws:chat_stream_start",
+        "ws:chat_stream_chunk",
+        "ws:chat_stream_chunk",
+        "ws:chat_stream_end",
+    ]
+    assert [m["payload"].get("chunk") for _, m in cm.sent[1:3]] == ["Bon", "jour"]
+    assert other_cm.sent == []
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_turn_with_ws_error():
+    bus = InProcessGenerationBus(max_pending=1)
+    cm = RecordingConnectionManager()
+    gateway = GenerationGateway(bus, cm)
+
+    assert await gateway.submit("s1", "anima") is not None
+    assert await gateway.submit("s1", "neo") is None
+
+    assert gateway.stats == {"enqueued": 1, "rejected": 1, "cancel_requests": 0}
+    session_id, message = cm.sent[-1]
+    assert session_id == "s1" and message["payload"]["code"] == "generation_overloaded"
+    job = await bus.dequeue(timeout=0.1)
+    assert job.user_id == "user-1" and job.thread_id == "thread-1"
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_running_and_queued_turns():
+    bus = InProcessGenerationBus()
+    cm = RecordingConnectionManager()
+    gateway = GenerationGateway(bus, cm)
+    never = asyncio.Event()
+    service = StreamingChatService(["a", "b"], block=never)
+    worker = GenerationWorker(bus, service, concurrency=1, poll_timeout=0.05)
+    await gateway.start()
+    await worker.start()
+
+    await gateway.submit("s1", "anima")
+    await gateway.submit("s1", "neo")
+    await _wait_until(lambda: service.started == ["anima"])
+    await gateway.cancel_session("s1")
+    await _wait_until(lambda: worker.stats["cancelled"] == 2)
+    await worker.stop()
+    await gateway.stop()
+
+    assert service.started == ["anima"]
+    assert worker.stats["completed"] == 0
+    assert [m["type"] for _, m in cm.sent] == ["ws:chat_stream_start"]
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_notifies_disconnect_listeners():
+    session_manager = Mock()
+    session_manager.finalize_session = AsyncMock()
+    session_manager.resolve_session_id = Mock(side_effect=lambda sid: sid)
+    cm = ConnectionManager(session_manager)
+    closed: List[str] = []
+
+    async def listener(session_id: str) -> None:
+        closed.append(session_id)
+
+    cm.add_disconnect_listener(listener)
+    websocket = Mock()
+    cm.active_connections["s1"] = [websocket]
+    await cm.disconnect("s1", websocket)
+
+    assert closed == ["s1"]
+
+
+@pytest.mark.asyncio
+async def test_chat_service_delegates_turns_to_gateway():
+    service = object.__new__(ChatService)
+    service.broadcast_agents = ["anima", "neo", "nexus"]
+    service.session_manager = Mock()
+    gateway = Mock()
+    gateway.submit = AsyncMock(return_value="job")
+    service.set_generation_gateway(gateway)
+
+    service.process_user_message_for_agents(
+        "s1", {"agent_id": "global", "use_rag": True, "doc_ids": [3]}, Mock()
+    )
+    await _wait_until(lambda: gateway.submit.await_count == 3)
+
+    agents = [call.args[1] for call in gateway.submit.await_args_list]
+    assert agents == ["anima", "neo", "nexus"]
+    assert gateway.submit.await_args_list[0].kwargs == {
+        "use_rag": True,
+        "doc_ids": [3],
+        "origin_agent_id": "global",
+    }
+
+
+def test_job_roundtrip_json():
+    job = GenerationJob(session_id="s1", agent_id="neo", reply_to="gw", doc_ids=[1, 2])
+    assert GenerationJob.from_json(job.to_json()) == job
+
+
+class _RemoteBus(InProcessGenerationBus):
+    """Bus local se comportant comme un bus inter-processus (Redis)."""
+
+    shared_process = False
+
+
+@pytest.mark.asyncio
+async def test_remote_worker_replaces_stale_history_with_job_snapshot():
+    bus = _RemoteBus()
+    cm = RecordingConnectionManager()
+    web_history = [
+        {"role": "user", "content": "ancien"},
+        {"role": "user", "content": "nouveau"},
+    ]
+    cm.session_manager.get_full_history.return_value = web_history
+    gateway = GenerationGateway(bus, cm)
+
+    stale = Mock()
+    stale.history = [{"role": "user", "content": "ancien"}]
+    chat_service = StreamingChatService(["ok"])
+    chat_service.session_manager = Mock()
+    chat_service.session_manager.ensure_session = AsyncMock(return_value=stale)
+    worker = GenerationWorker(bus, chat_service, concurrency=1)
+    await gateway.start()
+    await worker.start()
+
+    await gateway.submit("s1", "anima", use_rag=False)
+    await _wait_until(lambda: worker.stats["completed"] == 1)
+    await worker.stop()
+    await gateway.stop()
+
+    chat_service.session_manager.ensure_session.assert_awaited_once()
+    assert stale.history == web_history
+
+
+@pytest.mark.asyncio
+async def test_failed_gateway_submit_is_logged_and_released(caplog):
+    service = object.__new__(ChatService)
+    service.broadcast_agents = ["anima"]
+    service.session_manager = Mock()
+    gateway = Mock()
+    gateway.submit = AsyncMock(side_effect=RuntimeError("bus indisponible"))
+    service.set_generation_gateway(gateway)
+
+    with caplog.at_level("ERROR"):
+        service.process_user_message_for_agents(
+            "s1", {"agent_id": "anima", "use_rag": False}, Mock()
+        )
+        assert len(service._gateway_submits) == 1
+        await _wait_until(lambda: not service._gateway_submits)
+
+    assert "bus indisponible" in caplog.text
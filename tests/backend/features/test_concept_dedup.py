@@ -0,0 +1,150 @@
+"""Tests de la dédup sémantique des concepts à l'écriture (MemoryGardener)."""
+
+import json
+import math
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.features.memory.gardener import MemoryGardener
+
+_VOCAB = ["docker", "conteneur", "python", "async", "jardin", "tomate", "kubernetes"]
+
+
+def _embed(text: str) -> List[float]:
+    words = text.lower().split()
+    return [float(words.count(w)) for w in _VOCAB]
+
+
+def _cos(a: List[float], b: List[float]) -> float:
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(x * x for x in b))
+    if not na or not nb:
+        return 0.0
+    return sum(x * y for x, y in zip(a, b)) / (na * nb)
+
+
+class _FakeVectorService:
+    """Collection en mémoire, embeddings sac-de-mots, distance cosinus."""
+
+    def __init__(self) -> None:
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.nn_calls = 0
+        self.embed_calls = 0
+
+    def get_or_create_collection(self, name: str) -> str:
+        return name
+
+    def embed_texts(self, texts):
+        self.embed_calls += 1
+        return [_embed(t) for t in texts]
+
+    def nearest_neighbors(self, collection, embeddings, *, n_results=1, where_filter=None):
+        self.nn_calls += 1
+        conds = {k: v for c in where_filter["$and"] for k, v in c.items()}
+        out = []
+        for emb in embeddings:
+            hits = [
+                {
+                    "id": vid,
+                    "text": it["text"],
+                    "metadata": dict(it["metadata"]),
+                    "distance": 1.0 - _cos(emb, it["embedding"]),
+                }
+                for vid, it in self.items.items()
+                if all(it["metadata"].get(k) == v for k, v in conds.items())
+            ]
+            out.append(sorted(hits, key=lambda h: h["distance"])[:n_results])
+        return out
+
+    def update_metadatas(self, collection, ids, metadatas):
+        for vid, meta in zip(ids, metadatas):
+            self.items[vid]["metadata"] = meta
+
+    def add_items(self, collection, items):
+        for item in items:
+            self.items[item["id"]] = {
+                "text": item["text"],
+                "metadata": dict(item["metadata"]),
+                "embedding": item.get("embedding") or _embed(item["text"]),
+            }
+
+
+@pytest.fixture
+def vector_service() -> _FakeVectorService:
+    return _FakeVectorService()
+
+
+@pytest.fixture
+def gardener(vector_service, monkeypatch) -> MemoryGardener:
+    monkeypatch.setenv("MEMORY_CONCEPT_DEDUP_THRESHOLD", "0.9")
+    return MemoryGardener(
+        db_manager=MagicMock(), vector_service=vector_service, memory_analyzer=MagicMock()
+    )
+
+
+def _session(thread_id: str) -> Dict[str, Any]:
+    return {"id": f"sess-{thread_id}", "thread_id": thread_id}
+
+
+@pytest.mark.asyncio
+async def test_near_duplicates_are_merged_into_existing_vector(gardener, vector_service):
+    await gardener._vectorize_concepts(
+        ["docker conteneur", "jardin tomate"], _session("t1"), "u1", agent_id="Anima"
+    )
+    assert len(vector_service.items) == 2
+
+    await gardener._vectorize_concepts(
+        ["Docker conteneur", "python async"], _session("t2"), "u1", agent_id="anima"
+    )
+
+    # Un seul nouveau vecteur ; une recherche NN et un encodage pour tout le lot
+    assert len(vector_service.items) == 3
+    assert vector_service.nn_calls == 2
+    assert vector_service.embed_calls == 2
+    docker = next(
+        it["metadata"] for it in vector_service.items.values() if it["text"] == "docker conteneur"
+    )
+    assert docker["mention_count"] == 2
+    assert json.loads(docker["thread_ids_json"]) == ["t1", "t2"]
+    assert gardener.concept_dedup_stats == {
+        "merged_existing": 1,
+        "merged_in_batch": 0,
+        "inserted": 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_dedup_respects_user_and_agent_scope(gardener, vector_service):
+    await gardener._vectorize_concepts(["docker conteneur"], _session("t1"), "u1", "anima")
+    await gardener._vectorize_concepts(["docker conteneur"], _session("t2"), "u2", "anima")
+    await gardener._vectorize_concepts(["docker conteneur"], _session("t3"), "u1", "neo")
+
+    assert len(vector_service.items) == 3
+    assert all(it["metadata"]["mention_count"] == 1 for it in vector_service.items.values())
+
+
+@pytest.mark.asyncio
+async def test_duplicates_within_one_batch_are_collapsed(gardener, vector_service):
+    await gardener._vectorize_concepts(
+        ["kubernetes docker", "Kubernetes Docker", "tomate"], _session("t1"), "u1"
+    )
+
+    assert len(vector_service.items) == 2
+    kube = next(it for it in vector_service.items.values() if "ubernetes" in it["text"])
+    assert kube["metadata"]["mention_count"] == 2
+    assert gardener.concept_dedup_stats["merged_in_batch"] == 1
+
+
+@pytest.mark.asyncio
+async def test_threshold_zero_disables_dedup(vector_service, monkeypatch):
+    monkeypatch.setenv("MEMORY_CONCEPT_DEDUP_THRESHOLD", "0")
+    gardener = MemoryGardener(
+        db_manager=MagicMock(), vector_service=vector_service, memory_analyzer=MagicMock()
+    )
+    await gardener._vectorize_concepts(["docker conteneur"], _session("t1"), "u1")
+    await gardener._vectorize_concepts(["docker conteneur"], _session("t2"), "u1")
+
+    assert len(vector_service.items) == 2
+    assert vector_service.nn_calls == 0
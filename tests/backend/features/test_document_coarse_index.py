@@ -0,0 +1,212 @@
+"""Tests de la recherche documentaire en deux étapes (profils par document → chunks)."""
+
+import math
+import zlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from backend.features.documents.coarse_index import (
+    CentroidAccumulator,
+    DocumentCoarseIndex,
+)
+from backend.features.documents.parser import ParserFactory
+from backend.features.documents.service import DocumentService
+
+DIM = 256
+
+
+def _embed(text: str) -> List[float]:
+    vec = [0.0] * DIM
+    for word in text.lower().split():
+        vec[zlib.crc32(word.encode()) % DIM] += 1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def _match(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    if not where:
+        return True
+    for key, value in where.items():
+        if key == "$and":
+            if not all(_match(meta, clause) for clause in value):
+                return False
+        elif key == "$or":
+            if not any(_match(meta, clause) for clause in value):
+                return False
+        elif meta.get(key) != value:
+            return False
+    return True
+
+
+class _FakeVectorService:
+    """Index vectoriel en mémoire (cosinus) avec l'API utilisée par le RAG documents."""
+
+    def __init__(self) -> None:
+        self.collections: Dict[str, Any] = {}
+        self.query_filters: List[Optional[Dict[str, Any]]] = []
+        self.embed_calls = 0
+
+    def get_or_create_collection(self, name: str):
+        if name not in self.collections:
+            self.collections[name] = SimpleNamespace(name=name, items={})
+        return self.collections[name]
+
+    def is_vector_store_reachable(self) -> bool:
+        return True
+
+    def embed_texts(self, texts):
+        self.embed_calls += 1
+        return [_embed(t) for t in texts]
+
+    def add_items(self, *, collection, items):
+        for item in items:
+            embedding = item.get("embedding") or _embed(item["text"])
+            collection.items[item["id"]] = (list(embedding), item["text"], dict(item["metadata"]))
+
+    def delete_vectors(self, *, collection, where_filter):
+        for item_id in [i for i, (_, _, m) in collection.items.items() if _match(m, where_filter)]:
+            del collection.items[item_id]
+
+    def _ranked(self, collection, embedding, where_filter):
+        rows = []
+        for item_id, (emb, text, meta) in collection.items.items():
+            if _match(meta, where_filter):
+                sim = sum(a * b for a, b in zip(emb, embedding))
+                rows.append({"id": item_id, "text": text, "metadata": meta, "distance": 1.0 - sim})
+        rows.sort(key=lambda r: r["distance"])
+        return rows
+
+    def nearest_neighbors(self, collection, embeddings, *, n_results=1, where_filter=None):
+        return [self._ranked(collection, emb, where_filter)[:n_results] for emb in embeddings]
+
+    def query(self, collection, query_text, n_results=5, where_filter=None, query_embedding=None):
+        self.query_filters.append(where_filter)
+        embedding = query_embedding if query_embedding is not None else _embed(query_text)
+        return self._ranked(collection, embedding, where_filter)[:n_results]
+
+    def get_page(self, collection, where_filter=None, *, limit=256, cursor=None):
+        rows = [(i, t, m) for i, (_, t, m) in collection.items.items() if _match(m, where_filter)]
+        offset = int(cursor or 0)
+        page = rows[offset : offset + limit]
+        next_cursor = offset + len(page) if len(page) >= limit else None
+        return {
+            "ids": [r[0] for r in page],
+            "documents": [r[1] for r in page],
+            "metadatas": [r[2] for r in page],
+        }, next_cursor
+
+
+def _chunks(doc_id: int, user_id: str = "u1") -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"{doc_id}_{j}",
+            "text": f"topic{doc_id} topic{doc_id} détail{j}",
+            "metadata": {
+                "document_id": doc_id,
+                "user_id": user_id,
+                "filename": f"doc{doc_id}.txt",
+                "keywords": f"topic{doc_id}",
+                "section_title": "",
+            },
+        }
+        for j in range(4)
+    ]
+
+
+@pytest.fixture
+def vector_service() -> _FakeVectorService:
+    return _FakeVectorService()
+
+
+@pytest.fixture
+def service(tmp_path, vector_service) -> DocumentService:
+    svc = DocumentService(
+        db_manager=None,  # type: ignore[arg-type]
+        parser_factory=ParserFactory(),
+        vector_service=vector_service,  # type: ignore[arg-type]
+        uploads_dir=str(tmp_path / "uploads"),
+    )
+    svc.coarse_index = DocumentCoarseIndex(vector_service, max_candidates=3, min_documents=5)
+    return svc
+
+
+def _ingest(service: DocumentService, doc_id: int) -> None:
+    items = _chunks(doc_id)
+    centroid = service._new_centroid()
+    service._vectorize_document_chunks(doc_id, items, total_chunks=len(items), centroid=centroid)
+    service._index_document_profile(doc_id, f"doc{doc_id}.txt", items, "u1", centroid)
+
+
+def test_centroid_is_normalized_mean():
+    acc = CentroidAccumulator()
+    acc.add([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0, 5.0]])  # dimension incohérente ignorée
+
+    assert acc.count == 2
+    assert acc.centroid() == pytest.approx([math.sqrt(0.5), math.sqrt(0.5)])
+
+
+def test_search_restricts_chunks_to_candidate_documents(service, vector_service):
+    for doc_id in range(1, 21):
+        _ingest(service, doc_id)
+
+    results = service.search_documents("topic7", session_id="s", user_id="u1", top_k=3)
+
+    stats = service.last_search_stats
+    assert stats["two_stage"] is True
+    assert 7 in stats["candidate_documents"] and len(stats["candidate_documents"]) <= 3
+    assert {r["metadata"]["document_id"] for r in results} <= set(stats["candidate_documents"])
+    assert results[0]["metadata"]["document_id"] == 7
+    chunks_stage = stats["stages"][1]
+    assert chunks_stage["stage"] == "chunks"
+    assert chunks_stage["items"] <= 3 * 4
+    last_filter = vector_service.query_filters[-1]
+    assert "$and" in last_filter
+
+
+def test_few_documents_stay_single_stage(service, vector_service):
+    for doc_id in range(1, 4):
+        _ingest(service, doc_id)
+
+    service.search_documents("topic2", session_id="s", user_id="u1")
+
+    assert service.last_search_stats["two_stage"] is False
+    assert vector_service.query_filters[-1] == {"user_id": "u1"}
+
+
+def test_backfill_profiles_legacy_documents(service, vector_service):
+    chunks = service.vector_service.get_or_create_collection("emergence_documents")
+    for doc_id in range(1, 11):
+        vector_service.add_items(collection=chunks, items=_chunks(doc_id))
+
+    service.search_documents("topic4", session_id="s", user_id="u1")
+
+    profiles = vector_service.collections["emergence_document_profiles"].items
+    assert len(profiles) == 10
+    assert profiles["docprofile_4"][2]["profile_kind"] == "summary"
+    assert service.last_search_stats["two_stage"] is True
+    assert 4 in service.last_search_stats["candidate_documents"]
+
+
+def test_delete_removes_profile_from_candidates(service, vector_service):
+    for doc_id in range(1, 11):
+        _ingest(service, doc_id)
+    service.coarse_index.ensure_backfilled(service.document_collection, "u1")
+    assert service.coarse_index.profiled_count("u1") == 10
+
+    service.coarse_index.delete_profile(3, "u1")
+
+    assert service.coarse_index.profiled_count("u1") == 9
+    assert "docprofile_3" not in vector_service.collections["emergence_document_profiles"].items
+
+
+def test_restrict_filter_shapes():
+    restrict = DocumentCoarseIndex.restrict_filter
+    assert restrict(None, [1]) == {"document_id": 1}
+    assert restrict({"user_id": "u"}, [1, 2]) == {
+        "$and": [{"user_id": "u"}, {"$or": [{"document_id": 1}, {"document_id": 2}]}]
+    }
+    assert restrict({"$and": [{"a": 1}, {"b": 2}]}, [5]) == {
+        "$and": [{"a": 1}, {"b": 2}, {"document_id": 5}]
+    }
@@ -0,0 +1,132 @@
+"""Tests de l'index parent–enfant des chunks documents."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.core.database import queries, schema
+from backend.core.database.manager import DatabaseManager
+from backend.features.chat.rag_service import RAGService
+from backend.features.documents.parent_windows import collapse_to_parent_windows
+from backend.features.documents.parser import ParserFactory
+from backend.features.documents.service import DocumentService
+
+
+def _section(title: str, paragraphs: int) -> str:
+    body = "\n\n".join(
+        f"Paragraphe {i} de {title} " + "contenu détaillé " * 20 for i in range(paragraphs)
+    )
+    return f"# {title}\n\n{body}"
+
+
+TEXT = "\n\n".join([_section("Introduction", 6), _section("Méthode", 6)])
+
+
+@pytest.fixture
+def service(tmp_path) -> DocumentService:
+    vector_service = MagicMock()
+    vector_service.get_or_create_collection.return_value = MagicMock()
+    return DocumentService(
+        db_manager=None,  # type: ignore[arg-type]
+        parser_factory=ParserFactory(),
+        vector_service=vector_service,
+        uploads_dir=str(tmp_path / "uploads"),
+    )
+
+
+@pytest.fixture
+async def sqlite_service(tmp_path, service):
+    db = DatabaseManager(str(tmp_path / "docs.db"))
+    await schema.create_tables(db)
+    service.db_manager = db
+    yield service
+    await db.disconnect()
+
+
+def test_chunker_groups_children_by_section(service):
+    chunks = service._chunk_text_semantic(TEXT, "doc.md")
+
+    assert len(chunks) > 2
+    parents = {c["parent_index"] for c in chunks}
+    assert parents == {0, 1}
+    intro = [c for c in chunks if c["parent_index"] == 0]
+    assert intro[0]["parent_text"].startswith("# Introduction")
+    assert "Méthode" not in intro[0]["parent_text"]
+    # Texte parent partagé entre enfants, sans overlap dupliqué
+    assert all(c["parent_text"] is intro[0]["parent_text"] for c in intro)
+    assert intro[0]["parent_text"].count("Paragraphe 1 de Introduction") == 1
+
+
+def test_parent_sections_respect_max_size(service):
+    service.parent_chunk_size = 1200
+    chunks = service._chunk_text_semantic(_section("Long", 12), "long.md")
+
+    parent_sizes = {c["parent_index"]: len(c["parent_text"]) for c in chunks}
+    assert len(parent_sizes) > 1
+    assert all(size <= 1200 + 1000 for size in parent_sizes.values())
+
+
+@pytest.mark.asyncio
+async def test_parents_stored_and_expanded_from_sql(sqlite_service):
+    service = sqlite_service
+    doc_id = await queries.insert_document(
+        service.db_manager, "doc.md", "doc.md", "ready", "2026-01-01", "s1", user_id="u1"
+    )
+    chunks = service._chunk_text_semantic(TEXT, "doc.md")
+    rows, vectors = service._build_chunk_payloads(doc_id, "doc.md", chunks, "s1", "u1")
+    await service._persist_document_chunks(rows, session_id="s1", user_id="u1")
+
+    stored = await queries.get_document_chunks(service.db_manager, doc_id, "s1", user_id="u1")
+    assert len(stored) == len(chunks)  # les parents ne polluent pas l'aperçu
+
+    intro_children = [v for v in vectors if v["metadata"]["parent_id"] == f"{doc_id}_p0"]
+    hits = [
+        {"id": v["id"], "text": v["text"], "metadata": v["metadata"], "distance": d}
+        for v, d in zip(intro_children[:2], (0.4, 0.2))
+    ]
+    legacy = {"id": "old", "text": "x", "metadata": {"document_id": 99}, "distance": 0.3}
+
+    windows, remaining = await service.expand_parent_windows(
+        hits + [legacy], user_id="u1"
+    )
+
+    assert remaining == [legacy]
+    assert len(windows) == 1
+    window = windows[0]
+    assert window["id"] == f"{doc_id}_p0"
+    assert window["text"].startswith("# Introduction")
+    assert window["distance"] == 0.2
+    assert window["metadata"]["merged_chunks"] == 2
+    assert window["metadata"]["parent_window"] is True
+
+    # Isolation : un autre utilisateur ne résout aucun parent
+    windows, remaining = await service.expand_parent_windows(hits, user_id="u2")
+    assert windows == [] and len(remaining) == 2
+
+
+def test_merge_keeps_parent_windows_and_merges_legacy_only():
+    rag = RAGService(vector_service=MagicMock())
+    windows, _ = collapse_to_parent_windows(
+        [
+            {
+                "id": "c1",
+                "text": "a",
+                "distance": 0.1,
+                "metadata": {"document_id": 1, "parent_id": "1_p0", "line_start": 3},
+            }
+        ],
+        {"1_p0": {"id": "1_p0", "content": "section complète"}},
+    )
+    legacy = [
+        {"id": "2_0", "text": "début", "distance": 0.2,
+         "metadata": {"document_id": 2, "line_start": 0, "line_end": 10}},
+        {"id": "2_1", "text": "suite", "distance": 0.4,
+         "metadata": {"document_id": 2, "line_start": 11, "line_end": 20}},
+    ]
+
+    merged = rag.merge_chunks(windows + legacy)
+
+    assert len(merged) == 2
+    by_id = {hit["id"]: hit for hit in merged}
+    assert by_id["1_p0"]["text"] == "section complète"
+    assert by_id["2_merged_0"]["metadata"]["merged_chunks"] == 2
@@ -0,0 +1,239 @@
+"""Tests du parsing/chunking en streaming des gros documents."""
+
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from backend.core import emergence_config as config
+from backend.core.database import queries as db_queries
+from backend.core.database.manager import DatabaseManager
+from backend.features.documents import parser as parser_module
+from backend.features.documents.parser import ParserFactory, PDFParser, TXTParser
+from backend.features.documents.service import DocumentService
+from backend.features.documents.streaming import (
+    StreamingChunker,
+    iter_paragraphs,
+    iter_spooled_segments,
+    spool_segments,
+)
+
+
+def _write_pdf(path: Path, pages: List[str]) -> None:
+    """PDF minimal (police Helvetica, une ligne de texte par page)."""
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream"
+        )
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for idx, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{idx} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    path.write_bytes(bytes(out))
+
+
+class _RecordingVectorService:
+    def __init__(self) -> None:
+        self.collection = SimpleNamespace(name="documents")
+        self.add_calls: List[List[dict[str, Any]]] = []
+
+    def get_or_create_collection(self, name: str):
+        return self.collection
+
+    def is_vector_store_reachable(self) -> bool:
+        return True
+
+    def add_items(self, *, collection, items):
+        self.add_calls.append(list(items))
+
+    def delete_vectors(self, *, collection, where_filter):
+        pass
+
+
+def _document(paragraphs: int) -> str:
+    sections = []
+    for s in range(paragraphs // 10):
+        body = "\n\n".join(
+            f"Paragraphe {s}.{i} " + "texte suivi " * (5 + (i * 7) % 40) for i in range(10)
+        )
+        sections.append(f"# Section {s}\n\n{body}")
+    return "\n\n".join(sections)
+
+
+@pytest.fixture
+def service(tmp_path) -> DocumentService:
+    return DocumentService(
+        db_manager=None,  # type: ignore[arg-type]
+        parser_factory=ParserFactory(),
+        vector_service=_RecordingVectorService(),  # type: ignore[arg-type]
+        uploads_dir=str(tmp_path / "uploads"),
+    )
+
+
+def _chunker(service: DocumentService, **overrides: Any) -> StreamingChunker:
+    params = dict(
+        filename="doc.txt",
+        chunk_size=config.CHUNK_SIZE,
+        overlap=config.CHUNK_OVERLAP,
+        max_paragraphs=2,
+        parent_chunk_size=service.parent_chunk_size,
+        max_chunks=service.MAX_TOTAL_CHUNKS_ALLOWED,
+    )
+    params.update(overrides)
+    return StreamingChunker(service._finalize_chunk, **params)
+
+
+def test_txt_segments_concatenate_to_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser_module, "TXT_READ_BLOCK_CHARS", 37)
+    path = tmp_path / "doc.txt"
+    path.write_text(_document(30), encoding="utf-8")
+
+    segments = list(TXTParser().iter_segments(str(path)))
+
+    assert len(segments) > 10
+    assert "".join(segments) == TXTParser().parse(str(path))
+    assert all(seg.endswith("\n") for seg in segments[:-1])
+
+
+def test_paragraphs_survive_arbitrary_segment_cuts():
+    text = "a\nb\n\n\nc\n\nd e\nf"
+    cuts = [text[i : i + 3] for i in range(0, len(text), 3)]
+
+    assert list(iter_paragraphs(cuts, 10_000)) == list(iter_paragraphs([text], 10_000))
+    assert [p["lines"] for p in iter_paragraphs(cuts, 10_000)] == [
+        ["a", "b"],
+        ["", "c"],
+        ["d e", "f"],
+    ]
+
+
+def test_streaming_chunks_match_in_memory_chunker(service):
+    text = _document(60)
+    expected = service._chunk_text_semantic(text, "doc.txt")
+
+    segments = [text[i : i + 997] for i in range(0, len(text), 997)]
+    chunker = _chunker(service)
+    streamed = [c for group in chunker.iter_groups(segments) for c in group]
+
+    assert chunker.char_count == len(text)
+    assert [c["text"] for c in streamed] == [c["text"] for c in expected]
+    assert [c["line_range"] for c in streamed] == [c["line_range"] for c in expected]
+    assert [c["parent_index"] for c in streamed] == [c["parent_index"] for c in expected]
+    assert [c["parent_text"] for c in streamed] == [c["parent_text"] for c in expected]
+
+
+def test_projection_escalates_instead_of_exceeding_limit(service):
+    paragraphs = [f"P{i}" for i in range(6000)]
+    text = "\n\n".join(paragraphs)
+    chunker = _chunker(service, max_chunks=1000, size_hint=len(text))
+
+    streamed = [c for group in chunker.iter_groups([text]) for c in group]
+
+    assert chunker.escalations[0] == "paragraph_limit_removed"
+    assert len(streamed) <= 1000
+    assert chunker.char_count == len(text)
+
+
+def test_projection_merges_chunks_when_chunk_size_is_maxed(service):
+    text = "\n\n".join(f"P{i} " + "x" * 900 for i in range(2000))
+    chunker = _chunker(service, max_chunks=50, size_hint=len(text))
+
+    streamed = [c for group in chunker.iter_groups([text]) for c in group]
+
+    assert len(streamed) <= 50
+    assert any(step.startswith("merge_factor=") for step in chunker.escalations)
+    assert "P0 " in streamed[0]["text"] and "P1999 " in streamed[-1]["text"]
+
+
+def test_last_chunk_absorbs_tail_without_projection(service):
+    text = "\n\n".join("x" * 900 for _ in range(50))
+    chunker = _chunker(service, max_chunks=10)
+
+    streamed = [c for group in chunker.iter_groups([text]) for c in group]
+
+    assert len(streamed) == 10
+    assert chunker.escalations == ["tail_merged"]
+    assert streamed[-1]["text"].count("x" * 900) == 41
+
+
+def test_spool_keeps_text_and_exact_length(tmp_path):
+    segments = ["ligne\r\n", "é" * 70_000, "\rfin"]
+
+    path, length = spool_segments(iter(segments), str(tmp_path))
+
+    assert length == len("".join(segments))
+    assert "".join(iter_spooled_segments(path)) == "".join(segments)
+
+
+def test_pdf_pages_extracted_in_process_pool_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser_module, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(parser_module, "PDF_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(parser_module, "PDF_MAX_WORKERS", 2)
+    path = tmp_path / "doc.pdf"
+    _write_pdf(path, [f"Page numero {i}" for i in range(7)])
+
+    try:
+        pages = list(PDFParser().iter_segments(str(path)))
+        pool = parser_module._pdf_pool
+        assert PDFParser().parse(str(path)) == "".join(pages)
+        assert pool is not None and parser_module._pdf_pool is pool
+    finally:
+        parser_module.shutdown_pdf_pool()
+
+    assert len(pages) == 7
+    assert [p.strip() for p in pages] == [f"Page numero {i}" for i in range(7)]
+    assert parser_module._pdf_pool is None
+
+
+@pytest.mark.asyncio
+async def test_large_upload_is_indexed_batch_by_batch(tmp_path, service):
+    db = DatabaseManager(str(tmp_path / "docs.db"))
+    await db.connect()
+    await db.initialize()
+    service.db_manager = db
+    service.streaming_min_bytes = 0
+    service.vector_batch_size = 8
+    vector_service = service.vector_service
+
+    text = _document(120)
+    expected_chunks = len(service._chunk_text_semantic(text, "big.txt"))
+    upload = UploadFile(filename="big.txt", file=BytesIO(text.encode("utf-8")))
+
+    result = await service.process_uploaded_file(upload, session_id="s1", user_id="u1")
+
+    assert result["vectorized"] is True
+    assert result["total_chunks"] == expected_chunks
+    assert result["indexed_chunks"] == expected_chunks
+    assert len(vector_service.add_calls) > 3
+    # Lots bornés : taille de lot + au plus une section parente
+    assert max(len(call) for call in vector_service.add_calls) < 8 + 10
+
+    documents = await db_queries.get_all_documents(db, session_id="s1", user_id="u1")
+    assert documents[0]["status"] == "ready"
+    assert documents[0]["chunk_count"] == expected_chunks
+    assert documents[0]["char_count"] == len(text)
+    stored = await db_queries.get_document_chunks(
+        db, result["document_id"], "s1", user_id="u1"
+    )
+    assert len(stored) == expected_chunks
+    await db.disconnect()
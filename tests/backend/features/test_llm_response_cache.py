@@ -0,0 +1,145 @@
+"""Tests du cache persistant des réponses LLM structurées."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.core.cache import llm_response_cache as cache_module
+from backend.core.cache.llm_response_cache import (
+    LLMResponseCache,
+    cached_call_site,
+    make_cache_key,
+)
+from backend.core.cost_tracker import CostTracker
+from backend.features.chat.service import ChatService
+
+SCHEMA = {"type": "object", "properties": {"summary": {"type": "string"}}}
+
+
+def _openai_response(payload: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))],
+        usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=200),
+    )
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    instance = LLMResponseCache(str(tmp_path / "llm_cache.db"))
+    monkeypatch.setattr(cache_module, "_cache", instance)
+    yield instance
+    instance.close()
+
+
+@pytest.fixture
+def tracker():
+    CostTracker._instance = None
+    tracker = CostTracker(db_manager=MagicMock())
+    yield tracker
+    CostTracker._instance = None
+
+
+@pytest.fixture
+def chat_service(tracker):
+    service = ChatService.__new__(ChatService)
+    service.cost_tracker = tracker
+    service.openai_client = MagicMock()
+    service.openai_client.chat.completions.create = AsyncMock(
+        return_value=_openai_response({"summary": "résumé"})
+    )
+    service._get_agent_config = lambda agent_id: ("openai", "gpt-4o-mini", "Système")
+    service._ensure_fr_tutoiement = lambda agent_id, provider, prompt: prompt
+    return service
+
+
+def test_key_normalizes_whitespace_and_schema_order():
+    base = make_cache_key(
+        "openai", "gpt-4o-mini", "v1", system_prompt="S", prompt="a  b\n c",
+        json_schema={"a": 1, "b": 2},
+    )
+    same = make_cache_key(
+        "openai", "gpt-4o-mini", "v1", system_prompt=" S ", prompt="a b c",
+        json_schema={"b": 2, "a": 1},
+    )
+    other_version = make_cache_key(
+        "openai", "gpt-4o-mini", "v2", system_prompt="S", prompt="a b c",
+        json_schema={"a": 1, "b": 2},
+    )
+    assert base == same
+    assert base != other_version
+
+
+@pytest.mark.asyncio
+async def test_cached_call_site_avoids_second_provider_call(chat_service, cache, tracker):
+    create = chat_service.openai_client.chat.completions.create
+
+    with cached_call_site("memory_analysis", version="v1"):
+        first = await chat_service.get_structured_llm_response("neo", "Texte", SCHEMA)
+        second = await chat_service.get_structured_llm_response("neo", "Texte ", SCHEMA)
+
+    assert first == second == {"summary": "résumé"}
+    assert create.await_count == 1
+    stats = tracker.get_cache_stats()["memory_analysis"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["tokens_saved"] == 1200
+    assert stats["cost_saved_usd"] == pytest.approx(1000 * 0.15e-6 + 200 * 0.60e-6)
+
+
+@pytest.mark.asyncio
+async def test_calls_outside_call_site_bypass_cache(chat_service, cache):
+    create = chat_service.openai_client.chat.completions.create
+
+    await chat_service.get_structured_llm_response("neo", "Texte", SCHEMA)
+    await chat_service.get_structured_llm_response("neo", "Texte", SCHEMA)
+
+    assert create.await_count == 2
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_responses_are_not_cached(chat_service, cache):
+    chat_service.openai_client.chat.completions.create.return_value = _openai_response({})
+
+    with cached_call_site("memory_analysis"):
+        await chat_service.get_structured_llm_response("neo", "Texte", SCHEMA)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_dropped(cache, monkeypatch):
+    with cached_call_site("short", ttl_seconds=60) as policy:
+        cache.put("k", {"a": 1}, policy=policy, provider="openai", model="m")
+
+    assert cache.get("k")["response"] == {"a": 1}
+    now = cache_module.time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+    assert cache.get("k") is None
+    assert cache.total_bytes == 0
+
+
+def test_ttl_from_environment(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_TTL_PREFERENCE_CLASSIFICATION", "0")
+    with cached_call_site("preference_classification"):
+        assert cache_module.current_call_site() is None
+    with cached_call_site("memory_analysis", ttl_seconds=10):
+        assert cache_module.current_call_site().ttl_seconds == 10
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "small.db"), max_bytes=2000)
+    policy = cache_module.CallSitePolicy("site", "v1", 3600)
+    for i in range(4):
+        cache.put(f"key{i}", {"text": "x" * 300}, policy=policy, provider="p", model="m")
+    assert cache.get("key0") is not None  # key0 devient le plus récent
+
+    for i in range(4, 8):
+        cache.put(f"key{i}", {"text": "x" * 300}, policy=policy, provider="p", model="m")
+
+    assert cache.total_bytes <= 2000
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.get("key7") is not None
+    cache.close()
@@ -225,6 +225,14 @@ async def _ensure_legacy_sessions_table(db: DatabaseManager) -> None:
     )
 
 
+class FakeAnalyzer:
+    def __init__(self) -> None:
+        self.reset_calls: list[str] = []
+
+    async def reset_checkpoint(self, thread_id: str) -> None:
+        self.reset_calls.append(thread_id)
+
+
 async def _run_memory_clear_scenario(tmp_path):
     db_path = tmp_path / "memory-clear.db"
     db = DatabaseManager(str(db_path))
@@ -274,7 +282,10 @@ async def _run_memory_clear_scenario(tmp_path):
     vector_service = FakeVectorService(collection)
     session_manager = FakeSessionManager(owner_id)
     session_manager.register(session_id, owner_id)
-    container = FakeContainer(db, vector_service, session_manager, auth_service)
+    analyzer = FakeAnalyzer()
+    container = FakeContainer(
+        db, vector_service, session_manager, auth_service, memory_analyzer=analyzer
+    )
 
     app = FastAPI()
     app.include_router(memory_router.router, prefix="/api/memory")
@@ -306,6 +317,8 @@ async def _run_memory_clear_scenario(tmp_path):
     assert row["summary"] is None
     assert row["extracted_concepts"] is None
     assert row["extracted_entities"] is None
+    # Le checkpoint d'analyse incrémentale est oublié avec la STM
+    assert analyzer.reset_calls == [session_id]
 
     assert "vec-1" not in collection.items
     assert "vec-2" in collection.items
@@ -0,0 +1,147 @@
+"""Tests des compteurs de génération mémoire et de leur effet sur les caches."""
+
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.features.chat.memory_ctx import MemoryContextBuilder
+from backend.features.memory import generations
+from backend.features.memory.gardener import MemoryGardener
+from backend.features.memory.generations import MemoryGenerationTracker
+from backend.features.memory.intent_tracker import IntentTracker
+
+
+class _FakePipeline:
+    def __init__(self, store: Dict[str, int]) -> None:
+        self.store = store
+        self.ops: List[tuple] = []
+
+    def incr(self, key):
+        self.ops.append(("incr", key))
+        return self
+
+    def expire(self, key, seconds):
+        self.ops.append(("expire", key))
+        return self
+
+    async def execute(self) -> List[Any]:
+        results: List[Any] = []
+        for op, key in self.ops:
+            if op == "incr":
+                self.store[key] = self.store.get(key, 0) + 1
+                results.append(self.store[key])
+            else:
+                results.append(True)
+        return results
+
+
+class _SharedRedis:
+    """Sous-ensemble de RedisManager partagé entre deux « instances »."""
+
+    def __init__(self) -> None:
+        self.store: Dict[str, int] = {}
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def get(self, key):
+        value = self.store.get(key)
+        return None if value is None else str(value)
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self.store)
+
+
+@pytest.fixture
+def tracker(monkeypatch) -> MemoryGenerationTracker:
+    instance = MemoryGenerationTracker()
+    monkeypatch.setattr(generations, "_tracker", instance)
+    return instance
+
+
+@pytest.mark.asyncio
+async def test_bump_updates_agent_and_user_wide_generations(tracker):
+    assert await tracker.get("u1") == 0
+
+    assert await tracker.bump("u1", "Anima") == 1
+    assert await tracker.bump("u1", "neo") == 2
+
+    assert await tracker.get("u1") == 2
+    assert await tracker.get("u1", "anima") == 1
+    assert await tracker.get("u2") == 0
+
+
+@pytest.mark.asyncio
+async def test_instances_agree_through_redis():
+    redis = _SharedRedis()
+    instance_a = MemoryGenerationTracker(redis_manager=redis)
+    instance_b = MemoryGenerationTracker(redis_manager=redis)
+
+    await instance_a.bump("u1", "anima")
+
+    assert await instance_b.get("u1") == 1
+    assert await instance_b.get("u1", "anima") == 1
+    assert instance_b.current("u1") == 1
+
+
+@pytest.mark.asyncio
+async def test_gardener_write_bumps_generation(tracker):
+    gardener = MemoryGardener(
+        db_manager=MagicMock(), vector_service=MagicMock(), memory_analyzer=MagicMock()
+    )
+    await gardener._add_vectors(
+        "knowledge",
+        [
+            {"id": "a", "text": "x", "metadata": {"user_id": "u1", "agent_id": "anima"}},
+            {"id": "b", "text": "y", "metadata": {"user_id": "u1", "agent_id": "anima"}},
+        ],
+    )
+
+    # Un bump par couple (user, agent) distinct, pas par vecteur
+    assert await tracker.get("u1") == 1
+    assert await tracker.get("u1", "anima") == 1
+
+
+@pytest.mark.asyncio
+async def test_intent_purge_bumps_generation(tracker):
+    vector_service = MagicMock()
+    intents = IntentTracker(vector_service)
+    intents.reminder_counts = {"i1": 3, "i2": 1}
+
+    assert await intents.purge_ignored_intents("u1") == 1
+    vector_service.get_or_create_collection.return_value.delete.assert_called_once_with(ids=["i1"])
+    assert await tracker.get("u1") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_bump_does_not_fail_the_write(monkeypatch):
+    broken = MemoryGenerationTracker()
+
+    async def _boom(*args, **kwargs):
+        raise RuntimeError("redis down")
+
+    monkeypatch.setattr(broken, "bump", _boom)
+    monkeypatch.setattr(broken, "bump_many", _boom)
+    monkeypatch.setattr(generations, "_tracker", broken)
+
+    await generations.bump_generation("u1")
+    await generations.bump_generations([{"user_id": "u1"}])
+
+
+@pytest.mark.asyncio
+async def test_preferences_cache_is_stale_after_generation_bump(tracker):
+    builder = MemoryContextBuilder(session_manager=MagicMock(db_manager=None), vector_service=MagicMock())
+    collection = MagicMock()
+    collection.get.return_value = {"documents": ["café: serré"], "metadatas": [{}]}
+
+    generation = await tracker.get("u1")
+    assert builder._fetch_active_preferences_cached(collection, "u1", generation) == "- café: serré"
+    builder._fetch_active_preferences_cached(collection, "u1", generation)
+    assert collection.get.call_count == 1
+
+    collection.get.return_value = {"documents": ["thé: vert"], "metadatas": [{}]}
+    await tracker.bump("u1")
+    generation = await tracker.get("u1")
+    assert builder._fetch_active_preferences_cached(collection, "u1", generation) == "- thé: vert"
+    assert collection.get.call_count == 2
@@ -0,0 +1,175 @@
+"""Tests de l'analyse mémoire incrémentale (checkpoint par thread, delta only)."""
+
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from backend.core.database import queries, schema
+from backend.core.database.manager import DatabaseManager
+from backend.features.memory.analyzer import MemoryAnalyzer
+
+
+def _messages(count: int, start: int = 0) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"m{i}",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message numéro {i} sur le déploiement Kubernetes " * 5,
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def _chat_service(*responses: Dict[str, Any]) -> Mock:
+    chat = Mock()
+    chat.get_structured_llm_response = AsyncMock(side_effect=list(responses))
+    chat.session_manager = None
+    return chat
+
+
+def _analyzer(db_manager: Any, chat: Mock) -> MemoryAnalyzer:
+    analyzer = MemoryAnalyzer(db_manager, incremental=True)
+    analyzer.chat_service = chat
+    analyzer.is_ready = True
+    return analyzer
+
+
+@pytest.fixture
+def mock_db():
+    db = Mock()
+    db.execute = AsyncMock()
+    db.fetch_one = AsyncMock(return_value=None)
+    return db
+
+
+@pytest.fixture
+async def sqlite_db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "checkpoints.db"))
+    await schema.create_tables(db)
+    yield db
+    await db.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_second_run_sends_only_new_messages_and_merges(mock_db):
+    chat = _chat_service(
+        {"summary": "Déploiement K8s.", "concepts": ["Kubernetes"], "entities": ["GKE"]},
+        {"summary": "Déploiement puis monitoring.", "concepts": ["Prometheus", "kubernetes"], "entities": []},
+    )
+    analyzer = _analyzer(mock_db, chat)
+    history = _messages(20)
+
+    await analyzer.analyze_history("t1", history)
+    result = await analyzer.analyze_history("t1", history + _messages(2, start=20))
+
+    prompt = chat.get_structured_llm_response.call_args_list[1].kwargs["prompt"]
+    assert "m20" not in prompt  # ids non envoyés, seulement le contenu
+    assert "numéro 21" in prompt and "numéro 19" not in prompt
+    assert "Déploiement K8s." in prompt  # état précédent compact
+    assert result == {
+        "summary": "Déploiement puis monitoring.",
+        "concepts": ["Prometheus", "kubernetes"],
+        "entities": ["GKE"],
+    }
+
+    stats = analyzer.get_incremental_stats()
+    assert stats["full"] == 1 and stats["incremental"] == 1
+    assert stats["tokens_saved"] > 0
+
+
+@pytest.mark.asyncio
+async def test_unchanged_history_skips_llm(mock_db):
+    chat = _chat_service({"summary": "S", "concepts": ["A"], "entities": []})
+    analyzer = _analyzer(mock_db, chat)
+    history = _messages(4)
+
+    await analyzer.analyze_history("t1", history)
+    result = await analyzer.analyze_history("t1", list(history))
+
+    assert chat.get_structured_llm_response.await_count == 1
+    assert result == {"summary": "S", "concepts": ["A"], "entities": []}
+    assert analyzer.get_incremental_stats()["unchanged"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rewritten_history_falls_back_to_full_analysis(mock_db):
+    chat = _chat_service(
+        {"summary": "S1", "concepts": ["A"], "entities": []},
+        {"summary": "S2", "concepts": ["B"], "entities": []},
+    )
+    analyzer = _analyzer(mock_db, chat)
+
+    await analyzer.analyze_history("t1", _messages(4))
+    # Messages sans ids et contenus différents : checkpoint introuvable
+    result = await analyzer.analyze_history(
+        "t1", [{"role": "user", "content": "tout autre chose"}]
+    )
+
+    prompt = chat.get_structured_llm_response.call_args_list[1].kwargs["prompt"]
+    assert "ÉTAT PRÉCÉDENT" not in prompt
+    assert result["concepts"] == ["B"]
+    assert analyzer.get_incremental_stats()["full"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_finds_checkpoint(mock_db):
+    chat = _chat_service(
+        {"summary": "S1", "concepts": ["A"], "entities": []},
+        {"summary": "S2", "concepts": ["B"], "entities": []},
+    )
+    analyzer = _analyzer(mock_db, chat)
+    history = _messages(15)
+
+    await analyzer.analyze_history("t1", history)
+    # Fenêtre des 10 derniers messages + 3 nouveaux
+    await analyzer.analyze_history("t1", (history + _messages(3, start=15))[-10:])
+
+    prompt = chat.get_structured_llm_response.call_args_list[1].kwargs["prompt"]
+    assert "numéro 15" in prompt and "numéro 14" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_survives_restart(sqlite_db):
+    history = _messages(6)
+    first = _analyzer(
+        sqlite_db, _chat_service({"summary": "S1", "concepts": ["A"], "entities": ["E"]})
+    )
+    await first.analyze_history("t1", history)
+
+    stored = await queries.get_analysis_checkpoint(sqlite_db, "t1")
+    assert stored["last_message_key"] == "m5"
+    assert stored["message_count"] == 6
+    assert stored["concepts"] == ["A"]
+
+    chat = _chat_service({"summary": "S2", "concepts": ["B"], "entities": []})
+    restarted = _analyzer(sqlite_db, chat)
+    result = await restarted.analyze_history("t1", history + _messages(1, start=6))
+
+    assert restarted.get_incremental_stats()["incremental"] == 1
+    assert result["concepts"] == ["B", "A"]
+
+    await restarted.reset_checkpoint("t1")
+    assert await queries.get_analysis_checkpoint(sqlite_db, "t1") is None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_history_still_persists_and_notifies(sqlite_db, monkeypatch):
+    history = _messages(4)
+    first = _analyzer(sqlite_db, _chat_service({"summary": "S", "concepts": ["A"], "entities": []}))
+    await first.analyze_history("t1", history)
+
+    # Autre instance (cache d'analyse vide) : checkpoint à jour, aucun appel LLM
+    chat = _chat_service()
+    restarted = _analyzer(sqlite_db, chat)
+    restarted._notify = AsyncMock()
+    persist = AsyncMock()
+    monkeypatch.setattr(queries, "update_session_analysis_data", persist)
+
+    result = await restarted._analyze("t1", history, persist=True)
+
+    assert chat.get_structured_llm_response.await_count == 0
+    assert result == {"summary": "S", "concepts": ["A"], "entities": []}
+    assert persist.await_args.kwargs["summary"] == "S"
+    payload = restarted._notify.await_args.args[1]
+    assert payload["status"] == "completed" and payload["provider"] == "checkpoint"
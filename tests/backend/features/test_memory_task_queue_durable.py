@@ -0,0 +1,144 @@
+"""Tests de la file mémoire persistante (voies, coalescence, baux, reprises)."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from backend.features.memory.job_store import InMemoryJobStore, SQLiteJobStore
+from backend.features.memory.task_queue import MemoryTaskQueue
+
+
+async def _wait_until(predicate, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("condition non atteinte")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryJobStore()
+    else:
+        instance = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        yield instance
+        instance.close()
+
+
+def test_duplicate_jobs_coalesce_per_thread(store):
+    first, coalesced_first = store.enqueue(
+        "consolidate_thread", {"thread_id": "t1"}, "bulk", "consolidate_thread:t1"
+    )
+    second, coalesced_second = store.enqueue(
+        "consolidate_thread", {"thread_id": "t1", "reason": "manual"}, "bulk",
+        "consolidate_thread:t1",
+    )
+    other, _ = store.enqueue(
+        "consolidate_thread", {"thread_id": "t2"}, "bulk", "consolidate_thread:t2"
+    )
+
+    assert first == second and not coalesced_first and coalesced_second
+    assert other != first
+    assert store.depth()["bulk"] == 2
+    job = store.lease(["bulk"], "w", 60)
+    assert job.payload == {"thread_id": "t1", "reason": "manual"}
+
+
+def test_interactive_lane_is_leased_first(store):
+    store.enqueue("consolidate_thread", {"thread_id": "t1"}, "bulk")
+    store.enqueue("analyze", {"session_id": "s1"}, "interactive")
+
+    assert store.lease(["interactive", "bulk"], "w", 60).task_type == "analyze"
+    assert store.lease(["bulk", "interactive"], "w", 60).task_type == "consolidate_thread"
+    assert store.lease(["interactive", "bulk"], "w", 60) is None
+
+
+def test_expired_lease_is_redelivered_then_failed(store):
+    job_id, _ = store.enqueue("garden", {"thread_id": "t1"}, "bulk")
+    leased = store.lease(["bulk"], "dead-worker", visibility_timeout=0.05)
+    assert store.lease(["bulk"], "other", 60) is None
+
+    time.sleep(0.06)
+    again = store.lease(["bulk"], "other", 60)
+    assert again.id == job_id and again.attempts == leased.attempts + 1
+
+    assert store.nack(job_id, "other", "boom", retry_delay=0, max_attempts=2) == "failed"
+    assert store.depth()["bulk"] == 0
+    assert store.failed()[0]["last_error"] == "boom"
+
+
+def test_stale_worker_cannot_settle_a_reclaimed_job(store):
+    job_id, _ = store.enqueue("garden", {"thread_id": "t1"}, "bulk")
+    stale = store.lease(["bulk"], "slow-worker", visibility_timeout=0.05)
+    time.sleep(0.06)
+    current = store.lease(["bulk"], "other", 60)
+    assert current.worker == "other"
+
+    assert store.extend(job_id, stale.worker, 60) is False
+    assert store.ack(job_id, stale.worker) is False
+    assert store.nack(job_id, stale.worker, "late", 0, 5) == "lease_lost"
+    assert store.depth()["bulk"] == 1
+
+    assert store.extend(job_id, current.worker, 60) is True
+    assert store.ack(job_id, current.worker) is True
+    assert store.depth()["bulk"] == 0
+
+
+def test_sqlite_jobs_survive_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(path)
+    store.enqueue("consolidate_thread", {"thread_id": "t1"}, "bulk", "consolidate_thread:t1")
+    store.close()
+
+    reopened = SQLiteJobStore(path)
+    job = reopened.lease(["bulk"], "w", 60)
+    assert job.payload == {"thread_id": "t1"}
+    assert reopened.ack(job.id, job.worker)
+    assert reopened.depth() == {"interactive": 0, "bulk": 0}
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_queue_coalesces_callbacks_and_shares_container():
+    gardener = Mock()
+    gardener.garden_thread = AsyncMock()
+    container = Mock()
+    container.memory_gardener = Mock(return_value=gardener)
+    queue = MemoryTaskQueue(max_workers=1, container=container, poll_interval=0.05)
+    results = []
+
+    async def callback(result):
+        results.append(result)
+
+    await queue.enqueue("garden", {"thread_id": "t1"}, callback=callback)
+    await queue.enqueue("garden", {"thread_id": "t1"}, callback=callback)
+    await queue.start()
+    await _wait_until(lambda: len(results) == 2)
+    stats = await queue.get_stats()
+    await queue.stop()
+
+    assert gardener.garden_thread.await_count == 1
+    assert results[0] == {"status": "gardened", "thread_id": "t1"}
+    assert stats["coalesced"] == 1 and stats["completed"] == 1
+    assert stats["depth"] == {"interactive": 0, "bulk": 0}
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_retried_then_marked_failed():
+    queue = MemoryTaskQueue(
+        max_workers=1, max_attempts=2, retry_delay=0, poll_interval=0.05
+    )
+    queue._run_gardening = AsyncMock(side_effect=RuntimeError("vector store down"))
+
+    await queue.enqueue("garden", {"thread_id": "t1"})
+    await queue.start()
+    await _wait_until(lambda: queue.stats["failed"] == 1)
+    await queue.stop()
+
+    assert queue._run_gardening.await_count == 2
+    assert queue.stats["retried"] == 1
+    assert "vector store down" in queue.store.failed()[0]["last_error"]
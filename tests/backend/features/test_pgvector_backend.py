@@ -0,0 +1,266 @@
+"""Tests du backend pgvector de VectorService (traduction where, API collection, parité)."""
+
+import importlib.util
+import os
+import uuid
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.features.memory.pgvector_store import (
+    PgVectorCollection,
+    PgVectorStore,
+    table_name_for,
+    where_to_sql,
+)
+from backend.features.memory.vector_service import VectorService
+
+
+def test_where_translation_is_parameterized():
+    params: List[Any] = []
+    sql = where_to_sql(
+        {
+            "$and": [
+                {"user_id": "u1"},
+                {"confidence": {"$gte": 0.6}},
+                {"type": {"$in": ["fact", "preference"]}},
+                {"$or": [{"thread_id": "t1"}, {"thread_id": {"$ne": "t2"}}]},
+            ]
+        },
+        params,
+    )
+
+    assert sql.startswith("(") and " OR " in sql
+    assert "u1" not in sql and "confidence" not in sql
+    assert params[0] == '{"user_id": "u1"}'
+    assert params[1:3] == ["confidence", 0.6]
+    assert params[4] == '["fact", "preference"]'
+    assert f"${len(params)}" in sql
+
+
+def test_where_translation_handles_strings_and_rejects_unknown_operators():
+    params: List[Any] = []
+    sql = where_to_sql({"last_mentioned_at": {"$gte": "2025-01-01"}}, params)
+    assert "::text" in sql and params == ["last_mentioned_at", "2025-01-01"]
+
+    assert where_to_sql(None, []) == "TRUE"
+    assert where_to_sql({"$and": []}, []) == "TRUE"
+    with pytest.raises(ValueError):
+        where_to_sql({"$not": {"a": 1}}, [])
+    with pytest.raises(ValueError):
+        where_to_sql({"a": {"$regex": "x"}}, [])
+
+
+def test_table_names_are_safe_identifiers():
+    assert table_name_for("emergence_knowledge") == "vec_emergence_knowledge"
+    unsafe = table_name_for('docs"; DROP TABLE x; --')
+    assert unsafe.startswith("vec_docs") and '"' not in unsafe and " " not in unsafe
+    assert len(table_name_for("x" * 200)) <= 63
+
+
+class _FakeStore:
+    """Store en mémoire reproduisant les lignes renvoyées par PgVectorStore."""
+
+    def __init__(self) -> None:
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, coro, timeout=None):
+        import asyncio
+
+        return asyncio.new_event_loop().run_until_complete(coro)
+
+    async def upsert(self, name, ids, embeddings, documents, metadatas, *, overwrite=True):
+        for i, item_id in enumerate(ids):
+            if item_id in self.rows and not overwrite:
+                continue
+            self.rows[item_id] = {
+                "id": item_id,
+                "document": documents[i],
+                "metadata": metadatas[i],
+                "embedding": list(embeddings[i]),
+            }
+
+    async def query(self, name, query_embeddings, n_results, where, include_embeddings):
+        return [
+            [
+                {**row, "distance": abs(row["embedding"][0] - emb[0])}
+                for row in sorted(
+                    self.rows.values(), key=lambda r: abs(r["embedding"][0] - emb[0])
+                )[:n_results]
+            ]
+            for emb in query_embeddings
+        ]
+
+    async def get(self, name, *, ids=None, where=None, limit=None, offset=None,
+                  include_embeddings=False):
+        rows = [r for r in self.rows.values() if ids is None or r["id"] in ids]
+        return rows[(offset or 0) : (offset or 0) + limit if limit else None]
+
+
+def test_collection_returns_chroma_shaped_results():
+    collection = PgVectorCollection(
+        _FakeStore(), "docs", embedding_function=lambda texts: [[float(len(t))] for t in texts]
+    )
+    collection.upsert(
+        ids=["a", "b"], documents=["x", "xxxx"], metadatas=[{"k": 1}, {"k": 2}]
+    )
+
+    result = collection.query(query_embeddings=[[1.0]], n_results=1, include=["documents", "distances"])
+    assert result["ids"] == [["a"]]
+    assert result["documents"] == [["x"]]
+    assert result["distances"] == [[0.0]]
+    assert result["metadatas"] is None
+
+    page = collection.get(limit=1, offset=1)
+    assert page == {"ids": ["b"], "documents": ["xxxx"], "metadatas": [{"k": 2}], "embeddings": None}
+
+
+def test_pgvector_preference_falls_back_to_chroma_without_driver(tmp_path):
+    if importlib.util.find_spec("asyncpg") is not None:
+        pytest.skip("asyncpg installé : le repli n'est pas exercé")
+    service = VectorService(
+        persist_directory=str(tmp_path / "vectors"),
+        embed_model_name="all-MiniLM-L6-v2",
+        backend_preference="pgvector",
+    )
+    assert service._select_backend() == "pgvector"
+    assert service._init_pgvector_store() is False
+    assert service.pg_store is None
+
+
+# ---------- Parité Chroma / pgvector (PostgreSQL local requis) ----------
+
+PG_HOST = os.getenv("PGVECTOR_TEST_HOST")
+requires_postgres = pytest.mark.skipif(
+    not PG_HOST or importlib.util.find_spec("asyncpg") is None,
+    reason="PostgreSQL + pgvector local requis (PGVECTOR_TEST_HOST)",
+)
+
+_ITEMS = [
+    {"id": f"m{i}", "text": f"souvenir {i}", "embedding": [1.0, i / 10.0, (i % 3) / 3.0],
+     "metadata": {"user_id": "u1" if i % 2 else "u2", "confidence": i / 10.0,
+                  "type": ["fact", "preference", "concept"][i % 3]}}
+    for i in range(10)
+]
+_FILTERS = [
+    {"user_id": "u1"},
+    {"$and": [{"user_id": "u1"}, {"confidence": {"$gte": 0.5}}]},
+    {"type": {"$in": ["fact", "concept"]}},
+    {"$or": [{"type": "preference"}, {"confidence": {"$lt": 0.2}}]},
+    {"type": {"$nin": ["fact"]}},
+]
+
+
+@pytest.fixture
+def backends(tmp_path):
+    from backend.core.database.manager_postgres import PostgreSQLManager
+
+    manager = PostgreSQLManager(
+        host=PG_HOST,
+        port=int(os.getenv("PGVECTOR_TEST_PORT", "5432")),
+        database=os.getenv("PGVECTOR_TEST_DATABASE", "postgres"),
+        user=os.getenv("PGVECTOR_TEST_USER", "postgres"),
+        password=os.getenv("PGVECTOR_TEST_PASSWORD"),
+        min_size=1,
+        max_size=2,
+    )
+    services = {}
+    for backend in ("chroma", "pgvector"):
+        service = VectorService(
+            persist_directory=str(tmp_path / backend),
+            embed_model_name="all-MiniLM-L6-v2",
+            backend_preference=backend,
+            pg_manager=manager,
+        )
+        service._allow_stub_model = True
+        services[backend] = service
+    name = f"parity_{uuid.uuid4().hex[:8]}"
+    collections = {b: s.get_or_create_collection(name) for b, s in services.items()}
+    assert services["pgvector"].backend == "pgvector"
+    for backend, service in services.items():
+        service.add_items(collections[backend], [dict(i) for i in _ITEMS])
+    yield services, collections
+    store = services["pgvector"].pg_store
+    store.run(manager.execute(f'DROP TABLE IF EXISTS "{table_name_for(name)}"'))
+    store.run(manager.execute("DELETE FROM vector_collections WHERE name = $1", name))
+    store.close()
+
+
+@requires_postgres
+@pytest.mark.parametrize("where", _FILTERS)
+def test_filtered_get_parity(backends, where):
+    services, collections = backends
+    ids = {
+        b: sorted(collections[b].get(where=services[b]._normalize_where(where))["ids"])
+        for b in services
+    }
+    assert ids["pgvector"] == ids["chroma"]
+
+
+@requires_postgres
+@pytest.mark.parametrize("where", _FILTERS)
+def test_nearest_neighbors_parity(backends, where):
+    services, collections = backends
+    query = [[1.0, 0.35, 0.5]]
+    hits = {
+        b: services[b].nearest_neighbors(collections[b], query, n_results=3, where_filter=where)[0]
+        for b in services
+    }
+    assert [h["id"] for h in hits["pgvector"]] == [h["id"] for h in hits["chroma"]]
+    for pg_hit, chroma_hit in zip(hits["pgvector"], hits["chroma"]):
+        assert pg_hit["distance"] == pytest.approx(chroma_hit["distance"], abs=1e-4)
+        assert pg_hit["metadata"] == chroma_hit["metadata"]
+
+
+@requires_postgres
+def test_update_and_delete_parity(backends):
+    services, collections = backends
+    for b, service in services.items():
+        service.update_metadatas(collections[b], ["m1"], [{"confidence": 0.99}])
+        service.delete_vectors(collections[b], {"user_id": "u2"})
+    snapshot = {b: collections[b].get(include=["metadatas"]) for b in services}
+    assert sorted(snapshot["pgvector"]["ids"]) == sorted(snapshot["chroma"]["ids"])
+    by_id = {
+        b: dict(zip(snapshot[b]["ids"], snapshot[b]["metadatas"])) for b in services
+    }
+    assert by_id["pgvector"] == by_id["chroma"]
+    assert by_id["pgvector"]["m1"]["confidence"] == 0.99
+
+
+def test_store_rejects_unknown_index_type():
+    with pytest.raises(ValueError):
+        PgVectorStore(manager=None, index_type="flat")
+
+
+class _FakeRegistryManager:
+    """Registre ``vector_collections`` partagé entre plusieurs stores."""
+
+    def __init__(self) -> None:
+        self.registry: Dict[str, Dict[str, Any]] = {}
+
+    async def execute(self, sql, *args):
+        return None
+
+    async def fetch_all(self, sql, *args):
+        return [{"name": name, **row} for name, row in self.registry.items()]
+
+    async def fetch_one(self, sql, *args):
+        return self.registry.get(args[0])
+
+
+@pytest.mark.asyncio
+async def test_registry_is_reread_for_collections_created_elsewhere():
+    manager = _FakeRegistryManager()
+    store = PgVectorStore(manager)
+    await store._ensure_schema()
+    assert await store._table_if_exists("docs") is None
+
+    # Un autre process crée puis type la collection après le chargement du registre
+    manager.registry["docs"] = {"table_name": "vec_docs", "dimension": None}
+    assert await store._table_if_exists("docs") is None
+    manager.registry["docs"]["dimension"] = 384
+
+    assert await store._table_if_exists("docs") == "vec_docs"
+    assert await store._ensure_table("docs", 384) == "vec_docs"
+    with pytest.raises(ValueError):
+        await store._ensure_table("docs", 768)
@@ -0,0 +1,220 @@
+"""Tests du backend Redis async du cache RAG et de l'index inverse document -> entrées."""
+
+import fnmatch
+from typing import Any, Dict, List, Set
+
+import pytest
+
+from backend.features.chat.rag_cache import RAGCache, create_rag_cache
+
+WHERE = {"user_id": "u1"}
+
+
+def _hits(*doc_ids: int) -> List[Dict[str, Any]]:
+    return [
+        {"id": f"d{d}-c0", "text": f"chunk {d}", "metadata": {"document_id": d}}
+        for d in doc_ids
+    ]
+
+
+class _FakePipeline:
+    def __init__(self, server: "_FakeRedisManager") -> None:
+        self.server = server
+        self.ops: List[tuple] = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append(("set", key, value, ex))
+        return self
+
+    def sadd(self, key, *members):
+        self.ops.append(("sadd", key, members))
+        return self
+
+    def srem(self, key, *members):
+        self.ops.append(("srem", key, members))
+        return self
+
+    def expire(self, key, seconds):
+        self.ops.append(("expire", key, seconds))
+        return self
+
+    def delete(self, *keys):
+        self.ops.append(("delete", keys))
+        return self
+
+    async def execute(self) -> List[Any]:
+        self.server.round_trips += 1
+        results: List[Any] = []
+        for op in self.ops:
+            kind = op[0]
+            if kind == "set":
+                self.server.strings[op[1]] = op[2]
+                self.server.ttls[op[1]] = op[3]
+                results.append(True)
+            elif kind == "sadd":
+                members = self.server.sets.setdefault(op[1], set())
+                before = len(members)
+                members.update(op[2])
+                results.append(len(members) - before)
+            elif kind == "srem":
+                members = self.server.sets.get(op[1], set())
+                results.append(sum(1 for m in op[2] if m in members))
+                members.difference_update(op[2])
+                if not members:
+                    self.server.sets.pop(op[1], None)
+            elif kind == "expire":
+                self.server.ttls[op[1]] = op[2]
+                results.append(True)
+            elif kind == "delete":
+                results.append(self.server._delete(op[1]))
+        return results
+
+
+class _FakeRedisManager:
+    """Sous-ensemble de RedisManager utilisé par RAGCache (stockage en mémoire)."""
+
+    def __init__(self, fail_connect: bool = False) -> None:
+        self.strings: Dict[str, str] = {}
+        self.sets: Dict[str, Set[str]] = {}
+        self.ttls: Dict[str, Any] = {}
+        self.connected = False
+        self.fail_connect = fail_connect
+        self.connect_calls = 0
+        self.round_trips = 0
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def connect(self) -> None:
+        self.connect_calls += 1
+        if self.fail_connect:
+            raise ConnectionError("redis down")
+        self.connected = True
+
+    async def disconnect(self) -> None:
+        self.connected = False
+
+    async def get(self, key: str):
+        self.round_trips += 1
+        return self.strings.get(key)
+
+    async def smembers(self, key: str) -> Set[str]:
+        self.round_trips += 1
+        return set(self.sets.get(key, set()))
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        assert transaction
+        return _FakePipeline(self)
+
+    async def delete_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        keys = [k for k in [*self.strings, *self.sets] if fnmatch.fnmatch(k, pattern)]
+        return self._delete(keys)
+
+    def _delete(self, keys) -> int:
+        deleted = 0
+        for key in keys:
+            if self.strings.pop(key, None) is not None or self.sets.pop(key, None) is not None:
+                deleted += 1
+            self.ttls.pop(key, None)
+        return deleted
+
+
+@pytest.fixture
+def redis_manager() -> _FakeRedisManager:
+    return _FakeRedisManager()
+
+
+@pytest.fixture
+def cache(redis_manager) -> RAGCache:
+    return RAGCache(ttl_seconds=120, redis_manager=redis_manager)
+
+
+@pytest.mark.asyncio
+async def test_aset_writes_entry_and_reverse_index_in_one_transaction(cache, redis_manager):
+    await cache.aset("budget 2025", WHERE, "anima", _hits(1, 2), [])
+
+    assert redis_manager.round_trips == 1
+    entry_keys = [k for k in redis_manager.strings if k.startswith("rag:query:")]
+    assert len(entry_keys) == 1
+    fingerprint = entry_keys[0].removeprefix("rag:query:")
+    assert redis_manager.sets == {"rag:doc:1": {fingerprint}, "rag:doc:2": {fingerprint}}
+    assert redis_manager.ttls["rag:doc:1"] == 120
+
+    result = await cache.aget("Budget 2025 ", WHERE, "anima")
+    assert result["cache_tier"] == "exact"
+    assert result["doc_hits"] == _hits(1, 2)
+    # Rien dans le cache mémoire local : l'entrée est partagée via Redis
+    assert cache.memory_cache == {}
+
+
+@pytest.mark.asyncio
+async def test_document_invalidation_is_targeted(cache, redis_manager):
+    await cache.aset("q1", WHERE, "anima", _hits(1), [])
+    await cache.aset("q2", WHERE, "anima", _hits(1, 2), [])
+    await cache.aset("q3", WHERE, "anima", _hits(3), [])
+
+    removed = await cache.ainvalidate_by_document(1)
+
+    assert removed == 2
+    assert await cache.aget("q1", WHERE, "anima") is None
+    assert await cache.aget("q2", WHERE, "anima") is None
+    # Les entrées des autres documents survivent (plus de flush global)
+    assert await cache.aget("q3", WHERE, "anima") is not None
+    assert "rag:doc:1" not in redis_manager.sets
+    assert "rag:doc:3" in redis_manager.sets
+
+    await cache.ainvalidate_all()
+    assert redis_manager.strings == {} and redis_manager.sets == {}
+
+
+@pytest.mark.asyncio
+async def test_semantic_tier_reads_entries_from_redis(redis_manager):
+    cache = RAGCache(semantic_threshold=0.9, redis_manager=redis_manager)
+    await cache.aset("budget", WHERE, "anima", _hits(5), [], query_embedding=[1.0, 0.0])
+
+    hit = await cache.aget("le budget ?", WHERE, "anima", query_embedding=[0.99, 0.05])
+    assert hit["cache_tier"] == "semantic"
+
+    await cache.ainvalidate_by_document(5)
+    assert await cache.aget_similar([1.0, 0.0], WHERE, "anima") is None
+    assert cache.get_stats()["semantic"]["vectors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_factory_instances_share_entries_through_injected_manager(redis_manager):
+    # Deux instances (deux workers) construites sur le RedisManager de l'application
+    first = create_rag_cache(redis_manager=redis_manager)
+    second = create_rag_cache(redis_manager=redis_manager)
+    assert first.redis_manager is redis_manager
+
+    await first.aset("__CONSOLIDATED_MEMORY__:q", WHERE, "memory_consolidation", [], [])
+    hit = await second.aget("__CONSOLIDATED_MEMORY__:q", WHERE, "memory_consolidation")
+    assert hit is not None and hit["cache_tier"] == "exact"
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_falls_back_to_memory_with_backoff():
+    redis_manager = _FakeRedisManager(fail_connect=True)
+    cache = RAGCache(redis_manager=redis_manager)
+
+    await cache.aset("q", WHERE, "anima", _hits(1), [])
+    assert (await cache.aget("q", WHERE, "anima"))["doc_hits"] == _hits(1)
+    # Reconnexion différée : un seul essai malgré plusieurs appels
+    assert redis_manager.connect_calls == 1
+    assert cache.get_stats()["connected"] is False
+
+
+def test_memory_reverse_index_tracks_eviction_and_replacement():
+    cache = RAGCache(max_memory_items=2)
+    cache.set("q1", WHERE, "anima", _hits(1), [])
+    cache.set("q2", WHERE, "anima", _hits(1, 2), [])
+    cache.set("q2", WHERE, "anima", _hits(2), [])  # remplacement : plus de doc 1
+    cache.set("q3", WHERE, "anima", _hits(3), [])  # éviction LRU de q1
+
+    assert cache.get("q1", WHERE, "anima") is None
+    assert cache.get_stats()["indexed_documents"] == 2
+    assert cache._invalidate_memory_by_doc(1) == 0
+
+    cache.invalidate_by_document(2)
+    assert cache.get("q2", WHERE, "anima") is None
+    assert cache.get("q3", WHERE, "anima") is not None
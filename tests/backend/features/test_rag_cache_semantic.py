@@ -0,0 +1,94 @@
+"""Tests du tier sémantique du cache RAG (embeddings de requêtes proches)."""
+
+import pytest
+
+from backend.features.chat.rag_cache import RAGCache
+
+WHERE = {"$and": [{"user_id": "u1"}, {"type": "document"}]}
+HITS = [
+    {"id": "c1", "text": "chunk 1", "metadata": {"document_id": 7}},
+    {"id": "c2", "text": "chunk 2", "metadata": {"document_id": 7}},
+]
+
+
+@pytest.fixture
+def cache() -> RAGCache:
+    return RAGCache(ttl_seconds=60, semantic_threshold=0.9, max_semantic_items_per_scope=2)
+
+
+def test_exact_hit_is_tagged_and_needs_no_embedding(cache):
+    cache.set("Quel est le budget ?", WHERE, "anima", HITS, [], query_embedding=[1.0, 0.0])
+
+    result = cache.get("quel est le budget ?", WHERE, "anima")
+
+    assert result["cache_tier"] == "exact"
+    assert result["doc_hits"] == HITS
+
+
+def test_near_duplicate_query_hits_semantic_tier(cache):
+    cache.set("Quel est le budget ?", WHERE, "anima", HITS, [], query_embedding=[1.0, 0.0])
+
+    similar = cache.get("Budget du projet ?", WHERE, "anima", query_embedding=[0.98, 0.1])
+    assert similar["cache_tier"] == "semantic"
+    assert similar["similarity"] >= 0.9
+    assert similar["doc_hits"] == HITS
+
+    # Sous le seuil : miss
+    assert cache.get("Qui est Neo ?", WHERE, "anima", query_embedding=[0.5, 0.5]) is None
+
+
+def test_semantic_tier_respects_scope(cache):
+    cache.set("budget", WHERE, "anima", HITS, [], [1], query_embedding=[1.0, 0.0])
+
+    assert cache.get_similar([1.0, 0.0], WHERE, "neo", [1]) is None
+    assert cache.get_similar([1.0, 0.0], WHERE, "anima", [2]) is None
+    assert cache.get_similar([1.0, 0.0], {"user_id": "u2"}, "anima", [1]) is None
+    assert cache.get_similar([1.0, 0.0], WHERE, "anima", [1]) is not None
+
+
+def test_scope_is_lru_bounded_and_follows_invalidation(cache):
+    for i, emb in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+        hits = [{"id": f"c{i}", "metadata": {"document_id": i}}]
+        cache.set(f"q{i}", WHERE, "anima", hits, [], query_embedding=emb)
+
+    # Capacité 2 par scope : la plus ancienne requête est sortie de l'index
+    assert cache.get_similar([1.0, 0.0, 0.0], WHERE, "anima") is None
+    assert cache.get_stats()["semantic"]["vectors"] == 2
+
+    # L'entrée exacte invalidée n'est plus servie par le tier sémantique
+    cache.invalidate_by_document(1)
+    assert cache.get_similar([0.0, 1.0, 0.0], WHERE, "anima") is None
+    assert cache.get_stats()["semantic"]["vectors"] == 1
+
+    cache.invalidate_all()
+    assert cache.get_similar([0.0, 0.0, 1.0], WHERE, "anima") is None
+
+
+def test_semantic_entries_expire_with_ttl(cache, monkeypatch):
+    import backend.features.chat.rag_cache as rag_cache_module
+
+    cache.set("budget", WHERE, "anima", HITS, [], query_embedding=[1.0, 0.0])
+    now = rag_cache_module.time.monotonic()
+    monkeypatch.setattr(rag_cache_module.time, "monotonic", lambda: now + 61)
+
+    assert cache.get_similar([1.0, 0.0], WHERE, "anima") is None
+    assert cache.get_stats()["semantic"]["scopes"] == 0
+
+
+def test_threshold_zero_disables_semantic_tier():
+    cache = RAGCache(semantic_threshold=0.0)
+    cache.set("budget", WHERE, "anima", HITS, [], query_embedding=[1.0, 0.0])
+
+    assert cache.get("budget ?", WHERE, "anima", query_embedding=[1.0, 0.0]) is None
+    assert cache.get_stats()["semantic"]["vectors"] == 0
+
+
+def test_audit_detects_false_positive():
+    cached = {"cache_tier": "semantic", "doc_hits": HITS}
+
+    assert RAGCache.audit_semantic_hit(cached, list(HITS)) is False
+    assert RAGCache.audit_semantic_hit(cached, [{"id": "zz", "metadata": {}}]) is True
+
+    cache = RAGCache(semantic_threshold=0.9, semantic_audit_rate=1.0)
+    assert cache.should_audit(cached) is True
+    assert cache.should_audit({**cached, "cache_tier": "exact"}) is False
@@ -0,0 +1,344 @@
+"""Tests export/import streamés NDJSON (+zstd) : threads et concepts LTM."""
+
+from typing import Any, AsyncIterator, Dict, List
+
+import pytest
+
+from backend.core.database import queries, schema
+from backend.core.database.manager import DatabaseManager
+from backend.features.memory.transfer import (
+    ConceptImportError,
+    import_concepts_stream,
+    iter_concepts_export,
+)
+from backend.features.threads.transfer import (
+    ThreadImportError,
+    import_thread_stream,
+    iter_thread_export,
+)
+from backend.shared.ndjson_stream import (
+    ZSTD_AVAILABLE,
+    ZSTD_MAGIC,
+    NDJSONDecodeError,
+    decode_ndjson,
+    encode_ndjson,
+)
+
+USER = "user-export"
+SESSION = "sess-export"
+
+
+async def _rechunk(
+    chunks: AsyncIterator[bytes], size: int = 7
+) -> AsyncIterator[bytes]:
+    """Redécoupe arbitrairement le flux (simule un corps HTTP reçu par morceaux)."""
+    async for chunk in chunks:
+        for i in range(0, len(chunk), size):
+            yield chunk[i : i + size]
+
+
+@pytest.fixture
+async def db(tmp_path) -> AsyncIterator[DatabaseManager]:
+    manager = DatabaseManager(str(tmp_path / "transfer.db"))
+    await schema.create_tables(manager)
+    yield manager
+    await manager.disconnect()
+
+
+async def _make_thread(db: DatabaseManager, n_messages: int) -> str:
+    doc_id = await queries.insert_document(
+        db,
+        filename="doc.pdf",
+        filepath="doc.pdf",
+        status="ready",
+        uploaded_at="2025-01-01T00:00:00Z",
+        session_id=SESSION,
+        user_id=USER,
+    )
+    thread_id = await queries.create_thread(
+        db, SESSION, user_id=USER, type_="chat", title="Long thread", meta={"k": 1}
+    )
+    # Horodatages identiques par paires : la pagination keyset doit départager par id
+    await db.executemany(
+        "INSERT INTO messages (id, thread_id, role, content, created_at, session_id, user_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                f"m{i:04d}",
+                thread_id,
+                "user" if i % 2 == 0 else "assistant",
+                f"message {i} é",
+                f"2025-01-01T00:00:{i // 2:02d}.000000+00:00",
+                SESSION,
+                USER,
+            )
+            for i in range(n_messages)
+        ],
+        commit=True,
+    )
+    await queries.set_thread_docs(db, thread_id, SESSION, [doc_id], user_id=USER)
+    return thread_id
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_visits_each_message_once(db):
+    thread_id = await _make_thread(db, 23)
+    pages = [
+        page
+        async for page in queries.iter_messages_keyset(
+            db, thread_id, SESSION, user_id=USER, page_size=4
+        )
+    ]
+    ids = [m["id"] for page in pages for m in page]
+    assert ids == [f"m{i:04d}" for i in range(23)]
+    assert max(len(p) for p in pages) == 4
+
+
+@pytest.mark.parametrize(
+    "compress",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard absent"),
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_thread_roundtrip(db, compress):
+    thread_id = await _make_thread(db, 1200)
+    thread = await queries.get_thread(db, thread_id, SESSION, user_id=USER)
+
+    records = iter_thread_export(db, thread, session_id=SESSION, user_id=USER, page_size=100)
+    payload = [chunk async for chunk in encode_ndjson(records, compress=compress)]
+    assert (b"".join(payload)[:4] == ZSTD_MAGIC) is compress
+
+    async def _body() -> AsyncIterator[bytes]:
+        for chunk in payload:
+            yield chunk
+
+    result = await import_thread_stream(
+        db,
+        decode_ndjson(_rechunk(_body())),
+        session_id=SESSION,
+        user_id=USER,
+        batch_size=256,
+    )
+
+    assert result["messages"] == 1200
+    assert result["docs_linked"] == 1
+    new_id = result["thread_id"]
+    assert new_id != thread_id
+    imported = await queries.get_thread(db, new_id, SESSION, user_id=USER)
+    assert imported["title"] == "Long thread"
+    assert imported["message_count"] == 1200
+
+    original = [
+        m
+        async for page in queries.iter_messages_keyset(db, thread_id, SESSION, user_id=USER)
+        for m in page
+    ]
+    copy = [
+        m
+        async for page in queries.iter_messages_keyset(db, new_id, SESSION, user_id=USER)
+        for m in page
+    ]
+    # Nouveaux IDs : seul l'ordre entre messages de même horodatage peut différer
+    def _key(messages: List[Dict[str, Any]]) -> List[tuple]:
+        return sorted((m["created_at"], m["role"], m["content"]) for m in messages)
+
+    assert len(copy) == 1200
+    assert _key(copy) == _key(original)
+
+
+@pytest.mark.asyncio
+async def test_thread_import_rejects_bad_stream_and_rolls_back(db):
+    await _make_thread(db, 1)
+
+    async def _records(items: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        for item in items:
+            yield item
+
+    with pytest.raises(ThreadImportError):
+        await import_thread_stream(
+            db, _records([{"type": "thread", "data": {}}]), session_id=SESSION, user_id=USER
+        )
+
+    # Message invalide (rôle hors CHECK) : le thread partiel est supprimé
+    bad = [
+        {"type": "header", "kind": "thread", "version": 1},
+        {"type": "thread", "data": {"type": "chat", "title": "Broken"}},
+        {"type": "message", "data": {"role": "intruder", "content": "x"}},
+    ]
+    with pytest.raises(Exception):
+        await import_thread_stream(db, _records(bad), session_id=SESSION, user_id=USER)
+    threads = await queries.get_threads(db, SESSION, user_id=USER)
+    assert [t["title"] for t in threads] == ["Long thread"]
+
+
+@pytest.mark.asyncio
+async def test_decode_reports_invalid_line():
+    async def _body() -> AsyncIterator[bytes]:
+        yield b'{"type": "header"}\n{oops\n'
+
+    with pytest.raises(NDJSONDecodeError, match="Ligne 2"):
+        _ = [r async for r in decode_ndjson(_body())]
+
+
+class _IdsCollection:
+    """Collection factice : seule la suppression par IDs est utilisée."""
+
+    def __init__(self, items: Dict[str, Dict[str, Any]]) -> None:
+        self._items = items
+
+    def delete(self, ids=None, where=None):
+        for key in ids or []:
+            self._items.pop(key, None)
+
+
+class _PagedVectorService:
+    """Collection en mémoire exposant ``get_page`` / ``add_items`` / ``delete_vectors``."""
+
+    def __init__(self) -> None:
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.collection = _IdsCollection(self.items)
+        self.page_calls = 0
+        self.add_batches: List[int] = []
+
+    @staticmethod
+    def _matches(meta: Dict[str, Any], where: Dict[str, Any]) -> bool:
+        return all(meta.get(k) == v for cond in where["$and"] for k, v in cond.items())
+
+    def get_page(self, collection, where_filter=None, *, limit=256, cursor=None):
+        self.page_calls += 1
+        rows = [(i, it) for i, it in self.items.items() if self._matches(it["metadata"], where_filter)]
+        offset = int(cursor or 0)
+        chunk = rows[offset : offset + limit]
+        page = {
+            "ids": [i for i, _ in chunk],
+            "documents": [it["text"] for _, it in chunk],
+            "metadatas": [dict(it["metadata"]) for _, it in chunk],
+        }
+        return page, (offset + len(chunk) if len(chunk) >= limit else None)
+
+    def add_items(self, collection, items):
+        self.add_batches.append(len(items))
+        for item in items:
+            self.items[item["id"]] = {"text": item["text"], "metadata": dict(item["metadata"])}
+
+    def delete_vectors(self, collection, where_filter):
+        for key in [i for i, it in self.items.items() if self._matches(it["metadata"], where_filter)]:
+            del self.items[key]
+
+
+@pytest.mark.asyncio
+async def test_concepts_roundtrip_paged_and_batched():
+    service = _PagedVectorService()
+    for i in range(50):
+        service.items[f"c{i}"] = {
+            "text": f"concept {i}",
+            "metadata": {"user_id": USER, "type": "concept", "mention_count": i},
+        }
+    service.items["other"] = {"text": "x", "metadata": {"user_id": "other", "type": "concept"}}
+
+    records = iter_concepts_export(service, service.collection, user_id=USER, page_size=16)
+    payload = b"".join([c async for c in encode_ndjson(records)])
+    assert service.page_calls == 4
+
+    async def _body() -> AsyncIterator[bytes]:
+        yield payload
+
+    # Import vers un autre compte : nouveaux IDs, les concepts source sont intacts
+    result = await import_concepts_stream(
+        service, service.collection, decode_ndjson(_body()), user_id="user-b", batch_size=20
+    )
+    assert result["imported"] == 50
+    assert service.add_batches == [20, 20, 10]
+    copies = [it for it in service.items.values() if it["metadata"]["user_id"] == "user-b"]
+    assert len(copies) == 50
+    assert sum(1 for it in service.items.values() if it["metadata"]["user_id"] == USER) == 50
+
+    # Ré-import même compte en mode replace : idempotent (IDs conservés)
+    result = await import_concepts_stream(
+        service, service.collection, decode_ndjson(_body()), user_id=USER, mode="replace"
+    )
+    assert result["imported"] == 50
+    assert result["replaced"] == 0
+    assert len(service.items) == 101
+
+    async def _empty() -> AsyncIterator[bytes]:
+        yield b""
+
+    with pytest.raises(ConceptImportError):
+        await import_concepts_stream(
+            service, service.collection, decode_ndjson(_empty()), user_id=USER
+        )
+
+
+def _concept_records(*concepts: Dict[str, Any], end: bool = True) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = [{"type": "header", "kind": "concepts", "version": 1}]
+    records += [{"type": "concept", "data": c} for c in concepts]
+    if end:
+        records.append({"type": "end", "counts": {"concepts": len(concepts)}})
+    return records
+
+
+async def _aiter(records: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    for record in records:
+        yield record
+
+
+@pytest.mark.asyncio
+async def test_concepts_import_never_reuses_foreign_ids():
+    service = _PagedVectorService()
+    service.items["victim"] = {
+        "text": "secret",
+        "metadata": {"user_id": "victim-user", "type": "concept"},
+    }
+
+    # Fichier forgé : ID d'un autre compte, métadonnées au nom de l'importeur
+    forged = {"id": "victim", "text": "pwned", "metadata": {"user_id": USER}}
+    result = await import_concepts_stream(
+        service, service.collection, _aiter(_concept_records(forged)), user_id=USER
+    )
+
+    assert result["imported"] == 1
+    assert service.items["victim"]["text"] == "secret"
+    assert service.items["victim"]["metadata"]["user_id"] == "victim-user"
+    copies = [i for i, it in service.items.items() if it["metadata"]["user_id"] == USER]
+    assert len(copies) == 1 and copies[0] != "victim"
+
+
+@pytest.mark.asyncio
+async def test_concepts_replace_deletes_only_after_all_batches_written():
+    service = _PagedVectorService()
+    for key in ("keep", "stale"):
+        service.items[key] = {
+            "text": key,
+            "metadata": {"user_id": USER, "type": "concept"},
+        }
+
+    async def _broken() -> AsyncIterator[Dict[str, Any]]:
+        for record in _concept_records({"id": "keep", "text": "keep v2"}, end=False):
+            yield record
+        raise NDJSONDecodeError("Ligne 3: JSON invalide")
+
+    # Flux interrompu : aucun ancien concept n'est supprimé
+    with pytest.raises(NDJSONDecodeError):
+        await import_concepts_stream(
+            service, service.collection, _broken(), user_id=USER, mode="replace"
+        )
+    assert {"keep", "stale"} <= set(service.items)
+
+    result = await import_concepts_stream(
+        service,
+        service.collection,
+        _aiter(_concept_records({"id": "keep", "text": "keep v3"}, {"text": "new"})),
+        user_id=USER,
+        mode="replace",
+    )
+    assert result["imported"] == 2
+    assert result["replaced"] == 1
+    assert "stale" not in service.items
+    assert service.items["keep"]["text"] == "keep v3"
+    assert len(service.items) == 2
@@ -0,0 +1,170 @@
+"""Tests de la télémétrie d'usage bufferisée (buffer borné, flush groupé, buckets)."""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.features.usage.guardian import UsageGuardian
+from backend.features.usage.models import FeatureUsage, UserError
+from backend.features.usage.telemetry import SQLiteTelemetrySink, UsageTelemetry
+
+NOW = datetime(2025, 3, 1, 10, 0, 30, tzinfo=timezone.utc)
+
+
+def _usage(email: str, feature: str, *, success: bool = True, minutes: int = 0) -> FeatureUsage:
+    return FeatureUsage(
+        user_email=email,
+        feature_name=feature,
+        endpoint=f"/api/{feature}",
+        method="GET",
+        timestamp=NOW + timedelta(minutes=minutes),
+        success=success,
+        duration_ms=100,
+        status_code=200 if success else 500,
+    )
+
+
+def _error(email: str, code: int = 500) -> UserError:
+    return UserError(
+        user_email=email,
+        endpoint="/api/chat",
+        method="POST",
+        error_type="RuntimeError",
+        error_code=code,
+        error_message="boom",
+        timestamp=NOW,
+    )
+
+
+@pytest.fixture
+def sink(tmp_path):
+    instance = SQLiteTelemetrySink(str(tmp_path / "telemetry.db"))
+    yield instance
+    instance.close()
+
+
+def _count(sink: SQLiteTelemetrySink, table: str) -> int:
+    conn = sqlite3.connect(sink.path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_batch_and_minute_buckets(sink):
+    telemetry = UsageTelemetry(sink, batch_size=100, flush_interval_ms=60_000)
+    for _ in range(3):
+        telemetry.record_feature_usage(_usage("a@x", "chat"))
+    telemetry.record_feature_usage(_usage("a@x", "chat", success=False))
+    telemetry.record_feature_usage(_usage("b@x", "documents", minutes=1))
+    telemetry.record_user_error(_error("a@x"))
+
+    assert await telemetry.flush() == 6
+    await telemetry.stop()
+
+    assert _count(sink, "feature_usage") == 5
+    assert _count(sink, "user_errors") == 1
+    # 2 buckets usage : (10:00, a, chat) et (10:01, b, documents)
+    assert _count(sink, "usage_minute_buckets") == 2
+    rollup = await sink.get_usage_rollup(NOW - timedelta(hours=1), NOW + timedelta(hours=1))
+    by_feature = {row["feature_name"]: row for row in rollup}
+    assert by_feature["chat"]["requests"] == 4
+    assert by_feature["chat"]["failures"] == 1
+    assert by_feature["chat"]["duration_ms"] == 400
+    assert telemetry.get_stats()["flushed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_bounded_and_counts_drops(sink):
+    telemetry = UsageTelemetry(sink, capacity=3, batch_size=100, flush_interval_ms=60_000)
+    accepted = [telemetry.record_feature_usage(_usage("a@x", "chat")) for _ in range(5)]
+
+    assert accepted == [True, True, True, False, False]
+    assert telemetry.get_stats()["dropped_full"] == 2
+    await telemetry.stop()
+    assert _count(sink, "feature_usage") == 3
+
+
+@pytest.mark.asyncio
+async def test_flusher_triggers_on_batch_size_and_stop_drains(sink):
+    telemetry = UsageTelemetry(sink, batch_size=4, flush_interval_ms=60_000)
+    for _ in range(4):
+        telemetry.record_feature_usage(_usage("a@x", "chat"))
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+        if telemetry.pending == 0:
+            break
+    assert telemetry.pending == 0
+    assert _count(sink, "feature_usage") == 4
+
+    telemetry.record_feature_usage(_usage("a@x", "chat"))
+    await telemetry.stop()
+    assert _count(sink, "feature_usage") == 5
+    assert telemetry.record_feature_usage(_usage("a@x", "chat")) is False
+
+
+def test_stopped_telemetry_restarts_on_a_new_event_loop(sink):
+    telemetry = UsageTelemetry(sink, batch_size=100, flush_interval_ms=60_000)
+
+    async def first_lifespan():
+        telemetry.record_feature_usage(_usage("a@x", "chat"))
+        await telemetry.stop()
+        return telemetry.record_feature_usage(_usage("a@x", "chat"))
+
+    async def second_lifespan():
+        accepted = telemetry.record_feature_usage(_usage("b@x", "chat"))
+        await telemetry.stop()
+        return accepted
+
+    assert asyncio.run(first_lifespan()) is False
+    assert asyncio.run(second_lifespan()) is True
+
+    stats = telemetry.get_stats()
+    assert stats["dropped_closed"] == 1
+    assert stats["dropped_full"] == 0
+    assert _count(sink, "feature_usage") == 2
+
+
+@pytest.mark.asyncio
+async def test_sink_failure_drops_batch_without_raising():
+    class _BrokenSink:
+        def write_batch(self, *args):
+            raise sqlite3.OperationalError("disk I/O error")
+
+    telemetry = UsageTelemetry(_BrokenSink(), flush_interval_ms=60_000)
+    telemetry.record_feature_usage(_usage("a@x", "chat"))
+
+    assert await telemetry.flush() == 0
+    assert telemetry.get_stats()["dropped_sink_error"] == 1
+    await telemetry.stop()
+
+
+@pytest.mark.asyncio
+async def test_guardian_report_reads_minute_rollups(sink):
+    telemetry = UsageTelemetry(sink, flush_interval_ms=60_000)
+    for _ in range(3):
+        telemetry.record_feature_usage(_usage("a@x", "chat"))
+    telemetry.record_feature_usage(_usage("b@x", "documents"))
+    telemetry.record_user_error(_error("b@x", code=503))
+
+    class _UnusedRepository:
+        def __getattr__(self, name):
+            raise AssertionError(f"repository.{name} ne doit pas être appelé")
+
+    guardian = UsageGuardian(_UnusedRepository(), telemetry=telemetry)
+    # Les événements encore en buffer sont vidés avant lecture
+    report = await guardian.generate_report(
+        start_time=NOW - timedelta(hours=1), end_time=NOW + timedelta(hours=1)
+    )
+    await telemetry.stop()
+
+    assert report["total_requests"] == 4
+    assert report["total_errors"] == 1
+    assert report["active_users"] == 2
+    assert report["top_features"][0] == {"name": "chat", "count": 3}
+    assert report["error_breakdown"] == {"503": 1}
+    users = {u["email"]: u for u in report["users"]}
+    assert users["b@x"]["errors"][0]["code"] == 503
@@ -0,0 +1,222 @@
+"""Tests du pipeline vocal phrase par phrase (STT/TTS servis par un faux serveur HTTP local)."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, Dict, Iterator, List
+
+import httpx
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+SRC_DIR = ROOT_DIR / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from backend.features.voice.models import VoiceServiceConfig  # noqa: E402
+from backend.features.voice.segmenter import SentenceSegmenter  # noqa: E402
+from backend.features.voice.service import VoiceService  # noqa: E402
+
+
+class _FakeSpeechServer(ThreadingHTTPServer):
+    """Faux Whisper + ElevenLabs : mesure la concurrence TTS et renvoie `AUDIO[texte]`."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeSpeechHandler)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.tts_texts: List[str] = []
+        self.tts_delay = 0.05
+        self.transcript = "Raconte-moi une histoire courte."
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _FakeSpeechHandler(BaseHTTPRequestHandler):
+    server: _FakeSpeechServer
+
+    def log_message(self, *args: Any) -> None:  # silence
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self._read_body()
+        if self.path.endswith("/audio/transcriptions"):
+            payload = json.dumps({"text": self.server.transcript}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        if "/text-to-speech/" in self.path:
+            text = json.loads(body)["text"]
+            srv = self.server
+            with srv.lock:
+                srv.in_flight += 1
+                srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+                srv.tts_texts.append(text)
+            try:
+                # Les premières phrases sont les plus lentes : l'ordre de sortie
+                # doit rester celui des phrases, pas celui des réponses.
+                time.sleep(srv.tts_delay * (4 - min(len(srv.tts_texts), 3)))
+                audio = f"AUDIO[{text}]".encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Content-Length", str(len(audio)))
+                self.end_headers()
+                self.wfile.write(audio)
+            finally:
+                with srv.lock:
+                    srv.in_flight -= 1
+            return
+
+        self.send_response(404)
+        self.end_headers()
+
+
+class _FakeChatService:
+    """Stream LLM simulé : tokens mot par mot avec une pause au milieu."""
+
+    def __init__(self, text: str, pause_after_first_sentence: float = 0.0) -> None:
+        self.text = text
+        self.pause = pause_after_first_sentence
+        self.session_manager = SimpleNamespace(get_full_history=lambda _sid: [])
+
+    async def stream_llm_response_for_debate(
+        self, **_kwargs: Any
+    ) -> AsyncGenerator[str, None]:
+        paused = False
+        for word in self.text.split(" "):
+            await asyncio.sleep(0)
+            yield word + " "
+            if not paused and word.endswith("."):
+                paused = True
+                await asyncio.sleep(self.pause)
+
+
+@pytest.fixture
+def speech_server() -> Iterator[_FakeSpeechServer]:
+    server = _FakeSpeechServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _make_service(
+    server: _FakeSpeechServer, client: httpx.AsyncClient, chat: Any, **overrides: Any
+) -> VoiceService:
+    config = VoiceServiceConfig(
+        stt_api_key="stt-test",
+        tts_api_key="tts-test",
+        tts_voice_id="voice-test",
+        stt_base_url=f"{server.base_url}/v1",
+        tts_base_url=f"{server.base_url}/v1",
+        sentence_min_chars=5,
+        **overrides,
+    )
+    return VoiceService(config=config, http_client=client, chat_service=chat)
+
+
+async def _audio_upload() -> AsyncGenerator[bytes, None]:
+    for chunk in (b"RIFF", b"fake", b"webm"):
+        yield chunk
+
+
+async def _collect(service: VoiceService, **kwargs: Any) -> List[Dict[str, Any]]:
+    return [
+        part
+        async for part in service.process_voice_interaction(
+            audio_stream=_audio_upload(), agent_name="anima", session_id="s1", **kwargs
+        )
+    ]
+
+
+def test_segmenter_cuts_on_sentence_boundaries() -> None:
+    segmenter = SentenceSegmenter(min_chars=8)
+    out: List[str] = []
+    for token in "Bonjour M. Dupont, ça va ? Oui. Très bien merci !\nEt".split(" "):
+        out += segmenter.feed(token + " ")
+
+    assert out == ["Bonjour M. Dupont, ça va ?", "Oui. Très bien merci !"]
+    assert segmenter.flush() == "Et"
+
+
+@pytest.mark.asyncio
+async def test_pipelined_audio_is_ordered_and_concurrency_bounded(
+    speech_server: _FakeSpeechServer,
+) -> None:
+    sentences = [
+        "Il était une fois un robot.",
+        "Il rêvait de chanter.",
+        "Un jour il apprit la musique.",
+        "Et il chanta pour toujours.",
+    ]
+    chat = _FakeChatService(" ".join(sentences))
+    async with httpx.AsyncClient() as client:
+        service = _make_service(speech_server, client, chat, tts_max_concurrency=2)
+        parts = await _collect(service)
+
+    texts = [p["data"] for p in parts if p["type"] == "text"]
+    audio = b"".join(p["data"] for p in parts if p["type"] == "audio")
+    assert texts == sentences
+    assert audio == b"".join(f"AUDIO[{s}]".encode() for s in sentences)
+    assert speech_server.max_in_flight <= 2
+
+    metrics = parts[-1]
+    assert metrics["type"] == "metrics"
+    assert metrics["data"]["mode"] == "pipelined"
+    assert metrics["data"]["segments"] == 4
+    assert metrics["data"]["time_to_first_audio_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_first_audio_arrives_before_llm_finishes(
+    speech_server: _FakeSpeechServer,
+) -> None:
+    chat = _FakeChatService(
+        "Première phrase prête. La suite arrive bien plus tard.",
+        pause_after_first_sentence=0.6,
+    )
+    speech_server.tts_delay = 0.01
+    async with httpx.AsyncClient() as client:
+        service = _make_service(speech_server, client, chat)
+        parts = await _collect(service)
+
+    data = parts[-1]["data"]
+    assert data["time_to_first_audio_ms"] < data["llm_ms"]
+    assert data["llm_ms"] >= 600
+
+
+@pytest.mark.asyncio
+async def test_sequential_mode_still_available(
+    speech_server: _FakeSpeechServer,
+) -> None:
+    class _DebateChat(_FakeChatService):
+        async def get_llm_response_for_debate(self, **_kwargs: Any) -> Dict[str, Any]:
+            return {"text": self.text}
+
+    chat = _DebateChat("Réponse complète en une fois.")
+    async with httpx.AsyncClient() as client:
+        service = _make_service(speech_server, client, chat)
+        parts = await _collect(service, pipelined=False)
+
+    assert [p["type"] for p in parts] == ["text", "audio", "metrics"]
+    assert parts[1]["data"] == b"AUDIO[R\xc3\xa9ponse compl\xc3\xa8te en une fois.]"
+    assert parts[2]["data"]["mode"] == "sequential"
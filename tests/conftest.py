@@ -0,0 +1,23 @@
+"""
+Fixtures communes à toute la suite.
+
+Les magasins SQLite activés par défaut écrivent sous ./data : la suite les
+redirige vers un répertoire temporaire pour ne rien laisser dans l'arbre.
+"""
+
+import pytest
+
+_DATA_PATHS = {
+    "USAGE_TELEMETRY_DB_PATH": "usage_telemetry.db",
+    "MEMORY_QUEUE_DB_PATH": "memory_queue.db",
+    "EVENT_STORE_DB_PATH": "event_store.db",
+}
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_data_paths(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("data")
+    with pytest.MonkeyPatch.context() as mp:
+        for var, filename in _DATA_PATHS.items():
+            mp.setenv(var, str(data_dir / filename))
+        yield data_dir
@@ -0,0 +1,138 @@
+"""Tests de l'analyse en streaming des logs de production (ProdGuardian)."""
+
+from __future__ import annotations
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ajouter le chemin des scripts Guardian au PYTHONPATH
+sys.path.insert(
+    0,
+    str(
+        Path(__file__).parent.parent.parent
+        / "claude-plugins"
+        / "integrity-docs-guardian"
+        / "scripts"
+    ),
+)
+
+import check_prod_logs  # noqa: E402
+
+
+def _entries() -> list[dict]:
+    entries = []
+    for i in range(40):
+        entries.append(
+            {
+                "severity": "ERROR",
+                "timestamp": f"2025-01-01T00:00:{i:02d}Z",
+                "textPayload": (
+                    f'Traceback: File "/app/backend/x.py", line {10 + i % 3}\n'
+                    f"KeyError: 'user_{i}' in request {1000 + i}"
+                ),
+            }
+        )
+        entries.append(
+            {
+                "severity": "WARNING",
+                "timestamp": f"2025-01-01T00:01:{i:02d}Z",
+                "httpRequest": {
+                    "requestMethod": "GET",
+                    "requestUrl": "https://app/wp-admin/setup.php",
+                    "status": 404,
+                },
+            }
+        )
+        entries.append(
+            {
+                "severity": "INFO",
+                "timestamp": f"2025-01-01T00:02:{i:02d}Z",
+                "jsonPayload": {"message": f"GET /api/chat HTTP/1.1 503 in {i}ms"},
+            }
+        )
+    entries.append(
+        {
+            "severity": "ERROR",
+            "textPayload": "Memory limit of 1024 MiB exceeded with 1300 MiB used",
+        }
+    )
+    return entries
+
+
+def test_stream_reader_handles_array_and_ndjson_in_small_blocks():
+    entries = _entries()
+    as_array = io.StringIO(json.dumps(entries, indent=2))
+    as_ndjson = io.StringIO("\n".join(json.dumps(e) for e in entries) + "\n")
+
+    assert list(check_prod_logs.iter_log_entries(as_array, block_chars=7)) == entries
+    assert list(check_prod_logs.iter_log_entries(as_ndjson, block_chars=13)) == entries
+
+
+def test_stream_reader_skips_corrupt_ndjson_line(capsys):
+    entries = _entries()
+    lines = [json.dumps(e) for e in entries]
+    lines.insert(len(lines) // 2, '{"severity": "ERROR", "textPayload": ')
+    stream = io.StringIO("\n".join(lines) + "\n")
+
+    assert list(check_prod_logs.iter_log_entries(stream, block_chars=13)) == entries
+    assert "Skipped 1 invalid NDJSON line" in capsys.readouterr().err
+
+
+def test_single_pass_classification(monkeypatch):
+    monkeypatch.setattr(check_prod_logs, "get_recent_commits", lambda max_commits=5: [])
+    report = check_prod_logs.analyze_logs(_entries())
+
+    assert report["logs_analyzed"] == 121
+    assert report["summary"]["errors"] == 81  # 40 tracebacks + 40 HTTP 5xx + OOM
+    assert report["summary"]["warnings"] == 0  # scans /wp-admin filtrés
+    assert report["status"] == "CRITICAL"
+    assert report["error_patterns"]["by_error_type"] == {"KeyError": 40}
+    assert report["error_patterns"]["most_common_error"] == "KeyError"
+    # Les identifiants variables sont regroupés sous une même signature
+    signatures = report["error_patterns"]["by_signature"]
+    assert max(signatures.values()) == 40
+    memory = [r for r in report["recommendations"] if r["action"] == "Increase memory limit"]
+    assert "--memory=2Gi" in memory[0]["command"]
+
+
+def test_top_k_sketch_is_bounded():
+    sketch = check_prod_logs.TopKSketch(capacity=4)
+    for i in range(1000):
+        sketch.add("hot" if i % 2 == 0 else f"cold-{i}")
+
+    assert len(sketch.counts) == 4
+    assert sketch.most_common(1)[0][0] == "hot"
+    assert sketch.total == 1000
+
+
+def test_sharded_analysis_matches_single_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(check_prod_logs, "SHARD_MIN_BYTES", 0)
+    path = tmp_path / "export.ndjson"
+    path.write_text("\n".join(json.dumps(e) for e in _entries() * 5) + "\n")
+
+    single = check_prod_logs.analyze_file(str(path), workers=1)
+    sharded = check_prod_logs.analyze_file(str(path), workers=2)
+
+    assert sharded.logs_analyzed == single.logs_analyzed == 605
+    assert sharded.counts == single.counts
+    assert sharded.patterns() == single.patterns()
+    assert sharded.log_samples == single.log_samples
+
+
+def test_cli_offline_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(check_prod_logs, "get_recent_commits", lambda max_commits=5: [])
+    export = tmp_path / "export.json"
+    export.write_text(json.dumps(_entries()[2:3]))
+    output = tmp_path / "report.json"
+
+    with pytest.raises(SystemExit) as exc:
+        check_prod_logs.main(["--input", str(export), "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert report["source"] == str(export)
+    assert report["summary"]["errors"] == 1
+    assert exc.value.code == 0